@@ -5,10 +5,12 @@ import time
 from util import generate_draft_url, is_windows_path, url_to_hash
 import re
 from typing import Optional, Dict, Tuple, List
-from pyJianYingDraft import exceptions, Audio_scene_effect_type, Tone_effect_type, Speech_to_song_type, CapCut_Voice_filters_effect_type,CapCut_Voice_characters_effect_type,CapCut_Speech_to_song_effect_type, trange
+from pyJianYingDraft import exceptions, trange
 from create_draft import get_or_create_draft
+from draft_oplog import draft_operation
 from settings.local import IS_CAPCUT_ENV
 
+@draft_operation("add_audio")
 def add_audio_track(
     audio_url: str,
     draft_folder: Optional[str] = None,
@@ -153,37 +155,20 @@ def add_audio_track(
     # Add scene sound effects
     if sound_effects:
         for effect_name, params in sound_effects:
-            # Choose different effect types based on IS_CAPCUT_ENV
-            effect_type = None
-            
+            # Choose different effect types based on IS_CAPCUT_ENV, searched in order
             if IS_CAPCUT_ENV:
-                # In CapCut environment, look for effects in CapCut_Voice_filters_effect_type
-                try:
-                    effect_type = getattr(CapCut_Voice_filters_effect_type, effect_name)
-                except AttributeError:
-                    try:
-                        # Look for effects in CapCut_Voice_characters_effect_type
-                        effect_type = getattr(CapCut_Voice_characters_effect_type, effect_name)
-                    except AttributeError:
-                        # If still not found, look for effects in CapCut_Speech_to_song_effect_type
-                        try:
-                            effect_type = getattr(CapCut_Speech_to_song_effect_type, effect_name)
-                        except AttributeError:
-                            effect_type = None
+                effect_enums = (draft.CapCut_Voice_filters_effect_type, draft.CapCut_Voice_characters_effect_type,
+                                draft.CapCut_Speech_to_song_effect_type)
             else:
-                # In JianYing environment, look for effects in Audio_scene_effect_type
+                effect_enums = (draft.Audio_scene_effect_type, draft.Tone_effect_type, draft.Speech_to_song_type)
+
+            effect_type = None
+            for effect_enum in effect_enums:
                 try:
-                    effect_type = getattr(Audio_scene_effect_type, effect_name)
-                except AttributeError:
-                    # If not found in Audio_scene_effect_type, continue searching in other effect types
-                    try:
-                        effect_type = getattr(Tone_effect_type, effect_name)
-                    except AttributeError:
-                        # If still not found, look for effects in Speech_to_song_type
-                        try:
-                            effect_type = getattr(Speech_to_song_type, effect_name)
-                        except AttributeError:
-                            effect_type = None
+                    effect_type = effect_enum.from_name(effect_name)
+                    break
+                except ValueError:
+                    continue
             
             # If corresponding effect type is found, add it to the audio segment
             if effect_type:
@@ -1,10 +1,12 @@
-from pyJianYingDraft import trange, Video_scene_effect_type, Video_character_effect_type, CapCut_Video_scene_effect_type, CapCut_Video_character_effect_type, exceptions
+from pyJianYingDraft import trange, exceptions
 import pyJianYingDraft as draft
 from typing import Optional, Dict, List, Union
 from create_draft import get_or_create_draft
+from draft_oplog import draft_operation
 from util import generate_draft_url
 from settings import IS_CAPCUT_ENV
 
+@draft_operation("add_effect")
 def add_effect_impl(
     effect_type: str,  # Changed to string type
     start: float = 0,
@@ -38,20 +40,25 @@ def add_effect_impl(
     duration = end - start
     t_range = trange(f"{start}s", f"{duration}s")
 
-    # Dynamically get effect type object
+    # Dynamically get effect type object, scene effects first, then character effects
     if IS_CAPCUT_ENV:
         # If in CapCut environment, use CapCut effects
-        effect_enum = CapCut_Video_scene_effect_type[effect_type]
-        if effect_enum is None:
-            effect_enum = CapCut_Video_character_effect_type[effect_type]
+        effect_enums = (draft.CapCut_Video_scene_effect_type, draft.CapCut_Video_character_effect_type)
     else:
         # Default to using JianYing effects
-        effect_enum = Video_scene_effect_type[effect_type]
-        if effect_enum is None:
-            effect_enum = Video_character_effect_type[effect_type]
-    
+        effect_enums = (draft.Video_scene_effect_type, draft.Video_character_effect_type)
+
+    effect_enum = None
+    for enum_class in effect_enums:
+        try:
+            effect_enum = enum_class.from_name(effect_type)
+            break
+        except ValueError:
+            continue
+
     if effect_enum is None:
-        raise ValueError(f"Unknown effect type: {effect_type}")
+        suggestions = [name for enum_class in effect_enums for name in enum_class.suggest(effect_type)]
+        raise ValueError(f"Unknown effect type: {effect_type}, similar effects: {suggestions}")
 
     # Add effect track (only when track doesn't exist)
     if track_name is not None:
@@ -9,7 +9,9 @@ import re
 from typing import Optional, Dict
 from pyJianYingDraft import exceptions
 from create_draft import get_or_create_draft
+from draft_oplog import draft_operation
 
+@draft_operation("add_image")
 def add_image_impl(
     image_url: str,
     draft_folder: Optional[str] = None,
@@ -161,55 +163,55 @@ def add_image_impl(
     if intro_anim:
         try:
             if IS_CAPCUT_ENV:
-                animation_type = getattr(draft.CapCut_Intro_type, intro_anim)
+                animation_type = draft.CapCut_Intro_type.from_name(intro_anim)
             else:
-                animation_type = getattr(draft.Intro_type, intro_anim)
-            image_segment.add_animation(animation_type, intro_animation_duration * 1e6)  # Use microsecond unit for animation duration
-        except AttributeError:
-            raise ValueError(f"Warning: Unsupported entrance animation type {intro_anim}, this parameter will be ignored")
+                animation_type = draft.Intro_type.from_name(intro_anim)
+        except ValueError as e:
+            raise ValueError(f"Warning: Unsupported entrance animation type {intro_anim}, this parameter will be ignored ({e})")
+        image_segment.add_animation(animation_type, intro_animation_duration * 1e6)  # Use microsecond unit for animation duration
     
     # Add exit animation
     if outro_animation:
         try:
             if IS_CAPCUT_ENV:
-                outro_type = getattr(draft.CapCut_Outro_type, outro_animation)
+                outro_type = draft.CapCut_Outro_type.from_name(outro_animation)
             else:
-                outro_type = getattr(draft.Outro_type, outro_animation)
-            image_segment.add_animation(outro_type, outro_animation_duration * 1e6)  # Use microsecond unit for animation duration
-        except AttributeError:
-            raise ValueError(f"Warning: Unsupported exit animation type {outro_animation}, this parameter will be ignored")
+                outro_type = draft.Outro_type.from_name(outro_animation)
+        except ValueError as e:
+            raise ValueError(f"Warning: Unsupported exit animation type {outro_animation}, this parameter will be ignored ({e})")
+        image_segment.add_animation(outro_type, outro_animation_duration * 1e6)  # Use microsecond unit for animation duration
     
     # Add combo animation
     if combo_animation:
         try:
             if IS_CAPCUT_ENV:
-                combo_type = getattr(draft.CapCut_Group_animation_type, combo_animation)
+                combo_type = draft.CapCut_Group_animation_type.from_name(combo_animation)
             else:
-                combo_type = getattr(draft.Group_animation_type, combo_animation)
-            image_segment.add_animation(combo_type, combo_animation_duration * 1e6)  # Use microsecond unit for animation duration
-        except AttributeError:
-            raise ValueError(f"Warning: Unsupported combo animation type {combo_animation}, this parameter will be ignored")
+                combo_type = draft.Group_animation_type.from_name(combo_animation)
+        except ValueError as e:
+            raise ValueError(f"Warning: Unsupported combo animation type {combo_animation}, this parameter will be ignored ({e})")
+        image_segment.add_animation(combo_type, combo_animation_duration * 1e6)  # Use microsecond unit for animation duration
     
     # Add transition effect
     if transition:
         try:
             if IS_CAPCUT_ENV:
-                transition_type = getattr(draft.CapCut_Transition_type, transition)
+                transition_type = draft.CapCut_Transition_type.from_name(transition)
             else:
-                transition_type = getattr(draft.Transition_type, transition)
-            # Convert seconds to microseconds (multiply by 1000000)
-            duration_microseconds = int(transition_duration * 1000000) if transition_duration is not None else None
-            image_segment.add_transition(transition_type, duration=duration_microseconds)
-        except AttributeError:
-            raise ValueError(f"Warning: Unsupported transition type {transition}, this parameter will be ignored")
+                transition_type = draft.Transition_type.from_name(transition)
+        except ValueError as e:
+            raise ValueError(f"Warning: Unsupported transition type {transition}, this parameter will be ignored ({e})")
+        # Convert seconds to microseconds (multiply by 1000000)
+        duration_microseconds = int(transition_duration * 1000000) if transition_duration is not None else None
+        image_segment.add_transition(transition_type, duration=duration_microseconds)
     
     # Add mask effect
     if mask_type:
         try:
             if IS_CAPCUT_ENV:
-                mask_type_enum = getattr(draft.CapCut_Mask_type, mask_type)
+                mask_type_enum = draft.CapCut_Mask_type.from_name(mask_type)
             else:
-                mask_type_enum = getattr(draft.Mask_type, mask_type)
+                mask_type_enum = draft.Mask_type.from_name(mask_type)
             image_segment.add_mask(
                 script,
                 mask_type_enum,  # Remove keyword name, pass as positional argument
@@ -3,8 +3,10 @@ from pyJianYingDraft import trange
 from typing import Optional, Dict
 from pyJianYingDraft import exceptions
 from create_draft import get_or_create_draft
+from draft_oplog import draft_operation
 from util import generate_draft_url
 
+@draft_operation("add_sticker")
 def add_sticker_impl(
     resource_id: str,
     start: float,
@@ -1,11 +1,18 @@
 import pyJianYingDraft as draft
 from util import generate_draft_url, hex_to_rgb
 from create_draft import get_or_create_draft
+from draft_oplog import draft_operation
 from pyJianYingDraft.text_segment import TextBubble, TextEffect
 from typing import Optional
 import requests
 import os
 
+def _is_inline_srt(params):
+    """Subtitles loaded from a URL or local file are not replayed from the log, since the source may change or disappear"""
+    srt_path = params.get('srt_path', '')
+    return not (srt_path.startswith(('http://', 'https://')) or os.path.isfile(srt_path))
+
+@draft_operation("add_subtitle", replayable=_is_inline_srt)
 def add_subtitle_impl(
     srt_path: str,
     draft_id: str = None,
@@ -49,14 +56,14 @@ def add_subtitle_impl(
 ):
     """
     Add subtitles to draft
-    :param srt_path: Subtitle file path or URL or SRT text content
+    :param srt_path: Subtitle file path or URL or SRT/WebVTT text content
     :param draft_id: Draft ID, if None, create a new draft
     :param track_name: Track name, default is "subtitle"
     :param time_offset: Time offset, default is "0"s
     :param text_style: Text style, default is None
     :param clip_settings: Clip settings, default is None
     :param style_reference: Style reference, default is None
-    :return: Draft information
+    :return: Draft information, number of imported cues and per-cue errors
     """
     # Get or create draft
     draft_id, script = get_or_create_draft(
@@ -149,7 +156,7 @@ def add_subtitle_impl(
         rotation=rotation
     )
 
-    script.import_srt(
+    import_result = script.import_subtitles(
         srt_content,
         track_name=track_name,
         time_offset=int(time_offset * 1000000),  # Convert seconds to microseconds
@@ -163,7 +170,12 @@ def add_subtitle_impl(
         effect=text_effect
     )
 
-    return {
+    result = {
         "draft_id": draft_id,
-        "draft_url": generate_draft_url(draft_id)
+        "draft_url": generate_draft_url(draft_id),
+        "imported_count": import_result.imported
     }
+    # Cues that could not be parsed or overlap existing subtitles are skipped and reported
+    if import_result.errors:
+        result["errors"] = [{"line": error.line, "message": error.message} for error in import_result.errors]
+    return result
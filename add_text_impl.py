@@ -1,12 +1,14 @@
 import pyJianYingDraft as draft
 from settings.local import IS_CAPCUT_ENV
 from util import generate_draft_url, hex_to_rgb
-from pyJianYingDraft import trange, Font_type
+from pyJianYingDraft import trange
 from typing import Optional, List  # add List type hint
 from pyJianYingDraft import exceptions
 from create_draft import get_or_create_draft
+from draft_oplog import draft_operation
 from pyJianYingDraft.text_segment import TextBubble, TextEffect, TextStyleRange
 
+@draft_operation("add_text")
 def add_text_impl(
     text: str,
     start: float,
@@ -103,10 +105,9 @@ def add_text_impl(
     """
     # Validate if font is in Font_type
     try:
-        font_type = getattr(Font_type, font)
-    except:
-        available_fonts = [attr for attr in dir(Font_type) if not attr.startswith('_')]
-        raise ValueError(f"Unsupported font: {font}, please use one of the fonts in Font_type: {available_fonts}")
+        font_type = draft.Font_type.from_name(font)
+    except ValueError:
+        raise ValueError(f"Unsupported font: {font}, similar fonts in Font_type: {draft.Font_type.suggest(font)}")
     
     # Validate alpha value range
     if not 0.0 <= font_alpha <= 1.0:
@@ -238,9 +239,9 @@ def add_text_impl(
     if intro_animation:
         try:
             if IS_CAPCUT_ENV:
-                animation_type = getattr(draft.CapCut_Text_intro, intro_animation)
+                animation_type = draft.CapCut_Text_intro.from_name(intro_animation)
             else:
-                animation_type = getattr(draft.Text_intro, intro_animation)
+                animation_type = draft.Text_intro.from_name(intro_animation)
             # Convert seconds to microseconds
             duration_microseconds = int(intro_duration * 1000000)
             text_segment.add_animation(animation_type, duration_microseconds)  # Add intro animation, set duration
@@ -251,9 +252,9 @@ def add_text_impl(
     if outro_animation:
         try:
             if IS_CAPCUT_ENV:
-                animation_type = getattr(draft.CapCut_Text_outro, outro_animation)
+                animation_type = draft.CapCut_Text_outro.from_name(outro_animation)
             else:
-                animation_type = getattr(draft.Text_outro, outro_animation)
+                animation_type = draft.Text_outro.from_name(outro_animation)
             # Convert seconds to microseconds
             duration_microseconds = int(outro_duration * 1000000)
             text_segment.add_animation(animation_type, duration_microseconds)  # Add outro animation, set duration
@@ -1,10 +1,12 @@
 import pyJianYingDraft as draft
 from pyJianYingDraft import exceptions
 from create_draft import get_or_create_draft
+from draft_oplog import draft_operation
 from typing import Optional, Dict, List
 
 from util import generate_draft_url
 
+@draft_operation("add_video_keyframe")
 def add_video_keyframe_impl(
     draft_id: Optional[str] = None,
     track_name: str = "main",
@@ -13,7 +15,8 @@ def add_video_keyframe_impl(
     value: str = "1.0",
     property_types: Optional[List[str]] = None,
     times: Optional[List[float]] = None,
-    values: Optional[List[str]] = None
+    values: Optional[List[str]] = None,
+    curves: Optional[Dict[str, Dict[str, list]]] = None
 ) -> Dict[str, str]:
     """
     Add keyframes to the specified segment
@@ -43,6 +46,9 @@ def add_video_keyframe_impl(
     :param times: Batch mode: List of keyframe time points (seconds), e.g. [0.0, 1.0, 2.0]
     :param values: Batch mode: List of keyframe values, e.g. ["1.0", "0.5", "45deg"]
     Note: property_types, times, values must be provided together and have equal lengths. If these parameters are provided, single keyframe parameters will be ignored
+    :param curves: Curve mode: a whole keyframe curve per property, e.g. {"alpha": {"times": [0.0, 0.04, ...], "values": [1.0, 0.98, ...]}},
+        values may be numbers or strings in the formats above. Can be combined with batch mode; if provided, single keyframe parameters will be ignored
+    Note: keyframes are grouped by segment and property and added to each segment's keyframe list in one pass; a keyframe at an existing time replaces its value
     :return: Updated draft information
     """
     # Get or create draft
@@ -60,6 +66,7 @@ def add_video_keyframe_impl(
             raise Exception(f"No segments in track {track_name}")
         
         # Determine the keyframes list to process
+        keyframes_to_process = []
         if property_types is not None or times is not None or values is not None:
             # Batch mode: use three array parameters
             if property_types is None or times is None or values is None:
@@ -74,15 +81,35 @@ def add_video_keyframe_impl(
             if not (len(property_types) == len(times) == len(values)):
                 raise Exception(f"property_types, times, values must have equal lengths, current lengths are: {len(property_types)}, {len(times)}, {len(values)}")
             
-            keyframes_to_process = [
+            keyframes_to_process.extend(
                 {
                     "property_type": prop_type,
                     "time": t,
                     "value": val
                 }
                 for prop_type, t, val in zip(property_types, times, values)
-            ]
-        else:
+            )
+
+        if curves is not None:
+            # Curve mode: one array of times and values per property
+            if not isinstance(curves, dict) or len(curves) == 0:
+                raise Exception("curves must be a non-empty object mapping property types to curves")
+
+            for prop_type, curve in curves.items():
+                if not isinstance(curve, dict) or not isinstance(curve.get("times"), list) or not isinstance(curve.get("values"), list):
+                    raise Exception(f"Curve of {prop_type} must contain times and values lists")
+                if len(curve["times"]) != len(curve["values"]):
+                    raise Exception(f"times and values of curve {prop_type} must have equal lengths, current lengths are: {len(curve['times'])}, {len(curve['values'])}")
+                keyframes_to_process.extend(
+                    {
+                        "property_type": prop_type,
+                        "time": t,
+                        "value": val
+                    }
+                    for t, val in zip(curve["times"], curve["values"])
+                )
+
+        if property_types is None and curves is None:
             # Single mode: use original parameters
             keyframes_to_process = [{
                 "property_type": property_type,
@@ -92,20 +119,26 @@ def add_video_keyframe_impl(
         
         # Process each keyframe
         added_count = 0
+        pending_count = len(track.pending_keyframes)
         for i, kf in enumerate(keyframes_to_process):
             try:
                 _add_single_keyframe(track, kf["property_type"], kf["time"], kf["value"])
                 added_count += 1
             except Exception as e:
+                # Discard the keyframes queued by this call so that none of them is applied later
+                del track.pending_keyframes[pending_count:]
                 raise Exception(f"Failed to add keyframe #{i+1} (property_type={kf['property_type']}, time={kf['time']}, value={kf['value']}): {str(e)}")
+
+        # Apply the keyframes to segments, grouped by segment and property
+        track.process_pending_keyframes()
         
         result = {
             "draft_id": draft_id,
             "draft_url": generate_draft_url(draft_id)
         }
         
-        # If in batch mode, return the number of added keyframes
-        if property_types is not None:
+        # If in batch or curve mode, return the number of added keyframes
+        if property_types is not None or curves is not None:
             result["added_keyframes_count"] = added_count
         
         return result
@@ -127,6 +160,8 @@ def _add_single_keyframe(track, property_type: str, time: float, value: str):
         raise Exception(f"Unsupported keyframe property type: {property_type}")
         
     # Parse value based on property type
+    if not isinstance(value, str):
+        value = str(value)
     try:
         if property_type in ['position_x', 'position_y']:
             # Handle position, range [0,1]
@@ -8,7 +8,9 @@ import re
 from typing import Optional, Dict
 from pyJianYingDraft import exceptions
 from create_draft import get_or_create_draft
+from draft_oplog import draft_operation
 
+@draft_operation("add_video")
 def add_video_track(
     video_url: str,
     draft_folder: Optional[str] = None,
@@ -177,25 +179,25 @@ def add_video_track(
         try:
             # Get transition type
             if IS_CAPCUT_ENV:
-                transition_type = getattr(draft.CapCut_Transition_type, transition)
+                transition_type = draft.CapCut_Transition_type.from_name(transition)
             else:
-                transition_type = getattr(draft.Transition_type, transition)
-            
-            # Set transition duration (convert to microseconds)
-            duration_microseconds = int(transition_duration * 1e6)
-            
-            # Add transition
-            video_segment.add_transition(transition_type, duration=duration_microseconds)
-        except AttributeError:
-            raise ValueError(f"Unsupported transition type: {transition}, transition setting skipped")
+                transition_type = draft.Transition_type.from_name(transition)
+        except ValueError as e:
+            raise ValueError(f"Unsupported transition type: {transition}, transition setting skipped ({e})")
+
+        # Set transition duration (convert to microseconds)
+        duration_microseconds = int(transition_duration * 1e6)
+
+        # Add transition
+        video_segment.add_transition(transition_type, duration=duration_microseconds)
     
     # Add mask effect
     if mask_type:
         try:
             if IS_CAPCUT_ENV:
-                mask_type_enum = getattr(draft.CapCut_Mask_type, mask_type)
+                mask_type_enum = draft.CapCut_Mask_type.from_name(mask_type)
             else:
-                mask_type_enum = getattr(draft.Mask_type, mask_type)
+                mask_type_enum = draft.Mask_type.from_name(mask_type)
             video_segment.add_mask(
                 script,
                 mask_type_enum,
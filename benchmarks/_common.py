@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试公共函数: 构造指定规模的草稿以及计时工具
+"""
+
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyJianYingDraft as draft
+from pyJianYingDraft import Clip_settings, Keyframe_property, SEC
+
+
+def build_draft(segment_count: int, keyframes_per_segment: int = 2) -> draft.Script_file:
+    """构造一个包含视频、文本片段的草稿, 视频片段与文本片段各占一半
+
+    :param segment_count: 片段总数
+    :param keyframes_per_segment: 每个视频片段的关键帧数量
+    :return: Script_file对象
+    """
+    script = draft.Script_file(1080, 1920)
+    script.add_track(draft.Track_type.video)
+    script.add_track(draft.Track_type.text)
+
+    video_count = segment_count // 2
+    for i in range(video_count):
+        material = draft.Video_material(material_type='video', remote_url=f"https://example.com/video_{i % 20}.mp4",
+                                        material_name=f"video_{i % 20}.mp4", duration=SEC * 5, width=1920, height=1080)
+        segment = draft.Video_segment(material, draft.Timerange(i * SEC, SEC),
+                                      source_timerange=draft.Timerange(0, SEC), speed=1.0,
+                                      clip_settings=Clip_settings(transform_y=-0.1))
+        for k in range(keyframes_per_segment):
+            segment.add_keyframe(Keyframe_property.alpha, k * SEC // max(keyframes_per_segment, 1), 1.0 - k * 0.1)
+        script.add_segment(segment)
+
+    for i in range(segment_count - video_count):
+        segment = draft.Text_segment(f"字幕 {i}", draft.Timerange(i * SEC, SEC),
+                                     clip_settings=Clip_settings(transform_y=-0.8))
+        script.add_segment(segment)
+
+    return script
+
+
+def measure(func, repeat: int = 5) -> float:
+    """多次运行并返回最短耗时（毫秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿内存占用基准测试
+构造5000个片段的草稿, 统计构建后及从快照加载后（即草稿缓存中）平均每个片段占用的内存、快照大小以及快照读写耗时.
+每个仓库目录在单独的子进程中测试, 可传入其他版本的检出目录进行对比
+
+用法: python benchmarks/bench_draft_memory.py [仓库目录 ...]
+      如: git worktree add /tmp/before <提交> && python benchmarks/bench_draft_memory.py /tmp/before .
+"""
+
+import gc
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SEGMENT_COUNT = 5000
+KEYFRAMES_PER_SEGMENT = 4
+
+
+def _allocated(func):
+    """返回func执行后新增的内存（字节）及其返回值"""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] - before, result
+
+
+def child(repo_dir: str) -> None:
+    # 先导入待测仓库的pyJianYingDraft, _common中的导入会直接使用已加载的模块
+    sys.path.insert(0, repo_dir)
+    import pyJianYingDraft  # noqa: F401
+    sys.path.insert(0, BENCH_DIR)
+    from _common import build_draft, measure
+
+    tracemalloc.start()
+    built_bytes, script = _allocated(lambda: build_draft(SEGMENT_COUNT, KEYFRAMES_PER_SEGMENT))
+    data = pickle.dumps(script, protocol=pickle.HIGHEST_PROTOCOL)
+    del script
+    loaded_bytes, script = _allocated(lambda: pickle.loads(data))
+    tracemalloc.stop()
+
+    dumps_ms = measure(lambda: pickle.dumps(script, protocol=pickle.HIGHEST_PROTOCOL))
+    loads_ms = measure(lambda: pickle.loads(data))
+
+    print(json.dumps({"built": built_bytes / SEGMENT_COUNT, "loaded": loaded_bytes / SEGMENT_COUNT,
+                      "pickled": len(data) / SEGMENT_COUNT, "dumps_ms": dumps_ms, "loads_ms": loads_ms}))
+
+
+def main(repo_dirs):
+    print(f"{SEGMENT_COUNT} 个片段, 每个视频片段 {KEYFRAMES_PER_SEGMENT} 个关键帧")
+    print(f"{'仓库':<24} | {'构建(B/片段)':>12} | {'加载(B/片段)':>12} | {'快照(B/片段)':>12} | {'写快照(ms)':>10} | {'读快照(ms)':>10}")
+    print("-" * 98)
+    for repo_dir in repo_dirs:
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", os.path.abspath(repo_dir)],
+                                capture_output=True, text=True, check=True)
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        name = os.path.basename(os.path.abspath(repo_dir))
+        print(f"{name:<24} | {stats['built']:>12.0f} | {stats['loaded']:>12.0f} | {stats['pickled']:>12.0f} | "
+              f"{stats['dumps_ms']:>10.1f} | {stats['loads_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        child(sys.argv[2])
+    else:
+        main(sys.argv[1:] or [os.path.dirname(BENCH_DIR)])
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿快照格式基准测试
+对比旧版base64 pickle与当前压缩二进制快照在不同草稿规模下的体积与序列化/反序列化耗时
+
+用法: python benchmarks/bench_draft_snapshot.py
+"""
+
+import base64
+import pickle
+
+from _common import build_draft, measure
+
+from draft_cache import serialize_script, deserialize_script
+
+
+def legacy_serialize(script):
+    return base64.b64encode(pickle.dumps(script)).decode('utf-8')
+
+
+def legacy_deserialize(script_data):
+    return pickle.loads(base64.b64decode(script_data.encode('utf-8')))
+
+
+def main():
+    print(f"{'片段数':>6} | {'格式':<8} | {'体积(KB)':>10} | {'保存(ms)':>9} | {'加载(ms)':>9}")
+    print("-" * 56)
+    for segment_count in (10, 100, 1000):
+        script = build_draft(segment_count)
+
+        legacy_data = legacy_serialize(script)
+        snapshot_data = serialize_script(script)
+        assert len(deserialize_script(snapshot_data).tracks["video"].segments) == segment_count // 2
+
+        rows = [
+            ("pickle", len(legacy_data), measure(lambda: legacy_serialize(script)),
+             measure(lambda: legacy_deserialize(legacy_data))),
+            ("snapshot", len(snapshot_data), measure(lambda: serialize_script(script)),
+             measure(lambda: deserialize_script(snapshot_data))),
+        ]
+        for name, size, save_ms, load_ms in rows:
+            print(f"{segment_count:>6} | {name:<8} | {size / 1024:>10.1f} | {save_ms:>9.2f} | {load_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+特效名称查找基准测试
+对所有元数据枚举, 对比逐个成员比较的旧from_name与名称索引的查找吞吐量（按忽略大小写的名称查找）
+
+用法: python benchmarks/bench_effect_lookup.py
+"""
+
+import random
+
+from _common import measure
+
+from pyJianYingDraft import metadata
+from pyJianYingDraft.metadata.effect_meta import Effect_enum
+
+
+def legacy_from_name(enum_class, name):
+    """旧实现: 每次查找都规范化并遍历全部成员"""
+    name = name.lower().replace(" ", "").replace("_", "")
+    for effect in enum_class:
+        if effect.name.lower().replace(" ", "").replace("_", "") == name:
+            return effect
+    raise ValueError(f"Effect named '{name}' not found")
+
+
+def main():
+    enum_classes = [getattr(metadata, name) for name in metadata.__all__]
+    enum_classes = [cls for cls in enum_classes if isinstance(cls, type) and issubclass(cls, Effect_enum)]
+
+    rng = random.Random(0)
+    queries = []
+    for enum_class in enum_classes:
+        for member in rng.sample(list(enum_class), min(50, len(enum_class))):
+            queries.append((enum_class, member.name.upper()))
+    rng.shuffle(queries)
+
+    # 首次查找时构建索引, 单独计时
+    build_ms = measure(lambda: [enum_class._name_index() for enum_class in enum_classes], repeat=1)
+    members = sum(len(enum_class.__members__) for enum_class in enum_classes)
+    print(f"{len(enum_classes)} 个枚举, {members} 个成员, 构建索引 {build_ms:.1f} ms")
+
+    print(f"{'实现':<8} | {'耗时(ms)':>9} | {'每秒查找次数':>14}")
+    print("-" * 38)
+    for name, lookup in (("legacy", legacy_from_name), ("indexed", lambda cls, n: cls.from_name(n))):
+        def run():
+            for enum_class, query in queries:
+                lookup(enum_class, query)
+
+        elapsed_ms = measure(run, repeat=3)
+        print(f"{name:<8} | {elapsed_ms:>9.1f} | {len(queries) / elapsed_ms * 1000:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字幕导入基准测试
+对比逐行拼接解析、逐条复制样式并调用add_segment的旧导入流程与批量导入import_subtitles的耗时
+
+用法: python benchmarks/bench_import_subtitles.py
+"""
+
+from copy import deepcopy
+
+from _common import measure
+
+import pyJianYingDraft as draft
+from pyJianYingDraft import SEC, Timerange
+from pyJianYingDraft.text_segment import TextBubble, TextEffect
+from pyJianYingDraft.time_util import srt_tstamp
+
+
+def make_srt(count: int) -> str:
+    def stamp(us):
+        ms = us // 1000
+        return "%02d:%02d:%02d,%03d" % (ms // 3600000, ms // 60000 % 60, ms // 1000 % 60, ms % 1000)
+
+    blocks = []
+    for i in range(count):
+        blocks.append(f"{i + 1}\n{stamp(i * 2 * SEC)} --> {stamp(i * 2 * SEC + int(1.5 * SEC))}\n第 {i} 条字幕\n第二行")
+    return "\n\n".join(blocks) + "\n"
+
+
+def legacy_import(script: draft.Script_file, content: str, track_name: str, bubble, effect) -> None:
+    """旧流程: 逐行拼接文本, 每条字幕复制一次样式/气泡/花字并单独加入轨道"""
+    script.add_track(draft.Track_type.text, track_name)
+    text_style = draft.Text_style(size=5, align=1)
+    clip_settings = draft.Clip_settings(transform_y=-0.8)
+
+    def add(text, t_range):
+        seg = draft.Text_segment(text, t_range, style=text_style, clip_settings=clip_settings, fixed_width=648)
+        seg.bubble = deepcopy(bubble)
+        seg.effect = deepcopy(effect)
+        script.add_segment(seg, track_name)
+
+    text, state, t_range = "", "index", None
+    for line in content.splitlines():
+        line = line.strip()
+        if state == "index":
+            if line:
+                state = "timestamp"
+        elif state == "timestamp":
+            start_str, end_str = line.split(" --> ")
+            start, end = srt_tstamp(start_str), srt_tstamp(end_str)
+            t_range, state = Timerange(start, end - start), "content"
+        elif not line:
+            add(text.strip(), t_range)
+            text, state = "", "index"
+        else:
+            text += line + "\n"
+    if text:
+        add(text.strip(), t_range)
+
+
+def main():
+    bubble = TextBubble("bubble_effect", "bubble_resource")
+    effect = TextEffect("text_effect", "text_effect")
+    print(f"{'字幕条数':>8} | {'旧流程(ms)':>10} | {'批量导入(ms)':>12}")
+    print("-" * 38)
+    for count in (2000, 10000):
+        content = make_srt(count)
+        legacy_ms = measure(lambda: legacy_import(draft.Script_file(1080, 1920), content, "subtitle", bubble, effect), repeat=3)
+        bulk_ms = measure(lambda: draft.Script_file(1080, 1920).import_subtitles(content, "subtitle", bubble=bubble, effect=effect), repeat=3)
+        print(f"{count:>8} | {legacy_ms:>10.1f} | {bulk_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
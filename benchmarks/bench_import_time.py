@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导入耗时基准测试
+在新的解释器中分别计时: 导入pyJianYingDraft、导入后再加载全部元数据枚举（即原先导入时的行为）、冷启动导入capcut_server
+
+用法: python benchmarks/bench_import_time.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = (
+    ("pyJianYingDraft", "import pyJianYingDraft"),
+    ("pyJianYingDraft+全部枚举", "import pyJianYingDraft as draft\n"
+                                "[getattr(draft.metadata, name) for name in draft.metadata.__all__]"),
+    ("capcut_server", "import capcut_server"),
+)
+
+
+def time_import(code: str, cwd: str) -> float:
+    """在子进程中执行code, 返回耗时（ms）"""
+    script = ("import sys, time\n"
+              f"sys.path.insert(0, {REPO_DIR!r})\n"
+              "start = time.perf_counter()\n"
+              f"{code}\n"
+              "print((time.perf_counter() - start) * 1000)\n")
+    result = subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main(repeat: int = 5):
+    # capcut_server导入时会在当前目录创建日志和数据库, 在临时目录中运行
+    with tempfile.TemporaryDirectory(prefix="capcut_import_") as cwd:
+        os.makedirs(os.path.join(cwd, "logs"))
+        print(f"{'导入':<24} | {'最短耗时(ms)':>12}")
+        print("-" * 40)
+        for name, code in CASES:
+            elapsed_ms = min(time_import(code, cwd) for _ in range(repeat))
+            print(f"{name:<24} | {elapsed_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
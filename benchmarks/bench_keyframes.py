@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键帧添加基准测试
+构造运动跟踪产生的密集关键帧曲线, 对比每次添加后整体排序的旧实现、二分插入的add_keyframe与批量添加的add_keyframes,
+以及通过轨道待处理关键帧分组批量应用的耗时
+
+用法: python benchmarks/bench_keyframes.py
+"""
+
+import random
+
+from _common import measure
+
+import pyJianYingDraft as draft
+from pyJianYingDraft import SEC, Timerange, Keyframe_property
+from pyJianYingDraft.keyframe import Keyframe, Keyframe_list
+from pyJianYingDraft.track import Track
+
+KEYFRAME_COUNT = 5000
+FRAME = SEC // 30
+
+
+def legacy_add_keyframe(kf_list: Keyframe_list, time_offset: int, value: float) -> None:
+    """旧实现: 追加后对整个列表重新排序"""
+    kf_list.keyframes.append(Keyframe(time_offset, value))
+    kf_list.keyframes.sort(key=lambda x: x.time_offset)
+
+
+def add_one_by_one(add, offsets, values) -> Keyframe_list:
+    kf_list = Keyframe_list(Keyframe_property.position_x)
+    for offset, value in zip(offsets, values):
+        add(kf_list, offset, value)
+    return kf_list
+
+
+def add_bulk(offsets, values) -> Keyframe_list:
+    kf_list = Keyframe_list(Keyframe_property.position_x)
+    kf_list.add_keyframes(offsets, values)
+    return kf_list
+
+
+def apply_pending(offsets, values) -> None:
+    track = Track(draft.Track_type.video, "video", 0, False)
+    material = draft.Video_material(material_type='photo', remote_url="https://example.com/a.png", material_name="a.png")
+    track.add_segment(draft.Video_segment(material, Timerange(0, KEYFRAME_COUNT * FRAME)))
+    for offset, value in zip(offsets, values):
+        track.add_pending_keyframe("position_x", offset / SEC, str(value))
+    track.process_pending_keyframes()
+
+
+def main():
+    rng = random.Random(0)
+    offsets = [i * FRAME for i in range(KEYFRAME_COUNT)]
+    values = [rng.uniform(-1, 1) for _ in offsets]
+    shuffled = list(zip(offsets, values))
+    rng.shuffle(shuffled)
+    shuffled_offsets, shuffled_values = [offset for offset, _ in shuffled], [value for _, value in shuffled]
+
+    print(f"每条曲线 {KEYFRAME_COUNT} 个关键帧")
+    print(f"{'实现':<24} | {'顺序(ms)':>10} | {'乱序(ms)':>10}")
+    print("-" * 52)
+    cases = (
+        ("legacy append+sort", lambda o, v: add_one_by_one(legacy_add_keyframe, o, v)),
+        ("add_keyframe (bisect)", lambda o, v: add_one_by_one(Keyframe_list.add_keyframe, o, v)),
+        ("add_keyframes (bulk)", add_bulk),
+    )
+    for name, func in cases:
+        in_order_ms = measure(lambda: func(offsets, values), repeat=3)
+        shuffled_ms = measure(lambda: func(shuffled_offsets, shuffled_values), repeat=3)
+        print(f"{name:<24} | {in_order_ms:>10.1f} | {shuffled_ms:>10.1f}")
+
+    pending_ms = measure(lambda: apply_pending(offsets, values), repeat=3)
+    print(f"{'pending (grouped)':<24} | {pending_ms:>10.1f} |")
+
+
+if __name__ == "__main__":
+    main()
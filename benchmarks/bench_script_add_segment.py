@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+片段添加基准测试
+向草稿添加带特效与滤镜的视频片段及字幕, 对比每次重新收集ID列表判断素材是否存在的旧实现与按ID索引的耗时
+
+用法: python benchmarks/bench_script_add_segment.py
+"""
+
+from _common import measure
+
+import pyJianYingDraft as draft
+from pyJianYingDraft import SEC, Timerange
+from pyJianYingDraft.script_file import Script_material
+
+SEGMENT_COUNT = 4000
+
+
+class Legacy_script_material(Script_material):
+    """旧实现: 每次判断都遍历素材列表收集ID"""
+
+    def add(self, item) -> bool:
+        list_name, id_attr = self._kind_of(item)
+        items = getattr(self, list_name)
+        if getattr(item, id_attr) in [getattr(existing, id_attr) for existing in items]:
+            return False
+        items.append(item)
+        return True
+
+
+def build(material_class) -> draft.Script_file:
+    script = draft.Script_file(1080, 1920)
+    script.materials = material_class()
+    script.add_track(draft.Track_type.video)
+    script.add_track(draft.Track_type.text)
+    effect_type = list(draft.CapCut_Video_scene_effect_type)[0]
+    filter_type = list(draft.Filter_type)[0]
+    for i in range(SEGMENT_COUNT // 2):
+        material = draft.Video_material(material_type='video', remote_url=f"https://example.com/video_{i}.mp4",
+                                        material_name=f"video_{i}.mp4", duration=SEC * 5, width=1920, height=1080)
+        segment = draft.Video_segment(material, Timerange(i * SEC, SEC))
+        segment.add_effect(effect_type)
+        segment.add_filter(filter_type)
+        script.add_segment(segment)
+        script.add_segment(draft.Text_segment(f"字幕 {i}", Timerange(i * SEC, SEC)))
+    return script
+
+
+def main():
+    print(f"{SEGMENT_COUNT} 个片段（视频片段各带一个特效和滤镜）")
+    print(f"{'实现':<8} | {'耗时(ms)':>9}")
+    print("-" * 22)
+    for name, material_class in (("legacy", Legacy_script_material), ("indexed", Script_material)):
+        print(f"{name:<8} | {measure(lambda: build(material_class), repeat=1):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
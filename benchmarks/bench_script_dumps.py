@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿导出基准测试
+对比旧的缩进格式json.dumps导出与紧凑格式(标准库json / orjson)导出2000个片段草稿的耗时及输出大小
+
+用法: python benchmarks/bench_script_dumps.py
+"""
+
+import json
+from unittest import mock
+
+from _common import build_draft, measure
+
+from pyJianYingDraft import script_file
+
+
+def legacy_dumps(script):
+    """旧实现: 导出后以indent=4序列化"""
+    return json.dumps(script.export_content(), ensure_ascii=False, indent=4).encode('utf-8')
+
+
+def json_dumps(script):
+    with mock.patch.object(script_file, "orjson", None):
+        return script.dumps_bytes()
+
+
+def main():
+    script = build_draft(2000)
+    implementations = [("legacy", legacy_dumps), ("json", json_dumps)]
+    if script_file.orjson is not None:
+        implementations.append(("orjson", lambda s: s.dumps_bytes()))
+
+    export_ms = measure(script.export_content, repeat=5)
+    print(f"构建导出字典: {export_ms:.1f} ms")
+    print(f"{'实现':<8} | {'耗时(ms)':>9} | {'大小(KB)':>9}")
+    print("-" * 34)
+    for name, func in implementations:
+        elapsed_ms = measure(lambda: func(script), repeat=5)
+        print(f"{name:<8} | {elapsed_ms:>9.1f} | {len(func(script)) / 1024:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿创建基准测试
+对比每次读取并解析draft_content_template.json与使用缓存模板时Script_file的创建吞吐量
+
+用法: python benchmarks/bench_script_file_create.py
+"""
+
+import json
+import os
+
+from _common import measure
+
+import pyJianYingDraft as draft
+from pyJianYingDraft import Script_file
+
+
+class Legacy_script_file(Script_file):
+    """每次创建时从磁盘读取模板的旧实现"""
+
+    @classmethod
+    def _new_template_content(cls):
+        with open(os.path.join(os.path.dirname(draft.__file__), cls.TEMPLATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def main():
+    count = 10000
+    print(f"{'实现':<8} | {'总耗时(ms)':>10} | {'每个(us)':>9} | {'每分钟可创建':>12}")
+    print("-" * 50)
+    for name, cls in (("legacy", Legacy_script_file), ("cached", Script_file)):
+        def create():
+            for _ in range(count):
+                cls(1080, 1920)
+
+        elapsed_ms = measure(create, repeat=3)
+        per_draft_us = elapsed_ms * 1000 / count
+        print(f"{name:<8} | {elapsed_ms:>10.1f} | {per_draft_us:>9.1f} | {60e6 / per_draft_us:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轨道片段插入与查找基准测试
+构造10000条字幕的文本轨道, 对比逐个检查重叠的旧实现与按起始时间二分查找的插入耗时, 以及按时刻查找片段的耗时
+
+用法: python benchmarks/bench_track_segments.py
+"""
+
+import random
+
+from _common import measure
+
+import pyJianYingDraft as draft
+from pyJianYingDraft import SEC, Timerange
+from pyJianYingDraft.exceptions import SegmentOverlap
+from pyJianYingDraft.track import Track
+
+SEGMENT_COUNT = 10000
+
+
+def legacy_add_segment(track: Track, segment) -> None:
+    """旧实现: 与全部已有片段比较后追加到末尾"""
+    for seg in track.segments:
+        if seg.overlaps(segment):
+            raise SegmentOverlap("New segment overlaps with existing segment")
+    track.segments.append(segment)
+
+
+def legacy_segment_at(track: Track, time: int):
+    return next((seg for seg in track.segments
+                 if seg.target_timerange.start <= time <= seg.target_timerange.end), None)
+
+
+def main():
+    segments = [draft.Text_segment(f"字幕 {i}", Timerange(i * SEC, SEC // 2)) for i in range(SEGMENT_COUNT)]
+    shuffled = segments[:]
+    random.Random(0).shuffle(shuffled)
+    queries = [random.Random(1).randrange(SEGMENT_COUNT * SEC) for _ in range(1000)]
+
+    def build(add, order):
+        track = Track(draft.Track_type.text, "text", 15000, False)
+        for segment in order:
+            add(track, segment)
+        return track
+
+    print(f"{SEGMENT_COUNT} 条字幕")
+    print(f"{'实现':<8} | {'顺序插入(ms)':>12} | {'乱序插入(ms)':>12} | {'1000次按时刻查找(ms)':>20}")
+    print("-" * 64)
+    for name, add, lookup in (("legacy", legacy_add_segment, legacy_segment_at),
+                              ("indexed", Track.add_segment, Track.segment_at)):
+        in_order_ms = measure(lambda: build(add, segments), repeat=1)
+        shuffled_ms = measure(lambda: build(add, shuffled), repeat=1)
+        track = build(add, segments)
+        lookup_ms = measure(lambda: [lookup(track, time) for time in queries], repeat=3)
+        print(f"{name:<8} | {in_order_ms:>12.1f} | {shuffled_ms:>12.1f} | {lookup_ms:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,12 +18,12 @@ CapCutAPI Server - 剪映草稿生成和管理API服务
 
 # ===== 标准库导入 =====
 import os
+import io
 import json
 import time
 import uuid
 import codecs
 import random
-import sqlite3
 import html
 from datetime import datetime
 from urllib.parse import quote
@@ -35,48 +35,36 @@ from flask import Flask, request, jsonify, Response, render_template, redirect
 
 # ===== pyJianYingDraft 相关导入 =====
 import pyJianYingDraft as draft
-from pyJianYingDraft.metadata.animation_meta import Intro_type, Outro_type, Group_animation_type
-from pyJianYingDraft.metadata.capcut_animation_meta import CapCut_Intro_type, CapCut_Outro_type, CapCut_Group_animation_type
-from pyJianYingDraft.metadata.transition_meta import Transition_type
-from pyJianYingDraft.metadata.capcut_transition_meta import CapCut_Transition_type
-from pyJianYingDraft.metadata.mask_meta import Mask_type
-from pyJianYingDraft.metadata.capcut_mask_meta import CapCut_Mask_type
-from pyJianYingDraft.metadata.audio_effect_meta import Tone_effect_type, Audio_scene_effect_type, Speech_to_song_type
-from pyJianYingDraft.metadata.capcut_audio_effect_meta import CapCut_Voice_filters_effect_type, CapCut_Voice_characters_effect_type, CapCut_Speech_to_song_effect_type
-from pyJianYingDraft.metadata.font_meta import Font_type
-from pyJianYingDraft.metadata.animation_meta import Text_intro, Text_outro, Text_loop_anim
-from pyJianYingDraft.metadata.capcut_text_animation_meta import CapCut_Text_intro, CapCut_Text_outro, CapCut_Text_loop_anim
-from pyJianYingDraft.metadata.video_effect_meta import Video_scene_effect_type, Video_character_effect_type
-from pyJianYingDraft.metadata.capcut_effect_meta import CapCut_Video_scene_effect_type, CapCut_Video_character_effect_type
 from add_audio_track import add_audio_track
 from add_video_track import add_video_track
 from add_text_impl import add_text_impl
 from add_subtitle_impl import add_subtitle_impl
 from add_image_impl import add_image_impl
 from add_video_keyframe_impl import add_video_keyframe_impl
-from save_draft_impl import save_draft_impl, query_task_status, query_script_impl
+from save_draft_impl import save_draft_impl, query_task_status, query_script_impl, get_export_script, resolve_draft_folder, write_draft_package, start_save_workers
+from draft_packager import stream_zip
+from draft_template import preload_templates
 from os_path_config import get_os_path_config
 from add_effect_impl import add_effect_impl
 from add_sticker_impl import add_sticker_impl
 from create_draft import create_draft, get_or_create_draft
+from draft_oplog import get_history as get_draft_history, undo as undo_draft_operations
+from draft_cache import get_cache_stats, draft_lock, is_dirty, flush_draft
+from media_store import get_media_store_stats
+from catalog import get_catalog, get_all_catalogs, CATALOG_MAX_AGE
 from util import generate_draft_url as utilgenerate_draft_url, hex_to_rgb, normalize_path_by_os
 from pyJianYingDraft.text_segment import TextStyleRange, Text_style, Text_border
 
 from settings.local import IS_CAPCUT_ENV, DRAFT_DOMAIN, PREVIEW_ROUTER, PORT, IS_UPLOAD_DRAFT
-from oss import get_signed_draft_url_if_exists
+from oss import get_signed_draft_url_if_exists, _ensure_bucket, upload_stream
 from customize_zip import get_customized_signed_url
 
 # OSS mirror support
 import uuid as _uuid
-import oss2 as _oss2
-from settings.local import OSS_CONFIG as _OSS_CONFIG
 
 def _ensure_bucket_v4():
-    auth = _oss2.AuthV4(_OSS_CONFIG['access_key_id'], _OSS_CONFIG['access_key_secret'])
-    endpoint = _OSS_CONFIG['endpoint']
-    if not str(endpoint).startswith('http'):
-        endpoint = 'https://' + endpoint
-    return _oss2.Bucket(auth, endpoint, _OSS_CONFIG['bucket_name'], region=_OSS_CONFIG['region'])
+    # 复用oss模块中缓存的Bucket, 不再每次请求重新创建认证对象和连接
+    return _ensure_bucket()
 
 from database import init_db
 
@@ -94,6 +82,10 @@ logging.basicConfig(
 logger = logging.getLogger('capcutapi')
 
 init_db()
+# 启动时将草稿模板读入内存, 保存草稿时不再复制和解析模板目录
+preload_templates()
+# 启动保存任务工作线程, 继续执行上次退出时未完成的保存任务
+start_save_workers()
 
 # ===== 全局变量和配置 =====
 draft_materials_cache = {}
@@ -149,7 +141,7 @@ def add_material_to_cache(draft_id, material_info):
     except Exception as e:
         print(f'持久化素材到数据库失败: {e}')
 
-from database import get_draft_materials as get_draft_materials_from_db, add_material_to_db, get_all_drafts
+from database import get_draft_materials as get_draft_materials_from_db, add_material_to_db, add_materials_to_db, get_all_drafts
 
 def get_draft_materials(draft_id):
     """获取草稿素材信息 - 优先从缓存获取，然后从数据库获取，最后扫描文件系统"""
@@ -207,12 +199,11 @@ def _create_material_info(draft_id, filename, file_path):
         return None
 
 def _save_materials_to_db(draft_id, materials):
-    """将素材信息保存到数据库"""
-    for material in materials:
-        try:
-            add_material_to_db(draft_id, material)
-        except Exception as e:
-            print(f"保存素材到数据库失败: {e}")
+    """将素材信息在一个事务中批量保存到数据库"""
+    try:
+        add_materials_to_db(draft_id, [(material['id'], material) for material in materials])
+    except Exception as e:
+        print(f"保存素材到数据库失败: {e}")
 
 # ===== HTML模板生成函数 =====
 
@@ -457,68 +448,79 @@ def index():
     # 返回HTML欢迎页面
     return generate_index_html()
 
+def _add_video_params(data):
+    """
+    解析/add_video的请求参数, /batch_edit中的add_video操作同样使用
+    :return: (add_video_track的调用参数, 记录到素材缓存的信息), 参数无效时抛出ValueError
+    """
+    # 验证必需参数
+    video_url = data.get('video_url')
+    if not video_url:
+        raise ValueError("缺少必需参数 'video_url'")
+        
+    # 拒绝未解析的占位符
+    if isinstance(video_url, str) and ('{{' in video_url or '}}' in video_url):
+        raise ValueError(f"video_url 是占位符，未替换为真实地址。请在调用前先生成实际URL。")
+    
+    # 获取参数
+    params = {
+        'draft_folder': data.get('draft_folder'),
+        'video_url': video_url,
+        'start': data.get('start', 0),
+        'end': data.get('end', 0),
+        'width': data.get('width', 1080),
+        'height': data.get('height', 1920),
+        'draft_id': data.get('draft_id'),
+        'transform_y': data.get('transform_y', 0),
+        'scale_x': data.get('scale_x', 1),
+        'scale_y': data.get('scale_y', 1),
+        'transform_x': data.get('transform_x', 0),
+        'speed': data.get('speed', 1.0),
+        'target_start': data.get('target_start', 0),
+        'track_name': data.get('track_name', "video_main"),
+        'relative_index': data.get('relative_index', 0),
+        'duration': data.get('duration'),
+        'transition': data.get('transition'),
+        'transition_duration': data.get('transition_duration', 0.5),
+        'volume': data.get('volume', 1.0),
+            # 遮罩相关参数
+        'mask_type': data.get('mask_type'),
+        'mask_center_x': data.get('mask_center_x', 0.5),
+        'mask_center_y': data.get('mask_center_y', 0.5),
+        'mask_size': data.get('mask_size', 1.0),
+        'mask_rotation': data.get('mask_rotation', 0.0),
+        'mask_feather': data.get('mask_feather', 0.0),
+        'mask_invert': data.get('mask_invert', False),
+        'mask_rect_width': data.get('mask_rect_width'),
+        'mask_round_corner': data.get('mask_round_corner'),
+        'background_blur': data.get('background_blur')
+    }
+    
+    # 素材信息
+    material_info = {
+        "type": "video",
+        "url": video_url,
+        "start": params['start'],
+        "end": params['end'],
+        "duration": params['end'] - params['start'] if params['end'] > params['start'] else None,
+        "track_name": params['track_name'],
+        "added_at": datetime.now().isoformat()
+    }
+    return params, material_info
+
 @app.route('/add_video', methods=['POST'])
 def add_video():
     """添加视频素材到草稿"""
     try:
-        data = request.get_json()
-        
-        # 验证必需参数
-        video_url = data.get('video_url')
-        if not video_url:
-            return handle_api_error("缺少必需参数 'video_url'")
-            
-        # 拒绝未解析的占位符
-        if isinstance(video_url, str) and ('{{' in video_url or '}}' in video_url):
-            return handle_api_error(f"video_url 是占位符，未替换为真实地址。请在调用前先生成实际URL。", video_url)
-        
-        # 获取参数
-        params = {
-            'draft_folder': data.get('draft_folder'),
-            'video_url': video_url,
-            'start': data.get('start', 0),
-            'end': data.get('end', 0),
-            'width': data.get('width', 1080),
-            'height': data.get('height', 1920),
-            'draft_id': data.get('draft_id'),
-            'transform_y': data.get('transform_y', 0),
-            'scale_x': data.get('scale_x', 1),
-            'scale_y': data.get('scale_y', 1),
-            'transform_x': data.get('transform_x', 0),
-            'speed': data.get('speed', 1.0),
-            'target_start': data.get('target_start', 0),
-            'track_name': data.get('track_name', "video_main"),
-            'relative_index': data.get('relative_index', 0),
-            'duration': data.get('duration'),
-            'transition': data.get('transition'),
-            'transition_duration': data.get('transition_duration', 0.5),
-            'volume': data.get('volume', 1.0),
-            # 遮罩相关参数
-            'mask_type': data.get('mask_type'),
-            'mask_center_x': data.get('mask_center_x', 0.5),
-            'mask_center_y': data.get('mask_center_y', 0.5),
-            'mask_size': data.get('mask_size', 1.0),
-            'mask_rotation': data.get('mask_rotation', 0.0),
-            'mask_feather': data.get('mask_feather', 0.0),
-            'mask_invert': data.get('mask_invert', False),
-            'mask_rect_width': data.get('mask_rect_width'),
-            'mask_round_corner': data.get('mask_round_corner'),
-            'background_blur': data.get('background_blur')
-        }
-        
+        params, material_info = _add_video_params(request.get_json())
+    except (ValueError, TypeError) as e:
+        return handle_api_error(str(e))
+
+    try:
         # 调用业务逻辑
         draft_result = add_video_track(**params)
         
         # 记录素材信息到缓存
-        material_info = {
-            "type": "video",
-            "url": video_url,
-            "start": params['start'],
-            "end": params['end'],
-            "duration": params['end'] - params['start'] if params['end'] > params['start'] else None,
-            "track_name": params['track_name'],
-            "added_at": datetime.now().isoformat()
-        }
         add_material_to_cache(params['draft_id'], material_info)
         
         return jsonify(create_standard_response(success=True, output=draft_result))
@@ -526,60 +528,69 @@ def add_video():
     except Exception as e:
         return handle_api_error(f"处理视频时发生错误: {str(e)}", e)
 
+def _add_audio_params(data):
+    """
+    解析/add_audio的请求参数, /batch_edit中的add_audio操作同样使用
+    :return: (add_audio_track的调用参数, 记录到素材缓存的信息), 参数无效时抛出ValueError
+    """
+    # 验证必需参数
+    audio_url = data.get('audio_url')
+    if not audio_url:
+        raise ValueError("缺少必需参数 'audio_url'")
+    
+    # 拒绝未解析的占位符
+    if isinstance(audio_url, str) and ('{{' in audio_url or '}}' in audio_url):
+        raise ValueError(f"audio_url 是占位符，未替换为真实地址。请在调用前先生成实际URL。")
+    
+    # 获取参数
+    params = {
+        'draft_folder': data.get('draft_folder'),
+        'audio_url': audio_url,
+        'start': data.get('start', 0),
+        'end': data.get('end', None),
+        'target_start': data.get('target_start', 0),
+        'draft_id': data.get('draft_id'),
+        'volume': data.get('volume', 1.0),
+        'track_name': data.get('track_name', 'audio_main'),
+        'speed': data.get('speed', 1.0),
+        'width': data.get('width', 1080),
+        'height': data.get('height', 1920),
+        'duration': data.get('duration', None),
+        'client_os': data.get('client_os', 'windows')  # 添加客户端操作系统参数，默认为windows
+    }
+    
+    # 处理音频效果参数
+    effect_type = data.get('effect_type')
+    if effect_type:
+        effect_params = data.get('effect_params')
+        params['sound_effects'] = [(effect_type, effect_params)]
+    
+    # 素材信息
+    material_info = {
+        "type": "audio",
+        "url": audio_url,
+        "start": params['start'],
+        "end": params['end'],
+        "duration": (params['end'] - params['start']) if params['end'] and params['end'] > params['start'] else None,
+        "track_name": params['track_name'],
+        "volume": params['volume'],
+        "added_at": datetime.now().isoformat()
+    }
+    return params, material_info
+
 @app.route('/add_audio', methods=['POST'])
 def add_audio():
     """添加音频素材到草稿"""
     try:
-        data = request.get_json()
-        
-        # 验证必需参数
-        audio_url = data.get('audio_url')
-        if not audio_url:
-            return handle_api_error("缺少必需参数 'audio_url'")
-        
-        # 拒绝未解析的占位符
-        if isinstance(audio_url, str) and ('{{' in audio_url or '}}' in audio_url):
-            return handle_api_error(f"audio_url 是占位符，未替换为真实地址。请在调用前先生成实际URL。", audio_url)
-        
-        # 获取参数
-        params = {
-            'draft_folder': data.get('draft_folder'),
-            'audio_url': audio_url,
-            'start': data.get('start', 0),
-            'end': data.get('end', None),
-            'target_start': data.get('target_start', 0),
-            'draft_id': data.get('draft_id'),
-            'volume': data.get('volume', 1.0),
-            'track_name': data.get('track_name', 'audio_main'),
-            'speed': data.get('speed', 1.0),
-            'width': data.get('width', 1080),
-            'height': data.get('height', 1920),
-            'duration': data.get('duration', None),
-            'client_os': data.get('client_os', 'windows')  # 添加客户端操作系统参数，默认为windows
-        }
-        
-        # 处理音频效果参数
-        sound_effects = None
-        effect_type = data.get('effect_type')
-        if effect_type:
-            effect_params = data.get('effect_params')
-            sound_effects = [(effect_type, effect_params)]
-            params['sound_effects'] = sound_effects
-        
+        params, material_info = _add_audio_params(request.get_json())
+    except (ValueError, TypeError) as e:
+        return handle_api_error(str(e))
+
+    try:
         # 调用业务逻辑
         draft_result = add_audio_track(**params)
         
         # 记录素材信息到缓存
-        material_info = {
-            "type": "audio",
-            "url": audio_url,
-            "start": params['start'],
-            "end": params['end'],
-            "duration": (params['end'] - params['start']) if params['end'] and params['end'] > params['start'] else None,
-            "track_name": params['track_name'],
-            "volume": params['volume'],
-            "added_at": datetime.now().isoformat()
-        }
         add_material_to_cache(params['draft_id'], material_info)
         
         return jsonify(create_standard_response(success=True, output=draft_result))
@@ -626,50 +637,59 @@ def create_draft_service():
     except Exception as e:
         return handle_api_error(f"创建草稿时发生错误: {str(e)}", e)
         
+def _add_subtitle_params(data):
+    """
+    解析/add_subtitle的请求参数, /batch_edit中的add_subtitle操作同样使用
+    :return: (add_subtitle_impl的调用参数, None), 参数无效时抛出ValueError
+    """
+    # 验证必需参数
+    srt = data.get('srt')
+    if not srt:
+        raise ValueError("缺少必需参数 'srt'")
+    
+    # 获取参数
+    params = {
+        'srt_path': srt,
+        'draft_id': data.get('draft_id'),
+        'track_name': data.get('track_name', 'subtitle'),
+        'time_offset': data.get('time_offset', 0.0),
+        # 字体样式参数
+        'font': data.get('font'),
+        'font_size': data.get('font_size', 5.0),
+        'bold': data.get('bold', False),
+        'italic': data.get('italic', False),
+        'underline': data.get('underline', False),
+        'font_color': data.get('font_color', '#FFFFFF'),
+        'vertical': data.get('vertical', False),
+        'alpha': data.get('alpha', 1),
+        # 边框参数
+        'border_alpha': data.get('border_alpha', 1.0),
+        'border_color': data.get('border_color', '#000000'),
+        'border_width': data.get('border_width', 0.0),
+        # 背景参数
+        'background_color': data.get('background_color', '#000000'),
+        'background_style': data.get('background_style', 0),
+        'background_alpha': data.get('background_alpha', 0.0),
+        # 位置调整参数
+        'transform_x': data.get('transform_x', 0.0),
+        'transform_y': data.get('transform_y', -0.8),
+        'scale_x': data.get('scale_x', 1.0),
+        'scale_y': data.get('scale_y', 1.0),
+        'rotation': data.get('rotation', 0.0),
+        'width': data.get('width', 1080),
+        'height': data.get('height', 1920)
+    }
+    return params, None
+
 @app.route('/add_subtitle', methods=['POST'])
 def add_subtitle():
     """添加字幕到草稿"""
     try:
-        data = request.get_json()
-        
-        # 验证必需参数
-        srt = data.get('srt')
-        if not srt:
-            return handle_api_error("缺少必需参数 'srt'")
-        
-        # 获取参数
-        params = {
-            'srt_path': srt,
-            'draft_id': data.get('draft_id'),
-            'track_name': data.get('track_name', 'subtitle'),
-            'time_offset': data.get('time_offset', 0.0),
-            # 字体样式参数
-            'font': data.get('font'),
-            'font_size': data.get('font_size', 5.0),
-            'bold': data.get('bold', False),
-            'italic': data.get('italic', False),
-            'underline': data.get('underline', False),
-            'font_color': data.get('font_color', '#FFFFFF'),
-            'vertical': data.get('vertical', False),
-            'alpha': data.get('alpha', 1),
-            # 边框参数
-            'border_alpha': data.get('border_alpha', 1.0),
-            'border_color': data.get('border_color', '#000000'),
-            'border_width': data.get('border_width', 0.0),
-            # 背景参数
-            'background_color': data.get('background_color', '#000000'),
-            'background_style': data.get('background_style', 0),
-            'background_alpha': data.get('background_alpha', 0.0),
-            # 位置调整参数
-            'transform_x': data.get('transform_x', 0.0),
-            'transform_y': data.get('transform_y', -0.8),
-            'scale_x': data.get('scale_x', 1.0),
-            'scale_y': data.get('scale_y', 1.0),
-            'rotation': data.get('rotation', 0.0),
-            'width': data.get('width', 1080),
-            'height': data.get('height', 1920)
-        }
-        
+        params, _ = _add_subtitle_params(request.get_json())
+    except (ValueError, TypeError) as e:
+        return handle_api_error(str(e))
+
+    try:
         # 调用业务逻辑
         draft_result = add_subtitle_impl(**params)
         
@@ -678,10 +698,11 @@ def add_subtitle():
     except Exception as e:
         return handle_api_error(f"处理字幕时发生错误: {str(e)}", e)
 
-@app.route('/add_text', methods=['POST'])
-def add_text():
-    data = request.get_json()
-    
+def _add_text_params(data):
+    """
+    解析/add_text的请求参数, /batch_edit中的add_text操作同样使用
+    :return: (add_text_impl的调用参数, 记录到素材缓存的信息), 参数无效时抛出ValueError
+    """
     # Get required parameters
     text = data.get('text')
     start = data.get('start', 0)
@@ -784,81 +805,92 @@ def add_text():
             
             text_styles.append(style_range)
 
+    # Validate required parameters
+    if not text or start is None or end is None:
+        raise ValueError("Hi, the required parameters 'text', 'start' or 'end' are missing. ")
+
+    params = dict(
+        text=text,
+        start=start,
+        end=end,
+        draft_id=draft_id,
+        transform_y=transform_y,
+        transform_x=transform_x,
+        font=font,
+        font_color=font_color,
+        font_size=font_size,
+        track_name=track_name,
+        vertical=vertical,
+        font_alpha=font_alpha,
+        border_alpha=border_alpha,
+        border_color=border_color,
+        border_width=border_width,
+        background_color=background_color,
+        background_style=background_style,
+        background_alpha=background_alpha,
+        background_round_radius=background_round_radius,
+        background_height=background_height,
+        background_width=background_width,
+        background_horizontal_offset=background_horizontal_offset,
+        background_vertical_offset=background_vertical_offset,
+        shadow_enabled=shadow_enabled,
+        shadow_alpha=shadow_alpha,
+        shadow_angle=shadow_angle,
+        shadow_color=shadow_color,
+        shadow_distance=shadow_distance,
+        shadow_smoothing=shadow_smoothing,
+        bubble_effect_id=bubble_effect_id,
+        bubble_resource_id=bubble_resource_id,
+        effect_effect_id=effect_effect_id,
+        intro_animation=intro_animation,
+        intro_duration=intro_duration,
+        outro_animation=outro_animation,
+        outro_duration=outro_duration,
+        width=width,
+        height=height,
+        fixed_width=fixed_width,
+        fixed_height=fixed_height,
+        text_styles=text_styles
+    )
+
+    # 素材信息
+    material_info = {
+        "type": "text",
+        "content": text,
+        "start": start,
+        "end": end,
+        "duration": end - start if end > start else None,
+        "track_name": track_name,
+        "font": font,
+        "font_size": font_size,
+        "added_at": datetime.now().isoformat()
+    }
+    return params, material_info
+
+@app.route('/add_text', methods=['POST'])
+def add_text():
     result = {
         "success": False,
         "output": "",
         "error": ""
     }
 
-    # Validate required parameters
-    if not text or start is None or end is None:
-        error_message = "Hi, the required parameters 'text', 'start' or 'end' are missing. "
-        result["error"] = error_message
+    try:
+        params, material_info = _add_text_params(request.get_json())
+    except (ValueError, TypeError) as e:
+        result["error"] = str(e)
         return jsonify(result)
 
     try:
         
         # Call add_text_impl method
-        draft_result = add_text_impl(
-            text=text,
-            start=start,
-            end=end,
-            draft_id=draft_id,
-            transform_y=transform_y,
-            transform_x=transform_x,
-            font=font,
-            font_color=font_color,
-            font_size=font_size,
-            track_name=track_name,
-            vertical=vertical,
-            font_alpha=font_alpha,
-            border_alpha=border_alpha,
-            border_color=border_color,
-            border_width=border_width,
-            background_color=background_color,
-            background_style=background_style,
-            background_alpha=background_alpha,
-            background_round_radius=background_round_radius,
-            background_height=background_height,
-            background_width=background_width,
-            background_horizontal_offset=background_horizontal_offset,
-            background_vertical_offset=background_vertical_offset,
-            shadow_enabled=shadow_enabled,
-            shadow_alpha=shadow_alpha,
-            shadow_angle=shadow_angle,
-            shadow_color=shadow_color,
-            shadow_distance=shadow_distance,
-            shadow_smoothing=shadow_smoothing,
-            bubble_effect_id=bubble_effect_id,
-            bubble_resource_id=bubble_resource_id,
-            effect_effect_id=effect_effect_id,
-            intro_animation=intro_animation,
-            intro_duration=intro_duration,
-            outro_animation=outro_animation,
-            outro_duration=outro_duration,
-            width=width,
-            height=height,
-            fixed_width=fixed_width,
-            fixed_height=fixed_height,
-            text_styles=text_styles
-        )
+        draft_result = add_text_impl(**params)
         
         result["success"] = True
         result["output"] = draft_result
         
         # 记录素材信息到缓存
-        material_info = {
-            "type": "text",
-            "content": text,
-            "start": start,
-            "end": end,
-            "duration": end - start if end > start else None,
-            "track_name": track_name,
-            "font": font,
-            "font_size": font_size,
-            "added_at": datetime.now().isoformat()
-        }
-        add_material_to_cache(draft_id, material_info)
+        add_material_to_cache(params['draft_id'], material_info)
         
         return jsonify(result)
 
@@ -867,17 +899,18 @@ def add_text():
         result["error"] = error_message
         return jsonify(result)
 
-@app.route('/add_image', methods=['POST'])
-def add_image():
-    data = request.get_json()
-    
+def _add_image_params(data):
+    """
+    解析/add_image的请求参数, /batch_edit中的add_image操作同样使用
+    :return: (add_image_impl的调用参数, 记录到素材缓存的信息), 参数无效时抛出ValueError
+    """
     # Get required parameters
     draft_folder = data.get('draft_folder')
     image_url = data.get('image_url')
     
     # Guard: reject unresolved placeholders
     if isinstance(image_url, str) and ('{{' in image_url or '}}' in image_url):
-        return jsonify({"success": False, "error": "image_url 是占位符，未替换为真实地址。请在调用前先生成实际URL。", "hint": image_url})
+        raise ValueError("image_url 是占位符，未替换为真实地址。请在调用前先生成实际URL。")
     width = data.get('width', 1080)
     height = data.get('height', 1920)
     start = data.get('start', 0)
@@ -922,70 +955,84 @@ def add_image():
 
     background_blur = data.get('background_blur')  # Background blur level, optional values: 1 (light), 2 (medium), 3 (strong), 4 (maximum), default None (no background blur)
 
+    # Validate required parameters
+    if not image_url:
+        raise ValueError("Hi, the required parameters 'image_url' are missing.")
+
+    params = dict(
+        draft_folder=draft_folder,
+        image_url=image_url,
+        width=width,
+        height=height,
+        start=start,
+        end=end,
+        draft_id=draft_id,
+        transform_y=transform_y,
+        scale_x=scale_x,
+        scale_y=scale_y,
+        transform_x=transform_x,
+        track_name=track_name,
+        relative_index=relative_index,  # Pass track rendering order index parameter
+        animation=animation,  # Pass entrance animation parameter (backward compatibility)
+        animation_duration=animation_duration,  # Pass entrance animation duration
+        intro_animation=intro_animation,  # Pass new entrance animation parameter
+        intro_animation_duration=intro_animation_duration,
+        outro_animation=outro_animation,  # Pass exit animation parameter
+        outro_animation_duration=outro_animation_duration,  # Pass exit animation duration
+        combo_animation=combo_animation,  # Pass combo animation parameter
+        combo_animation_duration=combo_animation_duration,  # Pass combo animation duration
+        transition=transition,  # Pass transition type parameter
+        transition_duration=transition_duration,  # Pass transition duration parameter (seconds)
+        # Pass mask related parameters
+        mask_type=mask_type,
+        mask_center_x=mask_center_x,
+        mask_center_y=mask_center_y,
+        mask_size=mask_size,
+        mask_rotation=mask_rotation,
+        mask_feather=mask_feather,
+        mask_invert=mask_invert,
+        mask_rect_width=mask_rect_width,
+        mask_round_corner=mask_round_corner,
+        background_blur=background_blur
+    )
+
+    # 素材信息
+    material_info = {
+        "type": "image",
+        "url": image_url,
+        "start": start,
+        "end": end,
+        "duration": end - start if end > start else None,
+        "track_name": track_name,
+        "added_at": datetime.now().isoformat()
+    }
+    return params, material_info
+
+@app.route('/add_image', methods=['POST'])
+def add_image():
     result = {
         "success": False,
         "output": "",
         "error": ""
     }
 
-    # Validate required parameters
-    if not image_url:
-        error_message = "Hi, the required parameters 'image_url' are missing."
-        result["error"] = error_message
+    data = request.get_json()
+    try:
+        params, material_info = _add_image_params(data)
+    except (ValueError, TypeError) as e:
+        result["error"] = str(e)
+        if data.get('image_url'):
+            result["hint"] = data['image_url']
         return jsonify(result)
 
     try:
-        draft_result = add_image_impl(
-            draft_folder=draft_folder,
-            image_url=image_url,
-            width=width,
-            height=height,
-            start=start,
-            end=end,
-            draft_id=draft_id,
-            transform_y=transform_y,
-            scale_x=scale_x,
-            scale_y=scale_y,
-            transform_x=transform_x,
-            track_name=track_name,
-            relative_index=relative_index,  # Pass track rendering order index parameter
-            animation=animation,  # Pass entrance animation parameter (backward compatibility)
-            animation_duration=animation_duration,  # Pass entrance animation duration
-            intro_animation=intro_animation,  # Pass new entrance animation parameter
-            intro_animation_duration=intro_animation_duration,
-            outro_animation=outro_animation,  # Pass exit animation parameter
-            outro_animation_duration=outro_animation_duration,  # Pass exit animation duration
-            combo_animation=combo_animation,  # Pass combo animation parameter
-            combo_animation_duration=combo_animation_duration,  # Pass combo animation duration
-            transition=transition,  # Pass transition type parameter
-            transition_duration=transition_duration,  # Pass transition duration parameter (seconds)
-            # Pass mask related parameters
-            mask_type=mask_type,
-            mask_center_x=mask_center_x,
-            mask_center_y=mask_center_y,
-            mask_size=mask_size,
-            mask_rotation=mask_rotation,
-            mask_feather=mask_feather,
-            mask_invert=mask_invert,
-            mask_rect_width=mask_rect_width,
-            mask_round_corner=mask_round_corner,
-            background_blur=background_blur
-        )
+        draft_result = add_image_impl(**params)
         
         result["success"] = True
         result["output"] = draft_result
         
         # 记录素材信息到缓存
-        material_info = {
-            "type": "image",
-            "url": image_url,
-            "start": start,
-            "end": end,
-            "duration": end - start if end > start else None,
-            "track_name": track_name,
-            "added_at": datetime.now().isoformat()
-        }
-        add_material_to_cache(draft_id, material_info)
+        add_material_to_cache(params['draft_id'], material_info)
         
         return jsonify(result)
 
@@ -994,10 +1041,11 @@ def add_image():
         result["error"] = error_message
         return jsonify(result)
 
-@app.route('/add_video_keyframe', methods=['POST'])
-def add_video_keyframe():
-    data = request.get_json()
-    
+def _add_video_keyframe_params(data):
+    """
+    解析/add_video_keyframe的请求参数, /batch_edit中的add_video_keyframe操作同样使用
+    :return: (add_video_keyframe_impl的调用参数, None), 参数无效时抛出ValueError
+    """
     # Get required parameters
     draft_id = data.get('draft_id')
     track_name = data.get('track_name', 'video_main')  # Default main track
@@ -1012,24 +1060,39 @@ def add_video_keyframe():
     times = data.get('times')  # Time list
     values = data.get('values')  # Value list
 
+    # Curve parameters: {property_type: {"times": [...], "values": [...]}}
+    curves = data.get('curves')
+
+    params = dict(
+        draft_id=draft_id,
+        track_name=track_name,
+        property_type=property_type,
+        time=time,
+        value=value,
+        property_types=property_types,
+        times=times,
+        values=values,
+        curves=curves
+    )
+    return params, None
+
+@app.route('/add_video_keyframe', methods=['POST'])
+def add_video_keyframe():
     result = {
         "success": False,
         "output": "",
         "error": ""
     }
 
+    try:
+        params, _ = _add_video_keyframe_params(request.get_json())
+    except (ValueError, TypeError) as e:
+        result["error"] = str(e)
+        return jsonify(result)
+
     try:
         # Call add_video_keyframe_impl method
-        draft_result = add_video_keyframe_impl(
-            draft_id=draft_id,
-            track_name=track_name,
-            property_type=property_type,
-            time=time,
-            value=value,
-            property_types=property_types,
-            times=times,
-            values=values
-        )
+        draft_result = add_video_keyframe_impl(**params)
         
         result["success"] = True
         result["output"] = draft_result
@@ -1040,44 +1103,54 @@ def add_video_keyframe():
         result["error"] = error_message
         return jsonify(result)
 
-@app.route('/add_effect', methods=['POST'])
-def add_effect():
-    data = request.get_json()
-    
+def _add_effect_params(data):
+    """
+    解析/add_effect的请求参数, /batch_edit中的add_effect操作同样使用
+    :return: (add_effect_impl的调用参数, None), 参数无效时抛出ValueError
+    """
     # Get required parameters
     effect_type = data.get('effect_type')  # Effect type name, will match from Video_scene_effect_type or Video_character_effect_type
     start = data.get('start', 0)  # Start time (seconds), default 0
     end = data.get('end', 3.0)  # End time (seconds), default 3 seconds
     draft_id = data.get('draft_id')  # Draft ID, if None or corresponding zip file not found, create new draft
     track_name = data.get('track_name', "effect_01")  # Track name, can be omitted when there is only one effect track
-    params = data.get('params')  # Effect parameter list, items not provided or None in parameter list use default values
+    effect_params = data.get('params')  # Effect parameter list, items not provided or None in parameter list use default values
     width = data.get('width', 1080)
     height = data.get('height', 1920)
 
+    # Validate required parameters
+    if not effect_type:
+        raise ValueError("Hi, the required parameters 'effect_type' are missing. Please add them and try again.")
+
+    params = dict(
+        effect_type=effect_type,
+        start=start,
+        end=end,
+        draft_id=draft_id,
+        track_name=track_name,
+        params=effect_params,
+        width=width,
+        height=height
+    )
+    return params, None
+
+@app.route('/add_effect', methods=['POST'])
+def add_effect():
     result = {
         "success": False,
         "output": "",
         "error": ""
     }
 
-    # Validate required parameters
-    if not effect_type:
-        error_message = "Hi, the required parameters 'effect_type' are missing. Please add them and try again."
-        result["error"] = error_message
+    try:
+        params, _ = _add_effect_params(request.get_json())
+    except (ValueError, TypeError) as e:
+        result["error"] = str(e)
         return jsonify(result)
 
     try:
         # Call add_effect_impl method
-        draft_result = add_effect_impl(
-            effect_type=effect_type,
-            start=start,
-            end=end,
-            draft_id=draft_id,
-            track_name=track_name,
-            params=params,
-            width=width,
-            height=height
-        )
+        draft_result = add_effect_impl(**params)
         
         result["success"] = True
         result["output"] = draft_result
@@ -1101,20 +1174,65 @@ def query_script():
         
         force_update = data.get('force_update', True)
         
-        # 调用查询实现方法
-        script = query_script_impl(draft_id=draft_id, force_update=force_update)
-        
-        if script is None:
-            return handle_api_error(f"草稿 {draft_id} 在缓存中不存在")
-        
-        # 将脚本对象转换为JSON可序列化字典
-        script_str = script.dumps()
+        # 调用查询实现方法, 查询期间持有草稿锁, 避免与并发编辑冲突
+        with draft_lock(draft_id):
+            script = query_script_impl(draft_id=draft_id, force_update=force_update)
+            
+            if script is None:
+                return handle_api_error(f"草稿 {draft_id} 在缓存中不存在")
+            
+            # 将脚本对象转换为JSON可序列化字典
+            script_str = script.dumps()
         
         return jsonify(create_standard_response(success=True, output=script_str))
         
     except Exception as e:
         return handle_api_error(f"查询脚本时发生错误: {str(e)}", e)
 
+@app.route('/draft_history', methods=['POST'])
+def draft_history():
+    """查询草稿自上次快照以来的编辑历史（可撤销的操作）"""
+    try:
+        data = request.get_json()
+        
+        # 验证必需参数
+        draft_id = data.get('draft_id')
+        if not draft_id:
+            return handle_api_error("缺少必需参数 'draft_id'")
+        
+        history = get_draft_history(draft_id)
+        
+        return jsonify(create_standard_response(success=True, output={
+            "draft_id": draft_id,
+            "operations": history
+        }))
+        
+    except Exception as e:
+        return handle_api_error(f"查询编辑历史时发生错误: {str(e)}", e)
+
+@app.route('/undo', methods=['POST'])
+def undo_draft():
+    """撤销草稿最近的若干步编辑操作"""
+    try:
+        data = request.get_json()
+        
+        # 验证必需参数
+        draft_id = data.get('draft_id')
+        if not draft_id:
+            return handle_api_error("缺少必需参数 'draft_id'")
+        
+        steps = int(data.get('steps', 1))
+        
+        result = undo_draft_operations(draft_id, steps)
+        result["draft_url"] = utilgenerate_draft_url(draft_id)
+        
+        return jsonify(create_standard_response(success=True, output=result))
+        
+    except ValueError as e:
+        return handle_api_error(str(e))
+    except Exception as e:
+        return handle_api_error(f"撤销操作时发生错误: {str(e)}", e)
+
 @app.route('/save_draft', methods=['POST'])
 def save_draft():
     """保存草稿到文件系统"""
@@ -1130,9 +1248,11 @@ def save_draft():
         draft_folder = data.get('draft_folder')
         # 获取客户端操作系统信息，默认为windows
         client_os = data.get('client_os', 'windows')
+        # 任务优先级, 数值越大越先执行
+        priority = int(data.get('priority', 0))
         
-        # 调用保存实现方法，启动后台任务
-        draft_result = save_draft_impl(draft_id, draft_folder, client_os)
+        # 调用保存实现方法，将保存任务加入队列
+        draft_result = save_draft_impl(draft_id, draft_folder, client_os, priority)
         
         # 直接返回 save_draft_impl 的结果
         return jsonify(draft_result)
@@ -1961,9 +2081,11 @@ def generate_draft_url():
     
     return html_template
 
-@app.route('/add_sticker', methods=['POST'])
-def add_sticker():
-    data = request.get_json()
+def _add_sticker_params(data):
+    """
+    解析/add_sticker的请求参数, /batch_edit中的add_sticker操作同样使用
+    :return: (add_sticker_impl的调用参数, None), 参数无效时抛出ValueError
+    """
     # Get required parameters
     resource_id = data.get('sticker_id')
     start = data.get('start', 0)
@@ -1982,38 +2104,47 @@ def add_sticker():
     width = data.get('width', 1080)
     height = data.get('height', 1920)
 
+    # Validate required parameters
+    if not resource_id:
+        raise ValueError("Hi, the required parameter 'sticker_id' is missing. Please add it and try again. ")
+
+    params = dict(
+        resource_id=resource_id,
+        start=start,
+        end=end,
+        draft_id=draft_id,
+        transform_y=transform_y,
+        transform_x=transform_x,
+        alpha=alpha,
+        flip_horizontal=flip_horizontal,
+        flip_vertical=flip_vertical,
+        rotation=rotation,
+        scale_x=scale_x,
+        scale_y=scale_y,
+        track_name=track_name,
+        relative_index=relative_index,
+        width=width,
+        height=height
+    )
+    return params, None
+
+@app.route('/add_sticker', methods=['POST'])
+def add_sticker():
     result = {
         "success": False,
         "output": "",
         "error": ""
     }
 
-    # Validate required parameters
-    if not resource_id:
-        error_message = "Hi, the required parameter 'sticker_id' is missing. Please add it and try again. "
-        result["error"] = error_message
+    try:
+        params, _ = _add_sticker_params(request.get_json())
+    except (ValueError, TypeError) as e:
+        result["error"] = str(e)
         return jsonify(result)
 
     try:
         # Call add_sticker_impl method
-        draft_result = add_sticker_impl(
-            resource_id=resource_id,
-            start=start,
-            end=end,
-            draft_id=draft_id,
-            transform_y=transform_y,
-            transform_x=transform_x,
-            alpha=alpha,
-            flip_horizontal=flip_horizontal,
-            flip_vertical=flip_vertical,
-            rotation=rotation,
-            scale_x=scale_x,
-            scale_y=scale_y,
-            track_name=track_name,
-            relative_index=relative_index,
-            width=width,
-            height=height
-        )
+        draft_result = add_sticker_impl(**params)
 
         result["success"] = True
         result["output"] = draft_result
@@ -2024,25 +2155,113 @@ def add_sticker():
         result["error"] = error_message
         return jsonify(result)
 
+# ===== 批量编辑API =====
+
+# 单次批量编辑允许的最大操作数, 整个批次持有同一个草稿锁
+BATCH_EDIT_MAX_OPERATIONS = 500
+
+# 批量编辑支持的操作: (参数解析函数, 实现), 参数与单独调用各接口时相同
+BATCH_EDIT_OPERATIONS = {
+    'add_video': (_add_video_params, add_video_track),
+    'add_audio': (_add_audio_params, add_audio_track),
+    'add_text': (_add_text_params, add_text_impl),
+    'add_image': (_add_image_params, add_image_impl),
+    'add_subtitle': (_add_subtitle_params, add_subtitle_impl),
+    'add_effect': (_add_effect_params, add_effect_impl),
+    'add_sticker': (_add_sticker_params, add_sticker_impl),
+    'add_video_keyframe': (_add_video_keyframe_params, add_video_keyframe_impl),
+}
+
+@app.route('/batch_edit', methods=['POST'])
+def batch_edit():
+    """在一个请求中对同一草稿按顺序执行多个编辑操作
+
+    请求格式: {"draft_id": 可选, "width": 1080, "height": 1920,
+              "operations": [{"op": "add_video", "params": {...}}, ...]}
+    遇到第一个失败的操作即停止, 已成功的操作保留; 返回每个已执行操作的结果及首个失败操作的下标
+    """
+    try:
+        data = request.get_json()
+        
+        # 验证必需参数
+        operations = data.get('operations')
+        if not isinstance(operations, list) or not operations:
+            return handle_api_error("缺少必需参数 'operations'")
+        if len(operations) > BATCH_EDIT_MAX_OPERATIONS:
+            return handle_api_error(f"单次最多执行 {BATCH_EDIT_MAX_OPERATIONS} 个操作")
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, dict) or operation.get('op') not in BATCH_EDIT_OPERATIONS:
+                return handle_api_error(f"第 {index} 个操作无效, 支持的操作: {', '.join(BATCH_EDIT_OPERATIONS)}")
+        
+        draft_id = data.get('draft_id')
+        width = data.get('width', 1080)
+        height = data.get('height', 1920)
+        
+        results = []
+        failed_index = None
+        # 未指定草稿时先创建, 之后所有操作作用于同一草稿
+        if not draft_id:
+            draft_id, _ = get_or_create_draft(width=width, height=height)
+        
+        # 整个批次持有草稿锁, 每个操作各自提交其操作日志, 不在批次期间长时间占用数据库写锁
+        with draft_lock(draft_id):
+            for index, operation in enumerate(operations):
+                parse_params, impl = BATCH_EDIT_OPERATIONS[operation['op']]
+                result = {"index": index, "op": operation['op'], "success": False, "output": "", "error": ""}
+                try:
+                    params = dict(operation.get('params') or {})
+                    if params.get('draft_id', draft_id) != draft_id:
+                        raise ValueError("批量操作中的 draft_id 必须与批次的 draft_id 一致")
+                    params['draft_id'] = draft_id
+                    params.setdefault('width', width)
+                    params.setdefault('height', height)
+                    params, material_info = parse_params(params)
+                    result["output"] = impl(**params)
+                    if material_info:
+                        add_material_to_cache(draft_id, material_info)
+                    result["success"] = True
+                except Exception as e:
+                    result["error"] = str(e)
+                
+                results.append(result)
+                if not result["success"]:
+                    failed_index = index
+                    break
+            
+            # 批次结束时统一写入一次快照（如压缩日志或失败操作留下的修改）
+            if is_dirty(draft_id):
+                flush_draft(draft_id)
+        
+        return jsonify(create_standard_response(
+            success=failed_index is None,
+            output={
+                "draft_id": draft_id,
+                "draft_url": utilgenerate_draft_url(draft_id),
+                "applied": len(results) if failed_index is None else failed_index,
+                "failed_index": failed_index,
+                "results": results
+            },
+            error="" if failed_index is None else f"第 {failed_index} 个操作失败: {results[-1]['error']}"
+        ))
+        
+    except Exception as e:
+        return handle_api_error(f"批量编辑时发生错误: {str(e)}", e)
+
 # ===== 元数据获取API =====
 
+def _catalog_response(body: bytes, version: str):
+    """返回预先序列化的类型目录, 客户端携带的If-None-Match与版本号一致时返回304"""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(version)
+    response.cache_control.public = True
+    response.cache_control.max_age = CATALOG_MAX_AGE
+    return response.make_conditional(request)
+
 @app.route('/get_intro_animation_types', methods=['GET'])
 def get_intro_animation_types():
     """获取支持的入场动画类型列表"""
     try:
-        animation_types = []
-        
-        if IS_CAPCUT_ENV:
-            # 返回CapCut环境下的入场动画类型
-            for name in CapCut_Intro_type.__members__:
-                animation_types.append({"name": name})
-        else:
-            # 返回剪映环境下的入场动画类型
-            for name in Intro_type.__members__:
-                animation_types.append({"name": name})
-        
-        return jsonify(create_standard_response(success=True, output=animation_types))
-    
+        return _catalog_response(*get_catalog("intro_animation"))
     except Exception as e:
         return handle_api_error(f"获取入场动画类型时发生错误: {str(e)}", e)
 
@@ -2050,19 +2269,7 @@ def get_intro_animation_types():
 def get_outro_animation_types():
     """获取支持的出场动画类型列表"""
     try:
-        animation_types = []
-        
-        if IS_CAPCUT_ENV:
-            # 返回CapCut环境下的出场动画类型
-            for name in CapCut_Outro_type.__members__:
-                animation_types.append({"name": name})
-        else:
-            # 返回剪映环境下的出场动画类型
-            for name in Outro_type.__members__:
-                animation_types.append({"name": name})
-        
-        return jsonify(create_standard_response(success=True, output=animation_types))
-    
+        return _catalog_response(*get_catalog("outro_animation"))
     except Exception as e:
         return handle_api_error(f"获取出场动画类型时发生错误: {str(e)}", e)
 
@@ -2070,38 +2277,15 @@ def get_outro_animation_types():
 def get_transition_types():
     """获取支持的转场动画类型列表"""
     try:
-        transition_types = []
-        
-        if IS_CAPCUT_ENV:
-            # 返回CapCut环境下的转场动画类型
-            for name in CapCut_Transition_type.__members__:
-                transition_types.append({"name": name})
-        else:
-            # 返回剪映环境下的转场动画类型
-            for name in Transition_type.__members__:
-                transition_types.append({"name": name})
-        
-        return jsonify(create_standard_response(success=True, output=transition_types))
-    
+        return _catalog_response(*get_catalog("transition"))
     except Exception as e:
         return handle_api_error(f"获取转场动画类型时发生错误: {str(e)}", e)
 
-
 @app.route('/get_mask_types', methods=['GET'])
 def get_mask_types():
     """获取支持的遮罩类型列表"""
     try:
-        mask_types = []
-        
-        if IS_CAPCUT_ENV:
-            for name in CapCut_Mask_type.__members__:
-                mask_types.append({"name": name})
-        else:
-            for name in Mask_type.__members__:
-                mask_types.append({"name": name})
-        
-        return jsonify(create_standard_response(success=True, output=mask_types))
-    
+        return _catalog_response(*get_catalog("mask"))
     except Exception as e:
         return handle_api_error(f"获取遮罩类型时发生错误: {str(e)}", e)
 
@@ -2109,18 +2293,10 @@ def get_mask_types():
 def get_font_types():
     """获取支持的字体类型列表"""
     try:
-        font_types = []
-        
-        # 返回剪映环境下的字体类型
-        for name in Font_type.__members__:
-            font_types.append({"name": name})
-        
-        return jsonify(create_standard_response(success=True, output=font_types))
-    
+        return _catalog_response(*get_catalog("font"))
     except Exception as e:
         return handle_api_error(f"获取字体类型时发生错误: {str(e)}", e)
 
-
 @app.route('/get_text_intro_types', methods=['GET'])
 def get_text_intro_types():
     """Return supported text entrance animation type list
@@ -2128,35 +2304,10 @@ def get_text_intro_types():
     If IS_CAPCUT_ENV is True, return text entrance animation types in CapCut environment
     Otherwise return text entrance animation types in JianYing environment
     """
-    result = {
-        "success": True,
-        "output": "",
-        "error": ""
-    }
-    
     try:
-        text_intro_types = []
-        
-        if IS_CAPCUT_ENV:
-            # Return text entrance animation types in CapCut environment
-            for name, member in CapCut_Text_intro.__members__.items():
-                text_intro_types.append({
-                    "name": name
-                })
-        else:
-            # Return text entrance animation types in JianYing environment
-            for name, member in Text_intro.__members__.items():
-                text_intro_types.append({
-                    "name": name
-                })
-        
-        result["output"] = text_intro_types
-        return jsonify(result)
-    
+        return _catalog_response(*get_catalog("text_intro"))
     except Exception as e:
-        result["success"] = False
-        result["error"] = f"Error occurred while getting text entrance animation types: {str(e)}"
-        return jsonify(result)
+        return handle_api_error(f"Error occurred while getting text entrance animation types: {str(e)}", e)
 
 @app.route('/get_text_outro_types', methods=['GET'])
 def get_text_outro_types():
@@ -2165,35 +2316,10 @@ def get_text_outro_types():
     If IS_CAPCUT_ENV is True, return text exit animation types in CapCut environment
     Otherwise return text exit animation types in JianYing environment
     """
-    result = {
-        "success": True,
-        "output": "",
-        "error": ""
-    }
-    
     try:
-        text_outro_types = []
-        
-        if IS_CAPCUT_ENV:
-            # Return text exit animation types in CapCut environment
-            for name, member in CapCut_Text_outro.__members__.items():
-                text_outro_types.append({
-                    "name": name
-                })
-        else:
-            # Return text exit animation types in JianYing environment
-            for name, member in Text_outro.__members__.items():
-                text_outro_types.append({
-                    "name": name
-                })
-        
-        result["output"] = text_outro_types
-        return jsonify(result)
-    
+        return _catalog_response(*get_catalog("text_outro"))
     except Exception as e:
-        result["success"] = False
-        result["error"] = f"Error occurred while getting text exit animation types: {str(e)}"
-        return jsonify(result)
+        return handle_api_error(f"Error occurred while getting text exit animation types: {str(e)}", e)
 
 @app.route('/get_text_loop_anim_types', methods=['GET'])
 def get_text_loop_anim_types():
@@ -2202,36 +2328,10 @@ def get_text_loop_anim_types():
     If IS_CAPCUT_ENV is True, return text loop animation types in CapCut environment
     Otherwise return text loop animation types in JianYing environment
     """
-    result = {
-        "success": True,
-        "output": "",
-        "error": ""
-    }
-    
     try:
-        text_loop_anim_types = []
-        
-        if IS_CAPCUT_ENV:
-            # Return text loop animation types in CapCut environment
-            for name, member in CapCut_Text_loop_anim.__members__.items():
-                text_loop_anim_types.append({
-                    "name": name
-                })
-        else:
-            # Return text loop animation types in JianYing environment
-            for name, member in Text_loop_anim.__members__.items():
-                text_loop_anim_types.append({
-                    "name": name
-                })
-        
-        result["output"] = text_loop_anim_types
-        return jsonify(result)
-    
+        return _catalog_response(*get_catalog("text_loop_anim"))
     except Exception as e:
-        result["success"] = False
-        result["error"] = f"Error occurred while getting text loop animation types: {str(e)}"
-        return jsonify(result)
-
+        return handle_api_error(f"Error occurred while getting text loop animation types: {str(e)}", e)
 
 @app.route('/get_video_scene_effect_types', methods=['GET'])
 def get_video_scene_effect_types():
@@ -2240,36 +2340,10 @@ def get_video_scene_effect_types():
     If IS_CAPCUT_ENV is True, return scene effect types in CapCut environment
     Otherwise return scene effect types in JianYing environment
     """
-    result = {
-        "success": True,
-        "output": "",
-        "error": ""
-    }
-    
     try:
-        effect_types = []
-        
-        if IS_CAPCUT_ENV:
-            # Return scene effect types in CapCut environment
-            for name, member in CapCut_Video_scene_effect_type.__members__.items():
-                effect_types.append({
-                    "name": name
-                })
-        else:
-            # Return scene effect types in JianYing environment
-            for name, member in Video_scene_effect_type.__members__.items():
-                effect_types.append({
-                    "name": name
-                })
-        
-        result["output"] = effect_types
-        return jsonify(result)
-    
+        return _catalog_response(*get_catalog("video_scene_effect"))
     except Exception as e:
-        result["success"] = False
-        result["error"] = f"Error occurred while getting scene effect types: {str(e)}"
-        return jsonify(result)
-
+        return handle_api_error(f"Error occurred while getting scene effect types: {str(e)}", e)
 
 @app.route('/get_video_character_effect_types', methods=['GET'])
 def get_video_character_effect_types():
@@ -2278,35 +2352,18 @@ def get_video_character_effect_types():
     If IS_CAPCUT_ENV is True, return character effect types in CapCut environment
     Otherwise return character effect types in JianYing environment
     """
-    result = {
-        "success": True,
-        "output": "",
-        "error": ""
-    }
-    
     try:
-        effect_types = []
-        
-        if IS_CAPCUT_ENV:
-            # Return character effect types in CapCut environment
-            for name, member in CapCut_Video_character_effect_type.__members__.items():
-                effect_types.append({
-                    "name": name
-                })
-        else:
-            # Return character effect types in JianYing environment
-            for name, member in Video_character_effect_type.__members__.items():
-                effect_types.append({
-                    "name": name
-                })
-        
-        result["output"] = effect_types
-        return jsonify(result)
-    
+        return _catalog_response(*get_catalog("video_character_effect"))
     except Exception as e:
-        result["success"] = False
-        result["error"] = f"Error occurred while getting character effect types: {str(e)}"
-        return jsonify(result)
+        return handle_api_error(f"Error occurred while getting character effect types: {str(e)}", e)
+
+@app.route('/catalog', methods=['GET'])
+def get_catalog_route():
+    """返回全部类型目录（动画、转场、遮罩、字体、特效、滤镜、音效）, 每个目录附带版本号"""
+    try:
+        return _catalog_response(*get_all_catalogs())
+    except Exception as e:
+        return handle_api_error(f"获取类型目录时发生错误: {str(e)}", e)
 
 @app.route('/upload_to_oss', methods=['POST'])
 def upload_to_oss_route():
@@ -2314,21 +2371,28 @@ def upload_to_oss_route():
     Accepts:
     - multipart/form-data: file=<binary>, prefix, content_type (optional)
     - application/json: {"filename":"a.png","data_base64":"...","prefix":"capcut/images"}
+    - raw request body (e.g. application/octet-stream): ?filename=a.mp4&prefix=...&content_type=...
+    The file is streamed to OSS (multipart above the part size) instead of being read into memory.
     Return: {success, oss_url, object}
     """
     try:
         prefix = (request.form.get('prefix') or request.args.get('prefix') or 'capcut').strip().strip('/')
-        data = None
+        source = None
         filename = None
         content_type = None
         
         if 'file' in request.files:
             f = request.files['file']
-            data = f.read()
+            # 表单文件已由werkzeug缓存在临时文件中, 直接从中流式上传
+            source = f.stream
             filename = f.filename or 'upload.bin'
             # 获取 Content-Type（优先使用表单字段，其次使用文件对象）
             content_type = request.form.get('content_type') or f.content_type
-        else:
+            if source.seek(0, os.SEEK_END) == 0:
+                source = None
+            else:
+                source.seek(0)
+        elif request.is_json:
             js = request.get_json(silent=True) or {}
             filename = js.get('filename') or 'upload.bin'
             content_type = js.get('content_type')
@@ -2336,11 +2400,17 @@ def upload_to_oss_route():
             if b64:
                 import base64
                 try:
-                    data = base64.b64decode(b64)
+                    source = io.BytesIO(base64.b64decode(b64))
                 except Exception:
                     return jsonify({"success": False, "error": "invalid base64"}), 400
-        
-        if not data:
+        elif request.content_length != 0:
+            # 原始请求体: 边接收边上传
+            source = request.stream
+            filename = request.args.get('filename') or 'upload.bin'
+            content_type = request.args.get('content_type') or (
+                request.mimetype if request.mimetype and request.mimetype != 'application/octet-stream' else None)
+        
+        if source is None:
             return jsonify({"success": False, "error": "no file provided"}), 400
         
         # 🔧 修复：智能推断扩展名和 MIME 类型
@@ -2359,6 +2429,9 @@ def upload_to_oss_route():
             '.ogg': 'audio/ogg',
             '.m4a': 'audio/mp4',
             '.flac': 'audio/flac',
+            '.mp4': 'video/mp4',
+            '.mov': 'video/quicktime',
+            '.zip': 'application/zip',
         }
         
         # 从文件名推断扩展名
@@ -2384,7 +2457,10 @@ def upload_to_oss_route():
         headers = {'Content-Type': content_type}
         logger.info(f"📦 上传到OSS - 文件名: {filename}, 对象名: {object_name}, MIME: {content_type}")
         
-        bucket.put_object(object_name, data, headers=headers)
+        if upload_stream(bucket, object_name, source, headers=headers) == 0:
+            # 分块传输的空请求体只能在读取后发现
+            bucket.delete_object(object_name)
+            return jsonify({"success": False, "error": "no file provided"}), 400
         signed = bucket.sign_url('GET', object_name, 24*60*60, slash_safe=True)
         return jsonify({"success": True, "oss_url": signed, "object": object_name})
     except Exception as e:
@@ -2536,6 +2612,34 @@ def debug_cache(draft_id: str):
         "cache_source": "test_materials.json" if draft_id in draft_materials_cache else "cache"
     })
 
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """查看草稿缓存统计：命中/未命中/加载/淘汰次数及估算内存"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': get_cache_stats()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/media_store/stats', methods=['GET'])
+def media_store_stats():
+    """查看素材下载缓存统计：命中率、下载/链接字节数、淘汰数量及存储大小"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': get_media_store_stats()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/drafts/list', methods=['GET'])
 def list_drafts():
     """获取所有可用草稿列表 - 新增功能"""
@@ -2654,17 +2758,12 @@ def delete_draft_api(draft_id):
         print(f"开始删除草稿: {draft_id}")
         
         # 检查草稿是否存在
-        from database import get_draft_by_id
+        from database import get_draft_by_id, delete_draft_from_db
         draft_info = get_draft_by_id(draft_id)
         print(f"草稿信息: {draft_info}")
         
         # 从数据库删除草稿和相关素材
-        conn = sqlite3.connect('capcut.db')
-        c = conn.cursor()
-        c.execute("DELETE FROM materials WHERE draft_id = ?", (draft_id,))
-        c.execute("DELETE FROM drafts WHERE id = ?", (draft_id,))
-        conn.commit()
-        conn.close()
+        delete_draft_from_db(draft_id)
         
         # 从缓存中删除
         if draft_id in draft_materials_cache:
@@ -2763,6 +2862,30 @@ def download_draft_file(draft_id):
             'error': f'下载失败: {str(e)}'
         }), 500
 
+@app.route('/api/drafts/stream/<draft_id>', methods=['GET'])
+def stream_draft_zip(draft_id):
+    """以zip流直接返回草稿: 素材下载完成即写入响应, 服务器端不生成草稿目录和zip文件"""
+    try:
+        script = get_export_script(draft_id)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'草稿 {draft_id} 不存在: {str(e)}'
+        }), 404
+
+    try:
+        draft_folder = resolve_draft_folder(request.args.get('draft_folder'), request.args.get('client_os', 'windows'))
+        chunks = stream_zip(lambda packager: write_draft_package(packager, script, draft_id, draft_folder))
+        response = Response(chunks, mimetype='application/zip')
+        response.headers['Content-Disposition'] = f'attachment; filename="{draft_id}.zip"'
+        return response
+    except Exception as e:
+        print(f"流式下载草稿失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': f'下载失败: {str(e)}'
+        }), 500
+
 def get_draft_title(draft_id):
     """获取草稿的真实标题名称 - 按官方格式命名"""
     try:
@@ -3108,40 +3231,135 @@ def batch_download_drafts():
             'error': f'批量下载失败: {str(e)}'
         }), 500
 
-from database import update_draft_status
+from database import update_draft_status, get_draft_status
+from status_bus import get_status_bus
+
+# SSE连接无状态变化时发送心跳注释的间隔（秒）, 避免被代理判定为空闲连接
+STATUS_STREAM_KEEPALIVE = 15
+# 草稿保存任务的结束状态, SSE在所有关注的草稿都进入结束状态后关闭
+TERMINAL_DRAFT_STATUSES = ('completed', 'failed')
+
+def _current_draft_status(draft_id):
+    """
+    获取草稿的当前状态
+    :return: (版本号, 状态), 优先从状态总线读取, 总线中没有时从数据库读取一次; 草稿不存在时为None
+    """
+    bus = get_status_bus()
+    entry = bus.get(draft_id)
+    if entry is None:
+        status = get_draft_status(draft_id)
+        if status['status'] == 'not_found':
+            return None
+        entry = bus.seed(draft_id, {"status": status['status'], "progress": status['progress'],
+                                    "message": status['message']})
+    return entry
 
 @app.route('/api/draft/long_poll_status', methods=['GET'])
 def long_poll_draft_status():
+    """
+    长轮询草稿状态: 状态与last_status不同时立即返回, 否则阻塞等待状态总线的通知直至超时
+    传入last_version（上次响应中的version）时, 任何更新（包括进度变化）都会返回
+    """
     draft_id = request.args.get('draft_id')
     last_status = request.args.get('last_status')
+    last_version = request.args.get('last_version', type=int)
     timeout = int(request.args.get('timeout', 30))
 
     if not draft_id:
         return jsonify({"success": False, "error": "'draft_id' is required"}), 400
 
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        conn = sqlite3.connect('capcut.db')
-        c = conn.cursor()
-        c.execute("SELECT status, progress, message FROM drafts WHERE id = ?", (draft_id,))
-        result = c.fetchone()
-        conn.close()
-        
-        current_status = result[0] if result else None
+    bus = get_status_bus()
+    deadline = time.monotonic() + timeout
+    entry = _current_draft_status(draft_id)
+    while True:
+        after_version = last_version or 0
+        if entry is not None:
+            version, status = entry
+            if last_version is not None:
+                changed = version > last_version
+            else:
+                changed = status['status'] != last_status
+            if changed:
+                return jsonify({
+                    "success": True,
+                    "draft_id": draft_id,
+                    "status": status['status'],
+                    "progress": status['progress'],
+                    "message": status['message'],
+                    "version": version
+                })
+            after_version = max(after_version, version)
 
-        if current_status and current_status != last_status:
-            return jsonify({
-                "success": True,
-                "draft_id": draft_id,
-                "status": current_status,
-                "progress": result[1],
-                "message": result[2]
-            })
-        
-        time.sleep(1) # 1秒轮询一次
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        entry = bus.wait([draft_id], after_version, remaining).get(draft_id, entry)
 
     return jsonify({"success": True, "status": "timeout", "message": "No status change"})
 
+@app.route('/api/draft/status_stream', methods=['GET'])
+def stream_draft_status():
+    """
+    以Server-Sent Events推送一个或多个草稿的状态, 一个连接即可关注多个草稿
+    参数: draft_ids（逗号分隔）或多个draft_id; timeout（秒, 默认300）
+    先推送各草稿的当前状态, 之后每次状态变化推送一个status事件, 事件id为状态版本号;
+    断线重连时浏览器携带Last-Event-ID, 只推送该版本之后的变化.
+    所有草稿进入completed/failed或超时后推送end事件并关闭连接, 客户端收到end后应主动关闭EventSource
+    """
+    draft_ids = request.args.getlist('draft_id')
+    for value in request.args.getlist('draft_ids'):
+        draft_ids.extend(draft_id.strip() for draft_id in value.split(',') if draft_id.strip())
+    draft_ids = list(dict.fromkeys(draft_ids))
+    if not draft_ids:
+        return jsonify({"success": False, "error": "'draft_ids' is required"}), 400
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or ''
+    after_version = int(last_event_id) if last_event_id.isdigit() else 0
+    timeout = float(request.args.get('timeout', 300))
+
+    def status_event(draft_id, version, status):
+        data = json.dumps({"draft_id": draft_id, "version": version, **status}, ensure_ascii=False)
+        return f"id: {version}\nevent: status\ndata: {data}\n\n"
+
+    def generate():
+        bus = get_status_bus()
+        deadline = time.monotonic() + timeout
+        cursor = after_version
+        latest = {}
+        yield "retry: 3000\n\n"
+
+        initial = []
+        for draft_id in draft_ids:
+            entry = _current_draft_status(draft_id)
+            if entry is not None:
+                latest[draft_id] = entry[1]['status']
+                if entry[0] > after_version:
+                    initial.append((entry[0], draft_id, entry[1]))
+        for version, draft_id, status in sorted(initial, key=lambda item: item[0]):
+            cursor = max(cursor, version)
+            yield status_event(draft_id, version, status)
+
+        while not all(latest.get(draft_id) in TERMINAL_DRAFT_STATUSES for draft_id in draft_ids):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            changed = bus.wait(draft_ids, cursor, min(remaining, STATUS_STREAM_KEEPALIVE))
+            if not changed:
+                yield ": keepalive\n\n"
+                continue
+            for draft_id, (version, status) in sorted(changed.items(), key=lambda item: item[1][0]):
+                latest[draft_id] = status['status']
+                cursor = max(cursor, version)
+                yield status_event(draft_id, version, status)
+
+        yield "event: end\ndata: {}\n\n"
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # 禁止nginx缓冲, 保证事件及时送达
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 # 操作系统检测API
 @app.route('/api/os/info', methods=['GET'])
 def get_os_info():
@@ -0,0 +1,111 @@
+"""
+元数据类型目录
+/get_*_types接口及/catalog返回的类型列表按环境（CapCut/剪映）只构建一次, 缓存序列化后的JSON响应体,
+并以内容哈希作为版本号（用作ETag）, 客户端可通过If-None-Match避免重复下载未变化的目录.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from pyJianYingDraft import metadata
+from settings import IS_CAPCUT_ENV
+
+# 客户端缓存目录的时间（秒）, 目录只随版本更新变化
+CATALOG_MAX_AGE = 3600
+
+# 目录名 -> (CapCut环境下的枚举, 剪映环境下的枚举), 枚举以metadata中的名称表示, 按需加载
+CATALOG_ENUMS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "intro_animation": (("CapCut_Intro_type",), ("Intro_type",)),
+    "outro_animation": (("CapCut_Outro_type",), ("Outro_type",)),
+    "combo_animation": (("CapCut_Group_animation_type",), ("Group_animation_type",)),
+    "transition": (("CapCut_Transition_type",), ("Transition_type",)),
+    "mask": (("CapCut_Mask_type",), ("Mask_type",)),
+    "font": (("Font_type",), ("Font_type",)),
+    "text_intro": (("CapCut_Text_intro",), ("Text_intro",)),
+    "text_outro": (("CapCut_Text_outro",), ("Text_outro",)),
+    "text_loop_anim": (("CapCut_Text_loop_anim",), ("Text_loop_anim",)),
+    "video_scene_effect": (("CapCut_Video_scene_effect_type",), ("Video_scene_effect_type",)),
+    "video_character_effect": (("CapCut_Video_character_effect_type",), ("Video_character_effect_type",)),
+    "filter": (("Filter_type",), ("Filter_type",)),
+    "audio_effect": (("CapCut_Voice_filters_effect_type", "CapCut_Voice_characters_effect_type", "CapCut_Speech_to_song_effect_type"),
+                     ("Audio_scene_effect_type", "Tone_effect_type", "Speech_to_song_type")),
+}
+
+# (是否CapCut环境, 目录名) -> (目录项, 响应体, 版本号)
+_CATALOGS: Dict[Tuple[bool, str], Tuple[List[dict], bytes, str]] = {}
+# 是否CapCut环境 -> (响应体, 版本号)
+_ALL_CATALOGS: Dict[bool, Tuple[bytes, str]] = {}
+_lock = threading.Lock()
+
+def _serialize(output) -> bytes:
+    return json.dumps({"success": True, "output": output, "error": ""},
+                      ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _version(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()[:16]
+
+def _catalog_item(name: str, meta) -> dict:
+    """目录项: 名称, 以及元数据中的VIP标记和可调参数（若有）"""
+    item = {"name": name}
+    is_vip = getattr(meta, "is_vip", None)
+    if is_vip is not None:
+        item["is_vip"] = is_vip
+    params = getattr(meta, "params", None)
+    if params:
+        item["params"] = [{"name": param.name, "default_value": param.default_value,
+                           "min_value": param.min_value, "max_value": param.max_value}
+                          for param in params]
+    return item
+
+def _build(catalog: str, capcut_env: bool) -> Tuple[List[dict], bytes, str]:
+    items = []
+    for enum_name in CATALOG_ENUMS[catalog][0 if capcut_env else 1]:
+        enum_class = getattr(metadata, enum_name)
+        # 与原接口一致, 别名也作为单独的名称返回
+        for name, member in enum_class.__members__.items():
+            items.append(_catalog_item(name, member.value))
+    body = _serialize(items)
+    return items, body, _version(body)
+
+def _get(catalog: str, capcut_env: bool) -> Tuple[List[dict], bytes, str]:
+    key = (capcut_env, catalog)
+    entry = _CATALOGS.get(key)
+    if entry is None:
+        with _lock:
+            entry = _CATALOGS.get(key)
+            if entry is None:
+                entry = _CATALOGS[key] = _build(catalog, capcut_env)
+    return entry
+
+def get_catalog(catalog: str, capcut_env: Optional[bool] = None) -> Tuple[bytes, str]:
+    """
+    获取单个类型目录
+    :param catalog: 目录名, 见CATALOG_ENUMS
+    :param capcut_env: 是否CapCut环境, 默认为当前配置
+    :return: (序列化后的响应体, 版本号)
+    """
+    if catalog not in CATALOG_ENUMS:
+        raise KeyError(f"Unknown catalog: {catalog}")
+    if capcut_env is None:
+        capcut_env = IS_CAPCUT_ENV
+    _, body, version = _get(catalog, capcut_env)
+    return body, version
+
+def get_all_catalogs(capcut_env: Optional[bool] = None) -> Tuple[bytes, str]:
+    """
+    获取全部类型目录, 每个目录附带各自的版本号, 客户端可据此只更新变化的目录
+    :return: (序列化后的响应体, 版本号)
+    """
+    if capcut_env is None:
+        capcut_env = IS_CAPCUT_ENV
+    entry = _ALL_CATALOGS.get(capcut_env)
+    if entry is None:
+        catalogs = {}
+        for catalog in CATALOG_ENUMS:
+            items, _, version = _get(catalog, capcut_env)
+            catalogs[catalog] = {"version": version, "items": items}
+        body = _serialize({"environment": "capcut" if capcut_env else "jianying", "catalogs": catalogs})
+        entry = _ALL_CATALOGS[capcut_env] = (body, _version(body))
+    return entry
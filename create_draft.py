@@ -1,7 +1,7 @@
 import uuid
 import pyJianYingDraft as draft
 import time
-from draft_cache import DRAFT_CACHE, update_cache
+from draft_cache import update_cache, get_draft, flush_draft
 
 def create_draft(width=1080, height=1920):
     """
@@ -20,6 +20,8 @@ def create_draft(width=1080, height=1920):
     
     # Store in global cache
     update_cache(draft_id, script)
+    # Persist the empty draft right away as the base snapshot for the operation log
+    flush_draft(draft_id)
     
     return script, draft_id
 
@@ -31,14 +33,12 @@ def get_or_create_draft(draft_id=None, width=1080, height=1920):
     :param height: Video height, default 1920
     :return: (draft_name, draft_path, draft_id, draft_dir, script)
     """
-    global DRAFT_CACHE  # Declare use of global variable
-    
-    if draft_id is not None and draft_id in DRAFT_CACHE:
-        # Get existing draft information from cache
-        print(f"Getting draft from cache: {draft_id}")
-        # Update last access time
-        update_cache(draft_id, DRAFT_CACHE[draft_id])
-        return draft_id, DRAFT_CACHE[draft_id]
+    if draft_id is not None:
+        # Get existing draft from cache (updating its last access time), or restore it
+        # from the database snapshot and replay its operation log
+        script = get_draft(draft_id)
+        if script is not None:
+            return draft_id, script
 
     # Create new draft logic
     print("Creating new draft")
@@ -46,6 +46,8 @@ def get_or_create_draft(draft_id=None, width=1080, height=1920):
         # User specified draft_id, create draft with that ID
         script = draft.Script_file(width, height)
         update_cache(draft_id, script)
+        # Persist the empty draft right away as the base snapshot for the operation log
+        flush_draft(draft_id)
         return draft_id, script
     else:
         # Generate new draft_id
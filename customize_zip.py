@@ -1,11 +1,12 @@
 import io
 import os
+import shutil
 import hashlib
 import json
 import tempfile
 import zipfile
 from typing import Tuple
-from oss import _ensure_bucket
+from oss import _ensure_bucket, upload_file
 from util import normalize_path_by_os
 
 ASSET_DIRS = ("assets/audio/", "assets/image/", "assets/video/")
@@ -68,7 +69,7 @@ def ensure_customized_zip(draft_id: str, client_os: str, draft_folder: str) -> T
         with open(base_zip_path, "wb") as f:
             # stream download via SDK
             obj = bucket.get_object(base_key)
-            f.write(obj.read())
+            shutil.copyfileobj(obj, f, 1024 * 1024)
         # Read, modify draft_info.json, write new zip
         custom_zip_path = os.path.join(td, custom_key)
         with zipfile.ZipFile(base_zip_path, "r") as zin, zipfile.ZipFile(custom_zip_path, "w", zipfile.ZIP_DEFLATED) as zout:
@@ -98,7 +99,7 @@ def ensure_customized_zip(draft_id: str, client_os: str, draft_folder: str) -> T
                     zout.writestr(item, data)
             # If draft_info.json missing, still proceed without change
         # Upload new zip
-        bucket.put_object_from_file(custom_key, custom_zip_path)
+        upload_file(bucket, custom_key, custom_zip_path)
 
     return custom_key, True
 
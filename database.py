@@ -1,87 +1,239 @@
 import sqlite3
 import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from status_bus import publish_status
+
+# 数据库文件路径（相对于进程工作目录）
+DB_PATH = 'capcut.db'
+# 连接池中保留的空闲连接数上限, 超出部分在归还时关闭
+POOL_SIZE = 8
+# 遇到写锁时的等待时间（秒），对应SQLite的busy_timeout
+BUSY_TIMEOUT = 5.0
+# 每个连接缓存的预编译语句数量
+STATEMENT_CACHE_SIZE = 128
+
+_idle_connections: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+_local = threading.local()
+
+class _Pooled_connection(sqlite3.Connection):
+    """记录所连接数据库路径的连接, 便于在DB_PATH变化后丢弃旧连接"""
+    db_path: str
+
+def _open_connection():
+    """创建一个新连接: 自动提交模式, WAL日志, 语句缓存"""
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT, isolation_level=None, factory=_Pooled_connection,
+                           check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    # WAL模式下NORMAL同步级别已能保证数据库一致性, 仅在断电时可能丢失最后的事务
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.db_path = DB_PATH
+    return conn
+
+@contextmanager
+def db_connection():
+    """从连接池借用一个连接; 同一线程内嵌套调用复用同一连接"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        yield conn
+        return
+
+    conn = None
+    while conn is None:
+        try:
+            conn = _idle_connections.get_nowait()
+        except queue.Empty:
+            conn = _open_connection()
+            break
+        if conn.db_path != DB_PATH:
+            # DB_PATH 已被修改（如测试中），丢弃指向旧数据库的连接
+            conn.close()
+            conn = None
+
+    _local.conn = conn
+    try:
+        yield conn
+    finally:
+        _local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        if _idle_connections.qsize() < POOL_SIZE and conn.db_path == DB_PATH:
+            _idle_connections.put(conn)
+        else:
+            conn.close()
+
+@contextmanager
+def db_transaction():
+    """在一个写事务中执行多条语句, 可嵌套, 仅由最外层提交或回滚
+
+    使用 BEGIN IMMEDIATE 在事务开始时即获取写锁, 避免读事务升级为写事务时的死锁
+    """
+    with db_connection() as conn:
+        depth = getattr(_local, 'tx_depth', 0)
+        if depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        _local.tx_depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            _local.tx_depth = depth
+            if depth == 0:
+                conn.execute("ROLLBACK")
+            raise
+        _local.tx_depth = depth
+        if depth == 0:
+            conn.execute("COMMIT")
+
+def close_all_connections():
+    """关闭连接池中的所有空闲连接"""
+    while True:
+        try:
+            _idle_connections.get_nowait().close()
+        except queue.Empty:
+            return
 
 def init_db():
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS drafts (
-            id TEXT PRIMARY KEY,
-            status TEXT DEFAULT 'initialized',
-            progress INTEGER DEFAULT 0,
-            message TEXT,
-            script_data TEXT,
-            width INTEGER DEFAULT 1920,
-            height INTEGER DEFAULT 1080,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            last_modified DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS materials (
-            id TEXT PRIMARY KEY,
-            draft_id TEXT,
-            data TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            last_modified DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (draft_id) REFERENCES drafts (id)
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    with db_transaction() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS drafts (
+                id TEXT PRIMARY KEY,
+                status TEXT DEFAULT 'initialized',
+                progress INTEGER DEFAULT 0,
+                message TEXT,
+                script_data TEXT,
+                width INTEGER DEFAULT 1920,
+                height INTEGER DEFAULT 1080,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                last_modified DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS materials (
+                id TEXT PRIMARY KEY,
+                draft_id TEXT,
+                data TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                last_modified DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (draft_id) REFERENCES drafts (id)
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_materials_draft_id ON materials (draft_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_drafts_last_modified ON drafts (last_modified)")
+        # 草稿增量操作日志, snapshot_seq 记录快照已包含的最后一条操作序号
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(drafts)")}
+        if 'snapshot_seq' not in columns:
+            conn.execute("ALTER TABLE drafts ADD COLUMN snapshot_seq INTEGER DEFAULT 0")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS draft_ops (
+                draft_id TEXT,
+                seq INTEGER,
+                op TEXT,
+                params TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (draft_id, seq)
+            )
+        ''')
+        # 素材下载缓存: URL -> 内容哈希, 以及按内容哈希存储的文件
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS media_urls (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS media_objects (
+                sha256 TEXT PRIMARY KEY,
+                size INTEGER,
+                last_access REAL
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_media_urls_sha256 ON media_urls (sha256)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_media_objects_last_access ON media_objects (last_access)")
+        # 媒体信息探测缓存: URL + 校验值(ETag/Last-Modified或本地文件的修改时间和大小) -> ffprobe结果
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS media_probes (
+                url TEXT PRIMARY KEY,
+                validator TEXT,
+                info TEXT,
+                probed_at REAL
+            )
+        ''')
+        # 草稿保存任务队列: 每个草稿最多一个任务, 运行中再次请求保存时置rerun, 完成后重新排队
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS save_jobs (
+                draft_id TEXT PRIMARY KEY,
+                draft_folder TEXT,
+                client_os TEXT,
+                priority INTEGER DEFAULT 0,
+                state TEXT DEFAULT 'queued',
+                rerun INTEGER DEFAULT 0,
+                attempts INTEGER DEFAULT 0,
+                created_at REAL
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_save_jobs_queue ON save_jobs (state, priority DESC, created_at)")
 
 def get_draft_materials(draft_id):
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    c.execute("SELECT data FROM materials WHERE draft_id = ?", (draft_id,))
-    materials = [json.loads(row[0]) for row in c.fetchall()]
-    conn.close()
-    return materials
+    with db_connection() as conn:
+        rows = conn.execute("SELECT data FROM materials WHERE draft_id = ?", (draft_id,)).fetchall()
+    return [json.loads(row[0]) for row in rows]
 
 def add_material_to_db(draft_id, material_id, material_data):
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    c.execute("INSERT OR IGNORE INTO drafts (id) VALUES (?)", (draft_id,))
-    c.execute("INSERT OR REPLACE INTO materials (id, draft_id, data) VALUES (?, ?, ?)",
-              (material_id, draft_id, json.dumps(material_data)))
-    conn.commit()
-    conn.close()
+    add_materials_to_db(draft_id, [(material_id, material_data)])
+
+def add_materials_to_db(draft_id, materials):
+    """在一个事务中批量写入素材
+
+    :param draft_id: 草稿ID
+    :param materials: (material_id, material_data) 列表
+    """
+    with db_transaction() as conn:
+        conn.execute("INSERT OR IGNORE INTO drafts (id) VALUES (?)", (draft_id,))
+        conn.executemany("INSERT OR REPLACE INTO materials (id, draft_id, data) VALUES (?, ?, ?)",
+                         [(material_id, draft_id, json.dumps(material_data)) for material_id, material_data in materials])
 
 def update_material_in_db(material_id, material_data):
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    c.execute("UPDATE materials SET data = ? WHERE id = ?", (json.dumps(material_data), material_id))
-    conn.commit()
-    conn.close()
+    with db_transaction() as conn:
+        conn.execute("UPDATE materials SET data = ? WHERE id = ?", (json.dumps(material_data), material_id))
 
 def delete_material_from_db(material_id):
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    c.execute("DELETE FROM materials WHERE id = ?", (material_id,))
-    conn.commit()
-    conn.close()
+    with db_transaction() as conn:
+        conn.execute("DELETE FROM materials WHERE id = ?", (material_id,))
+
+def delete_draft_from_db(draft_id):
+    """删除草稿及其全部素材和操作日志"""
+    with db_transaction() as conn:
+        conn.execute("DELETE FROM materials WHERE draft_id = ?", (draft_id,))
+        conn.execute("DELETE FROM draft_ops WHERE draft_id = ?", (draft_id,))
+        conn.execute("DELETE FROM drafts WHERE id = ?", (draft_id,))
 
 def get_all_drafts():
     """获取所有草稿信息，返回字典格式列表"""
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    c.execute("""
-        SELECT 
-            d.id, 
-            d.status,
-            d.progress,
-            d.message,
-            d.created_at,
-            d.last_modified,
-            COUNT(m.id) as materials_count
-        FROM drafts d
-        LEFT JOIN materials m ON d.id = m.draft_id
-        GROUP BY d.id
-        ORDER BY d.last_modified DESC
-    """)
-    
+    with db_connection() as conn:
+        rows = conn.execute("""
+            SELECT
+                d.id,
+                d.status,
+                d.progress,
+                d.message,
+                d.created_at,
+                d.last_modified,
+                COUNT(m.id) as materials_count
+            FROM drafts d
+            LEFT JOIN materials m ON d.id = m.draft_id
+            GROUP BY d.id
+            ORDER BY d.last_modified DESC
+        """).fetchall()
+
     drafts = []
-    for row in c.fetchall():
+    for row in rows:
         draft = {
             'id': row[0],
             'name': row[0],  # 使用ID作为名称
@@ -94,30 +246,29 @@ def get_all_drafts():
             'duration': '00:00'  # 默认时长
         }
         drafts.append(draft)
-    
-    conn.close()
+
     return drafts
 
 def update_draft_status(draft_id, status, progress=None, message=None):
-    """更新草稿状态和进度信息"""
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    # 确保草稿存在
-    c.execute("INSERT OR IGNORE INTO drafts (id, status) VALUES (?, ?)", (draft_id, status))
-    # 更新状态
-    c.execute("UPDATE drafts SET status = ?, progress = ?, message = ?, last_modified = CURRENT_TIMESTAMP WHERE id = ?", 
-              (status, progress, message, draft_id))
-    conn.commit()
-    conn.close()
+    """更新草稿状态和进度信息, 写入后发布到状态总线以唤醒等待状态变化的请求"""
+    with db_transaction() as conn:
+        # 草稿不存在时插入, 否则更新状态
+        conn.execute("""
+            INSERT INTO drafts (id, status, progress, message) VALUES (?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                status = excluded.status,
+                progress = excluded.progress,
+                message = excluded.message,
+                last_modified = CURRENT_TIMESTAMP
+        """, (draft_id, status, progress, message))
+    publish_status(draft_id, status, progress, message)
 
 def get_draft_status(draft_id):
     """获取草稿状态和进度信息"""
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    c.execute("SELECT status, progress, message, last_modified FROM drafts WHERE id = ?", (draft_id,))
-    result = c.fetchone()
-    conn.close()
-    
+    with db_connection() as conn:
+        result = conn.execute("SELECT status, progress, message, last_modified FROM drafts WHERE id = ?",
+                              (draft_id,)).fetchone()
+
     if result:
         return {
             'status': result[0],
@@ -133,67 +284,111 @@ def get_draft_status(draft_id):
             'last_modified': None
         }
 
-def save_draft_to_db(draft_id, script_data, width=1920, height=1080):
-    """保存草稿完整数据到数据库"""
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    c.execute("""
-        INSERT OR REPLACE INTO drafts 
-        (id, script_data, width, height, status, last_modified) 
-        VALUES (?, ?, ?, ?, 'saved', CURRENT_TIMESTAMP)
-    """, (draft_id, script_data, width, height))
-    conn.commit()
-    conn.close()
+def save_draft_to_db(draft_id, script_data, width=1920, height=1080, snapshot_seq=None):
+    """保存草稿完整数据到数据库
+    只写入快照本身, 已有草稿的保存任务状态、进度和消息保持不变
+
+    :param snapshot_seq: 快照已包含的最后一条操作序号, 传入时同时清理已被快照覆盖的操作日志
+    """
+    with db_transaction() as conn:
+        conn.execute("""
+            INSERT INTO drafts (id, script_data, width, height, status, snapshot_seq, last_modified)
+            VALUES (?, ?, ?, ?, 'saved', COALESCE(?, 0), CURRENT_TIMESTAMP)
+            ON CONFLICT(id) DO UPDATE SET
+                script_data = excluded.script_data,
+                width = excluded.width,
+                height = excluded.height,
+                snapshot_seq = COALESCE(?, drafts.snapshot_seq),
+                last_modified = CURRENT_TIMESTAMP
+        """, (draft_id, script_data, width, height, snapshot_seq, snapshot_seq))
+        if snapshot_seq is not None:
+            conn.execute("DELETE FROM draft_ops WHERE draft_id = ? AND seq <= ?", (draft_id, snapshot_seq))
 
 def get_draft_from_db(draft_id):
     """从数据库获取草稿完整数据"""
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    c.execute("SELECT script_data, width, height FROM drafts WHERE id = ?", (draft_id,))
-    result = c.fetchone()
-    conn.close()
-    
+    with db_connection() as conn:
+        result = conn.execute("SELECT script_data, width, height, snapshot_seq FROM drafts WHERE id = ?",
+                              (draft_id,)).fetchone()
+
     if result:
         return {
             'script_data': result[0],
             'width': result[1] or 1920,
-            'height': result[2] or 1080
+            'height': result[2] or 1080,
+            'snapshot_seq': result[3] or 0
         }
     return None
 
 def draft_exists_in_db(draft_id):
     """检查草稿是否存在于数据库中"""
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    c.execute("SELECT 1 FROM drafts WHERE id = ? AND script_data IS NOT NULL", (draft_id,))
-    result = c.fetchone()
-    conn.close()
+    with db_connection() as conn:
+        result = conn.execute("SELECT 1 FROM drafts WHERE id = ? AND script_data IS NOT NULL", (draft_id,)).fetchone()
     return result is not None
 
+def get_legacy_script_data_ids():
+    """获取以旧版文本格式(base64 pickle)保存快照的草稿ID列表"""
+    with db_connection() as conn:
+        rows = conn.execute("SELECT id FROM drafts WHERE typeof(script_data) = 'text'").fetchall()
+    return [row[0] for row in rows]
+
+def update_script_data_batch(rows):
+    """在一个事务中批量替换草稿快照, 不修改状态和修改时间
+
+    :param rows: (draft_id, script_data) 列表
+    """
+    with db_transaction() as conn:
+        conn.executemany("UPDATE drafts SET script_data = ? WHERE id = ?",
+                         [(script_data, draft_id) for draft_id, script_data in rows])
+
+def append_draft_op(draft_id, op, params):
+    """追加一条草稿操作日志
+
+    :param op: 操作名称
+    :param params: JSON编码的操作参数
+    :return: 操作序号, 在同一草稿内严格递增
+    """
+    with db_transaction() as conn:
+        seq = conn.execute("""
+            SELECT MAX(COALESCE((SELECT MAX(seq) FROM draft_ops WHERE draft_id = ?), 0),
+                       COALESCE((SELECT snapshot_seq FROM drafts WHERE id = ?), 0)) + 1
+        """, (draft_id, draft_id)).fetchone()[0]
+        conn.execute("INSERT INTO draft_ops (draft_id, seq, op, params) VALUES (?, ?, ?, ?)",
+                     (draft_id, seq, op, params))
+    return seq
+
+def get_draft_ops(draft_id, after_seq=0):
+    """按序号顺序获取草稿在after_seq之后的操作日志"""
+    with db_connection() as conn:
+        rows = conn.execute("""
+            SELECT seq, op, params, created_at FROM draft_ops
+            WHERE draft_id = ? AND seq > ? ORDER BY seq
+        """, (draft_id, after_seq)).fetchall()
+    return [{'seq': row[0], 'op': row[1], 'params': json.loads(row[2]), 'created_at': row[3]} for row in rows]
+
+def delete_draft_ops_from(draft_id, seq):
+    """删除序号不小于seq的操作日志, 用于撤销"""
+    with db_transaction() as conn:
+        conn.execute("DELETE FROM draft_ops WHERE draft_id = ? AND seq >= ?", (draft_id, seq))
+
 def get_all_draft_ids_from_db():
     """获取数据库中所有草稿的ID列表"""
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    c.execute("SELECT id FROM drafts WHERE script_data IS NOT NULL")
-    draft_ids = [row[0] for row in c.fetchall()]
-    conn.close()
-    return draft_ids
+    with db_connection() as conn:
+        rows = conn.execute("SELECT id FROM drafts WHERE script_data IS NOT NULL").fetchall()
+    return [row[0] for row in rows]
 
 def get_draft_by_id(draft_id):
     """根据ID获取草稿基本信息"""
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    c.execute("SELECT id, status, last_modified, script_data FROM drafts WHERE id = ?", (draft_id,))
-    result = c.fetchone()
-    conn.close()
-    
+    with db_connection() as conn:
+        result = conn.execute("SELECT id, status, last_modified, script_data FROM drafts WHERE id = ?",
+                              (draft_id,)).fetchone()
+
     if result:
         script_data = None
         if result[3]:
             try:
                 script_data = json.loads(result[3])
-            except json.JSONDecodeError:
-                # 如果JSON解析失败，使用原始数据
+            except (ValueError, TypeError):
+                # 如果JSON解析失败（如二进制草稿快照），使用原始数据
                 script_data = result[3]
         return {
             'id': result[0],
@@ -204,3 +399,137 @@ def get_draft_by_id(draft_id):
         }
     return None
 
+def get_media_url(url):
+    """获取URL对应的缓存素材信息"""
+    with db_connection() as conn:
+        result = conn.execute("""
+            SELECT u.sha256, u.etag, u.last_modified, u.fetched_at, o.size FROM media_urls u
+            JOIN media_objects o ON o.sha256 = u.sha256 WHERE u.url = ?
+        """, (url,)).fetchone()
+
+    if result:
+        return {
+            'sha256': result[0],
+            'etag': result[1],
+            'last_modified': result[2],
+            'fetched_at': result[3],
+            'size': result[4]
+        }
+    return None
+
+def put_media_object(url, sha256, size, etag=None, last_modified=None, fetched_at=None):
+    """记录下载的素材: 写入内容对象并将URL指向它"""
+    with db_transaction() as conn:
+        conn.execute("""
+            INSERT INTO media_objects (sha256, size, last_access) VALUES (?, ?, ?)
+            ON CONFLICT(sha256) DO UPDATE SET last_access = excluded.last_access
+        """, (sha256, size, fetched_at))
+        conn.execute("INSERT OR REPLACE INTO media_urls (url, sha256, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                     (url, sha256, etag, last_modified, fetched_at))
+
+def touch_media_object(sha256, last_access, fetched_at_url=None):
+    """更新素材对象的最近访问时间, 可同时刷新URL的校验时间"""
+    with db_transaction() as conn:
+        conn.execute("UPDATE media_objects SET last_access = ? WHERE sha256 = ?", (last_access, sha256))
+        if fetched_at_url:
+            conn.execute("UPDATE media_urls SET fetched_at = ? WHERE url = ?", (last_access, fetched_at_url))
+
+def get_media_store_size():
+    """素材下载缓存中对象的总大小（字节）"""
+    with db_connection() as conn:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM media_objects").fetchone()[0]
+
+def get_lru_media_objects(limit=100):
+    """按最近访问时间从早到晚获取素材对象 (sha256, size) 列表"""
+    with db_connection() as conn:
+        return conn.execute("SELECT sha256, size FROM media_objects ORDER BY last_access LIMIT ?",
+                            (limit,)).fetchall()
+
+def delete_media_objects(sha256_list):
+    """删除素材对象及指向它们的URL记录"""
+    with db_transaction() as conn:
+        rows = [(sha256,) for sha256 in sha256_list]
+        conn.executemany("DELETE FROM media_urls WHERE sha256 = ?", rows)
+        conn.executemany("DELETE FROM media_objects WHERE sha256 = ?", rows)
+
+def get_media_probe(url):
+    """获取URL缓存的媒体信息探测结果"""
+    with db_connection() as conn:
+        result = conn.execute("SELECT validator, info, probed_at FROM media_probes WHERE url = ?", (url,)).fetchone()
+
+    if result:
+        return {
+            'validator': result[0],
+            'info': json.loads(result[1]),
+            'probed_at': result[2]
+        }
+    return None
+
+def put_media_probe(url, validator, info, probed_at=None):
+    """保存URL的媒体信息探测结果"""
+    with db_transaction() as conn:
+        conn.execute("INSERT OR REPLACE INTO media_probes (url, validator, info, probed_at) VALUES (?, ?, ?, ?)",
+                     (url, validator, json.dumps(info), probed_at if probed_at is not None else time.time()))
+
+def enqueue_save_job(draft_id, draft_folder, client_os, priority=0):
+    """
+    加入草稿保存任务, 同一草稿的重复请求合并为一个任务（保留较高的优先级与最新的参数）
+    :return: 'queued' 新任务; 'merged' 已合并到排队中的任务; 'rerun' 任务正在运行, 完成后重新保存
+    """
+    with db_transaction() as conn:
+        row = conn.execute("SELECT state FROM save_jobs WHERE draft_id = ?", (draft_id,)).fetchone()
+        if row is None:
+            conn.execute("""
+                INSERT INTO save_jobs (draft_id, draft_folder, client_os, priority, state, created_at)
+                VALUES (?, ?, ?, ?, 'queued', ?)
+            """, (draft_id, draft_folder, client_os, priority, time.time()))
+            return 'queued'
+        conn.execute("""
+            UPDATE save_jobs SET draft_folder = ?, client_os = ?, priority = MAX(priority, ?),
+                rerun = CASE WHEN state = 'running' THEN 1 ELSE rerun END
+            WHERE draft_id = ?
+        """, (draft_folder, client_os, priority, draft_id))
+        return 'rerun' if row[0] == 'running' else 'merged'
+
+def claim_save_job():
+    """取出优先级最高、最早加入的排队任务并标记为运行中, 没有任务时返回None"""
+    with db_transaction() as conn:
+        row = conn.execute("""
+            SELECT draft_id, draft_folder, client_os, priority, attempts FROM save_jobs
+            WHERE state = 'queued' ORDER BY priority DESC, created_at LIMIT 1
+        """).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE save_jobs SET state = 'running', rerun = 0, attempts = attempts + 1 WHERE draft_id = ?",
+                     (row[0],))
+
+    return {
+        'draft_id': row[0],
+        'draft_folder': row[1],
+        'client_os': row[2],
+        'priority': row[3],
+        'attempts': row[4] + 1
+    }
+
+def finish_save_job(draft_id):
+    """
+    结束运行中的任务: 运行期间有新的保存请求时重新排队, 否则删除任务
+    :return: 是否重新排队
+    """
+    with db_transaction() as conn:
+        row = conn.execute("SELECT rerun FROM save_jobs WHERE draft_id = ?", (draft_id,)).fetchone()
+        if row is not None and row[0]:
+            conn.execute("UPDATE save_jobs SET state = 'queued', rerun = 0, attempts = 0, created_at = ? WHERE draft_id = ?",
+                         (time.time(), draft_id))
+            return True
+        conn.execute("DELETE FROM save_jobs WHERE draft_id = ?", (draft_id,))
+        return False
+
+def requeue_running_save_jobs():
+    """服务启动时将上次退出时仍在运行的任务重新排队, 返回任务数"""
+    with db_transaction() as conn:
+        return conn.execute("UPDATE save_jobs SET state = 'queued' WHERE state = 'running'").rowcount
+
+def count_save_jobs(state='queued'):
+    with db_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM save_jobs WHERE state = ?", (state,)).fetchone()[0]
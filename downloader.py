@@ -1,11 +1,78 @@
 import os
 import subprocess
+import threading
 import time
 import requests
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException, Timeout
 from urllib.parse import urlparse, unquote, urlunparse
 from settings.local import DOWNLOAD_HEADERS, FILE_SERVER_PUBLIC_HOST, FILE_SERVER_INTERNAL_BASE
+from settings.local import SAVE_DOWNLOAD_WORKERS, DOWNLOADS_PER_HOST, MEDIA_PROBE_WORKERS
+
+# Connections kept alive per host in the shared session: at most DOWNLOADS_PER_HOST downloads (parallel chunks
+# included) plus the HEAD validations issued by the download and media probe workers outside the host slots
+POOL_MAXSIZE = max(32, DOWNLOADS_PER_HOST + SAVE_DOWNLOAD_WORKERS + MEDIA_PROBE_WORKERS)
+# Read/write buffer size for downloads
+BLOCK_SIZE = 1024 * 1024
+# Files at least this large are downloaded as parallel byte ranges when the server advertises Accept-Ranges
+PARALLEL_THRESHOLD = 32 * 1024 * 1024
+# Upper bound on chunks per file; each chunk beyond the first needs a free host slot
+PARALLEL_CHUNKS = 4
+# Sidecar next to a .part file holding the remote file's ETag/Last-Modified, sent as If-Range when resuming
+VALIDATOR_SUFFIX = ".validator"
+# Parallel chunks are written here and renamed to the .part file only once every chunk is complete
+CHUNKS_SUFFIX = ".chunks"
+
+_session = None
+_session_lock = threading.Lock()
+
+_download_executor = None
+# host -> 限制该主机并发下载数的信号量
+_host_slots = {}
+
+def get_session():
+    """
+    Shared requests session; its connection pool reuses DNS/TCP/TLS setup across downloads from the same host
+    :return: requests.Session
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_MAXSIZE, pool_maxsize=POOL_MAXSIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+def get_download_executor():
+    """
+    Download pool shared by all draft save jobs, so concurrent saves queue their downloads instead of each
+    starting its own pool
+    :return: ThreadPoolExecutor
+    """
+    global _download_executor
+    if _download_executor is None:
+        with _session_lock:
+            if _download_executor is None:
+                _download_executor = ThreadPoolExecutor(max_workers=SAVE_DOWNLOAD_WORKERS,
+                                                        thread_name_prefix="draft_download")
+    return _download_executor
+
+def _host_slot(url):
+    """
+    Semaphore limiting concurrent downloads from the host of url to DOWNLOADS_PER_HOST
+    :return: threading.BoundedSemaphore
+    """
+    host = urlparse(url).netloc.lower()
+    slot = _host_slots.get(host)
+    if slot is None:
+        with _session_lock:
+            slot = _host_slots.setdefault(host, threading.BoundedSemaphore(DOWNLOADS_PER_HOST))
+    return slot
 
 def download_video(video_url, draft_name, material_name):
     """
@@ -78,11 +145,11 @@ def download_image(image_url, draft_name, material_name):
 
 def download_audio(audio_url, draft_name, material_name, max_retries=3):
     """
-    Download audio using requests (more reliable than ffmpeg for remote URLs)
+    Download audio using the shared pooled session (more reliable than ffmpeg for remote URLs)
     :param audio_url: Audio URL  
     :param draft_name: Draft name
     :param material_name: Material name
-    :param max_retries: Maximum retry attempts
+    :param max_retries: Maximum retry attempts, interrupted downloads are resumed
     :return: Local audio path
     """
     # Ensure directory exists
@@ -97,65 +164,18 @@ def download_audio(audio_url, draft_name, material_name, max_retries=3):
         print(f"Audio file already exists: {local_path}")
         return local_path
     
-    # 🔧 修复：使用requests替代ffmpeg，更稳定可靠
-    import requests
-    import time
+    print(f"Downloading audio: {audio_url[:80]}...")
+    if not download_file(audio_url, local_path, max_retries=max_retries, timeout=60):
+        raise Exception(f"Failed to download audio after {max_retries} attempts: {audio_url}")
     
-    last_error = None
-    for attempt in range(max_retries):
-        try:
-            print(f"Downloading audio (attempt {attempt+1}/{max_retries}): {audio_url[:80]}...")
-            
-            # 🔧 改进：使用requests下载，支持重定向和各种HTTP特性，增强请求头
-            response = requests.get(
-                audio_url, 
-                timeout=60,  # 60秒超时
-                stream=True,  # 流式下载，节省内存
-                allow_redirects=True,
-                headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36',
-                    'Accept': '*/*',
-                    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                    'Accept-Encoding': 'identity'  # 避免压缩，直接下载原始音频
-                }
-            )
-            response.raise_for_status()  # 检查HTTP错误
-            
-            # 写入文件
-            with open(local_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            
-            # 验证文件已下载且不为空
-            if not os.path.exists(local_path):
-                raise Exception(f"File was not created: {local_path}")
-            
-            file_size = os.path.getsize(local_path)
-            if file_size == 0:
-                raise Exception(f"Downloaded file is empty: {local_path}")
-            
-            print(f"✅ Audio downloaded successfully: {material_name} ({file_size} bytes)")
-            return local_path
-            
-        except requests.Timeout:
-            last_error = f"Download timeout after 60 seconds"
-            print(f"⚠️  {last_error}")
-        except requests.RequestException as e:
-            last_error = f"HTTP error: {str(e)}"
-            print(f"⚠️  {last_error}")
-        except Exception as e:
-            last_error = f"Download error: {str(e)}"
-            print(f"⚠️  {last_error}")
-        
-        # 重试前等待（指数退避）
-        if attempt < max_retries - 1:
-            wait_time = 2 ** attempt  # 1s, 2s, 4s...
-            print(f"Retrying in {wait_time} seconds...")
-            time.sleep(wait_time)
+    # 验证文件已下载且不为空
+    file_size = os.path.getsize(local_path)
+    if file_size == 0:
+        os.remove(local_path)
+        raise Exception(f"Downloaded file is empty: {local_path}")
     
-    # 所有重试都失败
-    raise Exception(f"Failed to download audio after {max_retries} attempts: {last_error}")
+    print(f"✅ Audio downloaded successfully: {material_name} ({file_size} bytes)")
+    return local_path
 
 def download_file(url:str, local_filename, max_retries=3, timeout=180):
     # 检查是否是本地文件路径
@@ -178,9 +198,11 @@ def download_file(url:str, local_filename, max_retries=3, timeout=180):
         print(f"File saved as: {os.path.abspath(local_filename)}")
         return local_filename
     
-    # 原有的下载逻辑
     # Extract directory part
     directory = os.path.dirname(local_filename)
+    url, headers = _build_request(url)
+    # 未完成的下载保存在.part文件中, 重试时通过Range请求从断点继续
+    part_filename = local_filename + ".part"
 
     retries = 0
     while retries < max_retries:
@@ -198,56 +220,15 @@ def download_file(url:str, local_filename, max_retries=3, timeout=180):
                 os.makedirs(directory, exist_ok=True)
                 print(f"Created directory: {directory}")
 
-            # Build headers dynamically; avoid hardcoded Referer which may cause 403
-            parsed = urlparse(url)
-            # Optional host rewrite to internal base
-            try:
-                if FILE_SERVER_PUBLIC_HOST and FILE_SERVER_INTERNAL_BASE and parsed.netloc == FILE_SERVER_PUBLIC_HOST:
-                    internal = urlparse(FILE_SERVER_INTERNAL_BASE)
-                    parsed = parsed._replace(scheme=internal.scheme or parsed.scheme,
-                                             netloc=internal.netloc or parsed.netloc)
-                    url = urlunparse(parsed)
-            except Exception:
-                pass
-            origin = f"{parsed.scheme}://{parsed.netloc}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36',
-                'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'
-            }
-            # Only set Referer when origin is http(s)
-            if parsed.scheme in ('http', 'https'):
-                headers['Referer'] = origin
-
-            # Merge custom headers from config (take precedence)
-            if isinstance(DOWNLOAD_HEADERS, dict) and DOWNLOAD_HEADERS:
-                headers.update(DOWNLOAD_HEADERS)
-            with requests.get(url, stream=True, timeout=timeout, headers=headers) as response:
-                response.raise_for_status()
-                
-                total_size = int(response.headers.get('content-length', 0))
-                block_size = 1024
-                
-                with open(local_filename, 'wb') as file:
-                    bytes_written = 0
-                    for chunk in response.iter_content(block_size):
-                        if chunk:
-                            file.write(chunk)
-                            bytes_written += len(chunk)
-                            
-                            if total_size > 0:
-                                progress = bytes_written / total_size * 100
-                                # For frequently updated progress, consider using logger.debug or more granular control to avoid large log files
-                                # Or only output progress to console, not write to file
-                                print(f"\r[PROGRESS] {progress:.2f}% ({bytes_written/1024:.2f}KB/{total_size/1024:.2f}KB)", end='')
-                                pass # Avoid printing too much progress information in log files
-                
-                if total_size > 0:
-                    # print() # Original newline
-                    pass
-                print(f"Download completed in {time.time()-start_time:.2f} seconds")
-                print(f"File saved as: {os.path.abspath(local_filename)}")
-                return local_filename
+            # 仅在传输期间占用主机并发名额, 重试等待期间释放
+            slot = _host_slot(url)
+            with slot:
+                _download_to_part(url, headers, part_filename, timeout, max_retries, slot)
+            os.replace(part_filename, local_filename)
+            _remove_file(part_filename + VALIDATOR_SUFFIX)
+            print(f"Download completed in {time.time()-start_time:.2f} seconds")
+            print(f"File saved as: {os.path.abspath(local_filename)}")
+            return local_filename
                 
         except Timeout:
             print(f"Download timed out after {timeout} seconds")
@@ -261,3 +242,213 @@ def download_file(url:str, local_filename, max_retries=3, timeout=180):
     print(f"Download failed after {max_retries} attempts for URL: {url}")
     return False
 
+def _build_request(url):
+    """
+    Apply the internal host rewrite and build request headers for a download
+    :return: (url, headers)
+    """
+    # Build headers dynamically; avoid hardcoded Referer which may cause 403
+    parsed = urlparse(url)
+    # Optional host rewrite to internal base
+    try:
+        if FILE_SERVER_PUBLIC_HOST and FILE_SERVER_INTERNAL_BASE and parsed.netloc == FILE_SERVER_PUBLIC_HOST:
+            internal = urlparse(FILE_SERVER_INTERNAL_BASE)
+            parsed = parsed._replace(scheme=internal.scheme or parsed.scheme,
+                                     netloc=internal.netloc or parsed.netloc)
+            url = urlunparse(parsed)
+    except Exception:
+        pass
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36',
+        'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
+        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+        # Byte ranges only make sense on the unencoded body
+        'Accept-Encoding': 'identity'
+    }
+    # Only set Referer when origin is http(s)
+    if parsed.scheme in ('http', 'https'):
+        headers['Referer'] = origin
+
+    # Merge custom headers from config (take precedence)
+    if isinstance(DOWNLOAD_HEADERS, dict) and DOWNLOAD_HEADERS:
+        headers.update(DOWNLOAD_HEADERS)
+    return url, headers
+
+def _content_range_total(response):
+    """Total size from a 'Content-Range: bytes a-b/total' (or 'bytes */total') header, None if unknown"""
+    total = response.headers.get('Content-Range', '').rpartition('/')[2]
+    return int(total) if total.isdigit() else None
+
+def _remove_file(path):
+    """Remove path if it exists"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _response_validator(response):
+    """Validator usable in If-Range: the ETag unless it is weak, otherwise Last-Modified; None if the server sent neither"""
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('Last-Modified')
+
+def _read_validator(part_filename):
+    """Validator recorded for part_filename, None if there is none"""
+    try:
+        with open(part_filename + VALIDATOR_SUFFIX, encoding='utf-8') as file:
+            return file.read().strip() or None
+    except OSError:
+        return None
+
+def _write_validator(part_filename, validator):
+    """Record the validator of the remote file part_filename is downloaded from, or forget it when None"""
+    if validator:
+        with open(part_filename + VALIDATOR_SUFFIX, 'w', encoding='utf-8') as file:
+            file.write(validator)
+    else:
+        _remove_file(part_filename + VALIDATOR_SUFFIX)
+
+def _acquire_free_slots(slot, count):
+    """Take up to count slots that are free right now without waiting, returning how many were taken"""
+    taken = 0
+    while taken < count and slot.acquire(blocking=False):
+        taken += 1
+    return taken
+
+def _download_to_part(url, headers, part_filename, timeout, max_retries, slot=None):
+    """
+    Download url into part_filename, resuming from its current size when the server supports Range requests.
+    A resume sends If-Range with the validator recorded when the .part file was started, so a remote file that
+    changed in between is downloaded again instead of being appended to stale bytes.
+    Large files on servers advertising Accept-Ranges are fetched as parallel chunks, one connection per host slot:
+    the caller's slot (held while this runs) covers the first chunk and each further chunk needs a free one.
+    Raises on failure, leaving the .part file for the next attempt to resume.
+    """
+    offset = os.path.getsize(part_filename) if os.path.exists(part_filename) else 0
+    validator = _read_validator(part_filename) if offset else None
+    if offset and not validator:
+        # Without a validator there is no way to tell whether the .part file still matches the remote file
+        print("Partial file has no recorded ETag/Last-Modified, restarting download")
+        offset = 0
+    request_headers = dict(headers)
+    if offset:
+        request_headers['Range'] = f'bytes={offset}-'
+        request_headers['If-Range'] = validator
+
+    with get_session().get(url, stream=True, timeout=timeout, headers=request_headers) as response:
+        if offset and response.status_code == 416:
+            # The .part file may already be complete (interrupted before the rename)
+            if _content_range_total(response) == offset:
+                return
+            os.remove(part_filename)
+            _write_validator(part_filename, None)
+            raise Exception("Partial file does not match the remote file, restarting download")
+        response.raise_for_status()
+
+        if offset and response.status_code != 206:
+            # Range not supported or the remote file changed (If-Range failed): start over
+            print("Server ignored the Range request, restarting download")
+            offset = 0
+        elif offset:
+            print(f"Resuming download at {offset/1024:.2f}KB")
+
+        content_length = response.headers.get('content-length')
+        total_size = offset + int(content_length) if content_length else 0
+
+        extra_slots = 0
+        if (not offset and total_size >= PARALLEL_THRESHOLD
+                and response.headers.get('Accept-Ranges', '').lower() == 'bytes'):
+            # Without a free slot the download simply continues over this connection
+            extra_slots = _acquire_free_slots(slot, PARALLEL_CHUNKS - 1) if slot else PARALLEL_CHUNKS - 1
+        if extra_slots:
+            try:
+                response.close()
+                # Drop any stale .part first, it is replaced only once all chunks are downloaded
+                _remove_file(part_filename)
+                _write_validator(part_filename, None)
+                _download_parallel(url, headers, part_filename, total_size, _response_validator(response),
+                                   timeout, max_retries, chunks=extra_slots + 1)
+            finally:
+                for _ in range(extra_slots if slot else 0):
+                    slot.release()
+            return
+
+        with open(part_filename, 'ab' if offset else 'wb', buffering=BLOCK_SIZE) as file:
+            if not offset:
+                # Recorded after truncating, so the validator always describes the bytes in the .part file
+                _write_validator(part_filename, _response_validator(response))
+            bytes_written = offset
+            for chunk in response.iter_content(BLOCK_SIZE):
+                if chunk:
+                    file.write(chunk)
+                    bytes_written += len(chunk)
+                    
+                    if total_size > 0:
+                        progress = bytes_written / total_size * 100
+                        # Only output progress to console, not write to file
+                        print(f"\r[PROGRESS] {progress:.2f}% ({bytes_written/1024:.2f}KB/{total_size/1024:.2f}KB)", end='')
+
+    if total_size > 0:
+        print()
+        if bytes_written < total_size:
+            raise Exception(f"Connection closed early ({bytes_written}/{total_size} bytes)")
+
+def _download_parallel(url, headers, part_filename, total_size, validator, timeout, max_retries,
+                       chunks=PARALLEL_CHUNKS):
+    """
+    Download a file as chunks byte ranges written into a preallocated chunks file.
+    The chunks file has holes until every range is done, so it is never resumed: it becomes the .part file only
+    once complete, and a leftover one from an interrupted run is simply overwritten.
+    """
+    print(f"Downloading {total_size/1024/1024:.2f}MB in {chunks} parallel chunks")
+    chunks_filename = part_filename + CHUNKS_SUFFIX
+    with open(chunks_filename, 'wb') as file:
+        file.truncate(total_size)
+
+    chunk_size = -(-total_size // chunks)
+    ranges = [(start, min(start + chunk_size, total_size) - 1) for start in range(0, total_size, chunk_size)]
+    try:
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [executor.submit(_download_range, url, headers, chunks_filename, start, end, validator,
+                                       timeout, max_retries)
+                       for start, end in ranges]
+            for future in futures:
+                future.result()
+    except Exception:
+        os.remove(chunks_filename)
+        raise
+    _write_validator(part_filename, validator)
+    os.replace(chunks_filename, part_filename)
+
+def _download_range(url, headers, filename, start, end, validator, timeout, max_retries):
+    """Download bytes [start, end] into filename at the same offset, resuming the range on errors"""
+    position = start
+    attempt = 0
+    while position <= end:
+        try:
+            request_headers = dict(headers)
+            request_headers['Range'] = f'bytes={position}-{end}'
+            if validator:
+                # A changed remote file answers with 200 instead of mixing two versions into one file
+                request_headers['If-Range'] = validator
+            with get_session().get(url, stream=True, timeout=timeout, headers=request_headers) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise Exception(f"Server did not honour Range request (status {response.status_code})")
+                with open(filename, 'r+b', buffering=BLOCK_SIZE) as file:
+                    file.seek(position)
+                    for chunk in response.iter_content(BLOCK_SIZE):
+                        if chunk:
+                            chunk = chunk[:end - position + 1]
+                            file.write(chunk)
+                            position += len(chunk)
+            if position <= end:
+                raise Exception(f"Connection closed early at byte {position} of range {start}-{end}")
+        except (RequestException, Exception) as e:
+            attempt += 1
+            if attempt >= max_retries:
+                raise
+            print(f"Chunk {start}-{end} failed ({e}), resuming at byte {position}")
+            time.sleep(2 ** attempt)
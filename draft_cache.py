@@ -1,104 +1,349 @@
 from collections import OrderedDict
 import pyJianYingDraft as draft
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple, Union
+import atexit
 import pickle
 import json
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from settings.local import DRAFT_PERSIST_DELAY, DRAFT_PERSIST_MAX_STALENESS, DRAFT_CACHE_MAX_BYTES
 
 # Modify global variable, use OrderedDict to implement LRU cache, limit the maximum number to 10000
 DRAFT_CACHE: Dict[str, 'draft.Script_file'] = OrderedDict()  # Use Dict for type hinting
 MAX_CACHE_SIZE = 10000
+# 缓存草稿估算内存总量上限（字节）, 超出时淘汰最久未使用的草稿, 被淘汰的草稿可从数据库快照和操作日志恢复
+MAX_CACHE_BYTES = DRAFT_CACHE_MAX_BYTES
+
+# 草稿内存估算参数（字节）, 由tracemalloc实测各类对象的平均开销取整
+_BASE_BYTES = 16 * 1024
+_SEGMENT_BYTES = 2048
+_MATERIAL_BYTES = 512
+_KEYFRAME_BYTES = 300
+_IMPORTED_ITEM_BYTES = 2048
+
+# 各草稿的估算内存及其总量, 与DRAFT_CACHE的增删同步维护
+_DRAFT_BYTES: Dict[str, int] = {}
+_cache_bytes = 0
+_cache_lock = threading.RLock()
+# 缓存命中统计
+_STATS = {"hits": 0, "misses": 0, "loads": 0, "evictions": 0}
+
+# 草稿快照格式, 以魔数开头以区分旧版base64文本快照
+SNAPSHOT_MAGIC = b"CCDS"
+SNAPSHOT_VERSION = 1
+# zlib压缩级别, 1级在pickle数据上已有较高压缩率且速度最快
+SNAPSHOT_COMPRESS_LEVEL = 1
+
+# Write-behind 持久化状态: draft_id -> (首次标脏时间, 最近一次标脏时间), 使用time.monotonic()计时
+_DIRTY_DRAFTS: Dict[str, Tuple[float, float]] = {}
+_dirty_cond = threading.Condition()
+_writer_thread: Optional[threading.Thread] = None
+_writer_stopping = False
+
+# 草稿锁: draft_id -> [可重入锁, 引用计数], 串行化同一草稿的编辑、写入与保存, 引用计数归零时回收
+_DRAFT_LOCKS: Dict[str, list] = {}
+_draft_locks_guard = threading.Lock()
 
-def serialize_script(script: draft.Script_file) -> str:
+# 增量操作日志状态: 缓存中草稿已应用的最后一条操作序号, 以及数据库快照包含的最后一条操作序号
+DRAFT_OP_SEQ: Dict[str, int] = {}
+_SNAPSHOT_SEQ: Dict[str, int] = {}
+
+def serialize_script(script: draft.Script_file) -> Optional[bytes]:
     """
-    序列化Script_file对象为JSON字符串
+    序列化Script_file对象为二进制快照
+    格式为: 魔数 + 1字节格式版本 + 负载, 版本1的负载为zlib压缩的pickle(最高协议)
     :param script: Script_file对象
-    :return: JSON字符串
+    :return: 快照字节串, 失败时返回None
     """
     try:
-        # 使用pickle序列化，然后base64编码
-        import base64
-        pickled_data = pickle.dumps(script)
-        return base64.b64encode(pickled_data).decode('utf-8')
+        pickled_data = pickle.dumps(script, protocol=pickle.HIGHEST_PROTOCOL)
+        return SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION]) + zlib.compress(pickled_data, SNAPSHOT_COMPRESS_LEVEL)
     except Exception as e:
         print(f"序列化草稿失败: {e}")
         return None
 
-def deserialize_script(script_data: str) -> Optional[draft.Script_file]:
+def deserialize_script(script_data: Union[bytes, str]) -> Optional[draft.Script_file]:
     """
-    从JSON字符串反序列化Script_file对象
-    :param script_data: JSON字符串
+    从快照反序列化Script_file对象, 兼容旧版base64编码的pickle字符串
+    :param script_data: serialize_script生成的快照, 或旧版base64字符串
     :return: Script_file对象或None
     """
     try:
-        import base64
-        pickled_data = base64.b64decode(script_data.encode('utf-8'))
-        return pickle.loads(pickled_data)
+        if is_legacy_snapshot(script_data):
+            import base64
+            return pickle.loads(base64.b64decode(script_data.encode('utf-8')))
+
+        if not script_data.startswith(SNAPSHOT_MAGIC):
+            raise ValueError("未知的草稿快照格式")
+        version = script_data[len(SNAPSHOT_MAGIC)]
+        payload = memoryview(script_data)[len(SNAPSHOT_MAGIC) + 1:]
+        if version == 1:
+            return pickle.loads(zlib.decompress(payload))
+        raise ValueError(f"不支持的草稿快照版本: {version}")
     except Exception as e:
         print(f"反序列化草稿失败: {e}")
         return None
 
+def is_legacy_snapshot(script_data: Union[bytes, str]) -> bool:
+    """
+    判断是否为旧版(base64编码的pickle字符串)快照
+    :param script_data: 数据库中的script_data
+    :return: bool
+    """
+    return isinstance(script_data, str)
+
+def migrate_legacy_snapshots(batch_size: int = 100) -> Tuple[int, int]:
+    """
+    将数据库中旧版base64快照批量转换为当前快照格式, 不修改草稿状态和修改时间
+    :param batch_size: 每个事务转换的草稿数量
+    :return: (转换成功数量, 转换失败数量)
+    """
+    from database import get_legacy_script_data_ids, get_draft_from_db, update_script_data_batch
+
+    migrated = failed = 0
+    draft_ids = get_legacy_script_data_ids()
+    for offset in range(0, len(draft_ids), batch_size):
+        rows = []
+        for draft_id in draft_ids[offset:offset + batch_size]:
+            result = get_draft_from_db(draft_id)
+            script = deserialize_script(result['script_data']) if result else None
+            script_data = serialize_script(script) if script else None
+            if script_data is None:
+                print(f"转换草稿快照失败: {draft_id}")
+                failed += 1
+                continue
+            rows.append((draft_id, script_data))
+        update_script_data_batch(rows)
+        migrated += len(rows)
+    return migrated, failed
+
+def estimate_script_size(script: draft.Script_file) -> int:
+    """
+    估算草稿对象占用的内存, 只统计对象数量而不遍历其内容, 开销与片段数量成正比
+    :param script: Script_file对象
+    :return: 估算的字节数
+    """
+    segments = keyframes = 0
+    for track in list(script.tracks.values()):
+        segments += len(track.segments)
+        for segment in track.segments:
+            for keyframe_list in segment.common_keyframes:
+                keyframes += len(keyframe_list.keyframes)
+    materials = sum(len(value) for value in vars(script.materials).values() if isinstance(value, list))
+    imported = sum(len(value) for value in script.imported_materials.values() if isinstance(value, list))
+    imported += sum(len(getattr(track, 'segments', ())) for track in script.imported_tracks)
+
+    return (_BASE_BYTES + segments * _SEGMENT_BYTES + materials * _MATERIAL_BYTES
+            + keyframes * _KEYFRAME_BYTES + imported * _IMPORTED_ITEM_BYTES)
+
+def _set_draft_size(key: str, size: int) -> None:
+    """更新草稿的估算内存, 调用方需持有_cache_lock"""
+    global _cache_bytes
+    _cache_bytes += size - _DRAFT_BYTES.get(key, 0)
+    _DRAFT_BYTES[key] = size
+
+def _evict_over_budget(keep: str) -> list:
+    """淘汰最久未使用的草稿直至满足数量和内存上限, 调用方需持有_cache_lock
+
+    正在被其他线程使用（草稿锁被占用）的草稿不会被淘汰; 被淘汰草稿的锁由本线程持有,
+    直到_persist_evicted将其写入数据库, 以免其他线程在写入完成前从数据库加载到旧快照
+    :param keep: 不被淘汰的草稿ID（刚访问的草稿）
+    :return: 被淘汰的(draft_id, script, 草稿锁)列表
+    """
+    global _cache_bytes
+    evicted = []
+    if len(DRAFT_CACHE) <= MAX_CACHE_SIZE and _cache_bytes <= MAX_CACHE_BYTES:
+        return evicted
+    for evicted_id in [draft_id for draft_id in DRAFT_CACHE if draft_id != keep]:
+        if len(DRAFT_CACHE) <= MAX_CACHE_SIZE and _cache_bytes <= MAX_CACHE_BYTES:
+            break
+        entry = _acquire_draft_lock(evicted_id, blocking=False)
+        if entry is None:
+            continue
+        evicted.append((evicted_id, DRAFT_CACHE.pop(evicted_id), entry))
+        _cache_bytes -= _DRAFT_BYTES.pop(evicted_id, 0)
+        _STATS["evictions"] += 1
+    return evicted
+
+def _persist_evicted(evicted: list) -> None:
+    """被淘汰的草稿若仍有未写入的修改, 需立即落盘, 否则修改会丢失"""
+    for evicted_id, evicted_script, entry in evicted:
+        try:
+            print(f"{evicted_id}, Cache is full, evicted the least recently used item")
+            if is_dirty(evicted_id):
+                flush_draft(evicted_id, evicted_script)
+            DRAFT_OP_SEQ.pop(evicted_id, None)
+            _SNAPSHOT_SEQ.pop(evicted_id, None)
+        finally:
+            _release_draft_lock(evicted_id, entry)
+
 def update_cache(key: str, value: draft.Script_file, sync_to_db: bool = True) -> None:
     """
     更新LRU缓存并可选择同步到数据库
     :param key: 草稿ID
     :param value: Script_file对象
-    :param sync_to_db: 是否同步到数据库
-    """
-    if key in DRAFT_CACHE:
-        # If the key exists, delete the old item
-        DRAFT_CACHE.pop(key)
-    elif len(DRAFT_CACHE) >= MAX_CACHE_SIZE:
-        print(f"{key}, Cache is full, deleting the least recently used item")
-        # If the cache is full, delete the least recently used item (the first item)
-        DRAFT_CACHE.popitem(last=False)
-    
-    # Add new item to the end (most recently used)
-    DRAFT_CACHE[key] = value
-    
+    :param sync_to_db: 是否同步到数据库. 同步为写回(write-behind)方式: 仅将草稿标记为脏, 由后台写入线程合并写入
+    """
+    # 估算需遍历整个草稿, 在全局缓存锁之外进行
+    size = estimate_script_size(value)
+    with _cache_lock:
+        # Add or move the item to the end (most recently used)
+        DRAFT_CACHE[key] = value
+        DRAFT_CACHE.move_to_end(key)
+        _set_draft_size(key, size)
+        # If the cache is over budget, delete the least recently used items
+        evicted = _evict_over_budget(key)
+
+    _persist_evicted(evicted)
+
     # 同步到数据库
     if sync_to_db:
-        try:
-            from database import save_draft_to_db
-            script_data = serialize_script(value)
-            if script_data:
-                save_draft_to_db(key, script_data, value.width, value.height)
-                print(f"草稿 {key} 已同步到数据库")
-        except Exception as e:
-            print(f"同步草稿到数据库失败: {e}")
+        mark_dirty(key)
+
+def refresh_draft_size(draft_id: str) -> None:
+    """
+    草稿被修改后重新估算其内存, 并在超出内存上限时淘汰其他草稿
+    :param draft_id: 草稿ID
+    """
+    script = DRAFT_CACHE.get(draft_id)
+    if script is None:
+        return
+    # 估算需遍历整个草稿, 在全局缓存锁之外进行, 锁内只更新估算值
+    size = estimate_script_size(script)
+    with _cache_lock:
+        # 估算期间草稿可能已被淘汰或替换
+        if DRAFT_CACHE.get(draft_id) is not script:
+            return
+        _set_draft_size(draft_id, size)
+        evicted = _evict_over_budget(draft_id)
+    _persist_evicted(evicted)
+
+def get_cache_stats() -> Dict[str, int]:
+    """
+    获取缓存统计: 命中/未命中/从数据库加载/淘汰次数, 缓存草稿数量及估算内存
+    :return: dict
+    """
+    with _cache_lock:
+        stats = dict(_STATS)
+        stats.update({
+            "drafts": len(DRAFT_CACHE),
+            "bytes": _cache_bytes,
+            "max_drafts": MAX_CACHE_SIZE,
+            "max_bytes": MAX_CACHE_BYTES,
+            "dirty": len(_DIRTY_DRAFTS)
+        })
+    return stats
 
 def get_draft(draft_id: str) -> Optional[draft.Script_file]:
     """
-    获取草稿，优先从缓存获取，缓存未命中时从数据库获取
+    获取草稿，优先从缓存获取，缓存未命中时从数据库加载快照并重放快照之后的操作日志
     :param draft_id: 草稿ID
     :return: Script_file对象或None
     """
     # 首先尝试从缓存获取
-    if draft_id in DRAFT_CACHE:
-        # 更新LRU顺序
-        script = DRAFT_CACHE.pop(draft_id)
-        DRAFT_CACHE[draft_id] = script
+    with _cache_lock:
+        script = DRAFT_CACHE.get(draft_id)
+        if script is not None:
+            # 更新LRU顺序
+            DRAFT_CACHE.move_to_end(draft_id)
+            _STATS["hits"] += 1
+        else:
+            _STATS["misses"] += 1
+    if script is not None:
         print(f"从缓存获取草稿: {draft_id}")
         return script
-    
-    # 缓存未命中，尝试从数据库获取
-    try:
-        from database import get_draft_from_db
-        result = get_draft_from_db(draft_id)
-        if result:
-            script_data = result['script_data']
-            width = result['width']
-            height = result['height']
-            script = deserialize_script(script_data)
-            if script:
-                # 加载到缓存中（不再次同步到数据库）
-                update_cache(draft_id, script, sync_to_db=False)
-                print(f"从数据库加载草稿到缓存: {draft_id}")
-                return script
-    except Exception as e:
-        print(f"从数据库获取草稿失败: {e}")
-    
+
+    # 缓存未命中，尝试从数据库获取; 持有草稿锁, 避免多个线程重复加载而相互覆盖
+    with draft_lock(draft_id):
+        script = DRAFT_CACHE.get(draft_id)
+        if script is not None:
+            return script
+        try:
+            from database import get_draft_from_db
+            result = get_draft_from_db(draft_id)
+            if result:
+                script_data = result['script_data']
+                width = result['width']
+                height = result['height']
+                script = deserialize_script(script_data)
+                if script:
+                    # 加载到缓存中（不再次同步到数据库）
+                    update_cache(draft_id, script, sync_to_db=False)
+                    DRAFT_OP_SEQ[draft_id] = _SNAPSHOT_SEQ[draft_id] = result['snapshot_seq']
+                    print(f"从数据库加载草稿到缓存: {draft_id}")
+                    from draft_oplog import replay_operations
+                    if replay_operations(draft_id):
+                        refresh_draft_size(draft_id)
+                    with _cache_lock:
+                        _STATS["loads"] += 1
+                    return script
+        except Exception as e:
+            print(f"从数据库获取草稿失败: {e}")
+
     return None
 
+def discard_draft(draft_id: str) -> None:
+    """
+    从缓存中移除草稿并丢弃其未写入的修改, 下次访问时从数据库重新加载
+    :param draft_id: 草稿ID
+    """
+    with draft_lock(draft_id):
+        with _dirty_cond:
+            _DIRTY_DRAFTS.pop(draft_id, None)
+        with _cache_lock:
+            DRAFT_CACHE.pop(draft_id, None)
+            _set_draft_size(draft_id, 0)
+            _DRAFT_BYTES.pop(draft_id, None)
+        DRAFT_OP_SEQ.pop(draft_id, None)
+        _SNAPSHOT_SEQ.pop(draft_id, None)
+
+def ops_since_snapshot(draft_id: str) -> int:
+    """
+    缓存中草稿自上次写入快照以来记录的操作数量
+    :param draft_id: 草稿ID
+    :return: int
+    """
+    return DRAFT_OP_SEQ.get(draft_id, 0) - _SNAPSHOT_SEQ.get(draft_id, 0)
+
+# ===== 草稿锁 =====
+
+def _acquire_draft_lock(draft_id: str, blocking: bool = True) -> Optional[list]:
+    """获取草稿锁, 非阻塞模式下锁被占用时返回None"""
+    with _draft_locks_guard:
+        entry = _DRAFT_LOCKS.setdefault(draft_id, [threading.RLock(), 0])
+        entry[1] += 1
+    if entry[0].acquire(blocking):
+        return entry
+    _release_draft_lock(draft_id, entry, locked=False)
+    return None
+
+def _release_draft_lock(draft_id: str, entry: list, locked: bool = True) -> None:
+    if locked:
+        entry[0].release()
+    with _draft_locks_guard:
+        entry[1] -= 1
+        if entry[1] == 0:
+            _DRAFT_LOCKS.pop(draft_id, None)
+
+@contextmanager
+def draft_lock(draft_id: Optional[str]):
+    """
+    持有草稿锁执行一段代码, 同一线程内可重入
+    锁的顺序为: 草稿锁 -> _cache_lock / _dirty_cond, 持有后两者时不得阻塞等待草稿锁
+    :param draft_id: 草稿ID, 为None（即将新建草稿）时不加锁
+    """
+    if draft_id is None:
+        yield
+        return
+    entry = _acquire_draft_lock(draft_id)
+    try:
+        yield
+    finally:
+        _release_draft_lock(draft_id, entry)
+
 def draft_exists(draft_id: str) -> bool:
     """
     检查草稿是否存在（缓存或数据库）
@@ -108,11 +353,132 @@ def draft_exists(draft_id: str) -> bool:
     # 检查缓存
     if draft_id in DRAFT_CACHE:
         return True
-    
+
     # 检查数据库
     try:
         from database import draft_exists_in_db
         return draft_exists_in_db(draft_id)
     except Exception as e:
         print(f"检查数据库草稿存在性失败: {e}")
-        return False
\ No newline at end of file
+        return False
+
+# ===== Write-behind 持久化 =====
+
+def mark_dirty(draft_id: str) -> None:
+    """
+    将草稿标记为待写入, 同一草稿的多次修改会被合并为一次数据库写入
+    :param draft_id: 草稿ID
+    """
+    now = time.monotonic()
+    with _dirty_cond:
+        first_dirty, _ = _DIRTY_DRAFTS.get(draft_id, (now, now))
+        _DIRTY_DRAFTS[draft_id] = (first_dirty, now)
+        _dirty_cond.notify()
+    _ensure_writer()
+
+def is_dirty(draft_id: str) -> bool:
+    """
+    检查草稿是否有尚未写入数据库的修改
+    :param draft_id: 草稿ID
+    :return: bool
+    """
+    with _dirty_cond:
+        return draft_id in _DIRTY_DRAFTS
+
+def flush_draft(draft_id: str, script: Optional[draft.Script_file] = None) -> bool:
+    """
+    同步写入单个草稿, 返回时该草稿此前的全部修改均已落盘
+    :param draft_id: 草稿ID
+    :param script: Script_file对象, 默认从缓存中获取
+    :return: 是否写入成功（草稿无待写入修改时视为成功）
+    """
+    with draft_lock(draft_id):
+        with _dirty_cond:
+            dirty_since = _DIRTY_DRAFTS.pop(draft_id, None)
+        if dirty_since is None:
+            return True
+        if script is None:
+            script = DRAFT_CACHE.get(draft_id)
+        if script is None:
+            return True
+
+        try:
+            from database import save_draft_to_db
+            script_data = serialize_script(script)
+            if not script_data:
+                raise ValueError("序列化结果为空")
+            # 快照包含截至当前已应用的全部操作, 写入后对应的操作日志即被清理
+            snapshot_seq = DRAFT_OP_SEQ.get(draft_id, 0)
+            save_draft_to_db(draft_id, script_data, script.width, script.height, snapshot_seq)
+            _SNAPSHOT_SEQ[draft_id] = snapshot_seq
+            print(f"草稿 {draft_id} 已同步到数据库")
+            return True
+        except Exception as e:
+            print(f"同步草稿到数据库失败: {e}")
+            # 写入失败则重新标脏, 由后台线程稍后重试; 保留首次标脏时间以维持最大滞后约束
+            with _dirty_cond:
+                first_dirty, last_dirty = _DIRTY_DRAFTS.get(draft_id, dirty_since)
+                _DIRTY_DRAFTS[draft_id] = (min(first_dirty, dirty_since[0]), max(last_dirty, dirty_since[1]))
+            return False
+
+def flush_all() -> None:
+    """同步写入所有待写入的草稿"""
+    with _dirty_cond:
+        draft_ids = list(_DIRTY_DRAFTS.keys())
+    for draft_id in draft_ids:
+        flush_draft(draft_id)
+
+def _writer_loop() -> None:
+    """后台写入线程: 草稿静置DRAFT_PERSIST_DELAY秒或滞后超过DRAFT_PERSIST_MAX_STALENESS秒时写入"""
+    failed_at: Dict[str, float] = {}
+    while True:
+        with _dirty_cond:
+            while not _DIRTY_DRAFTS and not _writer_stopping:
+                _dirty_cond.wait()
+            if _writer_stopping:
+                return
+
+            now = time.monotonic()
+            due = []
+            next_deadline = None
+            for draft_id, (first_dirty, last_dirty) in _DIRTY_DRAFTS.items():
+                deadline = min(last_dirty + DRAFT_PERSIST_DELAY, first_dirty + DRAFT_PERSIST_MAX_STALENESS)
+                # 写入失败的草稿至少间隔DRAFT_PERSIST_DELAY再重试, 避免忙等
+                deadline = max(deadline, failed_at.get(draft_id, 0) + DRAFT_PERSIST_DELAY)
+                if deadline <= now:
+                    due.append(draft_id)
+                elif next_deadline is None or deadline < next_deadline:
+                    next_deadline = deadline
+            if not due:
+                _dirty_cond.wait(max(next_deadline - now, 0.01))
+                continue
+
+        for draft_id in due:
+            if flush_draft(draft_id):
+                failed_at.pop(draft_id, None)
+            else:
+                failed_at[draft_id] = time.monotonic()
+
+def _ensure_writer() -> None:
+    """按需启动后台写入线程, 并注册退出时的写入钩子"""
+    global _writer_thread, _writer_stopping
+    if _writer_thread is not None and _writer_thread.is_alive():
+        return
+    with _dirty_cond:
+        if _writer_thread is not None and _writer_thread.is_alive():
+            return
+        _writer_stopping = False
+        _writer_thread = threading.Thread(target=_writer_loop, name="draft-cache-writer", daemon=True)
+        _writer_thread.start()
+
+def shutdown_writer() -> None:
+    """停止后台写入线程并写入所有剩余的脏草稿, 在进程退出时自动调用"""
+    global _writer_stopping
+    with _dirty_cond:
+        _writer_stopping = True
+        _dirty_cond.notify_all()
+    if _writer_thread is not None and _writer_thread is not threading.current_thread():
+        _writer_thread.join(timeout=10)
+    flush_all()
+
+atexit.register(shutdown_writer)
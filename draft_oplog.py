@@ -0,0 +1,174 @@
+"""
+草稿增量操作日志
+编辑接口以(操作名, 参数)的形式追加到draft_ops表, 写入开销与单次编辑的大小相关, 而不再与草稿大小相关;
+每累计OPLOG_COMPACT_INTERVAL条操作由写回线程写入一次完整快照并清理已被覆盖的日志.
+缓存未命中时由快照重放其后的操作恢复草稿, 同时基于日志提供编辑历史与撤销.
+"""
+
+import functools
+import importlib
+import inspect
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import draft_cache
+from database import append_draft_op, get_draft_ops, delete_draft_ops_from
+from settings.local import OPLOG_COMPACT_INTERVAL
+
+# 操作名 -> 操作实现（未经装饰的原始函数）
+_OPERATIONS: Dict[str, Callable] = {}
+# 操作名 -> 实现所在模块, 重放时按需导入以完成注册
+_OPERATION_MODULES = {
+    "add_video": "add_video_track",
+    "add_audio": "add_audio_track",
+    "add_text": "add_text_impl",
+    "add_subtitle": "add_subtitle_impl",
+    "add_image": "add_image_impl",
+    "add_video_keyframe": "add_video_keyframe_impl",
+    "add_effect": "add_effect_impl",
+    "add_sticker": "add_sticker_impl",
+}
+
+# 线程内正在执行的操作层数, 嵌套调用和重放时不重复记录
+_local = threading.local()
+
+def draft_operation(name: str, replayable: Optional[Callable[[Dict[str, Any]], bool]] = None):
+    """
+    将编辑接口注册为可记录、可重放的草稿操作
+    实现函数必须返回包含"draft_id"的字典
+    :param name: 操作名称, 写入日志后不可更改
+    :param replayable: 可选, 根据调用参数判断该次调用能否仅凭参数重放（如依赖外部文件时不能）,
+                       不能重放的调用直接写入完整快照
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        _OPERATIONS[name] = func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            depth = getattr(_local, 'depth', 0)
+            if depth:
+                return func(*args, **kwargs)
+
+            params = dict(signature.bind(*args, **kwargs).arguments)
+            # 持有草稿锁完成修改和记录, 保证同一草稿的操作按日志顺序串行执行
+            with draft_cache.draft_lock(params.get('draft_id')):
+                _local.depth = 1
+                try:
+                    result = func(*args, **kwargs)
+                except Exception:
+                    # 失败的操作可能已修改了部分草稿内容, 以快照方式保存, 保证数据库与缓存一致
+                    if params.get('draft_id') in draft_cache.DRAFT_CACHE:
+                        draft_cache.mark_dirty(params['draft_id'])
+                    raise
+                finally:
+                    _local.depth = 0
+
+                draft_cache.refresh_draft_size(result['draft_id'])
+                # 未指定draft_id时实现会新建草稿, 记录实际的草稿ID
+                params['draft_id'] = result['draft_id']
+                record_operation(name, params, replayable is None or replayable(params))
+            return result
+        return wrapper
+    return decorator
+
+def record_operation(name: str, params: Dict[str, Any], replayable: bool = True) -> Optional[int]:
+    """
+    记录一次已应用到缓存草稿上的操作
+    :param name: 操作名称
+    :param params: 操作参数, 需包含draft_id
+    :param replayable: 是否可仅凭参数重放
+    :return: 操作序号, 以快照方式保存时返回None
+    """
+    draft_id = params['draft_id']
+    params_json = None
+    if replayable:
+        try:
+            params_json = json.dumps(params, ensure_ascii=False)
+        except (TypeError, ValueError):
+            pass
+
+    if params_json is None:
+        # 参数无法重放, 立即写入完整快照, 之前的操作日志随之被清理
+        draft_cache.mark_dirty(draft_id)
+        draft_cache.flush_draft(draft_id)
+        return None
+
+    try:
+        seq = append_draft_op(draft_id, name, params_json)
+    except Exception as e:
+        print(f"记录草稿操作失败, 改为写入快照: {e}")
+        draft_cache.mark_dirty(draft_id)
+        return None
+
+    draft_cache.DRAFT_OP_SEQ[draft_id] = seq
+    if draft_cache.ops_since_snapshot(draft_id) >= OPLOG_COMPACT_INTERVAL:
+        # 日志过长时由写回线程压缩为新快照, 以限制重放开销
+        draft_cache.mark_dirty(draft_id)
+    return seq
+
+def _get_operation(name: str) -> Optional[Callable]:
+    if name not in _OPERATIONS and name in _OPERATION_MODULES:
+        importlib.import_module(_OPERATION_MODULES[name])
+    return _OPERATIONS.get(name)
+
+def replay_operations(draft_id: str) -> int:
+    """
+    在缓存中的草稿上重放其已应用序号之后的全部操作
+    :param draft_id: 草稿ID, 草稿须已在缓存中
+    :return: 重放的操作数量
+    """
+    ops = get_draft_ops(draft_id, draft_cache.DRAFT_OP_SEQ.get(draft_id, 0))
+    _local.depth = getattr(_local, 'depth', 0) + 1
+    try:
+        for op in ops:
+            func = _get_operation(op['op'])
+            try:
+                if func is None:
+                    raise ValueError(f"未知的操作: {op['op']}")
+                func(**op['params'])
+            except Exception as e:
+                print(f"重放草稿 {draft_id} 的操作 #{op['seq']} ({op['op']}) 失败: {e}")
+            draft_cache.DRAFT_OP_SEQ[draft_id] = op['seq']
+    finally:
+        _local.depth -= 1
+    if ops:
+        print(f"草稿 {draft_id} 已重放 {len(ops)} 条操作")
+    return len(ops)
+
+def get_history(draft_id: str) -> List[Dict[str, Any]]:
+    """
+    获取草稿自上次快照以来的编辑历史, 即可撤销的操作
+    :param draft_id: 草稿ID
+    :return: 按时间顺序排列的操作列表, 每项包含seq, op, params, created_at
+    """
+    return get_draft_ops(draft_id)
+
+def undo(draft_id: str, steps: int = 1) -> Dict[str, Any]:
+    """
+    撤销草稿最近的若干步操作: 删除对应日志后由快照重放剩余操作重建草稿
+    只能撤销最近一次快照之后记录的操作
+    :param draft_id: 草稿ID
+    :param steps: 撤销的步数
+    :return: 包含draft_id, 撤销的操作列表及剩余可撤销步数的字典
+    """
+    if steps < 1:
+        raise ValueError("steps must be a positive integer")
+    with draft_cache.draft_lock(draft_id):
+        ops = get_draft_ops(draft_id)
+        if steps > len(ops):
+            raise ValueError(f"Draft {draft_id} can only undo {len(ops)} step(s)")
+
+        undone = ops[-steps:]
+        delete_draft_ops_from(draft_id, undone[0]['seq'])
+        # 丢弃缓存中的草稿及尚未写入的压缩快照, 由数据库快照和剩余日志重建
+        draft_cache.discard_draft(draft_id)
+        if draft_cache.get_draft(draft_id) is None:
+            raise ValueError(f"Draft {draft_id} does not exist in database")
+
+    return {
+        "draft_id": draft_id,
+        "undone": [{"seq": op['seq'], "op": op['op']} for op in reversed(undone)],
+        "remaining": len(ops) - steps
+    }
@@ -0,0 +1,192 @@
+"""
+流式草稿打包
+素材下载完成后即可写入zip, 不需要先落盘到草稿目录再整体压缩; 已压缩的媒体文件(mp4/mp3/png/jpg等)按存储方式写入,
+避免无意义的二次压缩. 压缩包既可以写入文件, 也可以按块流式输出(HTTP响应、上传)而不经过中间文件.
+"""
+
+import os
+import queue
+import threading
+import zipfile
+from typing import Callable, Iterable, Iterator, Optional
+
+# 已压缩的媒体格式, 写入zip时不再压缩
+STORED_EXTENSIONS = {
+    '.mp4', '.mov', '.m4v', '.mkv', '.webm', '.avi', '.flv',
+    '.mp3', '.m4a', '.aac', '.ogg', '.opus', '.flac',
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.heic', '.zip'
+}
+# 流式输出时每块的大小
+STREAM_CHUNK_SIZE = 1024 * 1024
+# 流式输出时缓冲的块数, 消费者较慢时写入方阻塞等待
+STREAM_MAX_CHUNKS = 8
+
+class Draft_packager:
+    """草稿zip打包器, 可在多个线程中并发添加文件"""
+
+    def __init__(self, file):
+        """
+        :param file: zip文件路径或可写的文件对象(不要求支持seek)
+        """
+        self._zip = zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED)
+        self._dirs = set()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _add_directory(self, arcname: str) -> None:
+        """写入目录项及其上级目录项（JianYing需要assets等空目录结构）, 调用方需持有锁"""
+        parts = arcname.strip('/').split('/')
+        for i in range(1, len(parts) + 1):
+            dir_arcname = '/'.join(parts[:i]) + '/'
+            if dir_arcname not in self._dirs:
+                self._dirs.add(dir_arcname)
+                self._zip.writestr(zipfile.ZipInfo(dir_arcname), b'')
+
+    def _add_parents(self, arcname: str) -> None:
+        parent = arcname.rpartition('/')[0]
+        if parent:
+            self._add_directory(parent)
+
+    def add_directory(self, arcname: str) -> None:
+        with self._lock:
+            self._add_directory(arcname.replace('\\', '/'))
+
+    def add_file(self, path: str, arcname: str) -> None:
+        """
+        写入文件, 已压缩的媒体格式按存储方式写入
+        :param path: 本地文件路径
+        :param arcname: zip中的路径
+        """
+        arcname = arcname.replace('\\', '/')
+        extension = os.path.splitext(arcname)[1].lower()
+        compress_type = zipfile.ZIP_STORED if extension in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+        with self._lock:
+            self._add_parents(arcname)
+            self._zip.write(path, arcname, compress_type=compress_type)
+
+    def add_bytes(self, arcname: str, data: bytes) -> None:
+        """写入内存中的数据(如draft_info.json)"""
+        arcname = arcname.replace('\\', '/')
+        with self._lock:
+            self._add_parents(arcname)
+            self._zip.writestr(arcname, data, compress_type=zipfile.ZIP_DEFLATED)
+
+    def add_tree(self, folder: str, prefix: str = "", exclude: Iterable[str] = ()) -> None:
+        """
+        写入整个目录, 包含空目录
+        :param folder: 本地目录
+        :param prefix: zip中的目录前缀, 默认写入根目录
+        :param exclude: 不写入的文件(相对folder的路径)
+        """
+        exclude = {name.replace('\\', '/') for name in exclude}
+        prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        for root, dirs, files in os.walk(folder):
+            rel_root = os.path.relpath(root, folder).replace('\\', '/')
+            rel_root = '' if rel_root == '.' else rel_root + '/'
+            if prefix + rel_root:
+                self.add_directory(prefix + rel_root)
+            for file in files:
+                if rel_root + file not in exclude:
+                    self.add_file(os.path.join(root, file), prefix + rel_root + file)
+
+    def close(self) -> None:
+        """写入zip目录区并关闭, 传入的文件对象不会被关闭"""
+        with self._lock:
+            self._zip.close()
+
+class Zip_stream:
+    """
+    可写文件对象: 写入的数据按块放入有界队列, 由消费者迭代读取
+    消费者读取结束或调用close()（如WSGI服务器关闭响应, 包括从不读取响应体的HEAD请求）后, 写入方的写入抛出IOError
+    """
+
+    def __init__(self, chunk_size: int = STREAM_CHUNK_SIZE, max_chunks: int = STREAM_MAX_CHUNKS):
+        self._chunk_size = chunk_size
+        self._queue = queue.Queue(max_chunks)
+        self._buffer = bytearray()
+        self._cancelled = False
+        self._producer: Optional[Callable[[], None]] = None
+
+    def set_producer(self, producer: Callable[[], None]) -> None:
+        """设置写入数据的函数, 在消费者首次读取时才于后台线程中启动"""
+        self._producer = producer
+
+    def _put(self, item) -> None:
+        while True:
+            if self._cancelled:
+                raise IOError("Zip stream consumer went away")
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                pass
+
+    def write(self, data) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self._chunk_size:
+            self._put(bytes(self._buffer[:self._chunk_size]))
+            del self._buffer[:self._chunk_size]
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """写入结束: 输出剩余数据, 出错时将异常传递给消费者"""
+        if error is None and self._buffer:
+            self._put(bytes(self._buffer))
+        self._buffer = bytearray()
+        self._put(error)
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self
+
+    def __next__(self) -> bytes:
+        if self._cancelled:
+            raise StopIteration
+        if self._producer is not None:
+            producer, self._producer = self._producer, None
+            threading.Thread(target=producer, daemon=True).start()
+        item = self._queue.get()
+        if item is None:
+            self.close()
+            raise StopIteration
+        if isinstance(item, BaseException):
+            self.close()
+            raise item
+        return item
+
+    def close(self) -> None:
+        """消费者不再读取: 未启动的写入方不再启动, 已启动的写入方在下次写入时停止"""
+        self._cancelled = True
+        self._producer = None
+
+def stream_zip(build: Callable[[Draft_packager], None], chunk_size: int = STREAM_CHUNK_SIZE) -> Zip_stream:
+    """
+    在后台线程中构建zip, 边构建边按块输出; 构建在首次读取时才开始
+    :param build: 接收Draft_packager并写入内容的函数
+    :param chunk_size: 每块的大小
+    :return: zip数据块迭代器, 构建出错时迭代抛出相同的异常; 不再读取时应调用其close()
+    """
+    stream = Zip_stream(chunk_size)
+
+    def produce():
+        error = None
+        try:
+            with Draft_packager(stream) as packager:
+                build(packager)
+        except BaseException as e:
+            error = e
+        try:
+            stream.finish(error)
+        except IOError:
+            # 消费者已断开(如客户端取消下载)
+            pass
+
+    stream.set_producer(produce)
+    return stream
@@ -0,0 +1,115 @@
+"""
+草稿模板内存镜像
+模板目录(template / template_jianying)在首次使用时读入内存并解析一次, 之后每次保存草稿都由镜像生成:
+未修改的文件共享同一份bytes(写时复制), 只重新生成包含草稿路径的draft_meta_info.json,
+不再复制模板目录、逐个修复路径文件, 也不再重新解析draft_info.json.
+"""
+
+import json
+import os
+import threading
+from types import MappingProxyType
+from typing import Dict, Iterable
+
+from draft_packager import Draft_packager
+from fix_draft_paths import apply_draft_meta_paths, get_target_draft_folder
+
+TEMPLATE_ROOT = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_NAMES = ("template", "template_jianying")
+
+_META_INFO = "draft_meta_info.json"
+_DRAFT_INFO = "draft_info.json"
+
+_IMAGES: Dict[str, "Template_image"] = {}
+_images_lock = threading.Lock()
+
+class Template_image:
+    """只读的草稿模板镜像: 模板中的全部文件、目录结构及解析后的元数据"""
+
+    def __init__(self, folder: str):
+        """
+        :param folder: 模板目录
+        :raises FileNotFoundError: 模板目录不存在
+        """
+        if not os.path.isdir(folder):
+            raise FileNotFoundError(f"模板草稿 {folder} 不存在")
+
+        files = {}
+        dirs = []
+        for root, dirnames, filenames in os.walk(folder):
+            rel_root = os.path.relpath(root, folder).replace('\\', '/')
+            rel_root = '' if rel_root == '.' else rel_root + '/'
+            if rel_root:
+                dirs.append(rel_root)
+            for filename in filenames:
+                with open(os.path.join(root, filename), 'rb') as f:
+                    files[rel_root + filename] = f.read()
+
+        meta_info = json.loads(files[_META_INFO]) if _META_INFO in files else None
+        draft_info = json.loads(files[_DRAFT_INFO]) if _DRAFT_INFO in files else None
+        if draft_info is not None:
+            # 与fix_draft_paths相同: 移除音频素材的replace_path, 让音频使用相对路径模式
+            audios = draft_info.get('materials', {}).get('audios', [])
+            if any('replace_path' in audio for audio in audios):
+                for audio in audios:
+                    audio.pop('replace_path', None)
+                files[_DRAFT_INFO] = json.dumps(draft_info, ensure_ascii=False, indent=2).encode('utf-8')
+
+        self.folder = folder
+        self.files = MappingProxyType(files)
+        self.dirs = tuple(dirs)
+        self.meta_info = MappingProxyType(meta_info) if meta_info is not None else None
+        self.draft_info = MappingProxyType(draft_info) if draft_info is not None else None
+
+    def instantiate(self, draft_id: str, client_os: str = "windows") -> Dict[str, bytes]:
+        """
+        生成草稿的模板文件, 未修改的文件与镜像共享数据
+        :param draft_id: 草稿ID, 即草稿文件夹名称
+        :param client_os: 客户端操作系统类型, 决定元数据中的路径格式
+        :return: zip中的路径 -> 文件内容
+        """
+        files = dict(self.files)
+        if self.meta_info is not None:
+            meta_info = dict(self.meta_info)
+            apply_draft_meta_paths(meta_info, get_target_draft_folder(client_os), draft_id, client_os)
+            files[_META_INFO] = json.dumps(meta_info, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return files
+
+    def write_to_folder(self, path: str, draft_id: str, client_os: str = "windows") -> None:
+        """在path生成草稿目录（用于需要保留本地草稿目录的保存模式）"""
+        os.makedirs(path, exist_ok=True)
+        for dir_name in self.dirs:
+            os.makedirs(os.path.join(path, dir_name), exist_ok=True)
+        for name, data in self.instantiate(draft_id, client_os).items():
+            with open(os.path.join(path, name), 'wb') as f:
+                f.write(data)
+
+    def write_to_packager(self, packager: Draft_packager, draft_id: str, client_os: str = "windows",
+                          exclude: Iterable[str] = ()) -> None:
+        """将草稿的模板文件直接写入zip"""
+        exclude = set(exclude)
+        for dir_name in self.dirs:
+            packager.add_directory(dir_name)
+        for name, data in self.instantiate(draft_id, client_os).items():
+            if name not in exclude:
+                packager.add_bytes(name, data)
+
+def get_template_image(template_name: str) -> Template_image:
+    """
+    获取模板镜像, 每个模板只加载一次
+    :param template_name: 模板目录名称, 如"template"或"template_jianying"
+    """
+    image = _IMAGES.get(template_name)
+    if image is None:
+        with _images_lock:
+            image = _IMAGES.get(template_name)
+            if image is None:
+                image = Template_image(os.path.join(TEMPLATE_ROOT, template_name))
+                _IMAGES[template_name] = image
+    return image
+
+def preload_templates() -> None:
+    """服务启动时预先加载所有模板镜像"""
+    for template_name in TEMPLATE_NAMES:
+        if os.path.isdir(os.path.join(TEMPLATE_ROOT, template_name)):
+            get_template_image(template_name)
@@ -24,6 +24,34 @@ from os_path_config import get_os_path_config
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def apply_draft_meta_paths(meta_data: dict, target_draft_folder: str, draft_folder_name: str, client_os: str = "windows") -> tuple:
+    """
+    在草稿元数据中设置草稿路径配置（不读写文件）
+    
+    Args:
+        meta_data (dict): draft_meta_info.json的内容, 原地修改
+        target_draft_folder (str): 目标草稿根目录路径
+        draft_folder_name (str): 草稿文件夹名称
+        client_os (str): 客户端操作系统类型
+    
+    Returns:
+        tuple: (draft_root_path, draft_fold_path)
+    """
+    # 根据客户端操作系统设置路径格式
+    if client_os.lower() == "windows":
+        # Windows路径格式
+        draft_root_path = target_draft_folder.replace('/', '\\')
+        draft_fold_path = os.path.join(draft_root_path, draft_folder_name).replace('/', '\\')
+    else:
+        # Unix/Linux/macOS路径格式
+        draft_root_path = target_draft_folder.replace('\\', '/')
+        draft_fold_path = os.path.join(draft_root_path, draft_folder_name).replace('\\', '/')
+    
+    meta_data["draft_root_path"] = draft_root_path
+    meta_data["draft_fold_path"] = draft_fold_path
+    meta_data["draft_name"] = draft_folder_name
+    return draft_root_path, draft_fold_path
+
 def update_draft_meta_paths(draft_path: str, target_draft_folder: str, client_os: str = "windows") -> bool:
     """
     更新草稿元数据文件中的路径配置
@@ -51,20 +79,8 @@ def update_draft_meta_paths(draft_path: str, target_draft_folder: str, client_os
         # 获取草稿文件夹名称
         draft_folder_name = os.path.basename(draft_path)
         
-        # 根据客户端操作系统设置路径格式
-        if client_os.lower() == "windows":
-            # Windows路径格式
-            draft_root_path = target_draft_folder.replace('/', '\\')
-            draft_fold_path = os.path.join(draft_root_path, draft_folder_name).replace('/', '\\')
-        else:
-            # Unix/Linux/macOS路径格式
-            draft_root_path = target_draft_folder.replace('\\', '/')
-            draft_fold_path = os.path.join(draft_root_path, draft_folder_name).replace('\\', '/')
-        
         # 更新路径配置
-        meta_data["draft_root_path"] = draft_root_path
-        meta_data["draft_fold_path"] = draft_fold_path
-        meta_data["draft_name"] = draft_folder_name
+        draft_root_path, draft_fold_path = apply_draft_meta_paths(meta_data, target_draft_folder, draft_folder_name, client_os)
         
         # 写回文件
         with open(meta_info_path, 'w', encoding='utf-8') as f:
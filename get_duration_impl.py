@@ -1,6 +1,5 @@
-import subprocess
-import json
 import time
+from media_probe import probe_media, media_duration
 
 def get_video_duration(video_url):
     """
@@ -12,41 +11,19 @@ def get_video_duration(video_url):
     # Define retry count and wait time for each retry
     max_retries = 3
     retry_delay_seconds = 1 # 1 second interval between retries
-    timeout_seconds = 10 # Set timeout for each attempt
 
     for attempt in range(max_retries):
         print(f"Attempting to get video duration (Attempt {attempt + 1}/{max_retries}) ...")
         result = {"success": False, "output": 0, "error": None} # Reset result before each retry
         
         try:
-            command = [
-                '/usr/bin/ffprobe',  # 使用完整路径确保能找到命令
-                '-v', 'error',
-                '-show_entries', 'stream=duration',
-                '-show_entries', 'format=duration',
-                '-print_format', 'json',
-                video_url
-            ]
-            
-            # Use subprocess.run for more flexible handling of timeout and output
-            process = subprocess.run(command, 
-                                     capture_output=True, 
-                                     text=True, # Auto decode to text
-                                     timeout=timeout_seconds, # Use variable to set timeout
-                                     check=True) # Raise CalledProcessError if non-zero exit code
-
-            info = json.loads(process.stdout)
+            # 使用媒体信息探测服务（结果按URL缓存, 同一素材不会重复运行ffprobe）
+            info = probe_media(video_url)
             
             # Prioritize getting duration from streams because it's more accurate
-            media_streams = [s for s in info.get('streams', []) if 'duration' in s]
+            duration = media_duration(info, "video" if info["video_duration"] else "audio")
             
-            if media_streams:
-                duration = float(media_streams[0]['duration'])
-                result["output"] = duration
-                result["success"] = True
-            # Otherwise get duration from format information
-            elif 'format' in info and 'duration' in info['format']:
-                duration = float(info['format']['duration'])
+            if duration:
                 result["output"] = duration
                 result["success"] = True
             else:
@@ -57,15 +34,9 @@ def get_video_duration(video_url):
                 print(f"Successfully obtained duration: {result['output']:.2f} seconds")
                 return result
 
-        except subprocess.TimeoutExpired:
-            result["error"] = f"Getting video duration timed out (exceeded {timeout_seconds} seconds)."
-            print(f"Attempt {attempt + 1} timed out.")
-        except subprocess.CalledProcessError as e:
-            result["error"] = f"Error executing ffprobe command (exit code {e.returncode}): {e.stderr.strip()}"
-            print(f"Attempt {attempt + 1} failed. Error: {e.stderr.strip()}")
-        except json.JSONDecodeError as e:
-            result["error"] = f"Error parsing JSON data: {e}"
-            print(f"Attempt {attempt + 1} failed. JSON parsing error: {e}")
+        except ValueError as e:
+            result["error"] = str(e)
+            print(f"Attempt {attempt + 1} failed. Error: {e}")
         except FileNotFoundError:
             result["error"] = "ffprobe command not found. Please ensure FFmpeg is installed and in system PATH."
             print("Error: ffprobe command not found, please check installation.")
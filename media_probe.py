@@ -0,0 +1,202 @@
+"""
+媒体信息探测服务
+每个URL只运行一次ffprobe, 一次取得宽高、时长、编码与流类型; 结果按URL + 校验值(远程为ETag/Last-Modified,
+本地文件为修改时间和大小)持久化保存在数据库中, 内容未变化时不再重复探测.
+探测在有界线程池中执行, 限制同时运行的ffprobe进程数, 并支持一次并行探测多个素材.
+"""
+
+import json
+import os
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Union
+
+from database import get_media_probe, put_media_probe
+from media_store import head_validators
+from settings.local import FFPROBE_PATH, MEDIA_PROBE_WORKERS
+
+# 单次ffprobe的超时时间（秒）
+PROBE_TIMEOUT = 30
+# 进程内缓存的探测结果数量
+MEMORY_CACHE_SIZE = 4096
+
+_STATS = {"hits": 0, "misses": 0, "failures": 0}
+_stats_lock = threading.Lock()
+
+# url -> (校验值, 探测结果)
+_MEMORY: "OrderedDict[str, tuple]" = OrderedDict()
+# 同一URL同时只探测一次: url -> Future
+_IN_FLIGHT: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+_executor = ThreadPoolExecutor(max_workers=MEDIA_PROBE_WORKERS, thread_name_prefix="media_probe")
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _STATS[name] += 1
+
+def _validator(url: str) -> Optional[str]:
+    """
+    获取判断内容是否变化的校验值
+    :return: 本地文件为"修改时间-大小"; 远程为ETag或Last-Modified, 服务器均未返回时为空字符串; HEAD请求失败时为None
+    """
+    if os.path.isfile(url):
+        stat = os.stat(url)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+    validators = head_validators(url)
+    if validators is None:
+        return None
+    return validators["etag"] or validators["last_modified"] or ""
+
+def _parse_probe_output(output: str) -> dict:
+    """将ffprobe的JSON输出整理为探测结果, 时长单位为秒"""
+    # 查找JSON开始位置（第一个'{'）
+    json_start = output.find('{')
+    if json_start == -1:
+        raise ValueError(f"无法在输出中找到JSON数据: {output}")
+    data = json.loads(output[json_start:])
+
+    streams = []
+    for stream in data.get('streams', []):
+        duration = stream.get('duration')
+        streams.append({
+            "codec_type": stream.get('codec_type', ''),
+            "codec_name": stream.get('codec_name', ''),
+            "width": int(stream.get('width', 0) or 0),
+            "height": int(stream.get('height', 0) or 0),
+            "duration": float(duration) if duration not in (None, 'N/A') else None
+        })
+    video = next((s for s in streams if s["codec_type"] == 'video'), None)
+    audio = next((s for s in streams if s["codec_type"] == 'audio'), None)
+
+    format_info = data.get('format', {})
+    format_duration = format_info.get('duration')
+    return {
+        "format_name": format_info.get('format_name', ''),
+        "format_duration": float(format_duration) if format_duration not in (None, 'N/A') else None,
+        "width": video["width"] if video else 0,
+        "height": video["height"] if video else 0,
+        "video_codec": video["codec_name"] if video else None,
+        "audio_codec": audio["codec_name"] if audio else None,
+        "video_duration": video["duration"] if video else None,
+        "audio_duration": audio["duration"] if audio else None,
+        "streams": streams
+    }
+
+def _run_ffprobe(url: str) -> dict:
+    command = [
+        FFPROBE_PATH,
+        '-v', 'error',
+        '-show_entries', 'stream=codec_type,codec_name,width,height,duration:format=duration,format_name',
+        '-of', 'json',
+        url
+    ]
+    try:
+        process = subprocess.run(command, capture_output=True, text=True, timeout=PROBE_TIMEOUT, check=True)
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"处理文件 {url} 时出错: {e.stderr.strip()}")
+    except subprocess.TimeoutExpired:
+        raise ValueError(f"获取媒体信息超时（超过{PROBE_TIMEOUT}秒）: {url}")
+    try:
+        return _parse_probe_output(process.stdout)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"解析媒体信息时出错: {e}")
+
+def _remember(url: str, validator: str, info: dict) -> None:
+    with _lock:
+        _MEMORY[url] = (validator, info)
+        _MEMORY.move_to_end(url)
+        while len(_MEMORY) > MEMORY_CACHE_SIZE:
+            _MEMORY.popitem(last=False)
+
+def _probe(url: str) -> dict:
+    """在线程池中执行: 校验缓存, 未命中时运行ffprobe并保存结果"""
+    validator = _validator(url)
+
+    with _lock:
+        cached = _MEMORY.get(url)
+    if cached is None:
+        stored = get_media_probe(url)
+        cached = (stored['validator'], stored['info']) if stored else None
+    # 无法校验（HEAD请求失败）时沿用已有结果
+    if cached and (validator is None or cached[0] == validator):
+        _count("hits")
+        _remember(url, cached[0], cached[1])
+        return cached[1]
+
+    _count("misses")
+    try:
+        info = _run_ffprobe(url)
+    except Exception:
+        _count("failures")
+        raise
+    validator = validator or ""
+    put_media_probe(url, validator, info, time.time())
+    _remember(url, validator, info)
+    return info
+
+def _forget_in_flight(url: str, future: Future) -> None:
+    with _lock:
+        if _IN_FLIGHT.get(url) is future:
+            del _IN_FLIGHT[url]
+
+def probe_media_async(url: str) -> Future:
+    """
+    提交媒体信息探测, 同一URL正在探测时返回同一个Future
+    :param url: 素材URL或本地文件路径
+    :return: Future, 结果为probe_media的返回值
+    """
+    with _lock:
+        future = _IN_FLIGHT.get(url)
+        if future is None:
+            future = _executor.submit(_probe, url)
+            _IN_FLIGHT[url] = future
+            future.add_done_callback(lambda f: _forget_in_flight(url, f))
+    return future
+
+def probe_media(url: str) -> dict:
+    """
+    获取媒体信息, 结果被持久缓存, 内容未变化时不会重复运行ffprobe
+    :param url: 素材URL或本地文件路径
+    :return: dict, 包含width, height, format_name, format_duration, video_codec, audio_codec,
+             video_duration, audio_duration（秒, 无对应流时为None）与streams列表
+    :raises ValueError: ffprobe执行失败或输出无法解析
+    """
+    return probe_media_async(url).result()
+
+def probe_many(urls: Iterable[str]) -> Dict[str, Union[dict, Exception]]:
+    """
+    并行探测多个素材
+    :param urls: 素材URL或本地文件路径列表
+    :return: url -> 探测结果, 失败时为对应的异常
+    """
+    futures = {url: probe_media_async(url) for url in dict.fromkeys(urls)}
+    results = {}
+    for url, future in futures.items():
+        try:
+            results[url] = future.result()
+        except Exception as e:
+            results[url] = e
+    return results
+
+def media_duration(info: dict, stream_type: str) -> float:
+    """
+    从探测结果中取指定类型流的时长, 流没有时长时使用容器时长
+    :param stream_type: 'video' 或 'audio'
+    :return: 时长（秒）, 无法获取时为0
+    """
+    return info.get(f"{stream_type}_duration") or info.get("format_duration") or 0.0
+
+def get_probe_stats() -> Dict[str, float]:
+    """
+    获取媒体信息探测统计: 缓存命中/未命中次数, 失败次数与命中率
+    :return: dict
+    """
+    with _stats_lock:
+        stats = dict(_STATS)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
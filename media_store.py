@@ -0,0 +1,251 @@
+"""
+素材下载缓存（内容寻址存储）
+远程素材按URL下载一次后以SHA-256为文件名保存在MEDIA_STORE_DIR中, 不同URL的相同内容只保存一份;
+再次使用时用ETag/Last-Modified校验后直接硬链接到草稿素材目录, 总大小超出上限时按最近访问时间淘汰.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+import requests
+
+from database import (get_media_url, put_media_object, touch_media_object, get_media_store_size,
+                      get_lru_media_objects, delete_media_objects)
+from downloader import download_file, get_session
+from settings.local import MEDIA_STORE_DIR, MEDIA_STORE_MAX_BYTES, MEDIA_STORE_TTL, DOWNLOAD_HEADERS
+
+# 校验缓存时HEAD请求的超时时间（秒）
+HEAD_TIMEOUT = 10
+HASH_BLOCK_SIZE = 1024 * 1024
+
+_STATS = {"hits": 0, "misses": 0, "revalidated": 0, "bytes_downloaded": 0, "bytes_linked": 0, "evictions": 0}
+_stats_lock = threading.Lock()
+
+# 同一URL同时只下载一次: url -> [锁, 引用计数]
+_URL_LOCKS: Dict[str, list] = {}
+_url_locks_guard = threading.Lock()
+_evict_lock = threading.Lock()
+# 正在被获取、链接或读取的内容对象: 路径 -> 引用计数, 淘汰时跳过; 淘汰检查与删除文件也在_pins_lock内进行
+_PINNED: Dict[str, int] = {}
+_pins_lock = threading.Lock()
+
+def _count(name: str, value: int = 1) -> None:
+    with _stats_lock:
+        _STATS[name] += value
+
+def _object_path(sha256: str) -> str:
+    return os.path.join(MEDIA_STORE_DIR, "objects", sha256[:2], sha256)
+
+def head_validators(url: str) -> Optional[Dict[str, Optional[str]]]:
+    """通过HEAD请求获取ETag和Last-Modified, 请求失败时返回None"""
+    try:
+        headers = dict(DOWNLOAD_HEADERS) if isinstance(DOWNLOAD_HEADERS, dict) else {}
+        response = get_session().head(url, timeout=HEAD_TIMEOUT, allow_redirects=True, headers=headers)
+        if response.status_code >= 400:
+            return None
+        return {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+    except requests.RequestException:
+        return None
+
+def _is_fresh(entry: dict, validators: Optional[dict]) -> bool:
+    """判断缓存条目是否仍与远程内容一致; 无法校验时按MEDIA_STORE_TTL判断"""
+    if validators:
+        if entry['etag'] and validators['etag']:
+            return entry['etag'] == validators['etag']
+        if entry['last_modified'] and validators['last_modified']:
+            return entry['last_modified'] == validators['last_modified']
+    return time.time() - (entry['fetched_at'] or 0) < MEDIA_STORE_TTL
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _link(source: str, dest_path: str) -> None:
+    """将存储中的文件硬链接到目标路径, 跨文件系统等无法硬链接时复制"""
+    directory = os.path.dirname(dest_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    try:
+        os.link(source, dest_path)
+    except OSError:
+        shutil.copyfile(source, dest_path)
+
+def _pin(object_path: str) -> None:
+    """固定内容对象, 在release_object之前不会被淘汰"""
+    with _pins_lock:
+        _PINNED[object_path] = _PINNED.get(object_path, 0) + 1
+
+def release_object(object_path: str) -> None:
+    """
+    释放fetch_to_store返回的内容对象, 之后该文件可被淘汰
+    :param object_path: fetch_to_store返回的路径
+    """
+    with _pins_lock:
+        count = _PINNED.get(object_path, 0) - 1
+        if count > 0:
+            _PINNED[object_path] = count
+        else:
+            _PINNED.pop(object_path, None)
+
+def _acquire_url_lock(url: str) -> list:
+    with _url_locks_guard:
+        entry = _URL_LOCKS.setdefault(url, [threading.Lock(), 0])
+        entry[1] += 1
+    entry[0].acquire()
+    return entry
+
+def _release_url_lock(url: str, entry: list) -> None:
+    entry[0].release()
+    with _url_locks_guard:
+        entry[1] -= 1
+        if entry[1] == 0:
+            _URL_LOCKS.pop(url, None)
+
+def _download_to_store(url: str, validators: Optional[dict]) -> str:
+    """下载URL到存储中并返回内容对象的路径"""
+    tmp_dir = os.path.join(MEDIA_STORE_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex + ".part")
+    try:
+        if not download_file(url, tmp_path) or not os.path.exists(tmp_path):
+            raise Exception(f"Failed to download {url}")
+        size = os.path.getsize(tmp_path)
+        if size == 0:
+            raise Exception(f"Downloaded file is empty: {url}")
+
+        sha256 = _file_sha256(tmp_path)
+        object_path = _object_path(sha256)
+        # 先固定再放入存储, 以免在返回前被淘汰
+        _pin(object_path)
+        try:
+            if os.path.exists(object_path):
+                # 其他URL已下载过相同内容
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(tmp_path, object_path)
+            validators = validators or {}
+            put_media_object(url, sha256, size, validators.get('etag'), validators.get('last_modified'), time.time())
+        except Exception:
+            release_object(object_path)
+            raise
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    _count("bytes_downloaded", size)
+    return object_path
+
+def fetch_to_store(url: str) -> str:
+    """
+    确保远程素材在存储中, 返回内容对象的路径（只读, 调用方不应修改或删除）
+    返回的对象已被固定, 不会被淘汰, 调用方使用完毕后须调用release_object释放
+    :param url: 素材URL
+    :return: 存储中的文件路径
+    """
+    entry = _acquire_url_lock(url)
+    object_path = None
+    try:
+        cached = get_media_url(url)
+        validators = head_validators(url)
+        if cached:
+            object_path = _object_path(cached['sha256'])
+            # 先固定再检查文件是否存在, 检查之后不会被淘汰
+            _pin(object_path)
+            if not (os.path.exists(object_path) and _is_fresh(cached, validators)):
+                release_object(object_path)
+                object_path = None
+        if object_path:
+            touch_media_object(cached['sha256'], time.time(), url if validators else None)
+            _count("hits")
+            if validators:
+                _count("revalidated")
+            print(f"Media cache hit: {url}")
+        else:
+            _count("misses")
+            object_path = _download_to_store(url, validators)
+    except Exception:
+        if object_path:
+            release_object(object_path)
+        raise
+    finally:
+        _release_url_lock(url, entry)
+    return object_path
+
+def fetch_media(url: str, dest_path: str) -> str:
+    """
+    获取远程素材到目标路径, 优先使用下载缓存
+    :param url: 素材URL, 本地文件路径直接复制
+    :param dest_path: 目标文件路径
+    :return: 目标文件路径
+    """
+    if os.path.isfile(url):
+        if not download_file(url, dest_path):
+            raise Exception(f"Failed to copy {url}")
+        return dest_path
+
+    object_path = fetch_to_store(url)
+    try:
+        _link(object_path, dest_path)
+    finally:
+        release_object(object_path)
+    _count("bytes_linked", os.path.getsize(dest_path))
+
+    evict_over_budget()
+    return dest_path
+
+def evict_over_budget() -> int:
+    """
+    按最近访问时间淘汰存储中的文件, 直至总大小不超过MEDIA_STORE_MAX_BYTES
+    已链接到草稿目录的文件不受影响, 被固定（正在获取或读取）的文件跳过
+    :return: 淘汰的文件数量
+    """
+    evicted = 0
+    with _evict_lock:
+        total = get_media_store_size()
+        while total > MEDIA_STORE_MAX_BYTES:
+            batch = []
+            # 持有_pins_lock直到文件删除完成, 其间不会有对象被固定
+            with _pins_lock:
+                for sha256, size in get_lru_media_objects():
+                    if total <= MEDIA_STORE_MAX_BYTES:
+                        break
+                    if _object_path(sha256) in _PINNED:
+                        continue
+                    batch.append(sha256)
+                    total -= size
+                if not batch:
+                    break
+                delete_media_objects(batch)
+                for sha256 in batch:
+                    try:
+                        os.remove(_object_path(sha256))
+                    except FileNotFoundError:
+                        pass
+            evicted += len(batch)
+    if evicted:
+        _count("evictions", evicted)
+    return evicted
+
+def get_media_store_stats() -> Dict[str, float]:
+    """
+    获取下载缓存统计: 命中/未命中次数, 命中率, 下载和链接的字节数, 淘汰数量及存储大小
+    :return: dict
+    """
+    with _stats_lock:
+        stats = dict(_STATS)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    stats["store_bytes"] = get_media_store_size()
+    stats["max_bytes"] = MEDIA_STORE_MAX_BYTES
+    return stats
@@ -8,7 +8,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from draft_cache import DRAFT_CACHE, serialize_script
+from draft_cache import DRAFT_CACHE, serialize_script, migrate_legacy_snapshots
 from database import save_draft_to_db, draft_exists_in_db, init_db
 import sqlite3
 
@@ -117,6 +117,16 @@ def show_migration_status():
     except Exception as e:
         print(f"检查状态时出错: {e}")
 
+def upgrade_snapshots():
+    """
+    将数据库中旧版base64 pickle快照转换为压缩二进制快照
+    """
+    print("开始转换旧版草稿快照...")
+    init_db()
+    migrated_count, failed_count = migrate_legacy_snapshots()
+    print(f"  成功转换: {migrated_count} 个草稿")
+    print(f"  转换失败: {failed_count} 个草稿")
+
 if __name__ == "__main__":
     import argparse
     
@@ -124,10 +134,11 @@ if __name__ == "__main__":
     parser.add_argument('--migrate', action='store_true', help='执行迁移操作')
     parser.add_argument('--verify', action='store_true', help='验证迁移结果')
     parser.add_argument('--status', action='store_true', help='显示迁移状态')
+    parser.add_argument('--upgrade-snapshots', action='store_true', help='将旧版base64快照转换为压缩二进制快照')
     
     args = parser.parse_args()
     
-    if args.status or (not args.migrate and not args.verify):
+    if args.status or (not args.migrate and not args.verify and not args.upgrade_snapshots):
         show_migration_status()
     
     if args.migrate:
@@ -135,4 +146,7 @@ if __name__ == "__main__":
         verify_migration()
     
     if args.verify:
-        verify_migration()
\ No newline at end of file
+        verify_migration()
+
+    if args.upgrade_snapshots:
+        upgrade_snapshots()
@@ -1,24 +1,149 @@
 
+import itertools
 import oss2
 import os
-from settings.local import OSS_CONFIG, MP4_OSS_CONFIG
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from oss2.models import PartInfo
+from settings.local import (OSS_CONFIG, MP4_OSS_CONFIG, OSS_MULTIPART_THRESHOLD, OSS_PART_SIZE, OSS_UPLOAD_THREADS,
+                            OSS_CHECKPOINT_DIR)
+
+
+# 缓存的Bucket: 复用认证对象和HTTP连接池, 不在每次调用时重新创建
+_BUCKETS = {}
+_buckets_lock = threading.Lock()
+
+# 流式上传时, 每个线程最多预读的分片数（限制内存占用）
+_STREAM_PARTS_PER_THREAD = 2
+# 单个分片上传失败时的重试次数
+_PART_RETRIES = 3
+
+
+def _get_bucket(access_key_id, access_key_secret, endpoint, bucket_name, region):
+    key = (access_key_id, access_key_secret, endpoint, bucket_name, region)
+    bucket = _BUCKETS.get(key)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _BUCKETS.get(key)
+            if bucket is None:
+                auth = oss2.AuthV4(access_key_id, access_key_secret)
+                bucket = oss2.Bucket(auth, endpoint, bucket_name, region=region)
+                _BUCKETS[key] = bucket
+    return bucket
 
 
 def _ensure_bucket():
-    auth = oss2.AuthV4(OSS_CONFIG['access_key_id'], OSS_CONFIG['access_key_secret'])
     endpoint = OSS_CONFIG['endpoint']
     if not endpoint.startswith('http'):
         endpoint = 'https://' + endpoint
-    return oss2.Bucket(auth, endpoint, OSS_CONFIG['bucket_name'], region=OSS_CONFIG['region'])
+    return _get_bucket(OSS_CONFIG['access_key_id'], OSS_CONFIG['access_key_secret'], endpoint,
+                       OSS_CONFIG['bucket_name'], OSS_CONFIG['region'])
+
+
+def _ensure_mp4_bucket():
+    # Use the correct OSS endpoint for bucket operations
+    oss_endpoint = f"https://oss-{MP4_OSS_CONFIG['region']}.aliyuncs.com"
+    return _get_bucket(MP4_OSS_CONFIG['access_key_id'], MP4_OSS_CONFIG['access_key_secret'], oss_endpoint,
+                       MP4_OSS_CONFIG['bucket_name'], MP4_OSS_CONFIG['region'])
+
+
+def upload_file(bucket, object_name, path, headers=None):
+    """
+    Upload a local file. Files above OSS_MULTIPART_THRESHOLD are uploaded as parallel multipart uploads
+    with a checkpoint in OSS_CHECKPOINT_DIR, so a failed upload resumes from the uploaded parts on the next call.
+    """
+    oss2.resumable_upload(bucket, object_name, path,
+                          store=oss2.ResumableStore(root=OSS_CHECKPOINT_DIR),
+                          headers=headers,
+                          multipart_threshold=OSS_MULTIPART_THRESHOLD,
+                          part_size=OSS_PART_SIZE,
+                          num_threads=OSS_UPLOAD_THREADS)
+
+
+def _iter_parts(data, part_size):
+    """Split a file-like object (read(size)) or an iterable of bytes chunks into parts of part_size bytes"""
+    if hasattr(data, 'read'):
+        while True:
+            part = data.read(part_size)
+            # Some streams return short reads before EOF
+            while part and len(part) < part_size:
+                more = data.read(part_size - len(part))
+                if not more:
+                    break
+                part += more
+            if not part:
+                return
+            yield part
+    else:
+        buffer = bytearray()
+        for chunk in data:
+            buffer += chunk
+            while len(buffer) >= part_size:
+                yield bytes(buffer[:part_size])
+                del buffer[:part_size]
+        if buffer:
+            yield bytes(buffer)
+
+
+def _upload_part(bucket, object_name, upload_id, part_number, part):
+    for attempt in range(_PART_RETRIES):
+        try:
+            result = bucket.upload_part(object_name, upload_id, part_number, part)
+            return PartInfo(part_number, result.etag, size=len(part))
+        except oss2.exceptions.OssError:
+            if attempt == _PART_RETRIES - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def upload_stream(bucket, object_name, data, headers=None):
+    """
+    Upload from a non-seekable source without buffering it whole: a file-like object (e.g. request.stream)
+    or an iterable of bytes chunks (e.g. draft_packager.stream_zip). Sources smaller than one part are sent
+    with a single put_object, larger ones as a multipart upload with parts uploaded in parallel.
+    Failed parts are retried; the upload is aborted if a part keeps failing.
+    :return: number of bytes uploaded
+    """
+    parts = _iter_parts(data, OSS_PART_SIZE)
+    first = next(parts, b'')
+    second = next(parts, None)
+    if second is None:
+        bucket.put_object(object_name, first, headers=headers)
+        return len(first)
+
+    upload_id = bucket.init_multipart_upload(object_name, headers=headers).upload_id
+    try:
+        futures = []
+        with ThreadPoolExecutor(max_workers=OSS_UPLOAD_THREADS) as executor:
+            pending = set()
+            for part_number, part in enumerate(itertools.chain((first, second), parts), start=1):
+                # Bound the parts held in memory while the source is faster than the upload
+                while len(pending) >= OSS_UPLOAD_THREADS * _STREAM_PARTS_PER_THREAD:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                future = executor.submit(_upload_part, bucket, object_name, upload_id, part_number, part)
+                futures.append(future)
+                pending.add(future)
+            part_infos = [future.result() for future in futures]
+        bucket.complete_multipart_upload(object_name, upload_id, part_infos)
+        return sum(part.size for part in part_infos)
+    except BaseException:
+        try:
+            bucket.abort_multipart_upload(object_name, upload_id)
+        except Exception:
+            pass
+        raise
+
 
-    
 def upload_to_oss(path):
-    # Create OSS client with v4 authentication and region
+    # Cached OSS client with v4 authentication and region
     bucket = _ensure_bucket()
     
-    # Upload file
+    # Upload file (multipart and resumable for large files)
     object_name = os.path.basename(path)
-    bucket.put_object_from_file(object_name, path)
+    upload_file(bucket, object_name, path)
     
     # Generate public URL (since bucket is public-read-write)
     url = f"https://{OSS_CONFIG['bucket_name']}.{OSS_CONFIG['endpoint']}/{object_name}"
@@ -29,20 +154,20 @@ def upload_to_oss(path):
     return url
 
 
+def upload_stream_to_oss(data, object_name):
+    """Upload a streamed file (file-like or iterable of bytes) to the draft bucket and return its public URL"""
+    upload_stream(_ensure_bucket(), object_name, data)
+    return f"https://{OSS_CONFIG['bucket_name']}.{OSS_CONFIG['endpoint']}/{object_name}"
+
+
 def upload_mp4_to_oss(path):
     """Special method for uploading MP4 files, using custom domain and v4 signature"""
-    # Directly use credentials from the configuration file
-    auth = oss2.AuthV4(MP4_OSS_CONFIG['access_key_id'], MP4_OSS_CONFIG['access_key_secret'])
-    
-    # Use the correct OSS endpoint for bucket operations
-    oss_endpoint = f"https://oss-{MP4_OSS_CONFIG['region']}.aliyuncs.com"
-    
-    # Create bucket instance with region
-    bucket = oss2.Bucket(auth, oss_endpoint, MP4_OSS_CONFIG['bucket_name'], region=MP4_OSS_CONFIG['region'])
+    # Cached bucket instance with region, using credentials from the configuration file
+    bucket = _ensure_mp4_bucket()
     
-    # Upload file
+    # Upload file (multipart and resumable for large files)
     object_name = os.path.basename(path)
-    bucket.put_object_from_file(object_name, path)
+    upload_file(bucket, object_name, path)
     
     # Generate custom domain URL (use the configured endpoint for public access)
     custom_domain = MP4_OSS_CONFIG['endpoint']
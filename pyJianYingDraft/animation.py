@@ -1,17 +1,22 @@
 """定义视频/文本动画相关类"""
 
+from __future__ import annotations
+
 import uuid
 
-from typing import Union, Optional
+from typing import Union, Optional, TYPE_CHECKING
 from typing import Literal, Dict, List, Any
 
 from .time_util import Timerange
 
-from .metadata.animation_meta import Animation_meta
-from .metadata import Intro_type, Outro_type, Group_animation_type
-from .metadata import CapCut_Intro_type, CapCut_Outro_type, CapCut_Group_animation_type
-from .metadata import Text_intro, Text_outro, Text_loop_anim
-from .metadata import CapCut_Text_intro, CapCut_Text_loop_anim, CapCut_Text_outro
+from . import metadata
+
+if TYPE_CHECKING:
+    from .metadata.animation_meta import Animation_meta
+    from .metadata import Intro_type, Outro_type, Group_animation_type
+    from .metadata import CapCut_Intro_type, CapCut_Outro_type, CapCut_Group_animation_type
+    from .metadata import Text_intro, Text_outro, Text_loop_anim
+    from .metadata import CapCut_Text_intro, CapCut_Text_loop_anim, CapCut_Text_outro
 
 class Animation:
     """一个视频/文本动画效果"""
@@ -67,11 +72,11 @@ class Video_animation(Animation):
                  start: int, duration: int):
         super().__init__(animation_type.value, start, duration)
 
-        if ((isinstance(animation_type, Intro_type) or isinstance(animation_type, CapCut_Intro_type))):
+        if ((isinstance(animation_type, metadata.Intro_type) or isinstance(animation_type, metadata.CapCut_Intro_type))):
             self.animation_type = "in"
-        elif isinstance(animation_type, Outro_type) or isinstance(animation_type, CapCut_Outro_type):
+        elif isinstance(animation_type, metadata.Outro_type) or isinstance(animation_type, metadata.CapCut_Outro_type):
             self.animation_type = "out"
-        elif isinstance(animation_type, Group_animation_type) or isinstance(animation_type, CapCut_Group_animation_type):
+        elif isinstance(animation_type, metadata.Group_animation_type) or isinstance(animation_type, metadata.CapCut_Group_animation_type):
             self.animation_type = "group"
 
         self.is_video_animation = True
@@ -85,11 +90,11 @@ class Text_animation(Animation):
                  start: int, duration: int):
         super().__init__(animation_type.value, start, duration)
 
-        if (isinstance(animation_type, Text_intro) or isinstance(animation_type, CapCut_Text_intro)):
+        if (isinstance(animation_type, metadata.Text_intro) or isinstance(animation_type, metadata.CapCut_Text_intro)):
             self.animation_type = "in"
-        elif (isinstance(animation_type, Text_outro) or isinstance(animation_type, CapCut_Text_outro)):
+        elif (isinstance(animation_type, metadata.Text_outro) or isinstance(animation_type, metadata.CapCut_Text_outro)):
             self.animation_type = "out"
-        elif (isinstance(animation_type, Text_loop_anim) or isinstance(animation_type, CapCut_Text_loop_anim)):
+        elif (isinstance(animation_type, metadata.Text_loop_anim) or isinstance(animation_type, metadata.CapCut_Text_loop_anim)):
             self.animation_type = "loop"
 
         self.is_video_animation = False
@@ -3,21 +3,26 @@
 包含淡入淡出效果、音频特效等相关类
 """
 
+from __future__ import annotations
+
 import uuid
 from copy import deepcopy
 
-from typing import Optional, Literal, Union
+from typing import Optional, Literal, Union, Sequence, TYPE_CHECKING
 from typing import Dict, List, Any
 
-from pyJianYingDraft.metadata.capcut_audio_effect_meta import CapCut_Speech_to_song_effect_type, CapCut_Voice_characters_effect_type, CapCut_Voice_filters_effect_type
 
 from .time_util import tim, Timerange
 from .segment import Media_segment
 from .local_materials import Audio_material
-from .keyframe import Keyframe_property, Keyframe_list
+from .keyframe import Keyframe_property
 
 from .metadata import Effect_param_instance
-from .metadata import Audio_scene_effect_type, Tone_effect_type, Speech_to_song_type
+from . import metadata
+
+if TYPE_CHECKING:
+    from .metadata import Audio_scene_effect_type, Tone_effect_type, Speech_to_song_type
+    from pyJianYingDraft.metadata.capcut_audio_effect_meta import CapCut_Speech_to_song_effect_type, CapCut_Voice_characters_effect_type, CapCut_Voice_filters_effect_type
 
 class Audio_fade:
     """音频淡入淡出效果"""
@@ -70,22 +75,22 @@ class Audio_effect:
         self.resource_id = effect_meta.value.resource_id
         self.audio_adjust_params = []
 
-        if isinstance(effect_meta, Audio_scene_effect_type):
+        if isinstance(effect_meta, metadata.Audio_scene_effect_type):
             self.category_id = "sound_effect"
             self.category_name = "场景音"
-        elif isinstance(effect_meta, Tone_effect_type):
+        elif isinstance(effect_meta, metadata.Tone_effect_type):
             self.category_id = "tone"
             self.category_name = "音色"
-        elif isinstance(effect_meta, Speech_to_song_type):
+        elif isinstance(effect_meta, metadata.Speech_to_song_type):
             self.category_id = "speech_to_song"
             self.category_name = "声音成曲"
-        elif isinstance(effect_meta, CapCut_Voice_filters_effect_type):
+        elif isinstance(effect_meta, metadata.CapCut_Voice_filters_effect_type):
             self.category_id = "sound_effect"
             self.category_name = "Voice filters"
-        elif isinstance(effect_meta, CapCut_Voice_characters_effect_type):
+        elif isinstance(effect_meta, metadata.CapCut_Voice_characters_effect_type):
             self.category_id = "tone"
             self.category_name = "Voice characters"
-        elif isinstance(effect_meta, CapCut_Speech_to_song_effect_type):
+        elif isinstance(effect_meta, metadata.CapCut_Speech_to_song_effect_type):
             self.category_id = "speech_to_song"
             self.category_name = "Speech to song"
         else:
@@ -113,6 +118,8 @@ class Audio_effect:
 class Audio_segment(Media_segment):
     """安放在轨道上的一个音频片段"""
 
+    __slots__ = ("material_instance", "fade", "effects")
+
     material_instance: Audio_material
     """音频素材实例"""
 
@@ -214,14 +221,20 @@ class Audio_segment(Media_segment):
             time_offset (`int`): 关键帧的时间偏移量, 单位为微秒
             volume (`float`): 音量在`time_offset`处的值
         """
-        _property = Keyframe_property.volume
-        for kf_list in self.common_keyframes:
-            if kf_list.keyframe_property == _property:
-                kf_list.add_keyframe(time_offset, volume)
-                return self
-        kf_list = Keyframe_list(_property)
-        kf_list.add_keyframe(time_offset, volume)
-        self.common_keyframes.append(kf_list)
+        self._keyframe_list(Keyframe_property.volume).add_keyframe(time_offset, volume)
+        return self
+
+    def add_keyframes(self, time_offsets: Sequence[int], volumes: Sequence[float]) -> "Audio_segment":
+        """为音频片段批量创建*控制音量*的关键帧, 合并入关键帧列表后只排序一次
+
+        Args:
+            time_offsets (`Sequence[int]`): 关键帧的时间偏移量, 单位为微秒, 可以是NumPy数组
+            volumes (`Sequence[float]`): 音量在各时间偏移量处的值, 可以是NumPy数组
+
+        Raises:
+            `ValueError`: 两个序列长度不一致
+        """
+        self._keyframe_list(Keyframe_property.volume).add_keyframes(time_offsets, volumes)
         return self
 
     def export_json(self) -> Dict[str, Any]:
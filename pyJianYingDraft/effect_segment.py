@@ -1,16 +1,23 @@
 """定义特效/滤镜片段类"""
 
-from typing import Union, Optional, List
+from __future__ import annotations
+
+from typing import Union, Optional, List, TYPE_CHECKING
 
 from .time_util import Timerange
 from .segment import Base_segment
 from .video_segment import Video_effect, Filter
 
-from .metadata import Video_scene_effect_type, Video_character_effect_type, Filter_type
+from . import metadata
+
+if TYPE_CHECKING:
+    from .metadata import Video_scene_effect_type, Video_character_effect_type, Filter_type
 
 class Effect_segment(Base_segment):
     """放置在独立特效轨道上的特效片段"""
 
+    __slots__ = ("effect_inst",)
+
     effect_inst: Video_effect
     """相应的特效素材
 
@@ -25,6 +32,8 @@ class Effect_segment(Base_segment):
 class Filter_segment(Base_segment):
     """放置在独立滤镜轨道上的滤镜片段"""
 
+    __slots__ = ("material",)
+
     material: Filter
     """相应的滤镜素材
 
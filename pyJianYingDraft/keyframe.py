@@ -1,11 +1,15 @@
 import uuid
 
 from enum import Enum
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Sequence
 
-class Keyframe:
+from .util import Slots_object
+
+class Keyframe(Slots_object):
     """一个关键帧（关键点）, 目前只支持线性插值"""
 
+    __slots__ = ("kf_id", "time_offset", "values")
+
     kf_id: str
     """关键帧全局id, 自动生成"""
     time_offset: int
@@ -62,9 +66,11 @@ class Keyframe_property(Enum):
     volume = "KFTypeVolume"
     """音量, 1.0为原始音量, 仅对`Audio_segment`和`Video_segment`有效"""
 
-class Keyframe_list:
+class Keyframe_list(Slots_object):
     """关键帧列表, 记录与某个特定属性相关的一系列关键帧"""
 
+    __slots__ = ("list_id", "keyframe_property", "keyframes")
+
     list_id: str
     """关键帧列表全局id, 自动生成"""
     keyframe_property: Keyframe_property
@@ -79,11 +85,51 @@ class Keyframe_list:
         self.keyframe_property = keyframe_property
         self.keyframes = []
 
+    def _bisect(self, time_offset: int) -> int:
+        """返回时间偏移量不大于`time_offset`的关键帧数量, 即按时间偏移量插入时的位置"""
+        lo, hi = 0, len(self.keyframes)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.keyframes[mid].time_offset <= time_offset:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
     def add_keyframe(self, time_offset: int, value: float):
-        """给定时间偏移量及关键值, 向此关键帧列表中添加一个关键帧"""
-        keyframe = Keyframe(time_offset, value)
-        self.keyframes.append(keyframe)
-        self.keyframes.sort(key=lambda x: x.time_offset)
+        """给定时间偏移量及关键值, 向此关键帧列表中添加一个关键帧, 已存在相同时间偏移量的关键帧时替换其值"""
+        index = self._bisect(time_offset)
+        if index > 0 and self.keyframes[index - 1].time_offset == time_offset:
+            self.keyframes[index - 1].values = [value]
+        else:
+            self.keyframes.insert(index, Keyframe(time_offset, value))
+
+    def add_keyframes(self, time_offsets: Sequence[int], values: Sequence[float]):
+        """批量添加关键帧, 合并后只排序一次, 适用于运动跟踪等产生的密集关键帧曲线
+
+        与已有关键帧或同批中更早出现的关键帧时间偏移量相同时, 以后出现的值为准
+
+        Args:
+            time_offsets (`Sequence[int]`): 关键帧的时间偏移量, 单位为微秒. 也可以是NumPy数组等提供`tolist()`方法的数组
+            values (`Sequence[float]`): 与`time_offsets`一一对应的关键值, 同样可以是数组
+
+        Raises:
+            `ValueError`: `time_offsets`与`values`长度不一致
+        """
+        if hasattr(time_offsets, "tolist"): time_offsets = time_offsets.tolist()
+        if hasattr(values, "tolist"): values = values.tolist()
+        if len(time_offsets) != len(values):
+            raise ValueError("time_offsets 与 values 长度不一致: %d != %d" % (len(time_offsets), len(values)))
+
+        by_offset: Dict[int, Keyframe] = {kf.time_offset: kf for kf in self.keyframes}
+        for time_offset, value in zip(time_offsets, values):
+            time_offset, value = int(time_offset), float(value)
+            keyframe = by_offset.get(time_offset)
+            if keyframe is None:
+                by_offset[time_offset] = Keyframe(time_offset, value)
+            else:
+                keyframe.values = [value]
+        self.keyframes = sorted(by_offset.values(), key=lambda kf: kf.time_offset)
 
     def export_json(self) -> Dict[str, Any]:
         return {
@@ -1,10 +1,7 @@
 import os
 import uuid
-import subprocess
-import json
 from typing import Optional
 from typing import Dict, Any
-import imageio.v2 as imageio
 
 class Crop_settings:
     """素材的裁剪设置, 各属性均在0-1之间, 注意素材的坐标原点在左上角"""
@@ -147,62 +144,32 @@ class Video_material:
             self.height = height
             return  # 直接返回，跳过后续的ffprobe检测
         
-        # 如果没有提供duration，则使用ffprobe获取
-        try:
-            # 使用ffprobe获取媒体信息
-            media_path = self.path if self.path else self.remote_url
-            command = [
-                '/usr/bin/ffprobe',  # 使用完整路径确保能找到命令
-                '-v', 'error',
-                '-select_streams', 'v:0',  # 选择第一个视频流
-                '-show_entries', 'stream=width,height,duration,codec_type',  # 添加codec_type
-                '-show_entries', 'format=duration,format_name',  # 添加format_name
-                '-of', 'json',
-                media_path
-            ]
-            result = subprocess.check_output(command, stderr=subprocess.STDOUT)
-            result_str = result.decode('utf-8')
-            # 查找JSON开始位置（第一个'{'）
-            json_start = result_str.find('{')
-            if json_start != -1:
-                json_str = result_str[json_start:]
-                info = json.loads(json_str)
-            else:
-                raise ValueError(f"无法在输出中找到JSON数据: {result_str}")
-            
-            if 'streams' in info and len(info['streams']) > 0:
-                stream = info['streams'][0]
-                self.width = int(stream.get('width', 0))
-                self.height = int(stream.get('height', 0))
-                
-                # 如果指定了material_type，则优先使用指定的类型
-                if material_type is not None:
-                    self.material_type = material_type
-                else:
-                    # 通过format_name和codec_type判断是否是动态视频
-                    format_name = info.get('format', {}).get('format_name', '').lower()
-                    codec_type = stream.get('codec_type', '').lower()
-                    
-                    # 检查是否是GIF或其他动态视频
-                    if 'gif' in format_name or (codec_type == 'video' and stream.get('duration') is not None):
-                        self.material_type = "video"
-                    else:
-                        self.material_type = "photo"
-                
-                # 设置持续时间
-                if self.material_type == "video":
-                    # 优先使用流的duration，如果没有则使用格式的duration
-                    duration = stream.get('duration') or info['format'].get('duration', '0')
-                    self.duration = int(float(duration) * 1e6)  # 转换为微秒
-                else:
-                    self.duration = 10800000000  # 静态图片默认3小时
+        # 如果没有提供duration，则使用媒体信息探测服务获取（结果按URL缓存）
+        from media_probe import probe_media, media_duration
+        media_path = self.path if self.path else self.remote_url
+        info = probe_media(media_path)
+        if info["video_codec"] is None:
+            raise ValueError(f"无法获取媒体文件 {media_path} 的流信息")
+
+        self.width = info["width"]
+        self.height = info["height"]
+
+        # 如果指定了material_type，则优先使用指定的类型
+        if material_type is not None:
+            self.material_type = material_type
+        else:
+            # 通过format_name和视频流时长判断是否是动态视频（GIF或其他动态视频）
+            if 'gif' in info["format_name"].lower() or info["video_duration"] is not None:
+                self.material_type = "video"
             else:
-                raise ValueError(f"无法获取媒体文件 {media_path} 的流信息")
-                
-        except subprocess.CalledProcessError as e:
-            raise ValueError(f"处理文件 {media_path} 时出错: {e.output.decode('utf-8')}")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"解析媒体信息时出错: {e}")
+                self.material_type = "photo"
+
+        # 设置持续时间
+        if self.material_type == "video":
+            # 优先使用流的duration，如果没有则使用格式的duration
+            self.duration = int(media_duration(info, "video") * 1e6)  # 转换为微秒
+        else:
+            self.duration = 10800000000  # 静态图片默认3小时
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Video_material":
@@ -327,63 +294,16 @@ class Audio_material:
         # 如果没有提供duration，则使用ffprobe获取
         self.duration = 0  # 初始化为0，如果有path则后续会更新
     
-        try:
-            # 使用ffprobe获取音频信息
-            command = [
-                '/usr/bin/ffprobe',  # 使用完整路径确保能找到命令
-                '-v', 'error',
-                '-select_streams', 'a:0',  # 选择第一个音频流
-                '-show_entries', 'stream=duration',
-                '-show_entries', 'format=duration',
-                '-of', 'json',
-                path if path else remote_url
-            ]
-            result = subprocess.check_output(command, stderr=subprocess.STDOUT)
-            result_str = result.decode('utf-8')
-            # 查找JSON开始位置（第一个'{'）
-            json_start = result_str.find('{')
-            if json_start != -1:
-                json_str = result_str[json_start:]
-                info = json.loads(json_str)
-            else:
-                raise ValueError(f"无法在输出中找到JSON数据: {result_str}")
-
-            # 检查是否有视频流
-            video_command = [
-                '/usr/bin/ffprobe',  # 使用完整路径确保能找到命令
-                '-v', 'error',
-                '-select_streams', 'v:0',
-                '-show_entries', 'stream=codec_type',
-                '-of', 'json',
-                path if path else remote_url
-            ]
-            video_result = subprocess.check_output(video_command, stderr=subprocess.STDOUT)
-            video_result_str = video_result.decode('utf-8')
-            # 查找JSON开始位置（第一个'{'）
-            video_json_start = video_result_str.find('{')
-            if video_json_start != -1:
-                video_json_str = video_result_str[video_json_start:]
-                video_info = json.loads(video_json_str)
-            else:
-                print(f"无法在输出中找到JSON数据: {video_result_str}")
-            
-            if 'streams' in video_info and len(video_info['streams']) > 0:
-                raise ValueError("音频素材不应包含视频轨道")
-
-            # 检查音频流
-            if 'streams' in info and len(info['streams']) > 0:
-                stream = info['streams'][0]
-                # 优先使用流的duration，如果没有则使用格式的duration
-                duration_value = stream.get('duration') or info['format'].get('duration', '0')
-                self.duration = int(float(duration_value) * 1e6)  # 转换为微秒
-            else:
-                raise ValueError(f"给定的素材文件 {path} 没有音频轨道")
+        # 使用媒体信息探测服务获取音频信息（一次ffprobe同时得到音频和视频流, 结果按URL缓存）
+        from media_probe import probe_media, media_duration
+        info = probe_media(path if path else remote_url)
+        if info["video_codec"] is not None:
+            raise ValueError("音频素材不应包含视频轨道")
+        if info["audio_codec"] is None:
+            raise ValueError(f"给定的素材文件 {path} 没有音频轨道")
+        # 优先使用流的duration，如果没有则使用格式的duration
+        self.duration = int(media_duration(info, "audio") * 1e6)  # 转换为微秒
 
-        except subprocess.CalledProcessError as e:
-            raise ValueError(f"处理文件 {path} 时出错: {e.output.decode('utf-8')}")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"解析媒体信息时出错: {e}")
-    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Audio_material":
         """从字典创建音频素材对象
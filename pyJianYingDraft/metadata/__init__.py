@@ -1,21 +1,73 @@
-"""记录各种特效/音效/滤镜等的元数据"""
+"""记录各种特效/音效/滤镜等的元数据
+
+元数据模块体积很大(构造数千个元数据对象), 因此除effect_meta外均在首次访问其中的名称时才导入(PEP 562)
+"""
+
+import importlib
+from typing import TYPE_CHECKING
 
 from .effect_meta import Effect_meta, Effect_param_instance
 
-from .font_meta import Font_type
-from .mask_meta import Mask_type, Mask_meta
-from .capcut_mask_meta import CapCut_Mask_type
-from .filter_meta import Filter_type
-from .transition_meta import Transition_type
-from .capcut_transition_meta import CapCut_Transition_type
-from .animation_meta import Intro_type, Outro_type, Group_animation_type
-from .capcut_animation_meta import CapCut_Intro_type, CapCut_Outro_type, CapCut_Group_animation_type
-from .animation_meta import Text_intro, Text_outro, Text_loop_anim
-from .capcut_text_animation_meta import CapCut_Text_intro, CapCut_Text_outro, CapCut_Text_loop_anim
-from .audio_effect_meta import Audio_scene_effect_type, Tone_effect_type, Speech_to_song_type
-from .capcut_audio_effect_meta import CapCut_Voice_filters_effect_type, CapCut_Voice_characters_effect_type, CapCut_Speech_to_song_effect_type
-from .video_effect_meta import Video_scene_effect_type, Video_character_effect_type
-from .capcut_effect_meta import CapCut_Video_scene_effect_type, CapCut_Video_character_effect_type
+_LAZY_NAMES = {
+    "Font_type": "font_meta",
+    "Mask_type": "mask_meta",
+    "Mask_meta": "mask_meta",
+    "CapCut_Mask_type": "capcut_mask_meta",
+    "Filter_type": "filter_meta",
+    "Transition_type": "transition_meta",
+    "CapCut_Transition_type": "capcut_transition_meta",
+    "Intro_type": "animation_meta",
+    "Outro_type": "animation_meta",
+    "Group_animation_type": "animation_meta",
+    "CapCut_Intro_type": "capcut_animation_meta",
+    "CapCut_Outro_type": "capcut_animation_meta",
+    "CapCut_Group_animation_type": "capcut_animation_meta",
+    "Text_intro": "animation_meta",
+    "Text_outro": "animation_meta",
+    "Text_loop_anim": "animation_meta",
+    "CapCut_Text_intro": "capcut_text_animation_meta",
+    "CapCut_Text_outro": "capcut_text_animation_meta",
+    "CapCut_Text_loop_anim": "capcut_text_animation_meta",
+    "Audio_scene_effect_type": "audio_effect_meta",
+    "Tone_effect_type": "audio_effect_meta",
+    "Speech_to_song_type": "audio_effect_meta",
+    "CapCut_Voice_filters_effect_type": "capcut_audio_effect_meta",
+    "CapCut_Voice_characters_effect_type": "capcut_audio_effect_meta",
+    "CapCut_Speech_to_song_effect_type": "capcut_audio_effect_meta",
+    "Video_scene_effect_type": "video_effect_meta",
+    "Video_character_effect_type": "video_effect_meta",
+    "CapCut_Video_scene_effect_type": "capcut_effect_meta",
+    "CapCut_Video_character_effect_type": "capcut_effect_meta",
+}
+"""名称 -> 定义该名称的子模块"""
+
+if TYPE_CHECKING:
+    from .font_meta import Font_type
+    from .mask_meta import Mask_type, Mask_meta
+    from .capcut_mask_meta import CapCut_Mask_type
+    from .filter_meta import Filter_type
+    from .transition_meta import Transition_type
+    from .capcut_transition_meta import CapCut_Transition_type
+    from .animation_meta import Intro_type, Outro_type, Group_animation_type
+    from .capcut_animation_meta import CapCut_Intro_type, CapCut_Outro_type, CapCut_Group_animation_type
+    from .animation_meta import Text_intro, Text_outro, Text_loop_anim
+    from .capcut_text_animation_meta import CapCut_Text_intro, CapCut_Text_outro, CapCut_Text_loop_anim
+    from .audio_effect_meta import Audio_scene_effect_type, Tone_effect_type, Speech_to_song_type
+    from .capcut_audio_effect_meta import CapCut_Voice_filters_effect_type, CapCut_Voice_characters_effect_type, CapCut_Speech_to_song_effect_type
+    from .video_effect_meta import Video_scene_effect_type, Video_character_effect_type
+    from .capcut_effect_meta import CapCut_Video_scene_effect_type, CapCut_Video_character_effect_type
+
+def __getattr__(name: str):
+    module_name = _LAZY_NAMES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    # 缓存到模块属性中, 之后的访问不再经过__getattr__
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
 
 __all__ = [
     "Effect_meta",
@@ -1,11 +1,17 @@
+import difflib
+import threading
 from enum import Enum
 
 from typing import List, Dict, Any
 from typing import TypeVar, Optional
 
-class Effect_param:
+from ..util import Slots_object
+
+class Effect_param(Slots_object):
     """特效参数信息"""
 
+    __slots__ = ("name", "default_value", "min_value", "max_value")
+
     name: str
     """参数名称"""
     default_value: float
@@ -24,6 +30,8 @@ class Effect_param:
 class Effect_param_instance(Effect_param):
     """特效参数实例"""
 
+    __slots__ = ("index", "value")
+
     index: int
     """参数索引"""
     value: float
@@ -89,21 +97,60 @@ class Effect_meta:
 
 Effect_enum_subclass = TypeVar("Effect_enum_subclass", bound="Effect_enum")
 
+_NAME_INDEXES: Dict[type, Dict[str, "Effect_enum"]] = {}
+"""特效枚举类 -> {规范化名称: 枚举成员}, 首次按名称查找时构建"""
+_index_lock = threading.Lock()
+
+def _normalize_name(name: str) -> str:
+    """规范化名称: 忽略大小写、空格和下划线"""
+    return name.lower().replace(" ", "").replace("_", "")
+
 class Effect_enum(Enum):
     """特效枚举基类, 提供一个`from_name`方法用于根据名称获取特效元数据"""
 
+    @classmethod
+    def _name_index(cls: "type[Effect_enum_subclass]") -> Dict[str, Effect_enum_subclass]:
+        """返回规范化名称到枚举成员的索引, 包含成员名、别名以及元数据中的效果名称, 成员名优先"""
+        index = _NAME_INDEXES.get(cls)
+        if index is None:
+            with _index_lock:
+                index = _NAME_INDEXES.get(cls)
+                if index is None:
+                    index = {}
+                    for member_name, member in cls.__members__.items():
+                        index.setdefault(_normalize_name(member_name), member)
+                    for member in cls.__members__.values():
+                        meta_name = getattr(member.value, "name", None)
+                        if isinstance(meta_name, str):
+                            index.setdefault(_normalize_name(meta_name), member)
+                    _NAME_INDEXES[cls] = index
+        return index
+
     @classmethod
     def from_name(cls: "type[Effect_enum_subclass]", name: str) -> Effect_enum_subclass:
-        """根据名称获取特效元数据, 忽略大小写、空格和下划线
+        """根据名称获取特效元数据, 忽略大小写、空格和下划线, 也可使用元数据中的效果名称
 
         Args:
             name (str): 特效名称
 
         Raises:
-            `ValueError`: 特效名称不存在
+            `ValueError`: 特效名称不存在, 错误信息中给出相近的名称
         """
-        name = name.lower().replace(" ", "").replace("_", "")
-        for effect in cls:
-            if effect.name.lower().replace(" ", "").replace("_", "") == name:
-                return effect
+        member = cls.__members__.get(name)
+        if member is not None:
+            return member
+        member = cls._name_index().get(_normalize_name(name))
+        if member is not None:
+            return member
+
+        suggestions = cls.suggest(name)
+        if suggestions:
+            raise ValueError(f"Effect named '{name}' not found, did you mean: {', '.join(suggestions)}")
         raise ValueError(f"Effect named '{name}' not found")
+
+    @classmethod
+    def suggest(cls, name: str, limit: int = 5) -> List[str]:
+        """返回与给定名称最相近的成员名, 用于名称不存在时的提示"""
+        index = cls._name_index()
+        matches = difflib.get_close_matches(_normalize_name(name), index.keys(), n=limit * 2, cutoff=0.5)
+        return list(dict.fromkeys(index[match].name for match in matches))[:limit]
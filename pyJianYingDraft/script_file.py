@@ -1,16 +1,18 @@
 import os
 import json
 import math
+import pickle
+import uuid
 from copy import deepcopy
 
-from typing import Optional, Literal, Union, overload
-from typing import Type, Dict, List, Any
+from typing import Optional, Literal, Union, overload, TYPE_CHECKING
+from typing import Type, Dict, List, Tuple, Any, BinaryIO
 
 
 from . import util
 from . import exceptions
 from .template_mode import ImportedTrack, EditableTrack, ImportedMediaTrack, ImportedTextTrack, Shrink_mode, Extend_mode, import_track
-from .time_util import Timerange, tim, srt_tstamp
+from .time_util import Timerange, tim
 from .local_materials import Video_material, Audio_material
 from .segment import Base_segment, Speed, Clip_settings
 from .audio_segment import Audio_segment, Audio_fade, Audio_effect
@@ -18,12 +20,52 @@ from .video_segment import Video_segment, Sticker_segment, Segment_animations, V
 from .effect_segment import Effect_segment, Filter_segment
 from .text_segment import Text_segment, Text_style, TextBubble, Text_border, Text_background, TextEffect
 from .track import Track_type, Base_track, Track
+from .subtitle import parse_subtitles, Subtitle_error, Subtitle_import_result
 
 from settings.local import IS_CAPCUT_ENV
-from .metadata import Video_scene_effect_type, Video_character_effect_type, Filter_type, Font_type
+from . import metadata
+
+if TYPE_CHECKING:
+    from .metadata import Video_scene_effect_type, Video_character_effect_type, Filter_type
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖, 未安装时使用标准库json
+    orjson = None
+
+_TEMPLATE_CONTENT_CACHE: Dict[str, bytes] = {}
+"""草稿内容模板文件名 -> 解析后内容的pickle数据"""
+
+_PLATFORM_INFO: Dict[str, Any] = {
+    "app_id": 359289,
+    "app_source": "cc",
+    "app_version": "6.5.0",
+    "device_id": "c4ca4238a0b923820dcc509a6f75849b",
+    "hard_disk_id": "307563e0192a94465c0e927fbc482942",
+    "mac_address": "c3371f2d4fb02791c067ce44d8fb4ed5",
+    "os": "mac",
+    "os_version": "15.5"
+}
+"""导出时写入platform及last_modified_platform的平台信息"""
+
+# 按ID建立索引的素材列表: (列表名, 素材类型, ID属性名)
+_INDEXED_MATERIALS = (
+    ("videos", Video_material, "material_id"),
+    ("audios", Audio_material, "material_id"),
+    ("audio_fades", Audio_fade, "fade_id"),
+    ("audio_effects", Audio_effect, "effect_id"),
+    ("animations", Segment_animations, "animation_id"),
+    ("video_effects", Video_effect, "global_id"),
+    ("transitions", Transition, "global_id"),
+    ("filters", (Filter, TextBubble), "global_id"),
+)
 
 class Script_material:
-    """草稿文件中的素材信息部分"""
+    """草稿文件中的素材信息部分
+
+    音视频素材、淡入淡出、音频特效、动画、视频特效、转场及滤镜列表同时按ID建立索引,
+    应通过`add`/`remove`修改这些列表以保持索引一致
+    """
 
     audios: List[Audio_material]
     """音频素材列表"""
@@ -71,6 +113,26 @@ class Script_material:
         self.filters = []
         self.canvases = []
 
+        self._indexes: Dict[str, Dict[str, Any]] = {list_name: {} for list_name, _, _ in _INDEXED_MATERIALS}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        # 索引不随旧版本草稿保存, 加载时根据素材列表重建
+        self._rebuild_indexes()
+
+    def _rebuild_indexes(self) -> None:
+        self._indexes = {}
+        for list_name, _, id_attr in _INDEXED_MATERIALS:
+            self._indexes[list_name] = {getattr(item, id_attr): item for item in getattr(self, list_name)}
+
+    @staticmethod
+    def _kind_of(item) -> Tuple[str, str]:
+        """返回素材所属的列表名及其ID属性名"""
+        for list_name, item_type, id_attr in _INDEXED_MATERIALS:
+            if isinstance(item, item_type):
+                return list_name, id_attr
+        raise TypeError("Invalid argument type '%s'" % type(item))
+
     @overload
     def __contains__(self, item: Union[Video_material, Audio_material]) -> bool: ...
     @overload
@@ -79,24 +141,54 @@ class Script_material:
     def __contains__(self, item: Union[Segment_animations, Video_effect, Transition, Filter]) -> bool: ...
 
     def __contains__(self, item) -> bool:
-        if isinstance(item, Video_material):
-            return item.material_id in [video.material_id for video in self.videos]
-        elif isinstance(item, Audio_material):
-            return item.material_id in [audio.material_id for audio in self.audios]
-        elif isinstance(item, Audio_fade):
-            return item.fade_id in [fade.fade_id for fade in self.audio_fades]
-        elif isinstance(item, Audio_effect):
-            return item.effect_id in [effect.effect_id for effect in self.audio_effects]
-        elif isinstance(item, Segment_animations):
-            return item.animation_id in [ani.animation_id for ani in self.animations]
-        elif isinstance(item, Video_effect):
-            return item.global_id in [effect.global_id for effect in self.video_effects]
-        elif isinstance(item, Transition):
-            return item.global_id in [transition.global_id for transition in self.transitions]
-        elif isinstance(item, Filter):
-            return item.global_id in [filter_.global_id for filter_ in self.filters]
-        else:
-            raise TypeError("Invalid argument type '%s'" % type(item))
+        list_name, id_attr = self._kind_of(item)
+        return getattr(item, id_attr) in self._indexes[list_name]
+
+    def add(self, item) -> bool:
+        """添加素材, 已存在相同ID的同类素材时不重复添加
+
+        Args:
+            item: 音视频素材、音频淡入淡出/特效、动画、视频特效、转场、滤镜或文本气泡/花字
+
+        Returns:
+            是否添加了新素材
+
+        Raises:
+            `TypeError`: 素材类型不受支持
+        """
+        list_name, id_attr = self._kind_of(item)
+        index = self._indexes[list_name]
+        item_id = getattr(item, id_attr)
+        if item_id in index:
+            return False
+        index[item_id] = item
+        getattr(self, list_name).append(item)
+        return True
+
+    def remove(self, item) -> None:
+        """移除与给定素材ID相同的同类素材
+
+        Raises:
+            `TypeError`: 素材类型不受支持
+            `MaterialNotFound`: 素材不存在
+        """
+        list_name, id_attr = self._kind_of(item)
+        existing = self._indexes[list_name].pop(getattr(item, id_attr), None)
+        if existing is None:
+            raise exceptions.MaterialNotFound("素材 '%s' 不存在" % getattr(item, id_attr))
+        getattr(self, list_name).remove(existing)
+
+    def get(self, item_id: str) -> Optional[Any]:
+        """根据ID查找素材, 不存在时返回None
+
+        Args:
+            item_id (`str`): 音视频素材的`material_id`, 淡入淡出的`fade_id`, 音频特效的`effect_id`,
+                动画的`animation_id`, 或视频特效/转场/滤镜的`global_id`
+        """
+        for index in self._indexes.values():
+            if item_id in index:
+                return index[item_id]
+        return None
 
     def export_json(self) -> Dict[str, List[Any]]:
         result = {
@@ -204,8 +296,20 @@ class Script_file:
         self.imported_materials = {}
         self.imported_tracks = []
 
-        with open(os.path.join(os.path.dirname(__file__), self.TEMPLATE_FILE), "r", encoding="utf-8") as f:
-            self.content = json.load(f)
+        self.content = self._new_template_content()
+
+    @classmethod
+    def _new_template_content(cls) -> Dict[str, Any]:
+        """返回一份独立的草稿内容模板副本
+
+        模板文件只在首次使用时读取并解析, 之后从缓存的序列化数据复制, 比重新读取并解析JSON快一倍且不访问磁盘
+        """
+        data = _TEMPLATE_CONTENT_CACHE.get(cls.TEMPLATE_FILE)
+        if data is None:
+            with open(os.path.join(os.path.dirname(__file__), cls.TEMPLATE_FILE), "r", encoding="utf-8") as f:
+                data = pickle.dumps(json.load(f), protocol=pickle.HIGHEST_PROTOCOL)
+            _TEMPLATE_CONTENT_CACHE[cls.TEMPLATE_FILE] = data
+        return pickle.loads(data)
 
     @staticmethod
     def load_template(json_path: str) -> "Script_file":
@@ -234,14 +338,9 @@ class Script_file:
 
     def add_material(self, material: Union[Video_material, Audio_material]) -> "Script_file":
         """向草稿文件中添加一个素材"""
-        if material in self.materials:  # 素材已存在
-            return self
-        if isinstance(material, Video_material):
-            self.materials.videos.append(material)
-        elif isinstance(material, Audio_material):
-            self.materials.audios.append(material)
-        else:
+        if not isinstance(material, (Video_material, Audio_material)):
             raise TypeError("错误的素材类型: '%s'" % type(material))
+        self.materials.add(material)  # 素材已存在时不重复添加
         return self
 
     def add_track(self, track_type: Track_type, track_name: Optional[str] = None, *,
@@ -355,25 +454,27 @@ class Script_file:
         target.add_segment(segment)
         self.duration = max(self.duration, segment.end)
 
-        # 自动添加相关素材
+        self._add_segment_materials(segment)
+        return self
+
+    def _add_segment_materials(self, segment: Union[Video_segment, Sticker_segment, Audio_segment, Text_segment]) -> None:
+        """将片段关联的动画、特效等素材及片段素材本身加入素材列表"""
         if isinstance(segment, Video_segment):
             # 出入场等动画
-            if (segment.animations_instance is not None) and (segment.animations_instance not in self.materials):
-                self.materials.animations.append(segment.animations_instance)
+            if segment.animations_instance is not None:
+                self.materials.add(segment.animations_instance)
             # 特效
             for effect in segment.effects:
-                if effect not in self.materials:
-                    self.materials.video_effects.append(effect)
+                self.materials.add(effect)
             # 滤镜
             for filter_ in segment.filters:
-                if filter_ not in self.materials:
-                    self.materials.filters.append(filter_)
+                self.materials.add(filter_)
             # 蒙版
             if segment.mask is not None:
                 self.materials.masks.append(segment.mask.export_json())
             # 转场
-            if (segment.transition is not None) and (segment.transition not in self.materials):
-                self.materials.transitions.append(segment.transition)
+            if segment.transition is not None:
+                self.materials.add(segment.transition)
             # 背景填充
             if segment.background_filling is not None:
                 self.materials.canvases.append(segment.background_filling)
@@ -383,23 +484,22 @@ class Script_file:
             self.materials.stickers.append(segment.export_material())
         elif isinstance(segment, Audio_segment):
             # 淡入淡出
-            if (segment.fade is not None) and (segment.fade not in self.materials):
-                self.materials.audio_fades.append(segment.fade)
+            if segment.fade is not None:
+                self.materials.add(segment.fade)
             # 特效
             for effect in segment.effects:
-                if effect not in self.materials:
-                    self.materials.audio_effects.append(effect)
+                self.materials.add(effect)
             self.materials.speeds.append(segment.speed)
         elif isinstance(segment, Text_segment):
             # 出入场等动画
-            if (segment.animations_instance is not None) and (segment.animations_instance not in self.materials):
-                self.materials.animations.append(segment.animations_instance)
+            if segment.animations_instance is not None:
+                self.materials.add(segment.animations_instance)
             # 气泡效果
             if segment.bubble is not None:
-                self.materials.filters.append(segment.bubble)
+                self.materials.add(segment.bubble)
             # 花字效果
             if segment.effect is not None:
-                self.materials.filters.append(segment.effect)
+                self.materials.add(segment.effect)
             # 字体样式
             self.materials.texts.append(segment.export_material())
 
@@ -407,9 +507,7 @@ class Script_file:
         if isinstance(segment, (Video_segment, Audio_segment)):
             self.add_material(segment.material_instance)
 
-        return self
-
-    def add_effect(self, effect: Union[Video_scene_effect_type, Video_character_effect_type],
+    def add_effect(self, effect: Union["Video_scene_effect_type", "Video_character_effect_type"],
                    t_range: Timerange, track_name: Optional[str] = None, *,
                    params: Optional[List[Optional[float]]] = None) -> "Script_file":
         """向指定的特效轨道中添加一个特效片段
@@ -434,11 +532,10 @@ class Script_file:
         self.duration = max(self.duration, t_range.start + t_range.duration)
 
         # 自动添加相关素材
-        if segment.effect_inst not in self.materials:
-            self.materials.video_effects.append(segment.effect_inst)
+        self.materials.add(segment.effect_inst)
         return self
 
-    def add_filter(self, filter_meta: Filter_type, t_range: Timerange,
+    def add_filter(self, filter_meta: "Filter_type", t_range: Timerange,
                    track_name: Optional[str] = None, intensity: float = 100.0) -> "Script_file":
         """向指定的滤镜轨道中添加一个滤镜片段
 
@@ -461,7 +558,7 @@ class Script_file:
         self.duration = max(self.duration, t_range.end)
 
         # 自动添加相关素材
-        self.materials.filters.append(segment.material)
+        self.materials.add(segment.material)
         return self
 
     def import_srt(self, srt_content: str, track_name: str, *,
@@ -478,8 +575,10 @@ class Script_file:
 
         注意: 默认不会使用参考片段的`clip_settings`属性, 若需要请显式为此函数传入`clip_settings=None`
 
+        无法解析或与已有片段重叠的字幕会被跳过并打印警告, 需要获取这些错误时请使用`import_subtitles`
+
         Args:
-            srt_content (`str`): SRT字幕内容或本地文件路径
+            srt_content (`str`): SRT字幕内容或本地文件路径, 也支持WebVTT格式
             track_name (`str`): 导入到的文本轨道名称, 若不存在则自动创建
             style_reference (`Text_segment`, optional): 作为样式参考的文本片段, 若提供则使用其样式.
             font (`Optional[str]`, optional): 字体, 默认为None.
@@ -495,110 +594,111 @@ class Script_file:
             `NameError`: 已存在同名轨道
             `TypeError`: 轨道类型不匹配
         """
+        result = self.import_subtitles(srt_content, track_name, time_offset=time_offset, style_reference=style_reference,
+                                       font=font, text_style=text_style, clip_settings=clip_settings,
+                                       border=border, background=background, bubble=bubble, effect=effect)
+        for error in result.errors:
+            print(f"警告：字幕第 {error.line} 行导入失败，已跳过: {error.message}")
+        return self
+
+    def import_subtitles(self, content: str, track_name: str, *,
+                         time_offset: Union[str, float] = 0.0,
+                         style_reference: Optional[Text_segment] = None,
+                         font: Optional[str] = None,
+                         text_style: Text_style = Text_style(size=5, align=1),
+                         clip_settings: Optional[Clip_settings] = Clip_settings(transform_y=-0.8),
+                         border: Optional[Text_border] = None,
+                         background: Optional[Text_background] = None,
+                         bubble: Optional[TextBubble] = None,
+                         effect: Optional[TextEffect] = None) -> Subtitle_import_result:
+        """批量导入SRT或WebVTT字幕, 参数含义同`import_srt`
+
+        所有字幕共享同一组样式、图像调节、描边、背景对象, 气泡和花字素材只注册一次, 片段排序后一次性合并入轨道.
+        无法解析或与已有片段重叠的字幕不会中断导入, 而是记录在返回结果中
+
+        Args:
+            content (`str`): 字幕内容或本地文件路径
+
+        Returns:
+            `Subtitle_import_result`: 成功导入的字幕数量及各条失败字幕的错误信息
+
+        Raises:
+            `ValueError`: 未提供样式参考也未提供`clip_settings`, 或字体不存在
+            `TypeError`: 指定名称的轨道不是文本轨道或为导入的模板轨道
+        """
         if style_reference is None and clip_settings is None:
             raise ValueError("未提供样式参考时请提供`clip_settings`参数")
 
+        font_meta = None
         if font:
             try:
-                font_type = getattr(Font_type, font)
-            except:
-                available_fonts = [attr for attr in dir(Font_type) if not attr.startswith('_')]
-                raise ValueError(f"Unsupported font: {font}, please use one of the fonts in Font_type: {available_fonts}")
+                font_meta = metadata.Font_type.from_name(font).value
+            except ValueError:
+                raise ValueError(f"Unsupported font: {font}, similar fonts in Font_type: {metadata.Font_type.suggest(font)}")
 
         time_offset = tim(time_offset)
         # 检查 track_name 是否存在于 self.tracks 或 self.imported_tracks
         track_exists = (track_name in self.tracks) or any(track.name == track_name for track in self.imported_tracks)
         if not track_exists:
             self.add_track(Track_type.text, track_name, relative_index=999)  # 在所有文本轨道的最上层
+        target = self._get_track_and_imported_track(Text_segment, track_name)[0]
+        if not isinstance(target, Track):
+            raise TypeError("轨道 '%s' 为导入的模板轨道, 不支持添加字幕" % track_name)
 
         # 检查是否为本地文件路径
-        if os.path.exists(srt_content):
-            with open(srt_content, "r", encoding="utf-8-sig") as srt_file:
-                lines = srt_file.readlines()
-        else:
-            # 直接将内容按行分割
-            lines = srt_content.splitlines()
-
-        def __add_text_segment(text: str, t_range: Timerange) -> None:
-            fixed_width = -1
-            if self.width < self.height:  # 竖屏
-                fixed_width = int(1080 * 0.6)
-            else:  # 横屏
-                fixed_width = int(1920 * 0.7)
-            
-            if style_reference:
-                seg = Text_segment.create_from_template(text, t_range, style_reference)
-                if clip_settings is not None:
-                    seg.clip_settings = deepcopy(clip_settings)
-                # 复制其他可选属性
-                if border:
-                    seg.border = deepcopy(border)
-                if background:
-                    seg.background = deepcopy(background)
-                if bubble:
-                    seg.bubble = deepcopy(bubble)
-                if effect:
-                    seg.effect = deepcopy(effect)
-                # 设置固定宽高
-                seg.fixed_width = fixed_width
-                # 设置字体
-                if font_type:
-                    seg.font = font_type.value
-            else:
-                seg = Text_segment(text, t_range, style=text_style, clip_settings=clip_settings,
-                                  border=border, background=background,
-                                  font = font_type,
-                                  fixed_width=fixed_width)
-                # 添加气泡和花字效果
-                if bubble:
-                    seg.bubble = deepcopy(bubble)
-                if effect:
-                    seg.effect = deepcopy(effect)
-            # 如果有气泡或花字效果，需要将它们添加到素材列表中
+        if os.path.exists(content):
+            with open(content, "r", encoding="utf-8-sig") as subtitle_file:
+                content = subtitle_file.read()
+        cues, errors = parse_subtitles(content)
+
+        # 所有字幕共享的样式
+        fixed_width = int(1080 * 0.6) if self.width < self.height else int(1920 * 0.7)  # 竖屏/横屏
+        animations = None
+        if style_reference:
+            text_style = deepcopy(style_reference.style)
+            if clip_settings is None:
+                clip_settings = deepcopy(style_reference.clip_settings)
+            border = border or deepcopy(style_reference.border)
+            background = background or deepcopy(style_reference.background)
+            font_meta = font_meta or style_reference.font
+            animations = style_reference.animations_instance
+            if bubble is None and style_reference.bubble:
+                bubble = TextBubble(style_reference.bubble.effect_id, style_reference.bubble.resource_id)
+            if effect is None and style_reference.effect:
+                effect = TextEffect(style_reference.effect.effect_id, style_reference.effect.resource_id)
+
+        segments: List[Text_segment] = []
+        cue_lines: Dict[int, int] = {}
+        for cue in cues:
+            seg = Text_segment(cue.text, Timerange(cue.start + time_offset, cue.end - cue.start),
+                               style=text_style, clip_settings=clip_settings,
+                               border=border, background=background, fixed_width=fixed_width)
+            seg.font = font_meta
+            if animations is not None:
+                # 动画素材按片段区分, 不能共享
+                seg.animations_instance = deepcopy(animations)
+                seg.animations_instance.animation_id = uuid.uuid4().hex
+                seg.extra_material_refs.append(seg.animations_instance.animation_id)
             if bubble:
-                self.materials.filters.append(bubble)
+                seg.bubble = bubble
+                seg.extra_material_refs.append(bubble.global_id)
             if effect:
-                self.materials.filters.append(effect)
-            self.add_segment(seg, track_name)
-
-        index = 0
-        text: str = ""
-        text_trange: Timerange
-        read_state: Literal["index", "timestamp", "content"] = "index"
-        while index < len(lines):
-            line = lines[index].strip()
-            if read_state == "index":
-                if len(line) == 0:
-                    index += 1
-                    continue
-                if not line.isdigit():
-                    raise ValueError("Expected a number at line %d, got '%s'" % (index+1, line))
-                index += 1
-                read_state = "timestamp"
-            elif read_state == "timestamp":
-                # 读取时间戳
-                start_str, end_str = line.split(" --> ")
-                start, end = srt_tstamp(start_str), srt_tstamp(end_str)
-                text_trange = Timerange(start + time_offset, end - start)
-
-                index += 1
-                read_state = "content"
-            elif read_state == "content":
-                # 内容结束, 生成片段
-                if len(line) == 0:
-                    __add_text_segment(text.strip(), text_trange)
-
-                    text = ""
-                    read_state = "index"
-                else:
-                    text += line + "\n"
-                index += 1
-
-        # 添加最后一个片段
-        if len(text) > 0:
-            __add_text_segment(text.strip(), text_trange)
-
-        return self
+                seg.effect = effect
+                seg.extra_material_refs.append(effect.global_id)
+            segments.append(seg)
+            cue_lines[id(seg)] = cue.line
+
+        rejected = target.add_segments(segments)
+        rejected_ids = {id(seg) for seg in rejected}
+        for seg in rejected:
+            errors.append(Subtitle_error(cue_lines[id(seg)], "与已有字幕重叠"))
+        for seg in segments:
+            if id(seg) not in rejected_ids:
+                self._add_segment_materials(seg)
+                self.duration = max(self.duration, seg.end)
+
+        errors.sort(key=lambda error: error.line)
+        return Subtitle_import_result(len(segments) - len(rejected), errors)
 
     def get_imported_track(self, track_type: Literal[Track_type.video, Track_type.audio, Track_type.text],
                            name: Optional[str] = None, index: Optional[int] = None) -> Track:
@@ -877,54 +977,57 @@ class Script_file:
             if effect["type"] == "text_effect":
                 print("\tResource id: %s '%s'" % (effect["resource_id"], effect.get("name", "")))
 
-    def dumps(self) -> str:
-        """将草稿文件内容导出为JSON字符串"""
-        self.content["fps"] = self.fps
-        self.content["duration"] = self.duration
-        self.content["canvas_config"] = {"width": self.width, "height": self.height, "ratio": "original"}
-        self.content["materials"] = self.materials.export_json()
-
-        self.content["last_modified_platform"] = {
-            "app_id": 359289,
-            "app_source": "cc",
-            "app_version": "6.5.0",
-            "device_id": "c4ca4238a0b923820dcc509a6f75849b",
-            "hard_disk_id": "307563e0192a94465c0e927fbc482942",
-            "mac_address": "c3371f2d4fb02791c067ce44d8fb4ed5",
-            "os": "mac",
-            "os_version": "15.5"
-        }
-
-        self.content["platform"] = {
-            "app_id": 359289,
-            "app_source": "cc",
-            "app_version": "6.5.0",
-            "device_id": "c4ca4238a0b923820dcc509a6f75849b",
-            "hard_disk_id": "307563e0192a94465c0e927fbc482942",
-            "mac_address": "c3371f2d4fb02791c067ce44d8fb4ed5",
-            "os": "mac",
-            "os_version": "15.5"
-        }
-
-        # 合并导入的素材
+    def export_content(self) -> Dict[str, Any]:
+        """生成草稿文件内容, 不修改`self.content`及已导入的素材, 可重复调用"""
+        content = dict(self.content)
+        content["fps"] = self.fps
+        content["duration"] = self.duration
+        content["canvas_config"] = {"width": self.width, "height": self.height, "ratio": "original"}
+        content["last_modified_platform"] = dict(_PLATFORM_INFO)
+        content["platform"] = dict(_PLATFORM_INFO)
+
+        # 合并导入的素材, 部分素材列表(如texts)直接引用了Script_material中的列表, 需复制后再合并
+        materials = self.materials.export_json()
         for material_type, material_list in self.imported_materials.items():
-            if material_type not in self.content["materials"]:
-                self.content["materials"][material_type] = material_list
+            if material_type not in materials:
+                materials[material_type] = material_list
             else:
-                self.content["materials"][material_type].extend(material_list)
+                materials[material_type] = materials[material_type] + material_list
+        content["materials"] = materials
 
         # 对轨道排序并导出
         track_list: List[Base_track] = list(self.tracks.values())
         track_list.extend(self.imported_tracks)
         track_list.sort(key=lambda track: track.render_index)
-        self.content["tracks"] = [track.export_json() for track in track_list]
+        content["tracks"] = [track.export_json() for track in track_list]
+        return content
 
-        return json.dumps(self.content, ensure_ascii=False, indent=4)
+    def dumps_bytes(self) -> bytes:
+        """将草稿文件内容导出为紧凑的UTF-8编码JSON"""
+        content = self.export_content()
+        if orjson is not None:
+            try:
+                return orjson.dumps(content)
+            except TypeError:  # orjson无法处理的数据(如超过64位的整数)交给标准库json
+                pass
+        return json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
 
-    def dump(self, file_path: str) -> None:
-        """将草稿文件内容写入文件"""
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(self.dumps())
+    def dumps(self) -> str:
+        """将草稿文件内容导出为JSON字符串"""
+        return self.dumps_bytes().decode('utf-8')
+
+    def dump(self, file: Union[str, BinaryIO]) -> None:
+        """将草稿文件内容写入文件
+
+        Args:
+            file (`str` or `BinaryIO`): 文件路径, 或以二进制模式打开的文件对象
+        """
+        data = self.dumps_bytes()
+        if isinstance(file, str):
+            with open(file, "wb") as f:
+                f.write(data)
+        else:
+            file.write(data)
 
     def save(self) -> None:
         """保存草稿文件至打开时的路径, 仅在模板模式下可用
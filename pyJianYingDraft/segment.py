@@ -1,15 +1,18 @@
 """定义片段基类及部分比较通用的属性类"""
 
 import uuid
-from typing import Optional, Dict, List, Any, Union
+from typing import Optional, Dict, List, Any, Union, Sequence
 
 from .animation import Segment_animations
 from .time_util import Timerange, tim
 from .keyframe import Keyframe_list, Keyframe_property
+from .util import Slots_object
 
-class Base_segment:
+class Base_segment(Slots_object):
     """片段基类"""
 
+    __slots__ = ("segment_id", "material_id", "target_timerange", "common_keyframes")
+
     segment_id: str
     """片段全局id, 由程序自动生成"""
     material_id: str
@@ -52,6 +55,15 @@ class Base_segment:
         """判断是否与另一个片段有重叠"""
         return self.target_timerange.overlaps(other.target_timerange)
 
+    def _keyframe_list(self, _property: Keyframe_property) -> Keyframe_list:
+        """返回给定属性的关键帧列表, 不存在时创建并加入到`common_keyframes`中"""
+        for kf_list in self.common_keyframes:
+            if kf_list.keyframe_property == _property:
+                return kf_list
+        kf_list = Keyframe_list(_property)
+        self.common_keyframes.append(kf_list)
+        return kf_list
+
     def export_json(self) -> Dict[str, Any]:
         """返回通用于各种片段的属性"""
         return {
@@ -76,9 +88,11 @@ class Base_segment:
             "keyframe_refs": [],  # 意义不明
         }
 
-class Speed:
+class Speed(Slots_object):
     """播放速度对象, 目前只支持固定速度"""
 
+    __slots__ = ("global_id", "speed")
+
     global_id: str
     """全局id, 由程序自动生成"""
     speed: float
@@ -97,9 +111,11 @@ class Speed:
             "type": "speed"
         }
 
-class Clip_settings:
+class Clip_settings(Slots_object):
     """素材片段的图像调节设置"""
 
+    __slots__ = ("alpha", "flip_horizontal", "flip_vertical", "rotation", "scale_x", "scale_y", "transform_x", "transform_y")
+
     alpha: float
     """图像不透明度, 0-1"""
     flip_horizontal: bool
@@ -154,6 +170,8 @@ class Clip_settings:
 class Media_segment(Base_segment):
     """媒体片段基类"""
 
+    __slots__ = ("source_timerange", "speed", "volume", "extra_material_refs")
+
     source_timerange: Optional[Timerange]
     """截取的素材片段的时间范围, 对贴纸而言不存在"""
     speed: Speed
@@ -187,6 +205,8 @@ class Media_segment(Base_segment):
 class Visual_segment(Media_segment):
     """视觉片段基类，用于处理所有可见片段（视频、贴纸、文本）的共同属性和行为"""
 
+    __slots__ = ("clip_settings", "uniform_scale", "animations_instance")
+
     clip_settings: Clip_settings
     """图像调节设置, 其效果可被关键帧覆盖"""
 
@@ -217,6 +237,16 @@ class Visual_segment(Media_segment):
         self.uniform_scale = True
         self.animations_instance = None
 
+    def _scale_property(self, _property: Keyframe_property) -> Keyframe_property:
+        """处理`uniform_scale`与`scale_x`、`scale_y`的互斥关系, 返回实际记录关键帧的属性"""
+        if (_property == Keyframe_property.scale_x or _property == Keyframe_property.scale_y) and self.uniform_scale:
+            self.uniform_scale = False
+        elif _property == Keyframe_property.uniform_scale:
+            if not self.uniform_scale:
+                raise ValueError("已设置 scale_x 或 scale_y 时, 不能再设置 uniform_scale")
+            _property = Keyframe_property.scale_x
+        return _property
+
     def add_keyframe(self, _property: Keyframe_property, time_offset: Union[int, str], value: float) -> "Visual_segment":
         """为给定属性创建一个关键帧, 并自动加入到关键帧列表中
 
@@ -228,22 +258,25 @@ class Visual_segment(Media_segment):
         Raises:
             `ValueError`: 试图同时设置`uniform_scale`以及`scale_x`或`scale_y`其中一者
         """
-        if (_property == Keyframe_property.scale_x or _property == Keyframe_property.scale_y) and self.uniform_scale:
-            self.uniform_scale = False
-        elif _property == Keyframe_property.uniform_scale:
-            if not self.uniform_scale:
-                raise ValueError("已设置 scale_x 或 scale_y 时, 不能再设置 uniform_scale")
-            _property = Keyframe_property.scale_x
-
+        _property = self._scale_property(_property)
         if isinstance(time_offset, str): time_offset = tim(time_offset)
 
-        for kf_list in self.common_keyframes:
-            if kf_list.keyframe_property == _property:
-                kf_list.add_keyframe(time_offset, value)
-                return self
-        kf_list = Keyframe_list(_property)
-        kf_list.add_keyframe(time_offset, value)
-        self.common_keyframes.append(kf_list)
+        self._keyframe_list(_property).add_keyframe(time_offset, value)
+        return self
+
+    def add_keyframes(self, _property: Keyframe_property, time_offsets: Sequence[int], values: Sequence[float]) -> "Visual_segment":
+        """为给定属性批量创建关键帧（一整条关键帧曲线）, 合并入关键帧列表后只排序一次
+
+        Args:
+            _property (`Keyframe_property`): 要控制的属性
+            time_offsets (`Sequence[int]`): 关键帧的时间偏移量, 单位为微秒, 可以是NumPy数组
+            values (`Sequence[float]`): 属性在各时间偏移量处的值, 可以是NumPy数组
+
+        Raises:
+            `ValueError`: 试图同时设置`uniform_scale`以及`scale_x`或`scale_y`其中一者, 或两个序列长度不一致
+        """
+        _property = self._scale_property(_property)
+        self._keyframe_list(_property).add_keyframes(time_offsets, values)
         return self
 
     def export_json(self) -> Dict[str, Any]:
@@ -0,0 +1,104 @@
+"""SRT/WebVTT字幕解析"""
+
+import html
+import re
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from .time_util import SEC
+
+_TIMESTAMP = r"(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})"
+_TIMING_RE = re.compile(r"^" + _TIMESTAMP + r"\s*-->\s*" + _TIMESTAMP)
+# WebVTT字幕文本中的<b>、<i>、<c.xxx>、<v 说话人>、<00:00:01.000>等标签
+_VTT_TAG_RE = re.compile(r"</?(?:[bciuv]|lang|ruby|rt)(?:[.\s][^>]*)?>|<\d[\d:.]*>")
+# WebVTT中不包含字幕的块
+_VTT_SKIPPED_BLOCKS = ("NOTE", "STYLE", "REGION")
+
+@dataclass
+class Subtitle_cue:
+    """一条字幕"""
+
+    start: int
+    """开始时间, 单位为微秒"""
+    end: int
+    """结束时间, 单位为微秒"""
+    text: str
+    """字幕文本, 多行以换行符分隔"""
+    line: int
+    """时间轴所在的行号, 从1开始"""
+
+@dataclass
+class Subtitle_error:
+    """无法导入的字幕及原因"""
+
+    line: int
+    """字幕所在的行号, 从1开始"""
+    message: str
+    """错误信息"""
+
+@dataclass
+class Subtitle_import_result:
+    """字幕批量导入结果"""
+
+    imported: int = 0
+    """成功导入的字幕数量"""
+    errors: List[Subtitle_error] = field(default_factory=list)
+    """未能导入的字幕, 按行号排序"""
+
+def _timestamp(hours, minutes, seconds, fraction) -> int:
+    # 小数部分不足三位时按小数处理, 如"1.5"为1500毫秒
+    return (int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)) * SEC + int(fraction.ljust(3, "0")) * 1000
+
+def parse_subtitles(content: str) -> Tuple[List[Subtitle_cue], List[Subtitle_error]]:
+    """一次遍历解析SRT或WebVTT字幕内容, 格式错误的字幕记录为错误并继续解析后续字幕
+
+    字幕块之间以空行分隔; 序号（SRT）或标识（WebVTT）可省略, 时间轴后的WebVTT显示设置被忽略
+
+    Args:
+        content (`str`): 字幕内容, 以"WEBVTT"开头时按WebVTT解析
+
+    Returns:
+        按出现顺序排列的字幕, 以及无法解析的字幕的错误信息
+    """
+    lines = content.lstrip("\ufeff").splitlines()
+    webvtt = bool(lines) and lines[0].startswith("WEBVTT")
+
+    cues: List[Subtitle_cue] = []
+    errors: List[Subtitle_error] = []
+    block: List[str] = []
+    block_start = 0
+    for number, line in enumerate(lines + [""], 1):  # 末尾补一个空行以结束最后一个字幕块
+        line = line.strip()
+        if line:
+            if not block:
+                block_start = number
+            block.append(line)
+            continue
+        if not block:
+            continue
+
+        for offset, block_line in enumerate(block):
+            timing = _TIMING_RE.match(block_line)
+            if timing:
+                break
+        else:
+            if not (webvtt and (block_start == 1 or block[0].startswith(_VTT_SKIPPED_BLOCKS))):
+                errors.append(Subtitle_error(block_start, "缺少时间轴: '%s'" % block[0]))
+            block = []
+            continue
+
+        timing_line = block_start + offset
+        start, end = _timestamp(*timing.group(1, 2, 3, 4)), _timestamp(*timing.group(5, 6, 7, 8))
+        text = "\n".join(block[offset + 1:])
+        if webvtt:
+            text = html.unescape(_VTT_TAG_RE.sub("", text))
+        block = []
+
+        if end <= start:
+            errors.append(Subtitle_error(timing_line, "结束时间不晚于开始时间"))
+        elif not text:
+            errors.append(Subtitle_error(timing_line, "字幕内容为空"))
+        else:
+            cues.append(Subtitle_cue(start, end, text, timing_line))
+
+    return cues, errors
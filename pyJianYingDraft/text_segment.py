@@ -1,20 +1,26 @@
 """定义文本片段及其相关类"""
 
+from __future__ import annotations
+
 import json
 import uuid
 from copy import deepcopy
 
 from typing import Dict, Tuple, Any, List
-from typing import Union, Optional, Literal
+from typing import Union, Optional, Literal, TYPE_CHECKING
 
-from pyJianYingDraft.metadata.capcut_text_animation_meta import CapCut_Text_intro, CapCut_Text_outro, CapCut_Text_loop_anim
 
 from .time_util import Timerange, tim
 from .segment import Clip_settings, Visual_segment
 from .animation import Segment_animations, Text_animation
 
-from .metadata import Font_type, Effect_meta
-from .metadata import Text_intro, Text_outro, Text_loop_anim
+from .metadata import Effect_meta
+from . import metadata
+
+if TYPE_CHECKING:
+    from .metadata import Font_type
+    from .metadata import Text_intro, Text_outro, Text_loop_anim
+    from pyJianYingDraft.metadata.capcut_text_animation_meta import CapCut_Text_intro, CapCut_Text_outro, CapCut_Text_loop_anim
 
 class Text_style:
     """字体样式类"""
@@ -275,10 +281,9 @@ class TextStyleRange:
         self.border = border
         if font_str:
             try:
-                font_type = getattr(Font_type, font_str).value
-            except:
-                available_fonts = [attr for attr in dir(Font_type) if not attr.startswith('_')]
-                raise ValueError(f"不支持的字体：{font_str}，请使用Font_type中的字体之一：{available_fonts}")
+                font_type = metadata.Font_type.from_name(font_str).value
+            except ValueError:
+                raise ValueError(f"不支持的字体：{font_str}，Font_type中相近的字体：{metadata.Font_type.suggest(font_str)}")
             self.font = font_type
     
     def get_range(self) -> List[int]:
@@ -292,6 +297,8 @@ class TextStyleRange:
 class Text_segment(Visual_segment):
     """文本片段类, 目前仅支持设置基本的字体样式"""
 
+    __slots__ = ("text", "font", "style", "border", "background", "shadow", "bubble", "effect", "fixed_width", "fixed_height", "text_styles")
+
     text: str
     """文本内容"""
     font: Optional[Effect_meta]
@@ -397,11 +404,11 @@ class Text_segment(Visual_segment):
         """
         duration = min(tim(duration), self.target_timerange.duration)
 
-        if (isinstance(animation_type, Text_intro) or isinstance(animation_type, CapCut_Text_intro)):
+        if (isinstance(animation_type, metadata.Text_intro) or isinstance(animation_type, metadata.CapCut_Text_intro)):
             start = 0
-        elif (isinstance(animation_type, Text_outro) or isinstance(animation_type, CapCut_Text_outro)):
+        elif (isinstance(animation_type, metadata.Text_outro) or isinstance(animation_type, metadata.CapCut_Text_outro)):
             start = self.target_timerange.duration - duration
-        elif (isinstance(animation_type, Text_loop_anim) or isinstance(animation_type, CapCut_Text_loop_anim)):
+        elif (isinstance(animation_type, metadata.Text_loop_anim) or isinstance(animation_type, metadata.CapCut_Text_loop_anim)):
             intro_trange = self.animations_instance and self.animations_instance.get_animation_trange("in")
             outro_trange = self.animations_instance and self.animations_instance.get_animation_trange("out")
             start = intro_trange.start if intro_trange else 0
@@ -3,6 +3,8 @@
 from typing import Union
 from typing import Dict
 
+from .util import Slots_object
+
 SEC = 1000000
 """一秒=1e6微秒"""
 
@@ -31,8 +33,11 @@ def tim(inp: Union[str, float]) -> int:
 
     return int(round(total_time) * sign)
 
-class Timerange:
+class Timerange(Slots_object):
     """记录了起始时间及持续长度的时间范围"""
+
+    __slots__ = ("start", "duration")
+
     start: int
     """起始时间, 单位为微秒"""
     duration: int
@@ -1,10 +1,11 @@
 """轨道类及其元数据"""
 
+import heapq
 import uuid
 
 from enum import Enum
 from typing import TypeVar, Generic, Type
-from typing import Dict, List, Any, Union
+from typing import Dict, List, Any, Union, Optional, Iterable, Tuple
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 import pyJianYingDraft as draft
@@ -16,6 +17,23 @@ from .audio_segment import Audio_segment
 from .text_segment import Text_segment
 from .effect_segment import Effect_segment, Filter_segment
 
+def _parse_keyframe_value(property_type: str, value: Union[str, float]) -> float:
+    """解析关键帧值, 支持"50%"（透明度、音量）、"45deg"（旋转）及"+0.5"等格式"""
+    if not isinstance(value, str):
+        return float(value)
+    if property_type == 'alpha' and value.endswith('%'):
+        return float(value[:-1]) / 100
+    elif property_type == 'volume' and value.endswith('%'):
+        return float(value[:-1]) / 100
+    elif property_type == 'rotation' and value.endswith('deg'):
+        return float(value[:-3])
+    elif property_type in ['saturation', 'contrast', 'brightness']:
+        if value.startswith('+'):
+            return float(value[1:])
+        elif value.startswith('-'):
+            return -float(value[1:])
+    return float(value)
+
 @dataclass
 class Track_meta:
     """与轨道类型关联的轨道元数据"""
@@ -77,7 +95,7 @@ class Track(Base_track, Generic[Seg_type]):
     """是否静音"""
 
     segments: List[Seg_type]
-    """该轨道包含的片段列表"""
+    """该轨道包含的片段列表, 按起始时间排序且互不重叠. 片段加入轨道后不应再修改其时间范围"""
     
     pending_keyframes: List[Dict[str, Any]]
     """待处理的关键帧列表"""
@@ -91,6 +109,45 @@ class Track(Base_track, Generic[Seg_type]):
         self.mute = mute
         self.segments = []
         self.pending_keyframes = []
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        # 早期版本按添加顺序保存片段, 加载时排序以满足按起始时间二分查找的前提
+        self.segments.sort(key=lambda seg: seg.target_timerange.start)
+
+    def _bisect(self, time: int) -> int:
+        """返回起始时间不晚于`time`的片段数量, 即按起始时间插入时的位置"""
+        lo, hi = 0, len(self.segments)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.segments[mid].target_timerange.start <= time:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def segment_at(self, time: int) -> Optional[Seg_type]:
+        """返回覆盖给定时刻的片段, 不存在时返回None
+
+        Args:
+            time (`int`): 时刻, 单位为微秒. 片段的时间范围为左闭右开区间
+        """
+        index = self._bisect(time) - 1
+        if index >= 0 and time < self.segments[index].target_timerange.end:
+            return self.segments[index]
+        return None
+
+    def segments_between(self, start: int, end: int) -> List[Seg_type]:
+        """按时间顺序返回与时间范围[start, end)有重叠的片段
+
+        Args:
+            start (`int`): 起始时间, 单位为微秒
+            end (`int`): 结束时间, 单位为微秒
+        """
+        first = self._bisect(start) - 1
+        if first < 0 or self.segments[first].target_timerange.end <= start:
+            first += 1
+        return self.segments[first:self._bisect(end - 1)]
         
     def add_pending_keyframe(self, property_type: str, time: float, value: str) -> None:
         """添加待处理的关键帧
@@ -106,58 +163,59 @@ class Track(Base_track, Generic[Seg_type]):
             "value": value
         })
         
+    def _keyframe_segment(self, target_time: int) -> Optional[Seg_type]:
+        """返回关键帧时刻所属的片段, 时刻恰好位于片段末尾时也视为属于该片段"""
+        target_segment = self.segment_at(target_time)
+        if target_segment is None:
+            previous = self.segment_at(target_time - 1)
+            if previous is not None and previous.target_timerange.end == target_time:
+                target_segment = previous
+        return target_segment
+
     def process_pending_keyframes(self) -> None:
-        """处理所有待处理的关键帧"""
+        """处理所有待处理的关键帧, 按片段和属性分组后批量加入各片段的关键帧列表"""
         if not self.pending_keyframes:
             return
-            
+
+        # (片段id, 属性类型) -> (片段, 属性, 时间偏移量列表, 值列表)
+        groups: Dict[Tuple[str, str], Tuple[Seg_type, Any, List[int], List[float]]] = {}
+        target_segment: Optional[Seg_type] = None
         for kf_info in self.pending_keyframes:
             property_type = kf_info["property_type"]
             time = kf_info["time"]
             value = kf_info["value"]
-            
+
             try:
-                # 找到时间点对应的片段（时间单位：微秒）
+                # 找到时间点对应的片段（时间单位：微秒）, 曲线上相邻的关键帧通常落在同一片段内, 此时无需重新查找
                 target_time = int(time * 1000000)  # 将秒转换为微秒
-                target_segment = next(
-                    (segment for segment in self.segments 
-                     if segment.target_timerange.start <= target_time <= segment.target_timerange.end),
-                    None
-                )
-                        
+                if target_segment is None or not (target_segment.target_timerange.start <= target_time
+                                                  < target_segment.target_timerange.end):
+                    target_segment = self._keyframe_segment(target_time)
+
                 if target_segment is None:
                     print(f"警告：在轨道 {self.name} 的时间点 {time}s 找不到对应的片段，跳过此关键帧")
                     continue
-                    
+
                 # 将属性类型字符串转换为枚举值
                 property_enum = getattr(draft.Keyframe_property, property_type)
-                    
-                # 解析value值
-                if property_type == 'alpha' and value.endswith('%'):
-                    float_value = float(value[:-1]) / 100
-                elif property_type == 'volume' and value.endswith('%'):
-                    float_value = float(value[:-1]) / 100
-                elif property_type == 'rotation' and value.endswith('deg'):
-                    float_value = float(value[:-3])
-                elif property_type in ['saturation', 'contrast', 'brightness']:
-                    if value.startswith('+'):
-                        float_value = float(value[1:])
-                    elif value.startswith('-'):
-                        float_value = -float(value[1:])
-                    else:
-                        float_value = float(value)
-                else:
-                    float_value = float(value)
-                    
+                float_value = _parse_keyframe_value(property_type, value)
+
+                group = groups.get((target_segment.segment_id, property_type))
+                if group is None:
+                    group = groups[(target_segment.segment_id, property_type)] = (target_segment, property_enum, [], [])
                 # 计算时间偏移量
-                offset_time = target_time - target_segment.target_timerange.start
-                    
-                # 添加关键帧
-                target_segment.add_keyframe(property_enum, offset_time, float_value)
-                print(f"成功添加关键帧: {property_type} 在 {time}s")
+                group[2].append(target_time - target_segment.target_timerange.start)
+                group[3].append(float_value)
             except Exception as e:
                 print(f"添加关键帧失败: {str(e)}")
-        
+
+        for (_, property_type), (segment, property_enum, offsets, values) in groups.items():
+            try:
+                segment.add_keyframes(property_enum, offsets, values)
+                print(f"成功添加 {len(offsets)} 个关键帧: {property_type}")
+            except Exception as e:
+                print(f"添加关键帧失败: {str(e)}")
+
         # 清空待处理的关键帧
         self.pending_keyframes = []
 
@@ -186,15 +244,54 @@ class Track(Base_track, Generic[Seg_type]):
         if not isinstance(segment, self.accept_segment_type):
             raise TypeError("New segment (%s) is not of the same type as the track (%s)" % (type(segment), self.accept_segment_type))
 
-        # 检查片段是否重叠
-        for seg in self.segments:
+        # 片段按起始时间有序且互不重叠, 只需检查插入位置前后相邻的两个片段
+        index = self._bisect(segment.target_timerange.start)
+        for seg in self.segments[max(index - 1, 0):index + 1]:
             if seg.overlaps(segment):
                 raise SegmentOverlap("New segment overlaps with existing segment [start: {}, end: {}]"
                                      .format(segment.target_timerange.start, segment.target_timerange.end))
 
-        self.segments.append(segment)
+        self.segments.insert(index, segment)
         return self
 
+    def add_segments(self, segments: Iterable[Seg_type]) -> List[Seg_type]:
+        """批量添加片段, 按起始时间排序后一次性合并入轨道, 适用于导入字幕等大量片段的场景
+
+        与已有片段或同批中更早开始的片段重叠的片段不会被添加
+
+        Args:
+            segments (`Iterable[Seg_type]`): 要添加的片段
+
+        Returns:
+            因重叠而未添加的片段
+
+        Raises:
+            `TypeError`: 存在类型与轨道类型不匹配的片段, 此时不添加任何片段
+        """
+        segments = sorted(segments, key=lambda seg: seg.target_timerange.start)
+        for segment in segments:
+            if not isinstance(segment, self.accept_segment_type):
+                raise TypeError("New segment (%s) is not of the same type as the track (%s)" % (type(segment), self.accept_segment_type))
+
+        accepted: List[Seg_type] = []
+        rejected: List[Seg_type] = []
+        for segment in segments:
+            # 同批片段已按起始时间排序, 只需与最后接受的片段比较
+            if accepted and accepted[-1].overlaps(segment):
+                rejected.append(segment)
+                continue
+            index = self._bisect(segment.target_timerange.start)
+            if any(seg.overlaps(segment) for seg in self.segments[max(index - 1, 0):index + 1]):
+                rejected.append(segment)
+                continue
+            accepted.append(segment)
+
+        if self.segments and accepted and accepted[0].target_timerange.start < self.segments[-1].target_timerange.start:
+            self.segments = list(heapq.merge(self.segments, accepted, key=lambda seg: seg.target_timerange.start))
+        else:
+            self.segments.extend(accepted)
+        return rejected
+
     def export_json(self) -> Dict[str, Any]:
         # 为每个片段写入render_index
         segment_exports = [seg.export_json() for seg in self.segments]
@@ -3,14 +3,14 @@
 包含图像调节设置、动画效果、特效、转场等相关类
 """
 
+from __future__ import annotations
+
 import uuid
 from copy import deepcopy
 
-from typing import Optional, Literal, Union, overload
+from typing import Optional, Literal, Union, overload, TYPE_CHECKING
 from typing import Dict, List, Tuple, Any
 
-from pyJianYingDraft.metadata.capcut_effect_meta import CapCut_Video_character_effect_type, CapCut_Video_scene_effect_type
-from pyJianYingDraft.metadata.capcut_mask_meta import CapCut_Mask_type
 from settings import IS_CAPCUT_ENV
 
 from .time_util import tim, Timerange
@@ -19,10 +19,15 @@ from .local_materials import Video_material
 from .animation import Segment_animations, Video_animation
 
 from .metadata import Effect_meta, Effect_param_instance
-from .metadata import Mask_meta, Mask_type, Filter_type, Transition_type, CapCut_Transition_type
-from .metadata import Intro_type, Outro_type, Group_animation_type
-from .metadata import CapCut_Intro_type, CapCut_Outro_type, CapCut_Group_animation_type
-from .metadata import Video_scene_effect_type, Video_character_effect_type
+from . import metadata
+
+if TYPE_CHECKING:
+    from .metadata import Mask_meta, Mask_type, Filter_type, Transition_type, CapCut_Transition_type
+    from pyJianYingDraft.metadata.capcut_effect_meta import CapCut_Video_character_effect_type, CapCut_Video_scene_effect_type
+    from pyJianYingDraft.metadata.capcut_mask_meta import CapCut_Mask_type
+    from .metadata import Intro_type, Outro_type, Group_animation_type
+    from .metadata import CapCut_Intro_type, CapCut_Outro_type, CapCut_Group_animation_type
+    from .metadata import Video_scene_effect_type, Video_character_effect_type
 
 
 class Mask:
@@ -119,16 +124,16 @@ class Video_effect:
         self.adjust_params = []
 
         if IS_CAPCUT_ENV:
-            if isinstance(effect_meta, CapCut_Video_scene_effect_type):
+            if isinstance(effect_meta, metadata.CapCut_Video_scene_effect_type):
                 self.effect_type = "video_effect"
-            elif isinstance(effect_meta, CapCut_Video_character_effect_type):
+            elif isinstance(effect_meta, metadata.CapCut_Video_character_effect_type):
                 self.effect_type = "face_effect"
             else:
                 raise TypeError("Invalid effect meta type %s" % type(effect_meta))
         else:
-            if isinstance(effect_meta, Video_scene_effect_type):
+            if isinstance(effect_meta, metadata.Video_scene_effect_type):
                 self.effect_type = "video_effect"
-            elif isinstance(effect_meta, Video_character_effect_type):
+            elif isinstance(effect_meta, metadata.Video_character_effect_type):
                 self.effect_type = "face_effect"
             else:
                 raise TypeError("Invalid effect meta type %s" % type(effect_meta))
@@ -291,6 +296,8 @@ class BackgroundFilling:
 class Video_segment(Visual_segment):
     """安放在轨道上的一个视频/图片片段"""
 
+    __slots__ = ("material_instance", "material_size", "effects", "filters", "mask", "transition", "background_filling", "visible")
+
     material_instance: Video_material
     """素材实例"""
     material_size: Tuple[int, int]
@@ -378,13 +385,13 @@ class Video_segment(Visual_segment):
         """
         if duration is not None:
             duration = tim(duration)
-        if (isinstance(animation_type, Intro_type) or isinstance(animation_type, CapCut_Intro_type)):
+        if (isinstance(animation_type, metadata.Intro_type) or isinstance(animation_type, metadata.CapCut_Intro_type)):
             start = 0
             duration = duration or animation_type.value.duration
-        elif isinstance(animation_type, Outro_type) or isinstance(animation_type, CapCut_Outro_type):
+        elif isinstance(animation_type, metadata.Outro_type) or isinstance(animation_type, metadata.CapCut_Outro_type):
             duration = duration or animation_type.value.duration
             start = self.target_timerange.duration - duration
-        elif isinstance(animation_type, Group_animation_type) or isinstance(animation_type, CapCut_Group_animation_type):
+        elif isinstance(animation_type, metadata.Group_animation_type) or isinstance(animation_type, metadata.CapCut_Group_animation_type):
             start = 0
             duration = duration or self.target_timerange.duration
         else:
@@ -454,9 +461,9 @@ class Video_segment(Visual_segment):
 
         if self.mask is not None:
             raise ValueError("当前片段已有蒙版, 不能再添加新的蒙版")
-        if (rect_width is not None or round_corner is not None) and (mask_type != Mask_type.矩形 and mask_type != CapCut_Mask_type.Rectangle):
+        if (rect_width is not None or round_corner is not None) and (mask_type != metadata.Mask_type.矩形 and mask_type != metadata.CapCut_Mask_type.Rectangle):
             raise ValueError("`rect_width` 以及 `round_corner` 仅在蒙版类型为矩形时允许设置")
-        if rect_width is None and (mask_type == Mask_type.矩形 or mask_type == CapCut_Mask_type.Rectangle):
+        if rect_width is None and (mask_type == metadata.Mask_type.矩形 or mask_type == metadata.CapCut_Mask_type.Rectangle):
             rect_width = size
         if round_corner is None:
             round_corner = 0
@@ -526,6 +533,8 @@ class Video_segment(Visual_segment):
 class Sticker_segment(Visual_segment):
     """安放在轨道上的一个贴纸片段"""
 
+    __slots__ = ("resource_id",)
+
     resource_id: str
     """贴纸资源id"""
 
@@ -4,23 +4,26 @@ import re
 import pyJianYingDraft as draft
 import shutil
 from util import zip_draft, is_windows_path
-from oss import upload_to_oss
-from typing import Dict, Literal
-from draft_cache import DRAFT_CACHE, get_draft
-from downloader import download_file, download_audio
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import imageio.v2 as imageio
-import subprocess
+from oss import upload_stream_to_oss
+from typing import Callable, Dict, Literal, Tuple
+from draft_cache import DRAFT_CACHE, get_draft, flush_draft, draft_lock, mark_dirty
+from media_store import fetch_media, fetch_to_store, release_object, evict_over_budget
+from draft_packager import Draft_packager, stream_zip
+from draft_template import get_template_image
+from concurrent.futures import as_completed
+from contextlib import closing
 import json
-from get_duration_impl import get_video_duration
+import pickle
+from media_probe import probe_many, media_duration
+from downloader import get_download_executor
+from save_queue import Save_scheduler
 import uuid
-import threading
 import logging
 import time
-import sqlite3
 
-from database import update_draft_status
+from database import update_draft_status, db_connection, enqueue_save_job, count_save_jobs
 from settings import IS_CAPCUT_ENV, IS_UPLOAD_DRAFT
+from settings.local import SAVE_QUEUE_MAX_PENDING
 from os_path_config import get_os_path_config, get_default_draft_path
 
 logger = logging.getLogger('flask_video_generator')
@@ -42,131 +45,215 @@ def build_asset_path(draft_folder: str, draft_id: str, asset_type: str, material
         draft_real_path = os.path.join(draft_folder, draft_id, "assets", asset_type, material_name)
     return draft_real_path
 
+def _get_existing_draft(draft_id: str):
+    script = get_draft(draft_id)
+    if script is None:
+        raise Exception(f"Draft {draft_id} does not exist in cache or database")
+    return script
+
+def get_export_script(draft_id: str):
+    """
+    获取用于导出的草稿副本: 在草稿锁外探测媒体信息, 再在草稿锁内更新媒体元数据后复制,
+    探测和导出期间均不阻塞对该草稿的编辑
+    :raises Exception: 草稿不存在
+    """
+    with draft_lock(draft_id):
+        sources = collect_media_sources(_get_existing_draft(draft_id))
+    # 探测需逐个发送HEAD请求, 未命中缓存时还要运行ffprobe, 不能持有草稿锁
+    probe_results = probe_media_sources(sources)
+
+    with draft_lock(draft_id):
+        script = _get_existing_draft(draft_id)
+        if apply_media_metadata(script, probe_results):
+            # 元数据写入的是缓存中的草稿, 需持久化, 否则被淘汰或重启后丢失
+            mark_dirty(draft_id)
+        # pickle往返复制比deepcopy快数倍
+        return pickle.loads(pickle.dumps(script, protocol=pickle.HIGHEST_PROTOCOL))
+
+def resolve_draft_folder(draft_folder: str = None, client_os: str = "windows") -> str:
+    """确定客户端草稿路径: 传入的路径 > 用户自定义路径配置 > 客户端操作系统的默认路径"""
+    if draft_folder:
+        logger.info(f"使用传入的草稿路径: {draft_folder}")
+        return draft_folder
+
+    # 优先读取用户自定义路径配置
+    custom_path = None
+    try:
+        config_file = 'path_config.json'
+        if os.path.exists(config_file):
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+                custom_path = config.get('custom_download_path', '')
+                if custom_path:
+                    logger.info(f"读取到用户自定义路径: {custom_path}")
+    except Exception as e:
+        logger.warning(f"读取自定义路径配置失败: {e}")
+
+    if custom_path:
+        # 使用用户自定义路径
+        logger.info(f"使用用户自定义草稿路径: {custom_path}")
+        return custom_path
+
+    # 根据客户端操作系统获取默认路径
+    os_config = get_os_path_config()
+    if client_os.lower() == "windows":
+        # 强制使用Windows路径配置
+        draft_folder = os_config.get_default_draft_path("windows")
+        logger.info(f"使用Windows客户端默认草稿路径: {draft_folder}")
+    else:
+        # 使用其他操作系统的路径配置
+        draft_folder = os_config.get_default_draft_path(client_os.lower())
+        logger.info(f"使用{client_os}客户端默认草稿路径: {draft_folder}")
+    return draft_folder
+
+def _asset_downloads(script, draft_id: str, draft_folder: str):
+    """
+    列出草稿需要下载的素材, 并将素材的replace_path设为客户端草稿目录中的路径
+    :return: [(素材, 素材URL, 草稿中的相对路径)]
+    """
+    materials_to_download = []
+    if script.materials.audios:
+        materials_to_download.extend(script.materials.audios)
+    if script.materials.videos:
+        materials_to_download.extend(script.materials.videos)
+
+    downloads = []
+    for material in materials_to_download:
+        remote_url = material.remote_url
+        if not remote_url:
+            logger.warning(f"Material {material.material_name} has no remote_url, skipping.")
+            continue
+
+        asset_type = 'audio'
+        if isinstance(material, draft.Video_material):
+            asset_type = 'image' if material.material_type == 'photo' else 'video'
+
+        material.replace_path = build_asset_path(draft_folder, draft_id, asset_type, material.material_name)
+        downloads.append((material, remote_url, f"assets/{asset_type}/{material.material_name}"))
+    return downloads
+
+def _fetch_to_store(url: str) -> Tuple[str, bool]:
+    """
+    本地文件直接使用, 远程素材通过下载缓存获取
+    :return: (可读取的文件路径, 是否为读取完毕后须用release_object释放的存储对象)
+    """
+    if os.path.isfile(url):
+        return url, False
+    return fetch_to_store(url), True
+
+def _release_fetched(future) -> None:
+    """释放_fetch_to_store任务获取的存储对象"""
+    if not future.cancelled() and future.exception() is None:
+        path, pinned = future.result()
+        if pinned:
+            release_object(path)
+
+def write_draft_package(packager: Draft_packager, script, draft_id: str, draft_folder: str,
+                        on_progress: Callable[[int, int], None] = None) -> None:
+    """
+    将草稿直接写入zip, 不生成本地草稿目录: 模板文件、素材（每个素材下载完成后立即写入）与draft_info.json
+    :param packager: 打包器
+    :param script: 草稿副本, 会修改素材的replace_path
+    :param draft_id: 草稿ID
+    :param draft_folder: 客户端草稿路径
+    :param on_progress: 每完成一个素材时以(已完成数, 总数)调用
+    """
+    template_dir = "template" if IS_CAPCUT_ENV else "template_jianying"
+    get_template_image(template_dir).write_to_packager(packager, draft_id, exclude=["draft_info.json"])
+
+    downloads = _asset_downloads(script, draft_id, draft_folder)
+    # 使用所有保存任务共用的下载线程池
+    executor = get_download_executor()
+    future_to_download = {executor.submit(_fetch_to_store, remote_url): (material, arcname)
+                          for material, remote_url, arcname in downloads}
+    pending = set(future_to_download)
+    completed_count = 0
+    try:
+        for future in as_completed(future_to_download):
+            material, arcname = future_to_download[future]
+            pending.discard(future)
+            try:
+                packager.add_file(future.result()[0], arcname)
+            except Exception as e:
+                logger.error(f"Failed to package {material.material_name} of draft {draft_id}: {e}")
+            finally:
+                # 写入zip后即可释放, 之后该素材可被淘汰
+                _release_fetched(future)
+            completed_count += 1
+            if on_progress:
+                on_progress(completed_count, len(future_to_download))
+    finally:
+        # 打包中途失败时, 未写入的素材在下载完成后释放
+        for future in pending:
+            future.add_done_callback(_release_fetched)
+    evict_over_budget()
+
+    packager.add_bytes("draft_info.json", script.dumps_bytes())
+
 def save_draft_background(draft_id: str, draft_folder: str, task_id: str, client_os: str = "windows"):
     try:
         update_draft_status(draft_id, 'processing', 0, '开始保存草稿')
         
-        script = get_draft(draft_id)
-        if script is None:
-            raise Exception(f"Draft {draft_id} does not exist in cache or database")
-        logger.info(f"Task {task_id}: Successfully retrieved draft {draft_id} from cache.")
         update_draft_status(draft_id, 'processing', 5, '正在更新媒体元数据')
-        update_media_metadata(script, draft_id)
+        script = get_export_script(draft_id)
+        logger.info(f"Task {task_id}: Successfully retrieved draft {draft_id} from cache.")
 
         current_dir = os.path.dirname(os.path.abspath(__file__))
         draft_path = os.path.join(current_dir, draft_id)
-        if os.path.exists(draft_path):
-            shutil.rmtree(draft_path)
+        zip_file_path = os.path.join(current_dir, f"{draft_id}.zip")
 
-        template_dir = "template" if IS_CAPCUT_ENV else "template_jianying"
-        draft_folder_for_duplicate = draft.Draft_folder(current_dir)
-        draft_folder_for_duplicate.duplicate_as_template(template_dir, draft_id)
+        # 确定最终使用的草稿路径
+        draft_folder = resolve_draft_folder(draft_folder, client_os)
+        
+        # 检查是否是自定义下载路径（任何临时目录或自定义路径）
+        is_custom_download = draft_folder and (draft_folder.startswith('/tmp/') or 'custom' in draft_folder.lower())
 
-        # 优先读取用户自定义路径配置
-        custom_path = None
-        try:
-            config_file = 'path_config.json'
-            if os.path.exists(config_file):
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    custom_path = config.get('custom_download_path', '')
-                    if custom_path:
-                        logger.info(f"读取到用户自定义路径: {custom_path}")
-        except Exception as e:
-            logger.warning(f"读取自定义路径配置失败: {e}")
+        def on_progress(completed_count, total_count):
+            progress = 10 + int((completed_count / total_count) * 60)
+            update_draft_status(draft_id, 'processing', progress, f"正在下载素材 ({completed_count}/{total_count})")
 
-        # 确定最终使用的草稿路径
-        if not draft_folder:
-            if custom_path:
-                # 使用用户自定义路径
-                draft_folder = custom_path
-                logger.info(f"使用用户自定义草稿路径: {draft_folder}")
-            else:
-                # 根据客户端操作系统获取默认路径
-                os_config = get_os_path_config()
-                if client_os.lower() == "windows":
-                    # 强制使用Windows路径配置
-                    draft_folder = os_config.get_default_draft_path("windows")
-                    logger.info(f"使用Windows客户端默认草稿路径: {draft_folder}")
-                else:
-                    # 使用其他操作系统的路径配置
-                    draft_folder = os_config.get_default_draft_path(client_os.lower())
-                    logger.info(f"使用{client_os}客户端默认草稿路径: {draft_folder}")
+        if IS_UPLOAD_DRAFT and not is_custom_download:
+            # 正常OSS上传模式: 不需要保留草稿目录, 素材下载完成即写入zip, zip边生成边分片上传, 不落盘
+            update_draft_status(draft_id, 'processing', 10, '正在下载素材并上传至云存储')
+            # 上传中途失败时关闭数据流, 使构建线程停止
+            with closing(stream_zip(lambda packager: write_draft_package(packager, script, draft_id, draft_folder,
+                                                                         on_progress))) as chunks:
+                draft_url = upload_stream_to_oss(chunks, f"{draft_id}.zip")
         else:
-            logger.info(f"使用传入的草稿路径: {draft_folder}")
-        
-        download_tasks = []
-        materials_to_download = []
-        if script.materials.audios:
-            materials_to_download.extend(script.materials.audios)
-        if script.materials.videos:
-            materials_to_download.extend(script.materials.videos)
-
-        update_draft_status(draft_id, 'processing', 10, f"收集到 {len(materials_to_download)} 个下载任务")
-
-        with ThreadPoolExecutor(max_workers=16) as executor:
-            future_to_material = {}
-            for material in materials_to_download:
-                remote_url = material.remote_url
-                if not remote_url:
-                    logger.warning(f"Material {material.material_name} has no remote_url, skipping.")
-                    continue
-
-                asset_type = 'audio'
-                if isinstance(material, draft.Video_material):
-                    asset_type = 'image' if material.material_type == 'photo' else 'video'
-                
-                material.replace_path = build_asset_path(draft_folder, draft_id, asset_type, material.material_name)
-                local_path = os.path.join(draft_path, "assets", asset_type, material.material_name)
-                
-                # 🔧 修复：音频使用专门的下载函数（支持重试和验证）
-                if asset_type == 'audio':
-                    future = executor.submit(download_audio, remote_url, draft_path, material.material_name)
-                else:
-                    # 图片和视频都使用 download_file（更稳定，支持OSS签名URL）
-                    future = executor.submit(download_file, remote_url, local_path)
-                future_to_material[future] = material
+            if os.path.exists(draft_path):
+                shutil.rmtree(draft_path)
+
+            # 由内存中的模板镜像生成草稿目录, 不再复制模板目录并重新解析
+            template_dir = "template" if IS_CAPCUT_ENV else "template_jianying"
+            get_template_image(template_dir).write_to_folder(draft_path, draft_id)
+
+            downloads = _asset_downloads(script, draft_id, draft_folder)
+            update_draft_status(draft_id, 'processing', 10, f"收集到 {len(downloads)} 个下载任务")
+
+            # 通过素材下载缓存获取: 已下载过的素材直接硬链接到草稿目录, 不再重复下载
+            executor = get_download_executor()
+            future_to_material = {executor.submit(fetch_media, remote_url, os.path.join(draft_path, arcname)): material
+                                  for material, remote_url, arcname in downloads}
 
             completed_count = 0
-            total_count = len(future_to_material)
             for future in as_completed(future_to_material):
                 completed_count += 1
-                progress = 10 + int((completed_count / total_count) * 60)
-                update_draft_status(draft_id, 'processing', progress, f"正在下载素材 ({completed_count}/{total_count})")
+                on_progress(completed_count, len(future_to_material))
                 try:
                     future.result()
                 except Exception as e:
                     material = future_to_material[future]
                     logger.error(f"Task {task_id}: Failed to download {material.material_name}: {e}")
 
-        update_draft_status(draft_id, 'processing', 70, '正在保存草稿信息')
-        
-        # Force local consumption - 但保留remote_url用于下载
-        # 注释掉这行，因为我们需要remote_url来下载文件
-        # for material in materials_to_download:
-        #     material.remote_url = None
+            update_draft_status(draft_id, 'processing', 70, '正在保存草稿信息')
+            script.dump(os.path.join(draft_path, "draft_info.json"))
 
-        script.dump(os.path.join(draft_path, "draft_info.json"))
+            update_draft_status(draft_id, 'processing', 80, '正在压缩草稿文件')
+            if not zip_draft(draft_path, zip_file_path):
+                raise Exception("Failed to compress draft folder")
 
-        update_draft_status(draft_id, 'processing', 80, '正在压缩草稿文件')
-        zip_filename = f"{draft_id}.zip"
-        zip_file_path = os.path.join(current_dir, zip_filename)
-        if not zip_draft(draft_path, zip_file_path):
-            raise Exception("Failed to compress draft folder")
+            draft_url = zip_file_path
 
-        draft_url = zip_file_path
-        
-        # 检查是否是自定义下载路径（任何临时目录或自定义路径）
-        is_custom_download = draft_folder and (draft_folder.startswith('/tmp/') or 'custom' in draft_folder.lower())
-        
-        if IS_UPLOAD_DRAFT and not is_custom_download:
-            # 正常OSS上传模式
-            update_draft_status(draft_id, 'processing', 90, '正在上传至云存储')
-            draft_url = upload_to_oss(zip_file_path)
-            # 删除本地文件
-            if os.path.exists(draft_path):
-                shutil.rmtree(draft_path)
-        else:
             # 本地保存模式或自定义下载模式
             if is_custom_download:
                 # 自定义下载：将文件复制到指定的临时目录
@@ -180,7 +267,6 @@ def save_draft_background(draft_id: str, draft_folder: str, task_id: str, client
             else:
                 # 普通本地保存模式，保留文件
                 logger.info(f"Task {task_id}: 本地保存模式，文件保存在: {draft_path}")
-                logger.info(f"草稿文件已复制到临时目录: {temp_target_path}")
         
         update_draft_status(draft_id, 'completed', 100, draft_url)
         logger.info(f"Task {task_id} completed, draft URL: {draft_url}")
@@ -189,15 +275,38 @@ def save_draft_background(draft_id: str, draft_folder: str, task_id: str, client
         logger.error(f"Saving draft {draft_id} task {task_id} failed: {e}", exc_info=True)
         update_draft_status(draft_id, 'failed', message=str(e))
 
-def save_draft_impl(draft_id: str, draft_folder: str = None, client_os: str = "windows") -> Dict[str, str]:
+def _run_save_job(job: dict) -> None:
+    save_draft_background(job['draft_id'], job['draft_folder'], job['draft_id'], job['client_os'])
+
+_save_scheduler = Save_scheduler(_run_save_job)
+
+def start_save_workers() -> None:
+    """启动保存任务工作线程, 并继续执行上次服务退出时未完成的任务"""
+    _save_scheduler.start()
+
+def save_draft_impl(draft_id: str, draft_folder: str = None, client_os: str = "windows",
+                    priority: int = 0) -> Dict[str, str]:
+    """
+    将草稿保存任务加入持久化队列, 由保存工作线程执行
+    :param priority: 优先级, 数值越大越先执行
+    """
     logger.info(f"Received save draft request: draft_id={draft_id}, draft_folder={draft_folder}, client_os={client_os}")
     try:
         task_id = draft_id # Use draft_id as task_id for simplicity
-        update_draft_status(draft_id, 'initialized', 0, '任务已创建')
-        
-        thread = threading.Thread(target=save_draft_background, args=(draft_id, draft_folder, task_id, client_os))
-        thread.start()
-        
+        # 写回缓存中尚未落盘的修改, 保证后台任务及其他进程读取到的是最新草稿
+        flush_draft(draft_id)
+
+        if count_save_jobs() >= SAVE_QUEUE_MAX_PENDING:
+            return {"success": False, "error": "Save queue is full, please retry later"}
+
+        queue_state = enqueue_save_job(draft_id, draft_folder, client_os, priority)
+        # 任务正在运行时保留其进度, 完成后由调度器重新排队并更新状态
+        if queue_state != 'rerun':
+            update_draft_status(draft_id, 'initialized', 0, '任务已创建')
+
+        _save_scheduler.start()
+        _save_scheduler.notify()
+
         return {"success": True, "task_id": task_id, "message": "Draft save task started successfully"}
     except Exception as e:
         logger.error(f"Failed to start save draft task {draft_id}: {e}", exc_info=True)
@@ -205,11 +314,8 @@ def save_draft_impl(draft_id: str, draft_folder: str = None, client_os: str = "w
 
 def query_task_status(task_id: str):
     # This function can be simplified or removed if long polling is directly on drafts table
-    conn = sqlite3.connect('capcut.db')
-    c = conn.cursor()
-    c.execute("SELECT status, progress, message FROM drafts WHERE id = ?", (task_id,))
-    result = c.fetchone()
-    conn.close()
+    with db_connection() as conn:
+        result = conn.execute("SELECT status, progress, message FROM drafts WHERE id = ?", (task_id,)).fetchone()
     
     if result:
         return {"status": result[0], "progress": result[1], "message": result[2]}
@@ -225,51 +331,97 @@ def query_script_impl(draft_id: str, force_update: bool = True):
     return script
 
 def update_media_metadata(script, draft_id=None):
-    # This function remains largely the same, but we can pass draft_id to update status
+    # 传入draft_id时script为缓存中的草稿, 元数据有变化需持久化
+    if apply_media_metadata(script, probe_media_sources(collect_media_sources(script))) and draft_id:
+        mark_dirty(draft_id)
+
+def collect_media_sources(script) -> Dict[str, str]:
+    """
+    收集草稿中需要探测的远程素材
+    :return: url -> 素材类型('audio'/'video'/'photo'), 同一URL被用作图片时为'photo'
+    """
+    sources = {}
+    for audio in script.materials.audios or []:
+        if audio.remote_url:
+            sources.setdefault(audio.remote_url, 'audio')
+    for video in script.materials.videos or []:
+        if video.remote_url and sources.get(video.remote_url) != 'photo':
+            sources[video.remote_url] = video.material_type
+    return sources
+
+def probe_media_sources(sources: Dict[str, str]) -> Dict[str, object]:
+    """
+    探测素材的媒体信息, 耗时较长（网络请求、ffprobe）, 调用方不应持有草稿锁
+    :param sources: collect_media_sources的返回值
+    :return: url -> 探测结果, 失败时为对应的异常
+    """
+    # 并行探测草稿中的所有远程素材, 每个URL只运行一次ffprobe且结果被持久缓存
+    probe_results = probe_many(sources)
+    for url, material_type in sources.items():
+        info = probe_results[url]
+        if material_type == 'photo' and (isinstance(info, Exception) or not info["width"]):
+            # ffprobe无法解析的图片格式回退到imageio（较少用到, 按需导入以加快服务启动）
+            try:
+                import imageio.v2 as imageio
+                height, width = imageio.imread(url).shape[:2]
+                probe_results[url] = {"width": width, "height": height}
+            except Exception as e:
+                probe_results[url] = e
+    return probe_results
+
+def apply_media_metadata(script, probe_results: Dict[str, object]) -> bool:
+    """
+    将探测结果写入草稿素材, 探测之后新加入的素材跳过
+    :param probe_results: probe_media_sources的返回值
+    :return: 草稿是否被修改
+    """
+    changed = False
     audios = script.materials.audios or []
     videos = script.materials.videos or []
 
     for audio in audios:
-        if not audio.remote_url: continue
-        try:
-            # Simplified metadata update logic
-            duration_result = get_video_duration(audio.remote_url)
-            if duration_result["success"]:
-                audio.duration = int(duration_result["output"] * 1000000)
-        except Exception as e:
-            logger.error(f"Error getting audio duration for {audio.material_name}: {e}")
+        if audio.remote_url not in probe_results: continue
+        info = probe_results[audio.remote_url]
+        if isinstance(info, Exception):
+            logger.error(f"Error getting audio duration for {audio.material_name}: {info}")
+            continue
+        duration = media_duration(info, "audio")
+        if duration and audio.duration != int(duration * 1000000):
+            audio.duration = int(duration * 1000000)
+            changed = True
 
     for video in videos:
-        if not video.remote_url: continue
+        if video.remote_url not in probe_results: continue
+        info = probe_results[video.remote_url]
+        before = (video.width, video.height, video.duration)
         try:
+            if isinstance(info, Exception):
+                raise info
             if video.material_type == 'photo':
-                img = imageio.imread(video.remote_url)
-                video.height, video.width = img.shape[:2]
+                video.width, video.height = info["width"], info["height"]
             elif video.material_type == 'video':
-                # Simplified ffprobe logic
-                command = ['/usr/bin/ffprobe', '-v', 'error', '-show_entries', 'stream=width,height,duration', '-of', 'json', video.remote_url]
-                result = subprocess.check_output(command, stderr=subprocess.STDOUT)
-                info = json.loads(result.decode('utf-8'))
-                if 'streams' in info and info['streams']:
-                    stream = info['streams'][0]
-                    video.width = int(stream.get('width', 0))
-                    video.height = int(stream.get('height', 0))
-                    video.duration = int(float(stream.get('duration', '0')) * 1000000)
+                if info.get("video_codec") is not None:
+                    video.width = info["width"]
+                    video.height = info["height"]
+                    video.duration = int(media_duration(info, "video") * 1000000)
         except Exception as e:
             logger.error(f"Error updating metadata for {video.material_name}: {e}")
+        changed = changed or (video.width, video.height, video.duration) != before
 
-    # Simplified conflict resolution and duration update
+    # Simplified conflict resolution and duration update (track segments are kept sorted by start time)
     for track in script.tracks.values():
-        track.segments.sort(key=lambda s: s.start)
         valid_segments = []
         last_end = -1
         for seg in track.segments:
             if seg.start >= last_end:
                 valid_segments.append(seg)
                 last_end = seg.end
-        track.segments = valid_segments
+        if len(valid_segments) != len(track.segments):
+            track.segments = valid_segments
+            changed = True
     
     # script.recalculate_duration()  # 该方法在pyJianYingDraft库中不存在，已注释
+    return changed
 
 if __name__ == "__main__":
     # Example usage for testing
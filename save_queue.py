@@ -0,0 +1,102 @@
+"""
+草稿保存任务调度
+保存任务持久化在数据库的save_jobs表中, 由固定数量的工作线程按优先级依次执行, 突发的大量保存请求在队列中排队,
+不再为每个请求启动一个线程. 服务重启后, 上次未完成的任务重新排队继续执行.
+"""
+
+import logging
+import threading
+from typing import Callable, List
+
+from database import claim_save_job, finish_save_job, requeue_running_save_jobs, update_draft_status
+from settings.local import SAVE_WORKERS
+
+logger = logging.getLogger('flask_video_generator')
+
+# 同一任务被中断（如服务异常退出）的次数上限, 超过后标记为失败, 避免反复导致服务崩溃的任务无限重试
+MAX_ATTEMPTS = 3
+# 工作线程空闲时重新检查队列的间隔（秒）
+IDLE_POLL_INTERVAL = 5.0
+
+class Save_scheduler:
+    """从持久化队列中取出保存任务并在工作线程中执行"""
+
+    def __init__(self, run_job: Callable[[dict], None], workers: int = SAVE_WORKERS):
+        """
+        :param run_job: 执行一个任务, 参数为claim_save_job返回的任务字典
+        :param workers: 工作线程数
+        """
+        self._run_job = run_job
+        self._workers = workers
+        self._threads: List[threading.Thread] = []
+        self._condition = threading.Condition()
+        # 每次有新任务时递增, 工作线程据此判断在检查队列之后是否又有任务加入, 避免错过通知
+        self._signals = 0
+        self._stopping = False
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        """启动工作线程（重复调用无效）, 首次启动时将上次未完成的任务重新排队"""
+        with self._start_lock:
+            if self._threads:
+                return
+            resumed = requeue_running_save_jobs()
+            if resumed:
+                logger.info(f"Resuming {resumed} unfinished save job(s)")
+            self._stopping = False
+            for index in range(self._workers):
+                thread = threading.Thread(target=self._worker, name=f"save_worker_{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def notify(self) -> None:
+        """通知工作线程有新任务"""
+        with self._condition:
+            self._signals += 1
+            self._condition.notify()
+
+    def stop(self, timeout: float = None) -> None:
+        """停止工作线程, 运行中的任务执行完毕后退出"""
+        with self._start_lock:
+            with self._condition:
+                self._stopping = True
+                self._condition.notify_all()
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+
+    def _worker(self) -> None:
+        while not self._stopping:
+            with self._condition:
+                signals = self._signals
+            try:
+                job = claim_save_job()
+            except Exception as e:
+                logger.error(f"Failed to claim save job: {e}", exc_info=True)
+                job = None
+
+            if job is None:
+                with self._condition:
+                    if self._signals == signals and not self._stopping:
+                        self._condition.wait(IDLE_POLL_INTERVAL)
+                continue
+
+            self._execute(job)
+
+    def _execute(self, job: dict) -> None:
+        draft_id = job['draft_id']
+        try:
+            if job['attempts'] > MAX_ATTEMPTS:
+                logger.error(f"Save job {draft_id} was interrupted {job['attempts'] - 1} times, giving up")
+                update_draft_status(draft_id, 'failed', message='保存任务多次中断, 已放弃')
+            else:
+                self._run_job(job)
+        except Exception as e:
+            logger.error(f"Save job {draft_id} failed: {e}", exc_info=True)
+        finally:
+            try:
+                if finish_save_job(draft_id):
+                    update_draft_status(draft_id, 'initialized', 0, '任务已创建')
+                    self.notify()
+            except Exception as e:
+                logger.error(f"Failed to finish save job {draft_id}: {e}", exc_info=True)
@@ -4,6 +4,7 @@
 
 import os
 import json
+import shutil
 
 # 配置文件路径
 CONFIG_FILE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.json")
@@ -38,6 +39,40 @@ DOWNLOAD_HEADERS = {}
 FILE_SERVER_PUBLIC_HOST = ""
 FILE_SERVER_INTERNAL_BASE = ""
 
+# 新增：草稿写回（write-behind）持久化配置, 单位为秒
+# 草稿在最后一次修改后静置 DRAFT_PERSIST_DELAY 秒即写入数据库, 但脏数据最多保留 DRAFT_PERSIST_MAX_STALENESS 秒
+DRAFT_PERSIST_DELAY = 0.5
+DRAFT_PERSIST_MAX_STALENESS = 5.0
+
+# 新增：草稿增量操作日志配置, 自上次快照起累计 OPLOG_COMPACT_INTERVAL 条操作后写入新的完整快照
+OPLOG_COMPACT_INTERVAL = 50
+
+# 新增：草稿缓存内存上限（字节）, 按估算内存淘汰最久未使用的草稿
+DRAFT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# 新增：素材下载缓存（内容寻址存储）配置, 草稿素材从存储中硬链接, 不再重复下载
+MEDIA_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "media_store")
+MEDIA_STORE_MAX_BYTES = 5 * 1024 * 1024 * 1024
+# 服务器未返回ETag/Last-Modified时, 缓存素材在该时间（秒）内视为有效
+MEDIA_STORE_TTL = 24 * 3600
+
+# 新增：ffprobe可执行文件路径（可通过环境变量FFPROBE_PATH覆盖）与媒体信息探测的并发数
+FFPROBE_PATH = os.environ.get("FFPROBE_PATH") or shutil.which("ffprobe") or "/usr/bin/ffprobe"
+MEDIA_PROBE_WORKERS = 8
+
+# 新增：OSS分片上传配置, 超过阈值的文件并行分片上传, 断点信息保存在OSS_CHECKPOINT_DIR中以便失败后续传
+OSS_MULTIPART_THRESHOLD = 16 * 1024 * 1024
+OSS_PART_SIZE = 8 * 1024 * 1024
+OSS_UPLOAD_THREADS = 4
+OSS_CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "oss_checkpoints")
+
+# 新增：草稿保存任务队列配置, 保存任务持久化在数据库中由固定数量的工作线程执行, 所有任务共用一个素材下载线程池
+SAVE_WORKERS = 2
+SAVE_DOWNLOAD_WORKERS = 16
+SAVE_QUEUE_MAX_PENDING = 1000
+# 同一主机同时进行的下载数上限
+DOWNLOADS_PER_HOST = 6
+
 # 尝试加载本地配置文件
 if os.path.exists(CONFIG_FILE_PATH):
     try:
@@ -88,6 +123,48 @@ if os.path.exists(CONFIG_FILE_PATH):
             if "file_server_internal_base" in local_config:
                 FILE_SERVER_INTERNAL_BASE = (local_config["file_server_internal_base"] or "").strip()
 
+            # 新增：草稿写回持久化配置
+            if "draft_persist_delay" in local_config:
+                DRAFT_PERSIST_DELAY = float(local_config["draft_persist_delay"])
+            if "draft_persist_max_staleness" in local_config:
+                DRAFT_PERSIST_MAX_STALENESS = float(local_config["draft_persist_max_staleness"])
+            # 新增：草稿操作日志压缩间隔
+            if "oplog_compact_interval" in local_config:
+                OPLOG_COMPACT_INTERVAL = int(local_config["oplog_compact_interval"])
+            # 新增：草稿缓存内存上限, 配置单位为MB
+            if "draft_cache_max_mb" in local_config:
+                DRAFT_CACHE_MAX_BYTES = int(float(local_config["draft_cache_max_mb"]) * 1024 * 1024)
+            # 新增：素材下载缓存配置
+            if "media_store_dir" in local_config:
+                MEDIA_STORE_DIR = local_config["media_store_dir"]
+            if "media_store_max_mb" in local_config:
+                MEDIA_STORE_MAX_BYTES = int(float(local_config["media_store_max_mb"]) * 1024 * 1024)
+            if "media_store_ttl" in local_config:
+                MEDIA_STORE_TTL = float(local_config["media_store_ttl"])
+            # 新增：媒体信息探测配置
+            if "ffprobe_path" in local_config:
+                FFPROBE_PATH = local_config["ffprobe_path"]
+            if "media_probe_workers" in local_config:
+                MEDIA_PROBE_WORKERS = int(local_config["media_probe_workers"])
+            # 新增：OSS分片上传配置, 大小单位为MB
+            if "oss_multipart_threshold_mb" in local_config:
+                OSS_MULTIPART_THRESHOLD = int(float(local_config["oss_multipart_threshold_mb"]) * 1024 * 1024)
+            if "oss_part_size_mb" in local_config:
+                OSS_PART_SIZE = int(float(local_config["oss_part_size_mb"]) * 1024 * 1024)
+            if "oss_upload_threads" in local_config:
+                OSS_UPLOAD_THREADS = int(local_config["oss_upload_threads"])
+            if "oss_checkpoint_dir" in local_config:
+                OSS_CHECKPOINT_DIR = local_config["oss_checkpoint_dir"]
+            # 新增：草稿保存任务队列配置
+            if "save_workers" in local_config:
+                SAVE_WORKERS = int(local_config["save_workers"])
+            if "save_download_workers" in local_config:
+                SAVE_DOWNLOAD_WORKERS = int(local_config["save_download_workers"])
+            if "save_queue_max_pending" in local_config:
+                SAVE_QUEUE_MAX_PENDING = int(local_config["save_queue_max_pending"])
+            if "downloads_per_host" in local_config:
+                DOWNLOADS_PER_HOST = int(local_config["downloads_per_host"])
+
     except (json.JSONDecodeError, IOError):
         # 配置文件加载失败，使用默认配置
         pass
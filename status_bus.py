@@ -0,0 +1,125 @@
+"""
+草稿状态总线
+update_draft_status写入数据库后将新状态发布到进程内的总线, 等待状态变化的长轮询/SSE请求在条件变量上阻塞,
+状态变化时只唤醒关注该草稿的等待者, 不再每秒查询一次数据库.
+每次发布分配一个全局递增的版本号, 客户端据此判断是否已收到最新状态, 也用作SSE事件的id以便断线续传.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+# 总线中保留最近发布状态的草稿数量, 超出时淘汰最久未更新且无人等待的草稿
+MAX_TRACKED_DRAFTS = 10000
+
+class Status_bus:
+    """进程内的草稿状态发布/等待"""
+
+    def __init__(self, max_tracked: int = MAX_TRACKED_DRAFTS):
+        self._lock = threading.Lock()
+        self._version = 0
+        # draft_id -> (版本号, 状态)
+        self._states: "OrderedDict[str, Tuple[int, dict]]" = OrderedDict()
+        # draft_id -> 等待该草稿状态变化的条件变量
+        self._waiters: Dict[str, Set[threading.Condition]] = {}
+        self._max_tracked = max_tracked
+
+    def publish(self, draft_id: str, status: dict) -> int:
+        """
+        发布草稿的新状态并唤醒等待者
+        :param status: 状态字典, 包含status、progress、message
+        :return: 本次发布的版本号
+        """
+        with self._lock:
+            self._version += 1
+            self._states[draft_id] = (self._version, status)
+            self._states.move_to_end(draft_id)
+            for condition in self._waiters.get(draft_id, ()):
+                condition.notify()
+            self._evict()
+            return self._version
+
+    def seed(self, draft_id: str, status: dict) -> Tuple[int, dict]:
+        """总线中没有该草稿时写入其当前状态（如服务启动前保存的状态）, 已存在时保持不变"""
+        with self._lock:
+            if draft_id not in self._states:
+                self._version += 1
+                self._states[draft_id] = (self._version, status)
+                self._evict()
+            return self._states[draft_id]
+
+    def get(self, draft_id: str) -> Optional[Tuple[int, dict]]:
+        """:return: (版本号, 状态), 总线中没有该草稿时为None"""
+        with self._lock:
+            return self._states.get(draft_id)
+
+    def wait(self, draft_ids: Iterable[str], after_version: int, timeout: float) -> Dict[str, Tuple[int, dict]]:
+        """
+        等待任一草稿发布版本号大于after_version的状态
+        :param draft_ids: 关注的草稿ID
+        :param after_version: 已收到的最新版本号
+        :param timeout: 最长等待时间（秒）
+        :return: draft_id -> (版本号, 状态), 仅包含有更新的草稿; 超时时为空字典
+        """
+        draft_ids = list(dict.fromkeys(draft_ids))
+        deadline = time.monotonic() + timeout
+        condition = threading.Condition(self._lock)
+        with self._lock:
+            changed = self._changed_since(draft_ids, after_version)
+            if changed:
+                return changed
+            for draft_id in draft_ids:
+                self._waiters.setdefault(draft_id, set()).add(condition)
+            try:
+                while not changed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    condition.wait(remaining)
+                    changed = self._changed_since(draft_ids, after_version)
+            finally:
+                for draft_id in draft_ids:
+                    waiters = self._waiters.get(draft_id)
+                    if waiters is not None:
+                        waiters.discard(condition)
+                        if not waiters:
+                            del self._waiters[draft_id]
+        return changed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self._version,
+                "tracked_drafts": len(self._states),
+                "waiters": sum(len(waiters) for waiters in self._waiters.values()),
+            }
+
+    def _changed_since(self, draft_ids, after_version: int) -> Dict[str, Tuple[int, dict]]:
+        changed = {}
+        for draft_id in draft_ids:
+            entry = self._states.get(draft_id)
+            if entry is not None and entry[0] > after_version:
+                changed[draft_id] = entry
+        return changed
+
+    def _evict(self) -> None:
+        """淘汰超出数量上限的草稿状态, 跳过仍有等待者的草稿"""
+        excess = len(self._states) - self._max_tracked
+        if excess <= 0:
+            return
+        for draft_id in list(self._states):
+            if excess <= 0:
+                break
+            if draft_id not in self._waiters:
+                del self._states[draft_id]
+                excess -= 1
+
+_BUS = Status_bus()
+
+def publish_status(draft_id: str, status: str, progress=None, message=None) -> int:
+    """发布草稿状态, 由database.update_draft_status在写入数据库后调用"""
+    return _BUS.publish(draft_id, {"status": status, "progress": progress, "message": message})
+
+def get_status_bus() -> Status_bus:
+    return _BUS
@@ -247,6 +247,30 @@ def test_add_text():
         print(f"❌ 文本添加失败")
         return False
 
+def test_batch_edit():
+    """测试批量编辑"""
+    print_section("📦 批量编辑")
+    
+    data = {
+        "draft_id": DRAFT_ID,
+        "operations": [
+            {"op": "add_text", "params": {"text": f"批量字幕 {i}", "start": 6 + i, "end": 7 + i, "track_name": "batch_subtitle"}}
+            for i in range(5)
+        ] + [
+            {"op": "add_effect", "params": {"effect_type": "Blur", "start": 6, "end": 8, "track_name": "batch_effect"}}
+        ]
+    }
+    
+    print(f"   操作数量: {len(data['operations'])}")
+    
+    result = make_request("/batch_edit", data)
+    if result and result.get("success", False):
+        print(f"✅ 批量编辑成功, 已执行 {result['output']['applied']} 个操作")
+        return True
+    else:
+        print(f"❌ 批量编辑失败")
+        return False
+
 def test_save_draft_oss():
     """测试OSS保存草稿"""
     print_section("☁️ 保存草稿到OSS云存储")
@@ -559,6 +583,7 @@ def main():
     test_results.append(("添加音频", test_add_audio()))
     test_results.append(("添加图片", test_add_image()))
     test_results.append(("添加文本", test_add_text()))
+    test_results.append(("批量编辑", test_batch_edit()))
     
     # 根据模式选择保存测试
     if TEST_MODE == "oss":
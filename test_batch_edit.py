@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量编辑接口单元测试
+验证每个操作的结果、遇到失败操作即停止并返回其下标, 以及每个成功的操作各自写入操作日志
+"""
+
+import importlib
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import database
+import draft_cache
+import draft_oplog
+
+
+class BatchEditTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # capcut_server导入时会在当前目录下写日志并初始化数据库, 在临时目录中导入
+        cls.work_dir = tempfile.mkdtemp(prefix="capcut_server_")
+        os.makedirs(os.path.join(cls.work_dir, "logs"))
+        cwd = os.getcwd()
+        os.chdir(cls.work_dir)
+        try:
+            with mock.patch.object(database, "DB_PATH", os.path.join(cls.work_dir, "capcut.db")):
+                cls.server = importlib.import_module("capcut_server")
+        finally:
+            os.chdir(cwd)
+            database.close_all_connections()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir, True)
+
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp(prefix="capcut_db_")
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        for patcher in (mock.patch.object(database, "DB_PATH", os.path.join(tmp_dir, "capcut.db")),
+                        mock.patch.object(draft_cache, "DRAFT_CACHE", draft_cache.OrderedDict()),
+                        mock.patch.object(draft_oplog, "OPLOG_COMPACT_INTERVAL", 1000)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_all_connections)
+        self.addCleanup(draft_cache.flush_all)
+        database.init_db()
+        self.client = self.server.app.test_client()
+
+    def _batch_edit(self, operations, draft_id=None):
+        response = self.client.post("/batch_edit", json={"draft_id": draft_id, "operations": operations})
+        return response.get_json()
+
+    @staticmethod
+    def _text(text, start):
+        return {"op": "add_text", "params": {"text": text, "start": start, "end": start + 1}}
+
+    def _text_segments(self, draft_id):
+        script = draft_cache.get_draft(draft_id)
+        return [segment.text for segment in script.tracks["text_main"].segments]
+
+    def test_all_operations_applied(self):
+        data = self._batch_edit([self._text("一", 0), self._text("二", 1)])
+        self.assertTrue(data["success"])
+        output = data["output"]
+        self.assertEqual((output["applied"], output["failed_index"]), (2, None))
+        self.assertEqual([(result["index"], result["op"], result["success"]) for result in output["results"]],
+                         [(0, "add_text", True), (1, "add_text", True)])
+        self.assertEqual(self._text_segments(output["draft_id"]), ["一", "二"])
+        # 每个操作各自写入一条操作日志
+        self.assertEqual(len(database.get_draft_ops(output["draft_id"])), 2)
+
+    def test_stops_at_first_failure(self):
+        data = self._batch_edit([self._text("一", 0),
+                                 {"op": "add_text", "params": {"start": 1, "end": 2}},
+                                 self._text("三", 2)])
+        self.assertFalse(data["success"])
+        output = data["output"]
+        self.assertEqual((output["applied"], output["failed_index"]), (1, 1))
+        self.assertEqual(len(output["results"]), 2)
+        self.assertTrue(output["results"][0]["success"])
+        self.assertFalse(output["results"][1]["success"])
+        self.assertIn("'text'", output["results"][1]["error"])
+        self.assertTrue(data["error"].startswith("第 1 个操作失败"))
+        # 失败之前的操作保留, 之后的操作不再执行
+        self.assertEqual(self._text_segments(output["draft_id"]), ["一"])
+        self.assertEqual(len(database.get_draft_ops(output["draft_id"])), 1)
+
+    def test_draft_id_mismatch(self):
+        draft_id = self._batch_edit([self._text("一", 0)])["output"]["draft_id"]
+        operation = self._text("二", 1)
+        operation["params"]["draft_id"] = "other"
+        output = self._batch_edit([operation], draft_id)["output"]
+        self.assertEqual(output["failed_index"], 0)
+        self.assertIn("draft_id", output["results"][0]["error"])
+        self.assertEqual(self._text_segments(draft_id), ["一"])
+
+    def test_invalid_operation(self):
+        data = self._batch_edit([{"op": "remove_everything"}])
+        self.assertFalse(data["success"])
+        self.assertIn("第 0 个操作无效", data["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+类型目录单元测试
+验证目录按环境分别构建并缓存、版本号随内容变化, 以及/catalog中的版本号与单个目录一致
+"""
+
+import json
+import unittest
+
+import catalog
+import pyJianYingDraft as draft
+
+
+class CatalogTest(unittest.TestCase):
+
+    def test_catalog_matches_enum_members(self):
+        for capcut_env, enum_class in ((True, draft.CapCut_Intro_type), (False, draft.Intro_type)):
+            body, _ = catalog.get_catalog("intro_animation", capcut_env)
+            data = json.loads(body)
+            self.assertTrue(data["success"])
+            self.assertEqual([item["name"] for item in data["output"]], list(enum_class.__members__))
+
+    def test_catalog_is_cached(self):
+        first = catalog.get_catalog("font", False)
+        self.assertIs(catalog.get_catalog("font", False)[0], first[0])
+        self.assertNotEqual(catalog.get_catalog("transition", True)[1], catalog.get_catalog("transition", False)[1])
+
+    def test_item_metadata(self):
+        items = json.loads(catalog.get_catalog("video_scene_effect", False)[0])["output"]
+        with_params = [item for item in items if "params" in item]
+        self.assertTrue(with_params)
+        member = draft.Video_scene_effect_type[with_params[0]["name"]]
+        self.assertEqual([param["name"] for param in with_params[0]["params"]], [param.name for param in member.value.params])
+        self.assertTrue(all("is_vip" in item for item in items))
+
+    def test_all_catalogs_versions(self):
+        data = json.loads(catalog.get_all_catalogs(True)[0])["output"]
+        self.assertEqual(data["environment"], "capcut")
+        self.assertEqual(set(data["catalogs"]), set(catalog.CATALOG_ENUMS))
+        self.assertEqual(data["catalogs"]["mask"]["version"], catalog.get_catalog("mask", True)[1])
+
+    def test_unknown_catalog(self):
+        with self.assertRaises(KeyError):
+            catalog.get_catalog("unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库访问层单元测试
+验证连接池、WAL模式、事务与并发状态写入
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import database
+
+
+class DatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="capcut_db_")
+        patcher = mock.patch.object(database, "DB_PATH", os.path.join(self.tmp_dir, "capcut.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.addCleanup(database.close_all_connections)
+        database.init_db()
+
+    def test_wal_mode_and_indexes(self):
+        with database.db_connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            indexes = {row[1] for row in conn.execute("SELECT type, name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn("idx_materials_draft_id", indexes)
+        self.assertIn("idx_drafts_last_modified", indexes)
+
+    def test_connections_are_reused(self):
+        with database.db_connection() as conn:
+            first = conn
+        with database.db_connection() as conn:
+            self.assertIs(conn, first)
+
+    def test_transaction_rolls_back_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with database.db_transaction() as conn:
+                conn.execute("INSERT INTO drafts (id) VALUES ('rolled_back')")
+                with database.db_transaction():
+                    raise RuntimeError("boom")
+        self.assertEqual(database.get_draft_status("rolled_back")["status"], "not_found")
+
+    def test_save_draft_keeps_created_at_and_status(self):
+        database.update_draft_status("d1", "processing", 10, "working")
+        created_at = database.get_draft_by_id("d1")["created_at"]
+        database.save_draft_to_db("d1", "data", 1080, 1920)
+        # 写入快照不影响保存任务的状态
+        status = database.get_draft_status("d1")
+        self.assertEqual((status["status"], status["progress"], status["message"]), ("processing", 10, "working"))
+        self.assertEqual(database.get_draft_from_db("d1"),
+                         {"script_data": "data", "width": 1080, "height": 1920, "snapshot_seq": 0})
+        self.assertEqual(database.get_draft_by_id("d1")["created_at"], created_at)
+
+    def test_batch_materials(self):
+        database.add_materials_to_db("d2", [("m%d" % i, {"index": i}) for i in range(50)])
+        self.assertEqual(len(database.get_draft_materials("d2")), 50)
+        database.delete_draft_from_db("d2")
+        self.assertEqual(database.get_draft_materials("d2"), [])
+
+    def test_concurrent_status_updates(self):
+        errors = []
+
+        def worker(index):
+            try:
+                for progress in range(20):
+                    database.update_draft_status("draft_%d" % index, "processing", progress, "downloading")
+                    database.get_draft_status("draft_%d" % index)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        for i in range(16):
+            self.assertEqual(database.get_draft_status("draft_%d" % i)["progress"], 19)
+
+
+if __name__ == "__main__":
+    unittest.main()
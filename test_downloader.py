@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+下载器单元测试
+使用支持Range请求的本地HTTP服务验证断点续传（含If-Range校验）、分块并行下载（受主机并发名额限制）与不支持Range时的重新下载
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest import mock
+
+import downloader
+
+
+_CONTENT = bytes(range(256)) * 4096  # 1MB
+_RANGE_PATTERN = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+class _Range_handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 由测试设置: 是否支持Range、文件的ETag, 以及记录收到的Range和If-Range头
+    support_ranges = True
+    etag = '"v1"'
+    requests_seen = []
+    if_range_seen = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        type(self).requests_seen.append(range_header)
+        type(self).if_range_seen.append(if_range)
+        match = _RANGE_PATTERN.fullmatch(range_header or "") if self.support_ranges else None
+        if if_range is not None and if_range != self.etag:
+            # 文件已变化, 忽略Range返回完整内容
+            match = None
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(_CONTENT) - 1
+            if start >= len(_CONTENT):
+                self.send_response(416)
+                self.send_header("Content-Range", "bytes */%d" % len(_CONTENT))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = _CONTENT[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", "bytes %d-%d/%d" % (start, end, len(_CONTENT)))
+        else:
+            body = _CONTENT
+            self.send_response(200)
+        if self.support_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class DownloaderTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Range_handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = "http://127.0.0.1:%d/video.mp4" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="capcut_download_")
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.path = os.path.join(self.tmp_dir, "assets", "video.mp4")
+        _Range_handler.support_ranges = True
+        _Range_handler.etag = '"v1"'
+        _Range_handler.requests_seen = []
+        _Range_handler.if_range_seen = []
+
+    def _read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _write_part(self, content, validator='"v1"'):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".part", "wb") as f:
+            f.write(content)
+        if validator:
+            with open(self.path + ".part" + downloader.VALIDATOR_SUFFIX, "w") as f:
+                f.write(validator)
+
+    def _assert_no_temp_files(self):
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), [os.path.basename(self.path)])
+
+    def test_download(self):
+        self.assertEqual(downloader.download_file(self.url, self.path), self.path)
+        self.assertEqual(self._read(self.path), _CONTENT)
+        self._assert_no_temp_files()
+        self.assertEqual(_Range_handler.requests_seen, [None])
+
+    def test_resume_from_part_file(self):
+        self._write_part(_CONTENT[:300000])
+        self.assertEqual(downloader.download_file(self.url, self.path), self.path)
+        self.assertEqual(self._read(self.path), _CONTENT)
+        self.assertEqual(_Range_handler.requests_seen, ["bytes=300000-"])
+        self.assertEqual(_Range_handler.if_range_seen, ['"v1"'])
+        self._assert_no_temp_files()
+
+    def test_restart_when_remote_file_changed(self):
+        self._write_part(b"x" * 300000, validator='"v0"')
+        self.assertEqual(downloader.download_file(self.url, self.path), self.path)
+        self.assertEqual(self._read(self.path), _CONTENT)
+        self.assertEqual(_Range_handler.requests_seen, ["bytes=300000-"])
+
+    def test_part_file_without_validator_not_resumed(self):
+        self._write_part(b"x" * 300000, validator=None)
+        self.assertEqual(downloader.download_file(self.url, self.path), self.path)
+        self.assertEqual(self._read(self.path), _CONTENT)
+        self.assertEqual(_Range_handler.requests_seen, [None])
+
+    def test_complete_part_file(self):
+        self._write_part(_CONTENT)
+        self.assertEqual(downloader.download_file(self.url, self.path), self.path)
+        self.assertEqual(self._read(self.path), _CONTENT)
+        self.assertEqual(_Range_handler.requests_seen, ["bytes=%d-" % len(_CONTENT)])
+
+    def test_restart_when_range_unsupported(self):
+        _Range_handler.support_ranges = False
+        self._write_part(b"x" * 1000)
+        self.assertEqual(downloader.download_file(self.url, self.path), self.path)
+        self.assertEqual(self._read(self.path), _CONTENT)
+
+    def test_parallel_chunks(self):
+        with mock.patch.object(downloader, "PARALLEL_THRESHOLD", 1024):
+            self.assertEqual(downloader.download_file(self.url, self.path), self.path)
+        self.assertEqual(self._read(self.path), _CONTENT)
+        chunk = len(_CONTENT) // downloader.PARALLEL_CHUNKS
+        expected = ["bytes=%d-%d" % (start, start + chunk - 1) for start in range(0, len(_CONTENT), chunk)]
+        self.assertEqual(sorted(_Range_handler.requests_seen[1:]), sorted(expected))
+        self.assertEqual(_Range_handler.if_range_seen[1:], ['"v1"'] * len(expected))
+        self._assert_no_temp_files()
+
+    def test_parallel_chunks_limited_by_free_host_slots(self):
+        with mock.patch.object(downloader, "_host_slots", {}), mock.patch.object(downloader, "DOWNLOADS_PER_HOST", 2), \
+                mock.patch.object(downloader, "PARALLEL_THRESHOLD", 1024):
+            self.assertEqual(downloader.download_file(self.url, self.path), self.path)
+            slot = downloader._host_slot(self.url)
+            # 下载结束后归还全部名额
+            self.assertEqual(downloader._acquire_free_slots(slot, 3), 2)
+        self.assertEqual(self._read(self.path), _CONTENT)
+        half = len(_CONTENT) // 2
+        self.assertEqual(sorted(_Range_handler.requests_seen[1:]),
+                         ["bytes=0-%d" % (half - 1), "bytes=%d-%d" % (half, len(_CONTENT) - 1)])
+
+    def test_no_free_host_slot_downloads_over_one_connection(self):
+        with mock.patch.object(downloader, "_host_slots", {}), mock.patch.object(downloader, "DOWNLOADS_PER_HOST", 1), \
+                mock.patch.object(downloader, "PARALLEL_THRESHOLD", 1024):
+            self.assertEqual(downloader.download_file(self.url, self.path), self.path)
+        self.assertEqual(self._read(self.path), _CONTENT)
+        self.assertEqual(_Range_handler.requests_seen, [None])
+
+    def test_interrupted_parallel_download_not_resumed(self):
+        # 进程在分块下载中途退出后留下的完整大小但有空洞的文件
+        self._write_part(bytes(len(_CONTENT)), validator=None)
+        with open(self.path + ".part" + downloader.CHUNKS_SUFFIX, "wb") as f:
+            f.truncate(len(_CONTENT))
+        with mock.patch.object(downloader, "PARALLEL_THRESHOLD", 1024):
+            self.assertEqual(downloader.download_file(self.url, self.path), self.path)
+        self.assertEqual(self._read(self.path), _CONTENT)
+        self.assertEqual(_Range_handler.requests_seen[0], None)
+        self._assert_no_temp_files()
+
+    def test_failed_parallel_download_leaves_no_part_file(self):
+        with mock.patch.object(downloader, "PARALLEL_THRESHOLD", 1024), \
+                mock.patch.object(downloader, "_download_range", side_effect=Exception("boom")), \
+                mock.patch.object(downloader.time, "sleep"):
+            self.assertFalse(downloader.download_file(self.url, self.path, max_retries=1))
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), [])
+
+    def test_host_slot_limits_concurrency(self):
+        with mock.patch.object(downloader, "_host_slots", {}), mock.patch.object(downloader, "DOWNLOADS_PER_HOST", 1):
+            slot = downloader._host_slot(self.url)
+            self.assertIs(downloader._host_slot(self.url.replace("video", "other")), slot)
+            with slot:
+                finished = threading.Event()
+                worker = threading.Thread(target=lambda: (downloader.download_file(self.url, self.path), finished.set()))
+                worker.start()
+                # 同一主机的名额被占用时下载等待
+                self.assertFalse(finished.wait(0.3))
+            worker.join(5)
+        self.assertEqual(self._read(self.path), _CONTENT)
+
+
+if __name__ == "__main__":
+    unittest.main()
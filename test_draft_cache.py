@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿缓存单元测试
+验证写回(write-behind)持久化的合并写入、最大滞后与同步写入接口, 以及草稿快照格式
+"""
+
+import base64
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import pyJianYingDraft as draft
+import database
+import draft_cache
+
+
+class WriteBehindTest(unittest.TestCase):
+
+    def setUp(self):
+        draft_cache.flush_all()
+        self.saved = []
+        patcher = mock.patch("database.save_draft_to_db",
+                             side_effect=lambda draft_id, *args: self.saved.append(draft_id))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_edits_are_coalesced(self):
+        draft_id = "test_coalesce"
+        script = draft.Script_file(1080, 1920)
+        with mock.patch.object(draft_cache, "DRAFT_PERSIST_DELAY", 0.2):
+            for _ in range(20):
+                draft_cache.update_cache(draft_id, script)
+            self.assertTrue(draft_cache.is_dirty(draft_id))
+            self.assertEqual(self.saved, [])
+            time.sleep(0.6)
+        self.assertEqual(self.saved, [draft_id])
+        self.assertFalse(draft_cache.is_dirty(draft_id))
+
+    def test_max_staleness_bounds_delay(self):
+        draft_id = "test_staleness"
+        script = draft.Script_file(1080, 1920)
+        with mock.patch.object(draft_cache, "DRAFT_PERSIST_DELAY", 10.0), \
+                mock.patch.object(draft_cache, "DRAFT_PERSIST_MAX_STALENESS", 0.3):
+            deadline = time.monotonic() + 0.9
+            while time.monotonic() < deadline and not self.saved:
+                draft_cache.update_cache(draft_id, script)
+                time.sleep(0.05)
+        self.assertEqual(self.saved[:1], [draft_id])
+
+    def test_flush_draft_is_synchronous(self):
+        draft_id = "test_flush"
+        script = draft.Script_file(1080, 1920)
+        with mock.patch.object(draft_cache, "DRAFT_PERSIST_DELAY", 60.0):
+            draft_cache.update_cache(draft_id, script)
+            self.assertTrue(draft_cache.flush_draft(draft_id))
+        self.assertEqual(self.saved, [draft_id])
+        self.assertTrue(draft_cache.flush_draft(draft_id))
+        self.assertEqual(self.saved, [draft_id])
+
+    def test_evicted_dirty_draft_is_persisted(self):
+        with mock.patch.object(draft_cache, "DRAFT_PERSIST_DELAY", 60.0), \
+                mock.patch.object(draft_cache, "MAX_CACHE_SIZE", 1), \
+                mock.patch.object(draft_cache, "DRAFT_CACHE", draft_cache.OrderedDict()):
+            draft_cache.update_cache("test_evict_a", draft.Script_file(1080, 1920))
+            draft_cache.update_cache("test_evict_b", draft.Script_file(1080, 1920))
+            self.assertEqual(self.saved, ["test_evict_a"])
+            draft_cache.flush_all()
+
+
+class MemoryBudgetTest(unittest.TestCase):
+
+    def setUp(self):
+        draft_cache.flush_all()
+        self.saved = []
+        for patcher in (mock.patch("database.save_draft_to_db",
+                                   side_effect=lambda draft_id, *args: self.saved.append(draft_id)),
+                        mock.patch.object(draft_cache, "DRAFT_CACHE", draft_cache.OrderedDict()),
+                        mock.patch.object(draft_cache, "_DRAFT_BYTES", {}),
+                        mock.patch.object(draft_cache, "_cache_bytes", 0),
+                        mock.patch.object(draft_cache, "_STATS", dict.fromkeys(draft_cache._STATS, 0)),
+                        mock.patch.object(draft_cache, "DRAFT_PERSIST_DELAY", 60.0)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(draft_cache.flush_all)
+
+    def _build_script(self, segment_count):
+        script = draft.Script_file(1080, 1920)
+        script.add_track(draft.Track_type.text)
+        for i in range(segment_count):
+            script.add_segment(draft.Text_segment("text %d" % i, draft.Timerange(i * draft.SEC, draft.SEC)))
+        return script
+
+    def test_estimate_grows_with_content(self):
+        small = draft_cache.estimate_script_size(self._build_script(1))
+        script = self._build_script(100)
+        large = draft_cache.estimate_script_size(script)
+        self.assertGreater(large, small * 10)
+        # 导出不修改草稿, 估算值不变
+        script.dumps()
+        self.assertEqual(draft_cache.estimate_script_size(script), large)
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        large = self._build_script(100)
+        budget = draft_cache.estimate_script_size(large) * 2
+        with mock.patch.object(draft_cache, "MAX_CACHE_BYTES", budget):
+            draft_cache.update_cache("test_budget_a", large)
+            draft_cache.update_cache("test_budget_b", self._build_script(100), sync_to_db=False)
+            self.assertEqual(list(draft_cache.DRAFT_CACHE), ["test_budget_a", "test_budget_b"])
+            draft_cache.get_draft("test_budget_a")
+            draft_cache.update_cache("test_budget_c", self._build_script(100), sync_to_db=False)
+
+        self.assertEqual(list(draft_cache.DRAFT_CACHE), ["test_budget_a", "test_budget_c"])
+        self.assertEqual(self.saved, [])
+        stats = draft_cache.get_cache_stats()
+        self.assertEqual((stats["hits"], stats["evictions"], stats["drafts"]), (1, 1, 2))
+        self.assertEqual(stats["bytes"], sum(draft_cache._DRAFT_BYTES.values()))
+
+    def test_refresh_size_after_edit(self):
+        script = self._build_script(1)
+        draft_cache.update_cache("test_refresh", script, sync_to_db=False)
+        before = draft_cache.get_cache_stats()["bytes"]
+        for i in range(1, 50):
+            script.add_segment(draft.Text_segment("text %d" % i, draft.Timerange(i * draft.SEC, draft.SEC)))
+        draft_cache.refresh_draft_size("test_refresh")
+        self.assertGreater(draft_cache.get_cache_stats()["bytes"], before)
+
+    def test_estimate_outside_cache_lock(self):
+        script = self._build_script(10)
+        draft_cache.update_cache("test_estimate_lock", script, sync_to_db=False)
+        estimate = draft_cache.estimate_script_size
+
+        def check_unlocked(value):
+            # 遍历草稿期间不占用全局缓存锁
+            self.assertFalse(draft_cache._cache_lock._is_owned())
+            return estimate(value)
+
+        with mock.patch.object(draft_cache, "estimate_script_size", side_effect=check_unlocked) as mocked:
+            draft_cache.update_cache("test_estimate_lock", script, sync_to_db=False)
+            draft_cache.refresh_draft_size("test_estimate_lock")
+        self.assertEqual(mocked.call_count, 2)
+        self.assertEqual(draft_cache._DRAFT_BYTES["test_estimate_lock"], estimate(script))
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def _build_script(self):
+        script = draft.Script_file(1920, 1080)
+        script.add_track(draft.Track_type.text)
+        for i in range(5):
+            script.add_segment(draft.Text_segment("text %d" % i, draft.Timerange(i * draft.SEC, draft.SEC)))
+        return script
+
+    def test_round_trip(self):
+        script = self._build_script()
+        script_data = draft_cache.serialize_script(script)
+        self.assertTrue(script_data.startswith(draft_cache.SNAPSHOT_MAGIC))
+        restored = draft_cache.deserialize_script(script_data)
+        self.assertEqual(restored.dumps(), script.dumps())
+
+    def test_legacy_snapshot_is_readable(self):
+        script = self._build_script()
+        legacy_data = base64.b64encode(pickle.dumps(script)).decode('utf-8')
+        self.assertTrue(draft_cache.is_legacy_snapshot(legacy_data))
+        self.assertEqual(draft_cache.deserialize_script(legacy_data).dumps(), script.dumps())
+
+    def test_unknown_version_is_rejected(self):
+        self.assertIsNone(draft_cache.deserialize_script(draft_cache.SNAPSHOT_MAGIC + bytes([99]) + b"payload"))
+
+    def test_migrate_legacy_snapshots(self):
+        tmp_dir = tempfile.mkdtemp(prefix="capcut_db_")
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        with mock.patch.object(database, "DB_PATH", os.path.join(tmp_dir, "capcut.db")):
+            database.init_db()
+            script = self._build_script()
+            database.save_draft_to_db("legacy", base64.b64encode(pickle.dumps(script)).decode('utf-8'))
+            database.update_draft_status("legacy", "completed", 100, "done")
+
+            self.assertEqual(draft_cache.migrate_legacy_snapshots(), (1, 0))
+            self.assertEqual(database.get_legacy_script_data_ids(), [])
+            script_data = database.get_draft_from_db("legacy")["script_data"]
+            self.assertIsInstance(script_data, bytes)
+            self.assertEqual(draft_cache.deserialize_script(script_data).dumps(), script.dumps())
+            self.assertEqual(database.get_draft_status("legacy")["status"], "completed")
+            database.close_all_connections()
+
+
+if __name__ == "__main__":
+    unittest.main()
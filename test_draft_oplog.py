@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿操作日志单元测试
+验证编辑操作的记录、缓存未命中时的重放、快照压缩与撤销
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import database
+import draft_cache
+import draft_oplog
+from add_text_impl import add_text_impl
+from add_effect_impl import add_effect_impl
+
+
+# 重放时片段和素材会生成新的随机ID, 比较草稿内容时忽略
+_UUID_PATTERN = re.compile(r"[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}")
+
+
+def _content(script):
+    return _UUID_PATTERN.sub("<id>", script.dumps())
+
+
+class DraftOplogTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp(prefix="capcut_db_")
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        for patcher in (mock.patch.object(database, "DB_PATH", os.path.join(tmp_dir, "capcut.db")),
+                        mock.patch.object(draft_cache, "DRAFT_CACHE", draft_cache.OrderedDict()),
+                        mock.patch.object(draft_cache, "DRAFT_PERSIST_DELAY", 60.0)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_all_connections)
+        self.addCleanup(draft_cache.flush_all)
+        database.init_db()
+
+    def _add_texts(self, count, draft_id=None, start=0):
+        for i in range(start, start + count):
+            draft_id = add_text_impl(text="text %d" % i, start=i, end=i + 1, draft_id=draft_id)["draft_id"]
+        return draft_id
+
+    def _reload(self, draft_id):
+        draft_cache.discard_draft(draft_id)
+        return draft_cache.get_draft(draft_id)
+
+    def test_edits_are_logged_not_snapshotted(self):
+        draft_id = self._add_texts(3)
+        self.assertEqual([op["op"] for op in draft_oplog.get_history(draft_id)], ["add_text"] * 3)
+        self.assertFalse(draft_cache.is_dirty(draft_id))
+        self.assertEqual(database.get_draft_from_db(draft_id)["snapshot_seq"], 0)
+
+    def test_cache_miss_replays_log(self):
+        draft_id = self._add_texts(3)
+        add_effect_impl(effect_type="Blur", start=0, end=2, draft_id=draft_id, params=[])
+        expected = _content(draft_cache.DRAFT_CACHE[draft_id])
+
+        restored = self._reload(draft_id)
+        self.assertEqual(_content(restored), expected)
+        self.assertEqual(draft_cache.DRAFT_OP_SEQ[draft_id], 4)
+
+    def test_compaction_writes_snapshot_and_prunes_log(self):
+        with mock.patch.object(draft_oplog, "OPLOG_COMPACT_INTERVAL", 3):
+            draft_id = self._add_texts(3)
+        self.assertTrue(draft_cache.is_dirty(draft_id))
+        draft_cache.flush_draft(draft_id)
+        self.assertEqual(draft_oplog.get_history(draft_id), [])
+        self.assertEqual(database.get_draft_from_db(draft_id)["snapshot_seq"], 3)
+
+        self._add_texts(1, draft_id, start=3)
+        self.assertEqual([op["seq"] for op in draft_oplog.get_history(draft_id)], [4])
+        self.assertEqual(len(self._reload(draft_id).tracks["text_main"].segments), 4)
+
+    def test_undo(self):
+        draft_id = self._add_texts(2)
+        expected = _content(draft_cache.DRAFT_CACHE[draft_id])
+        self._add_texts(2, draft_id, start=2)
+
+        result = draft_oplog.undo(draft_id, 2)
+        self.assertEqual([op["seq"] for op in result["undone"]], [4, 3])
+        self.assertEqual(result["remaining"], 2)
+        self.assertEqual(_content(draft_cache.DRAFT_CACHE[draft_id]), expected)
+
+        self._add_texts(1, draft_id, start=2)
+        self.assertEqual([op["seq"] for op in draft_oplog.get_history(draft_id)], [1, 2, 3])
+        with self.assertRaises(ValueError):
+            draft_oplog.undo(draft_id, 4)
+
+    def test_unreplayable_params_are_snapshotted(self):
+        draft_id = self._add_texts(2)
+        draft_oplog.record_operation("add_text", {"draft_id": draft_id, "text": object()})
+        self.assertEqual(draft_oplog.get_history(draft_id), [])
+        self.assertEqual(database.get_draft_from_db(draft_id)["snapshot_seq"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
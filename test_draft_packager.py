@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式草稿打包单元测试
+验证目录结构、媒体文件按存储方式写入、流式输出（含消费者提前关闭）与不经过草稿目录的草稿打包
+"""
+
+import functools
+import importlib
+import io
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import zipfile
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from unittest import mock
+
+import database
+import pyJianYingDraft as draft
+import draft_cache
+import media_store
+import save_draft_impl
+from add_audio_track import add_audio_track
+from draft_packager import stream_zip
+from util import zip_draft
+
+
+class _Quiet_handler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _writer_until_closed(started: threading.Event, stopped: threading.Event):
+    """返回持续写入直至数据流被关闭的构建函数"""
+    def build(packager):
+        started.set()
+        try:
+            for index in itertools.count():
+                packager.add_bytes("data_%d.bin" % index, os.urandom(64 * 1024))
+        finally:
+            stopped.set()
+    return build
+
+
+class DraftPackagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="capcut_zip_")
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+
+    def _make_folder(self):
+        folder = os.path.join(self.tmp_dir, "draft")
+        os.makedirs(os.path.join(folder, "assets", "image"))
+        os.makedirs(os.path.join(folder, "assets", "video"))
+        with open(os.path.join(folder, "draft_info.json"), "w") as f:
+            f.write('{"tracks": []}' * 100)
+        with open(os.path.join(folder, "assets", "video", "clip.mp4"), "wb") as f:
+            f.write(os.urandom(4096))
+        return folder
+
+    def test_zip_draft_keeps_empty_dirs_and_stores_media(self):
+        zip_path = os.path.join(self.tmp_dir, "draft.zip")
+        self.assertTrue(zip_draft(self._make_folder(), zip_path))
+        with zipfile.ZipFile(zip_path) as zipf:
+            infos = {info.filename: info for info in zipf.infolist()}
+        self.assertEqual(sorted(infos), ["assets/", "assets/image/", "assets/video/",
+                                         "assets/video/clip.mp4", "draft_info.json"])
+        self.assertEqual(infos["assets/video/clip.mp4"].compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(infos["draft_info.json"].compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_stream_zip(self):
+        folder = self._make_folder()
+
+        def build(packager):
+            packager.add_tree(folder, exclude=["draft_info.json"])
+            packager.add_bytes("draft_info.json", b"{}")
+
+        data = b"".join(stream_zip(build, chunk_size=1024))
+        with zipfile.ZipFile(io.BytesIO(data)) as zipf:
+            self.assertEqual(zipf.read("draft_info.json"), b"{}")
+            with open(os.path.join(folder, "assets", "video", "clip.mp4"), "rb") as f:
+                self.assertEqual(zipf.read("assets/video/clip.mp4"), f.read())
+
+    def test_stream_zip_reports_errors(self):
+        def build(packager):
+            packager.add_bytes("a.txt", b"a")
+            raise ValueError("broken")
+
+        with self.assertRaises(ValueError):
+            b"".join(stream_zip(build))
+
+    def test_stream_zip_closed_before_read_never_builds(self):
+        build = mock.Mock()
+        stream_zip(build).close()
+        self.assertFalse(build.called)
+
+    def test_stream_zip_closed_mid_stream_stops_builder(self):
+        started, stopped = threading.Event(), threading.Event()
+        chunks = stream_zip(_writer_until_closed(started, stopped), chunk_size=1024)
+        next(chunks)
+        chunks.close()
+        self.assertTrue(stopped.wait(5))
+        self.assertEqual(list(chunks), [])
+
+
+class WriteDraftPackageTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.www_dir = tempfile.mkdtemp(prefix="capcut_www_")
+        with open(os.path.join(cls.www_dir, "voice.mp3"), "wb") as f:
+            f.write(b"v" * 5000)
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_Quiet_handler, directory=cls.www_dir))
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = "http://127.0.0.1:%d/" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        shutil.rmtree(cls.www_dir, True)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="capcut_pkg_")
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        for patcher in (mock.patch.object(database, "DB_PATH", os.path.join(self.tmp_dir, "capcut.db")),
+                        mock.patch.object(draft_cache, "DRAFT_CACHE", draft_cache.OrderedDict()),
+                        mock.patch.object(media_store, "MEDIA_STORE_DIR", os.path.join(self.tmp_dir, "store"))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_all_connections)
+        self.addCleanup(draft_cache.flush_all)
+        database.init_db()
+
+    def test_assets_are_written_without_draft_folder(self):
+        draft_id = add_audio_track(audio_url=self.base_url + "voice.mp3", duration=2.0)["draft_id"]
+        script = save_draft_impl.get_export_script(draft_id)
+        draft_folder = "/data/jianying/drafts"
+
+        data = b"".join(stream_zip(lambda packager: save_draft_impl.write_draft_package(
+            packager, script, draft_id, draft_folder)))
+
+        self.assertFalse(os.path.exists(os.path.join(os.path.dirname(save_draft_impl.__file__), draft_id)))
+        with zipfile.ZipFile(io.BytesIO(data)) as zipf:
+            names = zipf.namelist()
+            self.assertEqual(names.count("draft_info.json"), 1)
+            self.assertIn("draft_meta_info.json", names)
+            audio_names = [name for name in names if name.startswith("assets/audio/") and not name.endswith("/")]
+            self.assertEqual(len(audio_names), 1)
+            self.assertEqual(zipf.read(audio_names[0]), b"v" * 5000)
+            self.assertEqual(zipf.getinfo(audio_names[0]).compress_type, zipfile.ZIP_STORED)
+            draft_info = json.loads(zipf.read("draft_info.json"))
+        audio_paths = [audio["path"] for audio in draft_info["materials"]["audios"]]
+        self.assertEqual(audio_paths, [os.path.join(draft_folder, draft_id, audio_names[0])])
+
+    def test_probing_does_not_hold_draft_lock(self):
+        draft_id = add_audio_track(audio_url=self.base_url + "voice.mp3", duration=2.0)["draft_id"]
+        edited = threading.Event()
+
+        def probe_while_editing(urls):
+            # 探测期间其他线程可以获得草稿锁
+            def edit():
+                with draft_cache.draft_lock(draft_id):
+                    edited.set()
+            thread = threading.Thread(target=edit)
+            thread.start()
+            thread.join(5)
+            return {url: {"audio_duration": 3.0} for url in urls}
+
+        with mock.patch.object(save_draft_impl, "probe_many", side_effect=probe_while_editing):
+            script = save_draft_impl.get_export_script(draft_id)
+        self.assertTrue(edited.is_set())
+        # 探测结果在重新获得草稿锁后写入
+        self.assertEqual(script.materials.audios[0].duration, 3 * draft.SEC)
+
+    def test_probed_metadata_is_persisted(self):
+        draft_id = add_audio_track(audio_url=self.base_url + "voice.mp3", duration=2.0)["draft_id"]
+        draft_cache.flush_draft(draft_id)
+        probe = mock.patch.object(save_draft_impl, "probe_many",
+                                  side_effect=lambda urls: {url: {"audio_duration": 3.0} for url in urls})
+        with probe:
+            save_draft_impl.get_export_script(draft_id)
+        # 缓存中的草稿被更新, 需写回数据库
+        self.assertTrue(draft_cache.is_dirty(draft_id))
+        draft_cache.flush_draft(draft_id)
+        restored = draft_cache.deserialize_script(database.get_draft_from_db(draft_id)["script_data"])
+        self.assertEqual(restored.materials.audios[0].duration, 3 * draft.SEC)
+
+        with probe:
+            save_draft_impl.get_export_script(draft_id)
+        # 元数据未变化时不重复写入
+        self.assertFalse(draft_cache.is_dirty(draft_id))
+
+
+class StreamRouteTest(unittest.TestCase):
+    """/api/drafts/stream在客户端不读取或提前关闭响应时不遗留构建线程"""
+
+    @classmethod
+    def setUpClass(cls):
+        # capcut_server导入时会在当前目录下写日志并初始化数据库, 在临时目录中导入
+        cls.work_dir = tempfile.mkdtemp(prefix="capcut_server_")
+        os.makedirs(os.path.join(cls.work_dir, "logs"))
+        cwd = os.getcwd()
+        os.chdir(cls.work_dir)
+        try:
+            with mock.patch.object(database, "DB_PATH", os.path.join(cls.work_dir, "capcut.db")):
+                cls.server = importlib.import_module("capcut_server")
+        finally:
+            os.chdir(cwd)
+            database.close_all_connections()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir, True)
+
+    def setUp(self):
+        self.started, self.stopped = threading.Event(), threading.Event()
+        build = _writer_until_closed(self.started, self.stopped)
+        for patcher in (mock.patch.object(self.server, "get_export_script", return_value=object()),
+                        mock.patch.object(self.server, "write_draft_package",
+                                          side_effect=lambda packager, *args: build(packager))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = self.server.app.test_client()
+
+    def test_head_does_not_build(self):
+        response = self.client.head("/api/drafts/stream/d1")
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        self.assertFalse(self.started.wait(0.5))
+
+    def test_response_closed_early_stops_builder(self):
+        response = self.client.get("/api/drafts/stream/d1", buffered=False)
+        next(iter(response.response))
+        response.close()
+        self.assertTrue(self.stopped.wait(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
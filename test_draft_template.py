@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿模板内存镜像单元测试
+验证由镜像生成的草稿目录与duplicate_as_template复制并修复路径后的结果一致, 且生成过程不修改镜像
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import pyJianYingDraft as draft
+from draft_template import TEMPLATE_ROOT, get_template_image
+
+
+def _read_tree(folder):
+    files = {}
+    dirs = set()
+    for root, dirnames, filenames in os.walk(folder):
+        rel_root = os.path.relpath(root, folder)
+        if rel_root != '.':
+            dirs.add(rel_root)
+        for filename in filenames:
+            with open(os.path.join(root, filename), 'rb') as f:
+                data = f.read()
+            if filename.endswith('.json') and data:
+                data = json.loads(data)
+            files[os.path.join(rel_root, filename)] = data
+    return dirs, files
+
+
+class TemplateImageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="capcut_template_")
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+
+    def test_matches_duplicate_as_template(self):
+        for template_name in ("template", "template_jianying"):
+            draft_id = "dfd_cat_1700000000_%s" % template_name
+            copied = os.path.join(self.tmp_dir, "copied", draft_id)
+            draft.Draft_folder(TEMPLATE_ROOT).duplicate_as_template(template_name, copied)
+            generated = os.path.join(self.tmp_dir, "generated", draft_id)
+            get_template_image(template_name).write_to_folder(generated, draft_id)
+            self.assertEqual(_read_tree(generated), _read_tree(copied))
+
+    def test_instantiate_does_not_modify_image(self):
+        image = get_template_image("template")
+        original = dict(image.files)
+        first = image.instantiate("draft_a")
+        second = image.instantiate("draft_b")
+        self.assertEqual(json.loads(first["draft_meta_info.json"])["draft_name"], "draft_a")
+        self.assertEqual(json.loads(second["draft_meta_info.json"])["draft_name"], "draft_b")
+        self.assertEqual(dict(image.files), original)
+        # 未修改的文件与镜像共享数据
+        self.assertIs(first["draft_info.json"], image.files["draft_info.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
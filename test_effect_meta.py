@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+特效枚举名称查找单元测试
+验证忽略大小写/空格/下划线的查找、别名与元数据名称、名称不存在时的相近名称提示, 以及枚举按需加载
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+from pyJianYingDraft import Font_type, Intro_type
+from pyJianYingDraft.metadata.effect_meta import Effect_enum, Effect_meta
+
+_FADE_IN = Effect_meta("渐显", False, "1", "11", "md5_1")
+
+
+class _Sample_type(Effect_enum):
+    Fade_in = _FADE_IN
+    Fade = _FADE_IN  # 别名
+    Slide_left = Effect_meta("向左滑动", False, "2", "22", "md5_2")
+
+
+class EffectEnumLookupTest(unittest.TestCase):
+
+    def test_exact_and_normalized_names(self):
+        self.assertIs(_Sample_type.from_name("Slide_left"), _Sample_type.Slide_left)
+        self.assertIs(_Sample_type.from_name("slide LEFT"), _Sample_type.Slide_left)
+        self.assertIs(_Sample_type.from_name("SlideLeft"), _Sample_type.Slide_left)
+
+    def test_alias_and_meta_name(self):
+        self.assertIs(_Sample_type.from_name("fade"), _Sample_type.Fade_in)
+        self.assertIs(_Sample_type.from_name("渐显"), _Sample_type.Fade_in)
+        self.assertIs(_Sample_type.from_name("向左滑动"), _Sample_type.Slide_left)
+
+    def test_missing_name_suggests_close_matches(self):
+        with self.assertRaises(ValueError) as context:
+            _Sample_type.from_name("Slide_lef")
+        self.assertIn("Slide_left", str(context.exception))
+        self.assertEqual(_Sample_type.suggest("unrelated"), [])
+
+    def test_metadata_enums(self):
+        for enum_class in (Font_type, Intro_type):
+            for member in list(enum_class)[:20]:
+                self.assertIs(enum_class.from_name(member.name.upper()), member)
+
+
+class LazyMetadataTest(unittest.TestCase):
+
+    def _run(self, code):
+        # 在新的解释器中执行, 避免受当前进程已导入模块的影响
+        return subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.split()
+
+    def test_import_does_not_load_enums(self):
+        loaded = self._run(
+            "import sys, pyJianYingDraft\n"
+            "print('pyJianYingDraft.metadata.video_effect_meta' in sys.modules, 'pyJianYingDraft.metadata.font_meta' in sys.modules)")
+        self.assertEqual(loaded, ["False", "False"])
+
+    def test_enum_loaded_on_first_access(self):
+        loaded = self._run(
+            "import sys, pyJianYingDraft as draft\n"
+            "from pyJianYingDraft.metadata.font_meta import Font_type\n"
+            "print(draft.Font_type is Font_type, 'pyJianYingDraft.metadata.video_effect_meta' in sys.modules, 'Intro_type' in dir(draft))")
+        self.assertEqual(loaded, ["True", "False", "True"])
+
+
+if __name__ == "__main__":
+    unittest.main()
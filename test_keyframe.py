@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键帧列表单元测试
+验证按时间偏移量有序插入、相同时间的关键帧替换、批量添加（含NumPy数组）, 以及关键帧接口的曲线模式
+"""
+
+import unittest
+from unittest import mock
+
+import pyJianYingDraft as draft
+import add_video_keyframe_impl
+from pyJianYingDraft import SEC, Timerange, Keyframe_property
+from pyJianYingDraft.keyframe import Keyframe_list
+from pyJianYingDraft.track import Track
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _offsets(kf_list: Keyframe_list):
+    return [kf.time_offset for kf in kf_list.keyframes]
+
+
+def _values(kf_list: Keyframe_list):
+    return [kf.values[0] for kf in kf_list.keyframes]
+
+
+def _video_segment(start: int, duration: int = SEC) -> draft.Video_segment:
+    material = draft.Video_material(material_type='photo', remote_url="https://example.com/a.png", material_name="a.png")
+    return draft.Video_segment(material, Timerange(start, duration))
+
+
+class KeyframeListTest(unittest.TestCase):
+
+    def setUp(self):
+        self.kf_list = Keyframe_list(Keyframe_property.alpha)
+
+    def test_add_keyframe_keeps_order(self):
+        for offset in (300, 100, 200, 0):
+            self.kf_list.add_keyframe(offset, offset / 1000)
+        self.assertEqual(_offsets(self.kf_list), [0, 100, 200, 300])
+
+    def test_add_keyframe_replaces_same_time(self):
+        self.kf_list.add_keyframe(100, 0.5)
+        kf_id = self.kf_list.keyframes[0].kf_id
+        self.kf_list.add_keyframe(100, 0.8)
+        self.assertEqual(len(self.kf_list.keyframes), 1)
+        self.assertEqual(self.kf_list.keyframes[0].kf_id, kf_id)
+        self.assertEqual(_values(self.kf_list), [0.8])
+
+    def test_add_keyframes_merges_once(self):
+        self.kf_list.add_keyframe(100, 0.1)
+        self.kf_list.add_keyframes([300, 0, 100, 300], [0.3, 0.0, 0.5, 0.9])
+        self.assertEqual(_offsets(self.kf_list), [0, 100, 300])
+        self.assertEqual(_values(self.kf_list), [0.0, 0.5, 0.9])
+
+    def test_add_keyframes_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            self.kf_list.add_keyframes([0, 100], [1.0])
+
+    @unittest.skipIf(np is None, "NumPy未安装")
+    def test_add_keyframes_numpy(self):
+        self.kf_list.add_keyframes(np.arange(5, 0, -1) * 1000, np.linspace(1.0, 0.0, 5))
+        self.assertEqual(_offsets(self.kf_list), [1000, 2000, 3000, 4000, 5000])
+        self.assertIsInstance(self.kf_list.keyframes[0].time_offset, int)
+        self.assertIsInstance(self.kf_list.keyframes[0].values[0], float)
+
+
+class SegmentKeyframesTest(unittest.TestCase):
+
+    def test_uniform_scale_curve(self):
+        segment = _video_segment(0)
+        segment.add_keyframes(Keyframe_property.uniform_scale, [0, SEC], [1.0, 2.0])
+        self.assertEqual([kf_list.keyframe_property for kf_list in segment.common_keyframes], [Keyframe_property.scale_x])
+        segment.add_keyframes(Keyframe_property.scale_y, [0], [1.0])
+        with self.assertRaises(ValueError):
+            segment.add_keyframes(Keyframe_property.uniform_scale, [0], [1.0])
+
+    def test_pending_keyframes_grouped_by_segment(self):
+        track = Track(draft.Track_type.video, "video", 0, False)
+        first, second = _video_segment(0), _video_segment(SEC)
+        track.add_segment(first)
+        track.add_segment(second)
+        for time in (1.5, 0.0, 0.5, 1.0):
+            track.add_pending_keyframe("alpha", time, "%d%%" % (time * 100))
+        track.process_pending_keyframes()
+
+        self.assertEqual(track.pending_keyframes, [])
+        self.assertEqual(_offsets(first.common_keyframes[0]), [0, SEC // 2])
+        # 1.0秒是第二个片段的起点
+        self.assertEqual(_offsets(second.common_keyframes[0]), [0, SEC // 2])
+        self.assertEqual(_values(second.common_keyframes[0]), [1.0, 1.5])
+
+
+class KeyframeCurveModeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.script = draft.Script_file(1080, 1920)
+        self.script.add_track(draft.Track_type.video, "main")
+        self.segment = _video_segment(0, 2 * SEC)
+        self.script.add_segment(self.segment, "main")
+        patcher = mock.patch.object(add_video_keyframe_impl, "get_or_create_draft", return_value=("d1", self.script))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # 只测试实现本身, 不写入操作日志
+        self.impl = add_video_keyframe_impl.add_video_keyframe_impl.__wrapped__
+
+    def test_curves(self):
+        result = self.impl(draft_id="d1", curves={
+            "alpha": {"times": [0.0, 0.5, 1.0], "values": [1.0, "50%", 0]},
+            "rotation": {"times": [2.0], "values": ["90deg"]},
+        })
+        self.assertEqual(result["added_keyframes_count"], 4)
+        kf_lists = {kf_list.keyframe_property: kf_list for kf_list in self.segment.common_keyframes}
+        self.assertEqual(_values(kf_lists[Keyframe_property.alpha]), [1.0, 0.5, 0.0])
+        self.assertEqual(_offsets(kf_lists[Keyframe_property.rotation]), [2 * SEC])
+
+    def test_invalid_curve_adds_nothing(self):
+        with self.assertRaises(Exception):
+            self.impl(draft_id="d1", curves={"alpha": {"times": [0.0, 0.5], "values": [1.0, "abc"]}})
+        self.assertEqual(self.script.tracks["main"].pending_keyframes, [])
+        self.assertEqual(self.segment.common_keyframes, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+媒体信息探测服务单元测试
+使用输出固定JSON的替身ffprobe脚本, 验证单次探测、持久缓存、内容变化后重新探测与并行探测
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import database
+import media_probe
+import pyJianYingDraft as draft
+
+
+# 替身ffprobe: 记录每次调用, .mp3输出仅音频流, 其他文件输出视频流+音频流
+_FAKE_FFPROBE = """#!%s
+import json, os, sys, time
+path = sys.argv[-1]
+with open(os.path.join(os.path.dirname(__file__), "calls.log"), "a") as f:
+    f.write(path + "\\n")
+time.sleep(float(os.environ.get("FAKE_FFPROBE_DELAY", "0")))
+streams = [{"codec_type": "audio", "codec_name": "aac", "duration": "3.500000"}]
+if not path.endswith(".mp3"):
+    streams.insert(0, {"codec_type": "video", "codec_name": "h264", "width": 1920, "height": 1080, "duration": "12.000000"})
+print(json.dumps({"streams": streams, "format": {"format_name": "mov,mp4", "duration": "12.100000"}}))
+"""
+
+
+class MediaProbeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="capcut_probe_")
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        ffprobe_path = os.path.join(self.tmp_dir, "ffprobe")
+        with open(ffprobe_path, "w") as f:
+            f.write(_FAKE_FFPROBE % sys.executable)
+        os.chmod(ffprobe_path, 0o755)
+
+        for patcher in (mock.patch.object(database, "DB_PATH", os.path.join(self.tmp_dir, "capcut.db")),
+                        mock.patch.object(media_probe, "FFPROBE_PATH", ffprobe_path),
+                        mock.patch.object(media_probe, "_MEMORY", media_probe.OrderedDict()),
+                        mock.patch.object(media_probe, "_STATS", dict.fromkeys(media_probe._STATS, 0))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_all_connections)
+        database.init_db()
+
+    def _media(self, name, content=b"data"):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def _calls(self):
+        log_path = os.path.join(self.tmp_dir, "calls.log")
+        if not os.path.exists(log_path):
+            return []
+        with open(log_path) as f:
+            return f.read().split()
+
+    def test_probe_returns_all_stream_info(self):
+        info = media_probe.probe_media(self._media("clip.mp4"))
+        self.assertEqual((info["width"], info["height"]), (1920, 1080))
+        self.assertEqual((info["video_codec"], info["audio_codec"]), ("h264", "aac"))
+        self.assertEqual(media_probe.media_duration(info, "video"), 12.0)
+        self.assertEqual(media_probe.media_duration(info, "audio"), 3.5)
+
+    def test_result_is_cached_persistently(self):
+        path = self._media("clip.mp4")
+        media_probe.probe_media(path)
+        media_probe.probe_media(path)
+        # 进程内缓存清空后（如服务重启）仍从数据库读取
+        media_probe._MEMORY.clear()
+        media_probe.probe_media(path)
+        self.assertEqual(self._calls(), [path])
+        self.assertEqual(media_probe.get_probe_stats()["hits"], 2)
+
+    def test_changed_file_is_probed_again(self):
+        path = self._media("clip.mp4")
+        media_probe.probe_media(path)
+        self._media("clip.mp4", b"new data")
+        media_probe.probe_media(path)
+        self.assertEqual(self._calls(), [path, path])
+
+    def test_probe_many_runs_in_parallel(self):
+        paths = [self._media("clip_%d.mp4" % i) for i in range(8)]
+        with mock.patch.dict(os.environ, {"FAKE_FFPROBE_DELAY": "0.5"}):
+            start = time.time()
+            results = media_probe.probe_many(paths + paths)
+            elapsed = time.time() - start
+        self.assertEqual(set(results), set(paths))
+        self.assertEqual(sorted(self._calls()), sorted(paths))
+        self.assertLess(elapsed, 8 * 0.5 / 2)
+
+    def test_materials_use_single_probe(self):
+        audio = draft.Audio_material(self._media("voice.mp3"))
+        self.assertEqual(audio.duration, 3500000)
+        video = draft.Video_material(material_type=None, path=self._media("clip.mp4"))
+        self.assertEqual((video.width, video.height, video.duration, video.material_type), (1920, 1080, 12000000, "video"))
+        self.assertEqual(len(self._calls()), 2)
+        with self.assertRaises(ValueError):
+            draft.Audio_material(self._media("clip.mp4"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+素材下载缓存单元测试
+使用本地HTTP服务验证缓存命中、按内容去重、硬链接与按大小淘汰, 以及正在使用的文件不被淘汰
+"""
+
+import functools
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from unittest import mock
+
+import database
+import media_store
+
+
+class _Quiet_handler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class MediaStoreTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.www_dir = tempfile.mkdtemp(prefix="capcut_www_")
+        for name, content in (("a.mp3", b"a" * 4000), ("b.mp3", b"b" * 4000), ("a_copy.mp3", b"a" * 4000)):
+            with open(os.path.join(cls.www_dir, name), "wb") as f:
+                f.write(content)
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_Quiet_handler, directory=cls.www_dir))
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = "http://127.0.0.1:%d/" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        shutil.rmtree(cls.www_dir, True)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="capcut_store_")
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        for patcher in (mock.patch.object(database, "DB_PATH", os.path.join(self.tmp_dir, "capcut.db")),
+                        mock.patch.object(media_store, "MEDIA_STORE_DIR", os.path.join(self.tmp_dir, "store")),
+                        mock.patch.object(media_store, "_STATS", dict.fromkeys(media_store._STATS, 0))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_all_connections)
+        database.init_db()
+
+    def _fetch(self, name, draft_id="draft"):
+        dest_path = os.path.join(self.tmp_dir, draft_id, "assets", "audio", name)
+        return media_store.fetch_media(self.base_url + name, dest_path)
+
+    def test_second_fetch_is_linked_from_store(self):
+        first = self._fetch("a.mp3", "draft_1")
+        second = self._fetch("a.mp3", "draft_2")
+        self.assertEqual(os.stat(first).st_ino, os.stat(second).st_ino)
+        stats = media_store.get_media_store_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["revalidated"]), (1, 1, 1))
+        self.assertEqual(stats["bytes_downloaded"], 4000)
+        self.assertEqual(stats["bytes_linked"], 8000)
+
+    def test_same_content_is_stored_once(self):
+        self._fetch("a.mp3")
+        self._fetch("a_copy.mp3")
+        self.assertEqual(media_store.get_media_store_stats()["store_bytes"], 4000)
+
+    def test_changed_remote_is_downloaded_again(self):
+        self._fetch("b.mp3")
+        cached = database.get_media_url(self.base_url + "b.mp3")
+        database.put_media_object(self.base_url + "b.mp3", cached["sha256"], cached["size"],
+                                  last_modified="Thu, 01 Jan 1970 00:00:00 GMT", fetched_at=0)
+        self._fetch("b.mp3")
+        self.assertEqual(media_store.get_media_store_stats()["misses"], 2)
+
+    def test_least_recently_used_is_evicted(self):
+        with mock.patch.object(media_store, "MEDIA_STORE_MAX_BYTES", 6000):
+            a_path = self._fetch("a.mp3")
+            self._fetch("b.mp3")
+        self.assertIsNone(database.get_media_url(self.base_url + "a.mp3"))
+        self.assertIsNotNone(database.get_media_url(self.base_url + "b.mp3"))
+        self.assertEqual(media_store.get_media_store_stats()["evictions"], 1)
+        # 已链接到草稿目录的文件不受淘汰影响
+        with open(a_path, "rb") as f:
+            self.assertEqual(f.read(), b"a" * 4000)
+
+    def test_fetched_object_is_pinned_until_released(self):
+        object_path = media_store.fetch_to_store(self.base_url + "a.mp3")
+        with mock.patch.object(media_store, "MEDIA_STORE_MAX_BYTES", 0):
+            self.assertEqual(media_store.evict_over_budget(), 0)
+            self.assertTrue(os.path.exists(object_path))
+            # 缓存命中同样固定对象
+            self.assertEqual(media_store.fetch_to_store(self.base_url + "a.mp3"), object_path)
+            media_store.release_object(object_path)
+            self.assertEqual(media_store.evict_over_budget(), 0)
+            media_store.release_object(object_path)
+            self.assertEqual(media_store.evict_over_budget(), 1)
+        self.assertFalse(os.path.exists(object_path))
+        self.assertEqual(media_store._PINNED, {})
+
+    def test_eviction_during_fetch_does_not_remove_object(self):
+        link = media_store._link
+
+        def evict_then_link(source, dest_path):
+            # 模拟其他保存任务在获取与链接之间执行淘汰
+            media_store.evict_over_budget()
+            link(source, dest_path)
+
+        with mock.patch.object(media_store, "MEDIA_STORE_MAX_BYTES", 0), \
+                mock.patch.object(media_store, "_link", side_effect=evict_then_link):
+            path = self._fetch("b.mp3")
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"b" * 4000)
+        self.assertEqual(media_store._PINNED, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
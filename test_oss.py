@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OSS上传单元测试
+使用内存中的Bucket替身验证流式分片上传、分片失败时中止上传, 以及Bucket的复用
+"""
+
+import io
+import threading
+import unittest
+from unittest import mock
+
+import oss2
+
+import oss
+
+
+class _Memory_bucket:
+    """记录上传内容的Bucket替身"""
+
+    def __init__(self, fail_part=None):
+        self.objects = {}
+        self.parts = {}
+        self.aborted = []
+        self.fail_part = fail_part
+        self._lock = threading.Lock()
+
+    def put_object(self, key, data, headers=None):
+        self.objects[key] = bytes(data)
+
+    def init_multipart_upload(self, key, headers=None):
+        return mock.Mock(upload_id="upload-1")
+
+    def upload_part(self, key, upload_id, part_number, data):
+        if part_number == self.fail_part:
+            raise oss2.exceptions.ServerError(500, {}, b"", {})
+        with self._lock:
+            self.parts[part_number] = bytes(data)
+        return mock.Mock(etag="etag-%d" % part_number)
+
+    def complete_multipart_upload(self, key, upload_id, parts):
+        self.objects[key] = b"".join(self.parts[part.part_number] for part in parts)
+
+    def abort_multipart_upload(self, key, upload_id):
+        self.aborted.append(upload_id)
+
+
+class UploadStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        for patcher in (mock.patch.object(oss, "OSS_PART_SIZE", 1000),
+                        mock.patch.object(oss.time, "sleep")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_small_stream_uses_single_put(self):
+        bucket = _Memory_bucket()
+        oss.upload_stream(bucket, "a.bin", io.BytesIO(b"x" * 999))
+        self.assertEqual(bucket.objects["a.bin"], b"x" * 999)
+        self.assertEqual(bucket.parts, {})
+
+    def test_large_stream_uses_multipart(self):
+        data = bytes(range(256)) * 40
+        chunks = (data[i:i + 300] for i in range(0, len(data), 300))
+        bucket = _Memory_bucket()
+        self.assertEqual(oss.upload_stream(bucket, "draft.zip", chunks), len(data))
+        self.assertEqual(bucket.objects["draft.zip"], data)
+        self.assertEqual(sorted(bucket.parts), list(range(1, 12)))
+
+    def test_failed_part_aborts_upload(self):
+        bucket = _Memory_bucket(fail_part=3)
+        with self.assertRaises(oss2.exceptions.ServerError):
+            oss.upload_stream(bucket, "draft.zip", io.BytesIO(b"x" * 5000))
+        self.assertEqual(bucket.aborted, ["upload-1"])
+        self.assertNotIn("draft.zip", bucket.objects)
+
+
+class BucketCacheTest(unittest.TestCase):
+
+    def test_bucket_is_reused(self):
+        config = {"access_key_id": "id", "access_key_secret": "secret", "endpoint": "oss-cn-test.aliyuncs.com",
+                  "bucket_name": "bucket", "region": "cn-test"}
+        with mock.patch.object(oss, "OSS_CONFIG", config), mock.patch.object(oss, "_BUCKETS", {}):
+            self.assertIs(oss._ensure_bucket(), oss._ensure_bucket())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿保存任务队列单元测试
+验证重复请求合并、优先级顺序、运行中再次请求时重新保存, 以及重启后继续执行未完成的任务
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import database
+import save_queue
+from save_queue import Save_scheduler
+
+
+class SaveQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="capcut_save_queue_")
+        patcher = mock.patch.object(database, "DB_PATH", os.path.join(self.tmp_dir, "capcut.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.addCleanup(database.close_all_connections)
+        database.init_db()
+
+        self.executed = []
+        self.all_done = threading.Event()
+
+    def _start(self, run_job=None, expected=1):
+        def record(job):
+            self.executed.append((job['draft_id'], job['draft_folder']))
+            if run_job:
+                run_job(job)
+            if len(self.executed) >= expected:
+                self.all_done.set()
+
+        scheduler = Save_scheduler(record, workers=1)
+        scheduler.start()
+        self.addCleanup(scheduler.stop, 5)
+        return scheduler
+
+    def test_duplicate_requests_are_merged(self):
+        self.assertEqual(database.enqueue_save_job("d1", "/old", "windows"), "queued")
+        self.assertEqual(database.enqueue_save_job("d1", "/new", "windows"), "merged")
+        self.assertEqual(database.count_save_jobs(), 1)
+        self._start()
+        self.assertTrue(self.all_done.wait(5))
+        self.assertEqual(self.executed, [("d1", "/new")])
+
+    def test_higher_priority_runs_first(self):
+        database.enqueue_save_job("low", None, "windows", priority=0)
+        database.enqueue_save_job("high", None, "windows", priority=5)
+        self._start(expected=2)
+        self.assertTrue(self.all_done.wait(5))
+        self.assertEqual([draft_id for draft_id, _ in self.executed], ["high", "low"])
+
+    def test_request_while_running_saves_again(self):
+        running = threading.Event()
+        release = threading.Event()
+
+        def block_first(job):
+            if len(self.executed) == 1:
+                running.set()
+                release.wait(5)
+
+        database.enqueue_save_job("d1", "/first", "windows")
+        scheduler = self._start(block_first, expected=2)
+        self.assertTrue(running.wait(5))
+        self.assertEqual(database.enqueue_save_job("d1", "/second", "windows"), "rerun")
+        scheduler.notify()
+        release.set()
+        self.assertTrue(self.all_done.wait(5))
+        self.assertEqual(self.executed, [("d1", "/first"), ("d1", "/second")])
+
+    def test_unfinished_jobs_resume_on_start(self):
+        database.enqueue_save_job("d1", None, "windows")
+        # 模拟服务在任务运行期间退出
+        database.claim_save_job()
+        self.assertIsNone(database.claim_save_job())
+        self._start()
+        self.assertTrue(self.all_done.wait(5))
+        self.assertEqual(self.executed, [("d1", None)])
+
+    def test_repeatedly_interrupted_job_fails(self):
+        database.enqueue_save_job("d1", None, "windows")
+        for _ in range(save_queue.MAX_ATTEMPTS):
+            database.claim_save_job()
+            database.requeue_running_save_jobs()
+        done = threading.Event()
+        with mock.patch.object(save_queue, "update_draft_status", side_effect=lambda *args, **kwargs: done.set()) as update:
+            self._start()
+            self.assertTrue(done.wait(5))
+        self.assertEqual(self.executed, [])
+        self.assertEqual(update.call_args[0][:2], ("d1", "failed"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script_file单元测试
+"""
+
+import io
+import json
+import os
+import pickle
+import unittest
+from copy import deepcopy
+from unittest import mock
+
+import pyJianYingDraft as draft
+from pyJianYingDraft import script_file
+from pyJianYingDraft.exceptions import MaterialNotFound
+from pyJianYingDraft.audio_segment import Audio_fade
+from pyJianYingDraft.script_file import Script_material
+from pyJianYingDraft.text_segment import TextBubble
+
+
+class ScriptFileTemplateTest(unittest.TestCase):
+
+    def test_content_matches_template_file(self):
+        path = os.path.join(os.path.dirname(draft.__file__), draft.Script_file.TEMPLATE_FILE)
+        with open(path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+        self.assertEqual(draft.Script_file(1080, 1920).content, expected)
+
+    def test_content_is_independent_per_draft(self):
+        first = draft.Script_file(1080, 1920)
+        second = draft.Script_file(1080, 1920)
+        first.content["config"]["modified"] = True
+        first.content["keyframes"].setdefault("videos", []).append({})
+        third = draft.Script_file(1080, 1920)
+        for script in (second, third):
+            self.assertNotIn("modified", script.content["config"])
+            self.assertNotEqual(script.content["keyframes"], first.content["keyframes"])
+
+
+class ScriptFileDumpsTest(unittest.TestCase):
+
+    def _build_script(self):
+        script = draft.Script_file(1080, 1920)
+        script.add_track(draft.Track_type.text)
+        script.add_segment(draft.Text_segment("字幕", draft.Timerange(0, draft.SEC)))
+        script.imported_materials = {"texts": [{"id": "imported_text"}], "beats": [{"id": "imported_beat"}]}
+        return script
+
+    def test_dumps_is_idempotent(self):
+        script = self._build_script()
+        first = script.dumps()
+        self.assertEqual(script.dumps(), first)
+        texts = json.loads(first)["materials"]["texts"]
+        self.assertEqual(texts[-1]["id"], "imported_text")
+        self.assertEqual(len(texts), 2)
+        # 导出不修改草稿内容及素材列表
+        self.assertEqual(len(script.materials.texts), 1)
+        self.assertEqual(script.content, script._new_template_content())
+
+    def test_json_fallback_matches_orjson(self):
+        script = self._build_script()
+        expected = json.loads(script.dumps())
+        with mock.patch.object(script_file, "orjson", None):
+            fallback = script.dumps_bytes()
+        self.assertEqual(json.loads(fallback), expected)
+        self.assertIn("字幕".encode("utf-8"), fallback)
+
+    def test_dump_to_file_object(self):
+        script = self._build_script()
+        buffer = io.BytesIO()
+        script.dump(buffer)
+        self.assertEqual(buffer.getvalue(), script.dumps_bytes())
+
+
+class ScriptMaterialIndexTest(unittest.TestCase):
+
+    def _video(self, name="a.mp4"):
+        return draft.Video_material(material_type='video', remote_url=f"https://example.com/{name}",
+                                    material_name=name, duration=draft.SEC, width=1920, height=1080)
+
+    def test_add_is_idempotent_by_id(self):
+        materials = Script_material()
+        video = self._video()
+        self.assertTrue(materials.add(video))
+        self.assertFalse(materials.add(self._video()))  # 同名素材ID相同
+        self.assertEqual(materials.videos, [video])
+        self.assertIn(video, materials)
+        self.assertIs(materials.get(video.material_id), video)
+        self.assertIsNone(materials.get("missing"))
+
+    def test_remove(self):
+        materials = Script_material()
+        fade = Audio_fade(draft.SEC, 0)
+        materials.add(fade)
+        materials.remove(fade)
+        self.assertNotIn(fade, materials)
+        self.assertEqual(materials.audio_fades, [])
+        with self.assertRaises(MaterialNotFound):
+            materials.remove(fade)
+        with self.assertRaises(TypeError):
+            materials.add(object())
+
+    def test_shared_text_bubble_exported_once(self):
+        script = draft.Script_file(1080, 1920)
+        script.add_track(draft.Track_type.text)
+        bubble = TextBubble("effect_id", "resource_id")
+        for i in range(3):
+            # 与导入字幕时一致, 各片段使用同一气泡的副本
+            segment = draft.Text_segment(f"字幕 {i}", draft.Timerange(i * draft.SEC, draft.SEC))
+            segment.bubble = deepcopy(bubble)
+            script.add_segment(segment)
+        self.assertEqual([filter_.global_id for filter_ in script.materials.filters], [bubble.global_id])
+
+    def test_indexes_rebuilt_after_unpickle(self):
+        script = draft.Script_file(1080, 1920)
+        video = self._video()
+        script.add_material(video)
+        # 模拟未保存索引的旧版本草稿
+        del script.materials.__dict__["_indexes"]
+        loaded = pickle.loads(pickle.dumps(script))
+        self.assertIn(video, loaded.materials)
+        self.assertFalse(loaded.materials.add(video))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+时间线对象__slots__单元测试
+验证核心时间线对象不再带有__dict__, pickle及深拷贝后属性不变（含未赋值的属性和未声明__slots__的子类）,
+以及改用__slots__之前以属性字典形式pickle的对象仍可加载
+"""
+
+import copy
+import copyreg
+import pickle
+import unittest
+
+import pyJianYingDraft as draft
+from pyJianYingDraft import SEC, Timerange, Keyframe_property
+from pyJianYingDraft.keyframe import Keyframe
+from pyJianYingDraft.metadata.effect_meta import Effect_param, Effect_param_instance
+from pyJianYingDraft.template_mode import ImportedSegment
+
+
+class _Legacy_state:
+    """以改用__slots__之前的格式（属性字典）pickle指定类的对象"""
+
+    def __init__(self, cls, state):
+        self.cls, self.state = cls, state
+
+    def __reduce__(self):
+        return copyreg._reconstructor, (self.cls, object, None), self.state
+
+
+def _video_segment() -> draft.Video_segment:
+    material = draft.Video_material(material_type='photo', remote_url="https://example.com/a.png", material_name="a.png")
+    segment = draft.Video_segment(material, Timerange(SEC, 2 * SEC))
+    segment.add_keyframe(Keyframe_property.alpha, 0, 0.5)
+    return segment
+
+
+class SlotsObjectTest(unittest.TestCase):
+
+    def test_no_instance_dict(self):
+        segment = _video_segment()
+        for obj in (segment, segment.target_timerange, segment.speed, segment.clip_settings,
+                    segment.common_keyframes[0], segment.common_keyframes[0].keyframes[0],
+                    draft.Text_segment("字幕", Timerange(0, SEC)),
+                    Effect_param_instance(Effect_param("强度", 0.5, 0.0, 1.0), 0, 0.8)):
+            self.assertFalse(hasattr(obj, "__dict__"), type(obj).__name__)
+
+    def test_pickle_and_deepcopy(self):
+        segment = _video_segment()
+        for restored in (pickle.loads(pickle.dumps(segment, protocol=pickle.HIGHEST_PROTOCOL)), copy.deepcopy(segment)):
+            self.assertEqual(restored.export_json(), segment.export_json())
+            self.assertEqual(restored.target_timerange, Timerange(SEC, 2 * SEC))
+            # 未赋值的属性保持未赋值
+            self.assertFalse(hasattr(restored, "visible"))
+
+    def test_subclass_with_dict(self):
+        segment = ImportedSegment({"material_id": "m1", "target_timerange": {"start": 0, "duration": SEC}, "extra": 1})
+        restored = pickle.loads(pickle.dumps(segment, protocol=pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(restored.raw_data["extra"], 1)
+        self.assertEqual(restored.target_timerange, Timerange(0, SEC))
+
+    def test_load_legacy_dict_state(self):
+        data = pickle.dumps([_Legacy_state(Timerange, {"start": 1, "duration": 2}),
+                             _Legacy_state(Keyframe, {"kf_id": "k1", "time_offset": 3, "values": [0.5], "removed": True})])
+        timerange, keyframe = pickle.loads(data)
+        self.assertIsInstance(timerange, Timerange)
+        self.assertEqual(timerange, Timerange(1, 2))
+        self.assertEqual((keyframe.kf_id, keyframe.time_offset, keyframe.values), ("k1", 3, [0.5]))
+
+
+if __name__ == "__main__":
+    unittest.main()
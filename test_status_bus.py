@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿状态总线单元测试
+验证发布时只唤醒关注该草稿的等待者、超时返回, 以及update_draft_status写入后发布状态
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import database
+import status_bus
+from status_bus import Status_bus
+
+
+class StatusBusTest(unittest.TestCase):
+
+    def test_waiter_is_woken_by_publish(self):
+        bus = Status_bus()
+        bus.publish("d1", {"status": "processing"})
+        version = bus.get("d1")[0]
+        timer = threading.Timer(0.1, bus.publish, ("d1", {"status": "completed"}))
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        start = time.monotonic()
+        changed = bus.wait(["d1"], version, timeout=5)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(changed["d1"][1], {"status": "completed"})
+        self.assertEqual(bus.stats()["waiters"], 0)
+
+    def test_wait_returns_pending_change_immediately(self):
+        bus = Status_bus()
+        bus.publish("d1", {"status": "processing"})
+        self.assertEqual(list(bus.wait(["d1", "d2"], 0, timeout=0)), ["d1"])
+
+    def test_other_draft_does_not_satisfy_waiter(self):
+        bus = Status_bus()
+        timer = threading.Timer(0.05, bus.publish, ("other", {"status": "completed"}))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEqual(bus.wait(["d1"], 0, timeout=0.3), {})
+
+    def test_seed_keeps_published_status(self):
+        bus = Status_bus()
+        bus.publish("d1", {"status": "completed"})
+        self.assertEqual(bus.seed("d1", {"status": "processing"})[1], {"status": "completed"})
+
+    def test_eviction_skips_drafts_with_waiters(self):
+        bus = Status_bus(max_tracked=2)
+        bus.publish("watched", {"status": "processing"})
+        waiter = threading.Thread(target=bus.wait, args=(["watched"], 10 ** 9, 1))
+        waiter.start()
+        time.sleep(0.1)
+        bus.publish("a", {"status": "processing"})
+        bus.publish("b", {"status": "processing"})
+        waiter.join()
+        self.assertIsNotNone(bus.get("watched"))
+        self.assertIsNone(bus.get("a"))
+        self.assertEqual(bus.stats()["tracked_drafts"], 2)
+
+
+class PublishFromDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="capcut_bus_")
+        for patcher in (mock.patch.object(database, "DB_PATH", os.path.join(self.tmp_dir, "capcut.db")),
+                        mock.patch.object(status_bus, "_BUS", Status_bus())):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.addCleanup(database.close_all_connections)
+        database.init_db()
+
+    def test_update_draft_status_publishes(self):
+        database.update_draft_status("d1", "processing", 40, "downloading")
+        version, status = status_bus.get_status_bus().get("d1")
+        self.assertEqual(status, {"status": "processing", "progress": 40, "message": "downloading"})
+        # 写入快照不发布状态, 不会唤醒等待中的长轮询
+        database.save_draft_to_db("d1", b"data")
+        self.assertEqual(status_bus.get_status_bus().get("d1"), (version, status))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字幕批量导入单元测试
+验证SRT/WebVTT解析、格式错误及重叠字幕不中断导入、共享样式与素材只注册一次, 以及与已有片段合并后保持有序
+"""
+
+import unittest
+
+import pyJianYingDraft as draft
+from pyJianYingDraft import SEC
+from pyJianYingDraft.subtitle import parse_subtitles
+from pyJianYingDraft.text_segment import TextBubble
+
+SRT = """1
+00:00:01,000 --> 00:00:02,500
+第一行
+第二行
+
+2
+00:00:02,000 --> 00:00:03,000
+与上一条重叠
+
+3
+00:00:05,000 --> 00:00:04,000
+结束早于开始
+
+4
+00:00:06,000 --> 00:00:07,000
+最后一条"""
+
+VTT = """WEBVTT
+Kind: captions
+
+NOTE 注释块
+
+intro
+00:01.000 --> 00:02.000 align:start position:10%
+<v 旁白>你好 &amp; <b>再见</b>
+
+00:00:03.5 --> 00:00:04.000
+第二条
+"""
+
+
+class ParseSubtitlesTest(unittest.TestCase):
+
+    def test_srt(self):
+        cues, errors = parse_subtitles(SRT)
+        self.assertEqual([(cue.start, cue.end) for cue in cues], [(SEC, int(2.5 * SEC)), (2 * SEC, 3 * SEC), (6 * SEC, 7 * SEC)])
+        self.assertEqual(cues[0].text, "第一行\n第二行")
+        self.assertEqual([(error.line, error.message) for error in errors], [(11, "结束时间不晚于开始时间")])
+
+    def test_webvtt(self):
+        cues, errors = parse_subtitles(VTT)
+        self.assertEqual(errors, [])
+        self.assertEqual([(cue.start, cue.text) for cue in cues], [(SEC, "你好 & 再见"), (int(3.5 * SEC), "第二条")])
+
+    def test_block_without_timing(self):
+        cues, errors = parse_subtitles("1\n字幕\n\n2\n00:00:01,000 --> 00:00:02,000\n正常")
+        self.assertEqual(len(cues), 1)
+        self.assertEqual(errors[0].line, 1)
+
+
+class ImportSubtitlesTest(unittest.TestCase):
+
+    def test_errors_do_not_abort(self):
+        script = draft.Script_file(1080, 1920)
+        result = script.import_subtitles(SRT, "subtitle")
+        self.assertEqual(result.imported, 2)
+        self.assertEqual([error.line for error in result.errors], [7, 11])
+        self.assertEqual(script.duration, 7 * SEC)
+        self.assertEqual(len(script.materials.texts), 2)
+
+    def test_shared_style_and_bubble(self):
+        script = draft.Script_file(1080, 1920)
+        bubble = TextBubble("effect_id", "resource_id")
+        script.import_subtitles(SRT, "subtitle", bubble=bubble)
+        segments = script.tracks["subtitle"].segments
+        self.assertIs(segments[0].style, segments[1].style)
+        self.assertEqual(script.materials.filters, [bubble])
+        self.assertTrue(all(bubble.global_id in seg.extra_material_refs for seg in segments))
+
+    def test_merge_with_existing_segments(self):
+        script = draft.Script_file(1080, 1920)
+        script.add_track(draft.Track_type.text, "subtitle")
+        script.add_segment(draft.Text_segment("已有", draft.Timerange(4 * SEC, SEC)), "subtitle")
+        script.add_segment(draft.Text_segment("重叠", draft.Timerange(int(6.5 * SEC), SEC)), "subtitle")
+        result = script.import_subtitles(SRT, "subtitle")
+        self.assertEqual(result.imported, 1)
+        self.assertEqual([error.line for error in result.errors], [7, 11, 15])
+        self.assertEqual([seg.text for seg in script.tracks["subtitle"].segments], ["第一行\n第二行", "已有", "重叠"])
+
+    def test_style_reference(self):
+        reference = draft.Text_segment("参考", draft.Timerange(0, SEC), style=draft.Text_style(size=12))
+        reference.add_animation(list(draft.CapCut_Text_intro)[0])
+        script = draft.Script_file(1080, 1920)
+        script.import_srt(VTT, "subtitle", style_reference=reference, clip_settings=None)
+        segments = script.tracks["subtitle"].segments
+        self.assertEqual(segments[0].style.size, 12)
+        self.assertIsNot(segments[0].animations_instance, segments[1].animations_instance)
+        self.assertEqual(len(script.materials.animations), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轨道片段索引单元测试
+验证片段按起始时间有序插入、批量合并、与相邻片段的重叠检测、按时刻/时间范围查找片段, 以及加载旧草稿时的排序
+"""
+
+import pickle
+import unittest
+
+import pyJianYingDraft as draft
+from pyJianYingDraft.track import Track
+from pyJianYingDraft import SEC, Timerange
+from pyJianYingDraft.exceptions import SegmentOverlap
+
+
+def _text(start: int, duration: int = SEC) -> draft.Text_segment:
+    return draft.Text_segment(f"字幕 {start}", Timerange(start, duration))
+
+
+class TrackIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.track = Track(draft.Track_type.text, "text", 15000, False)
+        for start in (4 * SEC, 0, 2 * SEC, 6 * SEC):
+            self.track.add_segment(_text(start))
+
+    def _starts(self, segments):
+        return [seg.start // SEC for seg in segments]
+
+    def test_segments_sorted_by_start(self):
+        self.assertEqual(self._starts(self.track.segments), [0, 2, 4, 6])
+        self.assertEqual(self.track.end_time, 7 * SEC)
+
+    def test_overlap_with_neighbors(self):
+        for start, duration in ((SEC // 2, SEC), (int(1.5 * SEC), SEC), (SEC, 6 * SEC), (-SEC // 2, SEC)):
+            with self.assertRaises(SegmentOverlap):
+                self.track.add_segment(_text(start, duration))
+        # 恰好填满间隙的片段不重叠
+        self.track.add_segment(_text(SEC))
+        self.assertEqual(self._starts(self.track.segments), [0, 1, 2, 4, 6])
+
+    def test_segment_at(self):
+        self.assertEqual(self.track.segment_at(int(2.5 * SEC)).start, 2 * SEC)
+        self.assertEqual(self.track.segment_at(4 * SEC).start, 4 * SEC)
+        self.assertIsNone(self.track.segment_at(3 * SEC))
+        self.assertIsNone(self.track.segment_at(-1))
+        self.assertIsNone(self.track.segment_at(7 * SEC))
+
+    def test_segments_between(self):
+        self.assertEqual(self._starts(self.track.segments_between(int(0.5 * SEC), 4 * SEC)), [0, 2])
+        self.assertEqual(self._starts(self.track.segments_between(SEC, int(4.5 * SEC))), [2, 4])
+        self.assertEqual(self.track.segments_between(3 * SEC, 4 * SEC), [])
+
+    def test_add_segments_batch(self):
+        rejected = self.track.add_segments([_text(8 * SEC), _text(SEC), _text(int(1.5 * SEC)), _text(int(6.5 * SEC))])
+        self.assertEqual(self._starts(self.track.segments), [0, 1, 2, 4, 6, 8])
+        self.assertEqual([seg.start for seg in rejected], [int(1.5 * SEC), int(6.5 * SEC)])
+
+    def test_pending_keyframe_at_segment_end(self):
+        track = Track(draft.Track_type.video, "video", 0, False)
+        material = draft.Video_material(material_type='photo', remote_url="https://example.com/a.png", material_name="a.png")
+        segment = draft.Video_segment(material, Timerange(0, SEC))
+        track.add_segment(segment)
+        track.add_pending_keyframe("alpha", 1.0, "50%")
+        track.process_pending_keyframes()
+        self.assertEqual(len(segment.common_keyframes), 1)
+
+    def test_unpickle_sorts_segments(self):
+        self.track.segments.reverse()
+        track = pickle.loads(pickle.dumps(self.track))
+        self.assertEqual(self._starts(track.segments), [0, 2, 4, 6])
+
+
+if __name__ == "__main__":
+    unittest.main()
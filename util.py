@@ -8,11 +8,11 @@ CapCutAPI 工具函数模块
 import os
 import json
 import hashlib
-import zipfile
 import time
 import functools
 from typing import Tuple, Optional
 from settings.local import WINDOWS_DRAFT_FOLDER, LINUX_DRAFT_FOLDER
+from draft_packager import Draft_packager
 
 
 def generate_draft_url(draft_id: Optional[str] = None, client_os: str = "windows", base: Optional[str] = None):
@@ -78,23 +78,10 @@ def hex_to_rgb(hex_color: str) -> Tuple[float, float, float]:
 
 
 def zip_draft(draft_folder: str, zip_path: str) -> bool:
-    """将草稿文件夹打包为zip文件，包含空目录（如 assets、assets/image 等）。"""
+    """将草稿文件夹打包为zip文件，包含空目录（如 assets、assets/image 等）；已压缩的媒体文件不再重复压缩。"""
     try:
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(draft_folder):
-                # 确保目录项（包括空目录）写入 zip，JianYing 需要 assets 目录结构
-                rel_root = os.path.relpath(root, draft_folder)
-                if rel_root != '.':
-                    dir_arcname = rel_root.replace('\\', '/') + '/'
-                    # 避免重复写入同名目录
-                    if dir_arcname not in zipf.namelist():
-                        zip_info = zipfile.ZipInfo(dir_arcname)
-                        zipf.writestr(zip_info, b'')
-                # 写入文件
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, draft_folder).replace('\\', '/')
-                    zipf.write(file_path, arcname)
+        with Draft_packager(zip_path) as packager:
+            packager.add_tree(draft_folder)
         return True
     except Exception as e:
         print(f"压缩草稿失败: {e}")